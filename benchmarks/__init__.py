@@ -0,0 +1,3 @@
+"""
+Benchmarks du pipeline get_response (python -m benchmarks --help).
+"""
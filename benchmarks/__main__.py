@@ -0,0 +1,70 @@
+"""
+Lance un benchmark et affiche le rapport JSON : python -m benchmarks --mode latency --inference-latency-ms 200
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.corpus import load_corpus
+from benchmarks.runner import run_benchmark
+from benchmarks.stubs import DEFAULT_DDRAGON_DATA
+
+
+def parse_env(values):
+    env = {}
+    for value in values or []:
+        name, sep, setting = value.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--env attend NOM=VALEUR : {value}")
+        env[name] = setting
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du chatbot contre des serveurs locaux")
+    parser.add_argument('--mode', choices=('latency', 'load', 'memory'), default='latency')
+    parser.add_argument('--corpus', help="fichier texte, une question par ligne (corpus intégré par défaut)")
+    parser.add_argument('--ddragon-data', default=DEFAULT_DDRAGON_DATA, help="championFull.json servi par Data Dragon")
+    parser.add_argument('--ddragon-latency-ms', type=float, default=0.0)
+    parser.add_argument('--inference-latency-ms', type=float, default=0.0)
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="aucun snapshot sur le disque : champions demandés à Data Dragon")
+    parser.add_argument('--sessions', type=int, default=4, help="sessions du mode latency")
+    parser.add_argument('--repeat', type=int, default=1, help="passages du corpus (mode latency)")
+    parser.add_argument('--concurrency', type=int, default=8, help="utilisateurs simultanés (mode load)")
+    parser.add_argument('--queries', type=int, default=200, help="questions posées (mode load)")
+    parser.add_argument('--memory-sessions', type=int, default=200, help="sessions créées (mode memory)")
+    parser.add_argument('--env', action='append', metavar='NOM=VALEUR',
+                        help="configuration du chatbot, ex. --env RESPONSE_CACHE_SIZE=0")
+    parser.add_argument('--output', help="fichier où écrire le rapport JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        env = parse_env(args.env)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    report = run_benchmark(
+        load_corpus(args.corpus),
+        mode=args.mode,
+        ddragon_latency=args.ddragon_latency_ms / 1000,
+        inference_latency=args.inference_latency_ms / 1000,
+        snapshot=not args.no_snapshot,
+        sessions=args.sessions,
+        repeat=args.repeat,
+        concurrency=args.concurrency,
+        queries=args.queries,
+        memory_sessions=args.memory_sessions,
+        data_path=args.ddragon_data,
+        env=env
+    )
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Questions de joueurs rejouées par les benchmarks (champions du snapshot de test, autres champions, questions générales).
+"""
+from typing import List, Optional
+
+CORPUS = [
+    # Salutations
+    "Salut !",
+    "Bonjour, tu peux m'aider ?",
+    # Fiches de champions
+    "Parle-moi d'Ahri",
+    "Qui est Garen ?",
+    "Présente-moi Jinx",
+    "C'est quoi le rôle de Wukong ?",
+    "ahri c bien pour débuter ?",
+    # Compétences
+    "Quelles sont les compétences d'Ahri ?",
+    "Comment fonctionne le passif de Jinx ?",
+    "Quel est le cooldown de l'ultime de Garen ?",
+    "Explique-moi les sorts de Wukong",
+    # Builds et objets
+    "Quel build sur Jinx ?",
+    "Quels objets acheter sur Garen en top ?",
+    "Quel stuff faire avec Ahri contre des assassins ?",
+    # Matchups
+    "Quels sont les counters de Garen ?",
+    "Comment jouer Ahri contre Zed au mid ?",
+    "Jinx est forte contre quels champions en bot ?",
+    # Statistiques
+    "Quels champions ont le plus de PV au niveau 18 ?",
+    "Compare Garen et Wukong au niveau 6",
+    "Qui a la plus grande vitesse d'attaque ?",
+    # Champions absents du snapshot de test
+    "Comment jouer Yasuo ?",
+    "Quel build pour Lee Sin en jungle ?",
+    "Thresh est-il un bon support ?",
+    # Rôles et stratégie
+    "Comment bien jouer jungle ?",
+    "Conseils pour le rôle support",
+    "Comment gérer sa vague de sbires en top ?",
+    "Quand faut-il prendre le dragon ?",
+    "Comment mieux placer ses wards ?",
+    "Comment sortir du bronze ?",
+    "Quelle est la différence entre AD et AP ?",
+    # Suivi de conversation (contexte de la session)
+    "Et ses counters ?",
+    "Et en mid ?",
+    "Merci !",
+]
+
+# Posées avant les mesures, hors corpus : chargent les composants paresseux (table des statistiques,
+# cache sémantique) sans remplir le cache de réponses avec les questions mesurées
+WARMUP = [
+    "Quels champions ont le moins de mana au niveau 1 ?",
+    "Comment progresser en début de partie ?",
+]
+
+
+def load_corpus(path: Optional[str] = None) -> List[str]:
+    """Corpus intégré, ou une question par ligne d'un fichier texte"""
+    if not path:
+        return list(CORPUS)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
@@ -0,0 +1,247 @@
+"""
+Rejoue un corpus de questions dans LolChatbot.get_response et mesure latence, requêtes sortantes et mémoire.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from benchmarks.corpus import WARMUP
+from benchmarks.stubs import DEFAULT_DDRAGON_DATA, DDragonStub, InferenceStub
+
+
+def reset_shared_state() -> None:
+    """Réinitialise les singletons du processus (caches, clients, sessions)"""
+    from src.shared_state import reset_all
+    reset_all()
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    """Percentile exact (rang le plus proche) d'une liste de mesures"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, Optional[float]]:
+    def rounded(value):
+        return round(value, 2) if value is not None else None
+    return {
+        'count': len(latencies_ms),
+        'mean_ms': rounded(sum(latencies_ms) / len(latencies_ms)) if latencies_ms else None,
+        'p50_ms': rounded(percentile(latencies_ms, 50)),
+        'p95_ms': rounded(percentile(latencies_ms, 95)),
+        'p99_ms': rounded(percentile(latencies_ms, 99)),
+        'max_ms': rounded(max(latencies_ms)) if latencies_ms else None
+    }
+
+
+class BenchmarkEnvironment:
+    def __init__(self, ddragon_latency: float = 0.0, inference_latency: float = 0.0,
+                 snapshot: bool = True, data_path: str = DEFAULT_DDRAGON_DATA,
+                 env: Optional[Dict[str, str]] = None):
+        """Serveurs locaux et configuration du chatbot pointant dessus.
+
+        snapshot=False : aucun snapshot sur le disque, les champions sont demandés à Data Dragon.
+        env : variables de configuration supplémentaires (stratégies de cache, micro-lots...).
+        """
+        self.ddragon = DDragonStub(data_path, ddragon_latency)
+        self.inference = InferenceStub(inference_latency)
+        self.snapshot = snapshot
+        self.extra_env = dict(env or {})
+        self._saved_env = {}
+        self._tmp_dir = None
+
+    def __enter__(self) -> 'BenchmarkEnvironment':
+        self.ddragon.start()
+        self.inference.start()
+        self._tmp_dir = tempfile.mkdtemp(prefix="lolchatbot-bench-")
+        variables = {
+            'DDRAGON_URL': self.ddragon.url,
+            'DDRAGON_CACHE_DIR': os.path.join(self._tmp_dir, 'ddragon'),
+            'DDRAGON_SYNC': '1' if self.snapshot else '0',
+            'HUGGINGFACE_MODEL_URL': self.inference.model_url,
+            'HUGGINGFACE_API_KEY': 'benchmark',
+            'HTTP_BACKOFF_BASE': '0',
+            'SEMANTIC_CACHE_MODEL': '',
+            'GENERATION_BACKEND': 'remote',
+            'RESPONSE_CACHE_PATH': '',
+            'SESSION_STORE': '',
+            **self.extra_env
+        }
+        for name, value in variables.items():
+            self._saved_env[name] = os.environ.get(name)
+            os.environ[name] = value
+        reset_shared_state()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        reset_shared_state()
+        for name, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self._saved_env = {}
+        self.ddragon.stop()
+        self.inference.stop()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def outbound(self) -> Dict[str, int]:
+        """Requêtes reçues jusqu'ici par les serveurs locaux"""
+        return {'ddragon': self.ddragon.total, 'inference': self.inference.total}
+
+
+def _cache_stats() -> Dict[str, Any]:
+    from src.chatbot.chatbot import get_chatbot_resources
+    resources = get_chatbot_resources()
+    return {'response': resources.response_cache.stats(), 'semantic': resources.semantic_cache.stats()}
+
+
+def measure_startup(env: BenchmarkEnvironment) -> Dict[str, Any]:
+    """Chargement des composants partagés (snapshot, index, analyses), puis des composants paresseux"""
+    from src.chatbot.chatbot import LolChatbot, get_chatbot_resources
+    before = env.outbound()
+    start = time.perf_counter()
+    get_chatbot_resources()
+    loaded = time.perf_counter()
+    chatbot = LolChatbot()
+    for question in WARMUP:
+        chatbot.get_response(question)
+    warmed = time.perf_counter()
+    after = env.outbound()
+    return {
+        'seconds': round(loaded - start, 3),
+        'warmup_seconds': round(warmed - loaded, 3),
+        'outbound': {name: after[name] - before[name] for name in after}
+    }
+
+
+def run_latency(env: BenchmarkEnvironment, corpus: List[str], sessions: int = 4,
+                repeat: int = 1) -> Dict[str, Any]:
+    """Questions posées une par une ; les requêtes sortantes sont attribuées à chaque question"""
+    from src.chatbot.session_manager import get_session_manager
+    manager = get_session_manager()
+    latencies, per_query = [], []
+    for round_index in range(repeat):
+        for i, question in enumerate(corpus):
+            chatbot = manager.get(f"bench-{i % sessions}")
+            before = env.outbound()
+            start = time.perf_counter()
+            chatbot.get_response(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+            after = env.outbound()
+            per_query.append({'query': question, **{name: after[name] - before[name] for name in after}})
+
+    totals = {name: sum(entry[name] for entry in per_query) for name in ('ddragon', 'inference')}
+    worst = sorted(per_query, key=lambda entry: entry['ddragon'] + entry['inference'], reverse=True)[:5]
+    return {
+        'latency': summarize_latencies(latencies),
+        'outbound': {
+            'total': totals,
+            'per_query': {name: round(count / len(per_query), 3) for name, count in totals.items()} if per_query else {},
+            'max_per_query': max((entry['ddragon'] + entry['inference'] for entry in per_query), default=0),
+            'worst_queries': [entry for entry in worst if entry['ddragon'] + entry['inference']]
+        },
+        'caches': _cache_stats()
+    }
+
+
+def measure_session_memory(env: BenchmarkEnvironment, corpus: List[str], sessions: int = 200,
+                           turns: int = 3) -> Dict[str, Any]:
+    """Mémoire allouée par session (tracemalloc) après quelques échanges chacune.
+
+    Le corpus est d'abord posé une fois : les réponses du LLM sont alors en cache et seul l'état
+    des sessions est compté.
+    """
+    from src.chatbot.session_manager import get_session_manager
+    manager = get_session_manager()
+    warmup = manager.get("bench-warmup")
+    for question in corpus:
+        warmup.get_response(question)
+    manager.drop("bench-warmup")
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.take_snapshot()
+        for session in range(sessions):
+            chatbot = manager.get(f"bench-memory-{session}")
+            for turn in range(turns):
+                chatbot.get_response(corpus[(session + turn) % len(corpus)])
+        current = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in current.compare_to(baseline, 'filename'))
+    return {
+        'sessions': sessions,
+        'turns': turns,
+        'traced_bytes_per_session': round(allocated / sessions),
+        'state_bytes_per_session': round(manager.memory_bytes() / max(len(manager), 1))
+    }
+
+
+def run_load(env: BenchmarkEnvironment, corpus: List[str], concurrency: int = 8,
+             queries: int = 200) -> Dict[str, Any]:
+    """Utilisateurs simultanés (une session par thread) ; débit et latences sous charge"""
+    from src.chatbot.session_manager import get_session_manager
+    manager = get_session_manager()
+
+    def ask(index: int):
+        # Session du thread : jamais deux tours simultanés sur une même conversation
+        chatbot = manager.get(f"bench-load-{threading.get_ident()}")
+        start = time.perf_counter()
+        try:
+            response = chatbot.get_response(corpus[index % len(corpus)])
+        except Exception as e:
+            print(f"Erreur pendant le benchmark: {e}")
+            response = None
+        return (time.perf_counter() - start) * 1000, response is not None
+
+    before = env.outbound()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(ask, range(queries)))
+    elapsed = time.perf_counter() - start
+    after = env.outbound()
+
+    return {
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'throughput_qps': round(queries / elapsed, 2) if elapsed else None,
+        'errors': sum(1 for _, ok in results if not ok),
+        'latency': summarize_latencies([latency for latency, _ in results]),
+        'outbound': {name: after[name] - before[name] for name in after},
+        'caches': _cache_stats()
+    }
+
+
+def run_benchmark(corpus: List[str], mode: str = 'latency', ddragon_latency: float = 0.0,
+                  inference_latency: float = 0.0, snapshot: bool = True, sessions: int = 4,
+                  repeat: int = 1, concurrency: int = 8, queries: int = 200,
+                  memory_sessions: int = 200, data_path: str = DEFAULT_DDRAGON_DATA,
+                  env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Rapport complet pour un mode ('latency', 'load' ou 'memory') dans un environnement neuf"""
+    report = {
+        'mode': mode,
+        'corpus': len(corpus),
+        'ddragon_latency_ms': ddragon_latency * 1000,
+        'inference_latency_ms': inference_latency * 1000,
+        'snapshot': snapshot,
+        'env': dict(env or {})
+    }
+    with BenchmarkEnvironment(ddragon_latency, inference_latency, snapshot, data_path, env) as bench:
+        report['startup'] = measure_startup(bench)
+        if mode == 'latency':
+            report.update(run_latency(bench, corpus, sessions, repeat))
+        elif mode == 'load':
+            report.update(run_load(bench, corpus, concurrency, queries))
+        elif mode == 'memory':
+            report['memory'] = measure_session_memory(bench, corpus, memory_sessions)
+        else:
+            raise ValueError(f"Mode de benchmark inconnu: {mode}")
+    return report
@@ -0,0 +1,155 @@
+"""
+Serveurs locaux imitant Data Dragon et l'endpoint d'inférence, avec latence injectée et comptage des requêtes.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_DDRAGON_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'tests', 'fixtures', 'ddragon', 'championFull.json')
+
+# Champs de champion.json (liste légère des champions)
+SUMMARY_FIELDS = ('version', 'id', 'key', 'name', 'title', 'blurb', 'info', 'tags', 'partype', 'stats')
+
+_CDN_PATTERN = re.compile(r"^/cdn/(?P<version>[^/]+)/data/(?P<lang>[^/]+)/(?P<file>.+)\.json$")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, latency: float = 0.0):
+        """Serveur local sur un port libre ; latency secondes ajoutées à chaque réponse"""
+        super().__init__(('127.0.0.1', 0), handler)
+        self.latency = latency
+        self.requests = Counter()  # chemin -> nombre de requêtes
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.requests.values())
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] += 1
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DDragonHandler(_StubHandler):
+    def do_GET(self):
+        self.server.record(self.path)
+        time.sleep(self.server.latency)
+        if self.path == '/api/versions.json':
+            self._send(200, json.dumps([self.server.version]).encode())
+            return
+        match = _CDN_PATTERN.match(self.path)
+        if match is None:
+            self._send(404, b'{}')
+            return
+        filename = match.group('file')
+        if filename == 'championFull':
+            self._send(200, self.server.raw)
+        elif filename == 'champion':
+            self._send(200, self.server.summary)
+        elif filename == 'item' and self.server.items is not None:
+            self._send(200, self.server.items)
+        elif filename.startswith('champion/') and filename[len('champion/'):] in self.server.champions:
+            champion_id = filename[len('champion/'):]
+            self._send(200, json.dumps({'data': {champion_id: self.server.champions[champion_id]}}).encode())
+        else:
+            self._send(404, b'{}')
+
+
+class DDragonStub(StubServer):
+    def __init__(self, data_path: str = DEFAULT_DDRAGON_DATA, latency: float = 0.0):
+        """Data Dragon servi depuis un championFull.json local (versions, champion, championFull, champion/<id>).
+
+        item.json est servi s'il se trouve dans le même répertoire.
+        """
+        super().__init__(DDragonHandler, latency)
+        with open(data_path, 'rb') as f:
+            self.raw = f.read()
+        item_path = os.path.join(os.path.dirname(data_path), 'item.json')
+        self.items = None
+        if os.path.exists(item_path):
+            with open(item_path, 'rb') as f:
+                self.items = f.read()
+        data = json.loads(self.raw)
+        self.version = data.get('version', '13.24.1')
+        self.champions = data['data']
+        self.summary = json.dumps({'data': {
+            champion_id: {field: champion[field] for field in SUMMARY_FIELDS if field in champion}
+            for champion_id, champion in self.champions.items()
+        }}).encode()
+
+
+class InferenceHandler(_StubHandler):
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.record(self.path)
+        time.sleep(self.server.latency)
+        text = self.server.text
+        if payload.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i, token in enumerate(text.split(' ')):
+                event = {"token": {"id": i, "text": token + ' ', "special": False}, "generated_text": None}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            final = {"token": {"id": -1, "text": "</s>", "special": True}, "generated_text": text}
+            self._write_chunk(f"data: {json.dumps(final)}\n\n".encode())
+            self._write_chunk(b"")
+            return
+        inputs = payload.get('inputs')
+        count = len(inputs) if isinstance(inputs, list) else 1
+        self._send(200, json.dumps([{"generated_text": text}] * count).encode())
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class InferenceStub(StubServer):
+    def __init__(self, latency: float = 0.0,
+                 text: str = "Voici quelques conseils pour progresser sur League of Legends."):
+        """Endpoint d'inférence : une génération par entrée (les lots comptent pour une requête)"""
+        super().__init__(InferenceHandler, latency)
+        self.text = text
+
+    @property
+    def model_url(self) -> str:
+        return f"{self.url}/models/stub"
+
@@ -0,0 +1,254 @@
+"""
+Statistiques dérivées des champions, calculées une seule fois par champion et par patch.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+# Niveaux pour lesquels les statistiques sont précalculées
+KEY_LEVELS = (1, 6, 11, 16, 18)
+SPELL_KEYS = ('Q', 'W', 'E', 'R')
+
+# Expressions compilées une seule fois (ex. "60% AP")
+RATIO_PATTERNS = {
+    'ap': re.compile(r'(\d+(?:\.\d+)?)%\s*ap'),
+    'ad': re.compile(r'(\d+(?:\.\d+)?)%\s*ad'),
+}
+MOBILITY_KEYWORDS = ("dash", "saut", "bond", "téléportation", "vitesse", "speed")
+
+
+@dataclass(frozen=True)
+class ChampionAnalytics:
+    """Statistiques dérivées immuables d'un champion pour un patch"""
+    champion_id: str
+    version: Optional[str]
+    levels_stats: Mapping[int, Mapping[str, float]]
+    ability_ratios: Mapping[str, Mapping[str, Any]]
+    mobility: int
+    scaling: float
+    damage_profile: Mapping[str, float]
+    playstyle_tips: Tuple[str, ...]
+
+    @property
+    def enriched_stats(self) -> Mapping[str, Any]:
+        """Vue en lecture seule au format attendu par les réponses du chatbot"""
+        return MappingProxyType({
+            'levels_stats': self.levels_stats,
+            'ability_ratios': self.ability_ratios,
+            'mobility': self.mobility,
+            'scaling': self.scaling,
+            'damage_profile': self.damage_profile
+        })
+
+
+def _freeze(value: Dict) -> Mapping:
+    return MappingProxyType({k: _freeze(v) if isinstance(v, dict) else v for k, v in value.items()})
+
+
+def find_ratio(text: str, ratio_type: str) -> float:
+    """Trouve les ratios dans le texte"""
+    ratio = 0
+    for match in RATIO_PATTERNS[ratio_type].finditer(text):
+        ratio += float(match.group(1)) / 100
+    return ratio
+
+
+def compute_levels_stats(stats: Dict[str, float], levels: Iterable[int] = KEY_LEVELS) -> Dict[int, Dict[str, float]]:
+    """Calcule les statistiques du champion aux niveaux demandés"""
+    attack_speed = 0.625 / stats['attackspeed']
+    levels_stats = {}
+    for level in levels:
+        levels_stats[level] = {
+            'hp': stats['hp'] + stats['hpperlevel'] * (level - 1),
+            'mp': stats.get('mp', 0) + stats.get('mpperlevel', 0) * (level - 1),
+            'armor': stats['armor'] + stats['armorperlevel'] * (level - 1),
+            'mr': stats['spellblock'] + stats['spellblockperlevel'] * (level - 1),
+            'ad': stats['attackdamage'] + stats['attackdamageperlevel'] * (level - 1),
+            'as': attack_speed * (1 + (stats['attackspeedperlevel'] * (level - 1) / 100))
+        }
+        # Calculer le DPS théorique par niveau
+        levels_stats[level]['dps'] = round(levels_stats[level]['ad'] * levels_stats[level]['as'], 2)
+    return levels_stats
+
+
+def extract_ability_ratios(abilities: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les ratios AP/AD des capacités"""
+    ratios = {key: {'ap': 0, 'ad': 0, 'description': ''} for key in ('passive',) + SPELL_KEYS}
+
+    # Analyser le passif puis les sorts
+    descriptions = [('passive', abilities['passive']['description'])]
+    descriptions += [(SPELL_KEYS[i], spell['description']) for i, spell in enumerate(abilities['spells'][:4])]
+    for key, description in descriptions:
+        desc = description.lower()
+        ratios[key]['ap'] = find_ratio(desc, 'ap')
+        ratios[key]['ad'] = find_ratio(desc, 'ad')
+        ratios[key]['description'] = desc
+
+    return ratios
+
+
+def calculate_damage_profile(champion_info: Dict[str, Any], ability_ratios: Dict[str, Any]) -> Dict[str, float]:
+    """Calcule le profil de dégâts du champion"""
+    physical = 0
+    magical = 0
+
+    # Analyser les ratios des capacités
+    for ability in ability_ratios.values():
+        physical += ability['ad'] * 20  # Pondération arbitraire
+        magical += ability['ap'] * 20   # Pondération arbitraire
+
+    # Ajuster en fonction des tags et stats de base
+    champion_tags = champion_info.get('tags', [])
+    if isinstance(champion_tags, list):
+        if "Mage" in champion_tags:
+            magical += 30
+        if "Marksman" in champion_tags:
+            physical += 30
+        if "Assassin" in champion_tags:
+            if magical > physical:
+                magical += 20
+            else:
+                physical += 20
+
+    return {
+        'physical': min(physical, 100),
+        'magical': min(magical, 100)
+    }
+
+
+def calculate_mobility_score(champion_info: Dict[str, Any]) -> int:
+    """Calcule un score de mobilité basé sur les capacités"""
+    score = 5  # Score de base
+
+    try:
+        # Analyser les descriptions des sorts pour les mots-clés de mobilité
+        spells = champion_info.get('abilities', {}).get('spells', [])
+        for spell in spells:
+            description = spell.get('description', '').lower()
+            if any(keyword in description for keyword in MOBILITY_KEYWORDS):
+                score += 1
+
+        # Ajuster en fonction des stats de base
+        if champion_info.get('stats', {}).get('movespeed', 0) > 340:
+            score += 1
+
+    except Exception as e:
+        print(f"Erreur lors du calcul du score de mobilité: {str(e)}")
+        return 5  # Score par défaut en cas d'erreur
+
+    return min(score, 10)  # Plafonner à 10
+
+
+def calculate_scaling_score(champion_info: Dict[str, Any], ability_ratios: Dict[str, Any]) -> float:
+    """Calcule un score de scaling basé sur les ratios et stats"""
+    score = 5  # Score de base
+
+    # Analyser les ratios AP/AD dans les descriptions des sorts
+    for spell in champion_info['abilities']['spells']:
+        if "% AD" in spell['description']:
+            score += 0.5
+        if "% AP" in spell['description']:
+            score += 0.5
+
+    # Ajuster en fonction des ratios des sorts
+    if any(ability_ratios[key]['ad'] > 0 for key in SPELL_KEYS):
+        score += 1
+    if any(ability_ratios[key]['ap'] > 0 for key in SPELL_KEYS):
+        score += 1
+
+    return min(score, 10)  # Plafonner à 10
+
+
+def compute_champion_analytics(champion_info: Dict[str, Any], version: Optional[str] = None) -> ChampionAnalytics:
+    """Calcule toutes les statistiques dérivées d'un champion"""
+    levels_stats = compute_levels_stats(champion_info['stats'])
+    ability_ratios = extract_ability_ratios(champion_info['abilities'])
+    mobility = calculate_mobility_score(champion_info)
+    scaling = calculate_scaling_score(champion_info, ability_ratios)
+    damage_profile = calculate_damage_profile(champion_info, ability_ratios)
+
+    # Conseils spécifiques basés sur les statistiques
+    playstyle_tips = []
+    if damage_profile['physical'] > 70:
+        playstyle_tips.append("Fort potentiel de dégâts physiques")
+    if damage_profile['magical'] > 70:
+        playstyle_tips.append("Fort potentiel de dégâts magiques")
+    if levels_stats[18]['hp'] > 2500:
+        playstyle_tips.append("Très résistant en late game")
+    if mobility > 7:
+        playstyle_tips.append("Grande mobilité")
+    if scaling > 7:
+        playstyle_tips.append("Excellent scaling en late game")
+
+    return ChampionAnalytics(
+        champion_id=champion_info.get('id', champion_info.get('name')),
+        version=version,
+        levels_stats=_freeze(levels_stats),
+        ability_ratios=_freeze(ability_ratios),
+        mobility=mobility,
+        scaling=scaling,
+        damage_profile=_freeze(damage_profile),
+        playstyle_tips=tuple(playstyle_tips)
+    )
+
+
+class AnalyticsStore:
+    def __init__(self):
+        """Cache des statistiques dérivées, indexé par (patch, champion)"""
+        self._records = {}
+        self._precomputed_versions = set()
+        self._lock = threading.Lock()
+
+    def get(self, champion_info: Dict[str, Any], version: Optional[str] = None) -> ChampionAnalytics:
+        """Retourne les statistiques dérivées d'un champion, calculées au premier appel"""
+        key = (version, champion_info.get('id'))
+        record = self._records.get(key)
+        if record is None:
+            record = compute_champion_analytics(champion_info, version)
+            if key[1] is not None:
+                with self._lock:
+                    self._records[key] = record
+        return record
+
+    def precompute(self, riot_api) -> int:
+        """Calcule les statistiques de tout le roster d'un patch (une fois par patch)"""
+        version = riot_api.version
+        with self._lock:
+            if version in self._precomputed_versions:
+                return 0
+            self._precomputed_versions.add(version)
+            # Les entrées des autres patchs ne seront plus demandées
+            self._records = {k: v for k, v in self._records.items() if k[0] == version}
+        count = 0
+        for champion_id in riot_api.get_all_champions():
+            champion_info = riot_api.get_champion_info(champion_id)
+            if champion_info:
+                self.get(champion_info, version)
+                count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+_analytics_store = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics_store() -> AnalyticsStore:
+    """Retourne le cache de statistiques dérivées partagé par le processus"""
+    global _analytics_store
+    if _analytics_store is None:
+        with _analytics_lock:
+            if _analytics_store is None:
+                _analytics_store = AnalyticsStore()
+    return _analytics_store
+
+
+def reset_analytics_store() -> None:
+    """Supprime le cache partagé (utilisé par les tests)"""
+    global _analytics_store
+    with _analytics_lock:
+        _analytics_store = None
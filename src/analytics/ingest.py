@@ -0,0 +1,346 @@
+"""
+Ingestion en masse de parties match-v5 dans le stockage en colonnes : fichiers lus en flux par un pool
+de processus, point de reprise après chaque fichier, téléchargement optionnel via le client limité.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+from src.config.config import Config
+from src.analytics.match_store import COLUMNS, ENCODED_COLUMNS, MatchStore, get_match_store
+from src.analytics.matchups import MATCH_FILE_SUFFIXES, ROLES, normalize_role, patch_of, read_matches
+
+_ROLE_INDEX = {role: i for i, role in enumerate(ROLES)}
+# Fichiers en cours de traitement par processus du pool (borne la mémoire des résultats en attente)
+IN_FLIGHT_PER_WORKER = 2
+# Lignes par lot lu dans un fichier (la mémoire de l'ingestion ne dépend pas de la taille des fichiers)
+DEFAULT_CHUNK_ROWS = 100000
+# Parties téléchargées écrites par bloc gzip
+FETCH_FLUSH_EVERY = 50
+FETCHED_IDS_FILE = 'fetched_ids.txt'
+
+
+def match_key(match_id: str) -> int:
+    """Empreinte 64 bits stable d'un matchId (colonne 'match')"""
+    return int.from_bytes(hashlib.blake2b(match_id.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+# Champs numériques d'un participant copiés tels quels : colonne -> champ match-v5
+PARTICIPANT_FIELDS = {
+    'kills': 'kills',
+    'deaths': 'deaths',
+    'assists': 'assists',
+    'gold': 'goldEarned',
+    'damage': 'totalDamageDealtToChampions',
+    **{f'item{slot}': f'item{slot}' for slot in range(7)},
+}
+
+
+def append_match(columns: Dict[str, list], match: Dict, seen: Optional[Set[int]] = None) -> Optional[int]:
+    """Ajoute une ligne par participant aux colonnes ; retourne l'empreinte, None pour une partie inexploitable
+    (ou déjà présente dans seen)"""
+    metadata, info = match.get('metadata') or {}, match.get('info') or {}
+    patch = patch_of(info.get('gameVersion'))
+    participants = [participant for participant in info.get('participants') or [] if participant.get('championName')]
+    if patch is None or not participants:
+        return None
+    match_id = metadata.get('matchId') or f"{info.get('platformId', '')}_{info.get('gameId', '')}"
+    duration = info.get('gameDuration') or 0
+    if 'gameEndTimestamp' not in info and duration > 10 * 3600:
+        # Parties antérieures au patch 11.20 : durée en millisecondes
+        duration //= 1000
+    key = match_key(match_id)
+    if seen is not None:
+        if key in seen:
+            return None
+        seen.add(key)
+    count = len(participants)
+    columns['match'].extend([key] * count)
+    columns['patch'].extend([patch] * count)
+    columns['queue'].extend([info.get('queueId', 0)] * count)
+    columns['duration'].extend([duration] * count)
+    # Bannissements de chaque équipe dans l'ordre de sélection : le k-ième revient au k-ième joueur
+    bans = {team.get('teamId'): [ban.get('championId', 0) for ban in sorted(team.get('bans') or [],
+                                                                            key=lambda ban: ban.get('pickTurn', 0))]
+            for team in info.get('teams') or []}
+    team_slots = {}
+    for participant in participants:
+        role = normalize_role(participant.get('teamPosition'))
+        team_id = participant.get('teamId')
+        slot = team_slots[team_id] = team_slots.get(team_id, -1) + 1
+        team_bans = bans.get(team_id) or []
+        columns['champion'].append(participant['championName'])
+        columns['champion_key'].append(participant.get('championId', 0))
+        columns['ban'].append(max(team_bans[slot], 0) if slot < len(team_bans) else 0)
+        columns['role'].append(_ROLE_INDEX[role] if role else -1)
+        columns['team'].append(0 if participant.get('teamId') == 100 else 1)
+        columns['win'].append(1 if participant.get('win') else 0)
+        columns['cs'].append(participant.get('totalMinionsKilled', 0) + participant.get('neutralMinionsKilled', 0))
+        for column, field in PARTICIPANT_FIELDS.items():
+            columns[column].append(participant.get(field, 0))
+    return key
+
+
+def match_rows(match: Dict) -> List[Dict[str, object]]:
+    """Lignes d'une partie sous forme de dictionnaires (inspection, tests)"""
+    columns = {name: [] for name in COLUMNS}
+    append_match(columns, match)
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _to_batch(columns: Dict[str, list]) -> Dict[str, object]:
+    return {name: values if name in ENCODED_COLUMNS else np.array(values, dtype=COLUMNS[name])
+            for name, values in columns.items()}
+
+
+def iter_batches(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Dict[str, object]]:
+    """Colonnes des participants d'un fichier, par lots d'environ chunk_rows lignes (parties entières).
+
+    Les doublons sont retirés dans un lot ; entre lots, le stockage les écarte (known_matches).
+    """
+    columns = {name: [] for name in COLUMNS}
+    seen = set()
+    for match in read_matches(path):
+        append_match(columns, match, seen)
+        if len(columns['match']) >= chunk_rows:
+            yield _to_batch(columns)
+            columns = {name: [] for name in COLUMNS}
+            seen.clear()
+    if columns['match']:
+        yield _to_batch(columns)
+
+
+def extract_file(path: str) -> Dict[str, object]:
+    """Colonnes de tout un fichier en un seul lot (inspection, tests)"""
+    for batch in iter_batches(path, chunk_rows=sys.maxsize):
+        return batch
+    return _to_batch({name: [] for name in COLUMNS})
+
+
+def spill_file(path: str, spill_dir: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> str:
+    """Lots d'un fichier écrits à la suite dans un fichier temporaire (exécuté dans un processus du pool)"""
+    fd, spill_path = tempfile.mkstemp(suffix='.pickle', dir=spill_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for batch in iter_batches(path, chunk_rows):
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(spill_path)
+        raise
+    return spill_path
+
+
+def read_spill(spill_path: str) -> Iterator[Dict[str, object]]:
+    """Relit un à un les lots d'un fichier temporaire, supprimé ensuite"""
+    try:
+        with open(spill_path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    finally:
+        os.remove(spill_path)
+
+
+def pending_files(store: MatchStore, data_dir: str) -> List[str]:
+    """Fichiers de data_dir absents du point de reprise (ou agrandis depuis)"""
+    if not data_dir or not os.path.isdir(data_dir):
+        return []
+    names = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith(MATCH_FILE_SUFFIXES) and store.files.get(name) != os.path.getsize(os.path.join(data_dir, name)):
+            names.append(name)
+    return names
+
+
+def _store_file(store: MatchStore, name: str, size: int, batches: Iterable[Dict[str, object]]) -> Dict[str, int]:
+    """Ajoute lot par lot les parties encore inconnues d'un fichier puis valide (point de reprise).
+
+    Une erreur de lecture en cours de fichier annule les lots déjà ajoutés.
+    """
+    added = {'rows': 0, 'matches': 0}
+    try:
+        for batch in batches:
+            keep = ~store.known_matches(batch['match'])
+            if not keep.all():
+                batch = {column: (np.asarray(values, dtype=object)[keep] if isinstance(values, list) else values[keep])
+                         for column, values in batch.items()}
+            rows = store.append(batch)
+            added['rows'] += rows
+            added['matches'] += len(np.unique(batch['match'])) if rows else 0
+    except BaseException:
+        store.rollback()
+        raise
+    store.commit({name: size})
+    return added
+
+
+def ingest_directory(data_dir: str, store: Optional[MatchStore] = None, workers: int = 0,
+                     chunk_rows: Optional[int] = None) -> Dict[str, int]:
+    """Ingère les nouveaux fichiers de data_dir ; workers=0 lit dans le processus courant.
+
+    Un fichier n'est validé qu'entier : une exécution interrompue reprend au premier fichier non validé.
+    Les fichiers sont lus par lots de chunk_rows lignes (INGEST_CHUNK_ROWS par défaut).
+    """
+    if store is None:
+        store = get_match_store()
+    if chunk_rows is None:
+        chunk_rows = Config().INGEST_CHUNK_ROWS
+    names = pending_files(store, data_dir)
+    report = {'files': 0, 'matches': 0, 'rows': 0, 'errors': 0}
+    start = time.perf_counter()
+
+    def record(name: str, size: int, batches: Iterable[Dict[str, object]]) -> None:
+        try:
+            added = _store_file(store, name, size, batches)
+        except (OSError, ValueError, EOFError) as e:
+            print(f"Erreur lors de la lecture des parties {name}: {e}")
+            report['errors'] += 1
+            return
+        report['files'] += 1
+        report['matches'] += added['matches']
+        report['rows'] += added['rows']
+
+    if workers <= 0:
+        for name in names:
+            path = os.path.join(data_dir, name)
+            record(name, os.path.getsize(path), iter_batches(path, chunk_rows))
+    else:
+        # Lots écrits par les processus dans des fichiers temporaires, relus un à un par le processus principal
+        with tempfile.TemporaryDirectory(prefix='spill-', dir=store.path) as spill_dir, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            def submit(name: str) -> None:
+                path = os.path.join(data_dir, name)
+                in_flight.append((name, os.path.getsize(path), executor.submit(spill_file, path, spill_dir, chunk_rows)))
+
+            in_flight = deque()
+            queue = iter(names)
+            for name in queue:
+                submit(name)
+                if len(in_flight) >= workers * IN_FLIGHT_PER_WORKER:
+                    break
+            while in_flight:
+                name, size, future = in_flight.popleft()
+                # Résultats validés dans l'ordre des fichiers, un nouveau fichier soumis pour chaque résultat
+                next_name = next(queue, None)
+                if next_name is not None:
+                    submit(next_name)
+
+                def batches(future=future) -> Iterator[Dict[str, object]]:
+                    yield from read_spill(future.result())
+                record(name, size, batches())
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def list_match_ids(puuid: str, count: int = 100, start: int = 0, http=None,
+                   config: Optional[Config] = None) -> List[str]:
+    """Identifiants des dernières parties d'un joueur (match-v5 by-puuid)"""
+    from src.api.http_client import get_http_client
+    config = config or Config()
+    http = http or get_http_client()
+    try:
+        response = http.get(f"{config.MATCH_API_URL}/lol/match/v5/matches/by-puuid/{puuid}/ids",
+                            endpoint='riot', headers={"X-Riot-Token": config.RIOT_API_KEY},
+                            params={'start': start, 'count': count})
+        if response.status_code == 200:
+            return response.json()
+        print(f"Erreur lors de la récupération des parties de {puuid}: HTTP {response.status_code}")
+        return []
+    except Exception as e:
+        print(f"Erreur lors de la récupération des parties de {puuid}: {e}")
+        return []
+
+
+def fetch_matches(match_ids: Iterable[str], output_dir: str, http=None,
+                  config: Optional[Config] = None) -> Dict[str, int]:
+    """Télécharge des parties dans output_dir (fichier .jsonl.gz par exécution, lu ensuite par l'ingestion).
+
+    Les identifiants déjà téléchargés sont ignorés : une exécution interrompue reprend où elle s'est arrêtée.
+    Le débit est celui du client HTTP partagé (limites Riot de la clé, retries sur 429).
+    """
+    from src.api.http_client import get_http_client
+    config = config or Config()
+    http = http or get_http_client()
+    os.makedirs(output_dir, exist_ok=True)
+    ids_path = os.path.join(output_dir, FETCHED_IDS_FILE)
+    fetched = set()
+    if os.path.exists(ids_path):
+        with open(ids_path, encoding='utf-8') as f:
+            fetched = {line.strip() for line in f if line.strip()}
+    output_path = os.path.join(output_dir, f"match-v5-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+    report = {'fetched': 0, 'skipped': 0, 'errors': 0}
+    buffer, done = [], []
+
+    def flush() -> None:
+        if not buffer:
+            return
+        # Un membre gzip par bloc : le fichier reste lisible même si l'exécution s'arrête ensuite
+        with gzip.open(output_path, 'at', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in buffer)
+        with open(ids_path, 'a', encoding='utf-8') as f:
+            f.writelines(match_id + '\n' for match_id in done)
+        buffer.clear()
+        done.clear()
+
+    for match_id in match_ids:
+        if match_id in fetched:
+            report['skipped'] += 1
+            continue
+        try:
+            response = http.get(f"{config.MATCH_API_URL}/lol/match/v5/matches/{match_id}",
+                                endpoint='riot', headers={"X-Riot-Token": config.RIOT_API_KEY})
+        except Exception as e:
+            print(f"Erreur lors du téléchargement de la partie {match_id}: {e}")
+            report['errors'] += 1
+            continue
+        if response.status_code == 200:
+            buffer.append(json.dumps(response.json(), separators=(',', ':')))
+            report['fetched'] += 1
+        elif response.status_code != 404:
+            print(f"Erreur lors du téléchargement de la partie {match_id}: HTTP {response.status_code}")
+            report['errors'] += 1
+            continue
+        # Partie introuvable (404) : marquée comme traitée, sans nouvel essai
+        fetched.add(match_id)
+        done.append(match_id)
+        if len(buffer) >= FETCH_FLUSH_EVERY:
+            flush()
+    flush()
+    return report
+
+
+def main(argv=None):
+    config = Config()
+    parser = argparse.ArgumentParser(description="Ingestion de parties match-v5 dans le stockage en colonnes")
+    parser.add_argument('--data-dir', default=config.MATCH_DATA_DIR, help="dossier des fichiers de parties")
+    parser.add_argument('--store', default=config.MATCH_STORE_DIR, help="dossier du stockage en colonnes")
+    parser.add_argument('--workers', type=int, default=config.INGEST_WORKERS, help="processus (0 = aucun pool)")
+    parser.add_argument('--chunk-rows', type=int, default=config.INGEST_CHUNK_ROWS, help="lignes par lot")
+    parser.add_argument('--fetch', metavar='FICHIER',
+                        help="télécharge d'abord les parties listées (un matchId par ligne) dans --data-dir")
+    args = parser.parse_args(argv)
+
+    if args.fetch:
+        with open(args.fetch, encoding='utf-8') as f:
+            match_ids = [line.strip() for line in f if line.strip()]
+        print(json.dumps(fetch_matches(match_ids, args.data_dir, config=config)))
+    report = ingest_directory(args.data_dir, MatchStore(args.store), args.workers, args.chunk_rows)
+    print(json.dumps(report))
+    return 0 if not report['errors'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
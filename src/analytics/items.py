@@ -0,0 +1,378 @@
+"""
+Index des objets Data Dragon : caractéristiques vectorisées, arbre de construction précalculé et
+recommandation de builds complets selon le profil de dégâts du champion et la composition adverse.
+"""
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Délai avant de reconstruire un index vide (objets indisponibles), en secondes
+INDEX_RETRY_DELAY = 30
+
+# Carte de la Faille de l'invocateur dans item.json
+SUMMONERS_RIFT = '11'
+
+# Caractéristiques d'un objet, exprimées en équivalent or
+FEATURES = ('ad', 'ap', 'hp', 'armor', 'mr', 'attack_speed', 'crit', 'mana', 'movespeed',
+            'lifesteal', 'armor_pen', 'magic_pen', 'haste', 'on_hit')
+_FEATURE_INDEX = {feature: i for i, feature in enumerate(FEATURES)}
+
+# Statistique de item.json -> (caractéristique, valeur en or d'une unité)
+STAT_GOLD = {
+    'FlatPhysicalDamageMod': ('ad', 35.0),
+    'FlatMagicDamageMod': ('ap', 20.0),
+    'FlatHPPoolMod': ('hp', 2.67),
+    'FlatArmorMod': ('armor', 20.0),
+    'FlatSpellBlockMod': ('mr', 18.0),
+    'PercentAttackSpeedMod': ('attack_speed', 2500.0),
+    'FlatCritChanceMod': ('crit', 4000.0),
+    'FlatMPPoolMod': ('mana', 1.4),
+    'FlatMovementSpeedMod': ('movespeed', 12.0),
+    'PercentMovementSpeedMod': ('movespeed', 3950.0),
+    'PercentLifeStealMod': ('lifesteal', 2667.0),
+}
+# Effets absents des statistiques de item.json, estimés à partir des tags
+TAG_GOLD = {
+    'ArmorPenetration': ('armor_pen', 600.0),
+    'MagicPenetration': ('magic_pen', 600.0),
+    'CooldownReduction': ('haste', 500.0),
+    'AbilityHaste': ('haste', 500.0),
+    'OnHit': ('on_hit', 400.0),
+    'SpellVamp': ('lifesteal', 400.0),
+}
+# Libellés des statistiques affichées dans la fiche d'un objet : (libellé, multiplicateur, suffixe)
+STAT_LABELS = {
+    'FlatPhysicalDamageMod': ("Dégâts d'attaque", 1, ""),
+    'FlatMagicDamageMod': ("Puissance", 1, ""),
+    'FlatHPPoolMod': ("PV", 1, ""),
+    'FlatArmorMod': ("Armure", 1, ""),
+    'FlatSpellBlockMod': ("Résistance magique", 1, ""),
+    'PercentAttackSpeedMod': ("Vitesse d'attaque", 100, "%"),
+    'FlatCritChanceMod': ("Chances de coup critique", 100, "%"),
+    'FlatMPPoolMod': ("Mana", 1, ""),
+    'FlatMovementSpeedMod': ("Vitesse de déplacement", 1, ""),
+    'PercentMovementSpeedMod': ("Vitesse de déplacement", 100, "%"),
+    'PercentLifeStealMod': ("Vol de vie", 100, "%"),
+}
+EXCLUDED_TAGS = {'Trinket', 'Consumable'}
+
+# Part de dégâts physiques par tag, quand les ratios des sorts ne suffisent pas
+TAG_PHYSICAL_SHARE = {'Marksman': 1.0, 'Fighter': 0.8, 'Assassin': 0.6, 'Tank': 0.6, 'Support': 0.3, 'Mage': 0.1}
+# Résistance recherchée selon le tag : (poids défensif)
+TAG_DEFENSE = {'Tank': 1.0, 'Fighter': 0.6, 'Support': 0.4, 'Assassin': 0.25, 'Marksman': 0.2, 'Mage': 0.2}
+# Équivalent or au-delà duquel une caractéristique rapporte de moins en moins
+SATURATION_GOLD = 6000.0
+BUILD_SIZE = 6
+BEAM_WIDTH = 8
+
+# Mots désignant des types d'adversaires dans les questions ("contre des assassins")
+ENEMY_TAG_KEYWORDS = {
+    'assassin': 'Assassin', 'assassins': 'Assassin',
+    'tank': 'Tank', 'tanks': 'Tank',
+    'mage': 'Mage', 'mages': 'Mage',
+    'tireur': 'Marksman', 'tireurs': 'Marksman', 'adc': 'Marksman', 'adcs': 'Marksman',
+    'combattant': 'Fighter', 'combattants': 'Fighter', 'bruiser': 'Fighter', 'bruisers': 'Fighter',
+}
+# Mots trop courants pour désigner un objet à eux seuls
+_NAME_STOPWORDS = {'bottes', 'chaussures', 'cristal', 'force', 'lame', 'cape', 'baton', 'epee'}
+_MIN_WORD_LENGTH = 5
+
+
+@dataclass(frozen=True)
+class Build:
+    """Build recommandé : objets dans l'ordre d'achat conseillé"""
+    items: Tuple[str, ...]
+    cost: int
+    score: float
+
+
+@dataclass(frozen=True)
+class EnemyComposition:
+    """Équipe adverse résumée : part de dégâts physiques et nombre de champions par tag"""
+    physical_share: float = 0.5
+    tags: Tuple[Tuple[str, int], ...] = ()
+
+    def count(self, tag: str) -> int:
+        return dict(self.tags).get(tag, 0)
+
+
+def physical_share(tags: Iterable[str], damage_profile: Optional[Dict[str, float]] = None) -> float:
+    """Part des dégâts physiques d'un champion : moyenne des ratios des sorts et des tags.
+
+    Les ratios seuls ignorent les attaques de base (un tireur paraîtrait en partie magique).
+    """
+    shares = [TAG_PHYSICAL_SHARE[tag] for tag in tags if tag in TAG_PHYSICAL_SHARE]
+    share = sum(shares) / len(shares) if shares else 0.5
+    if damage_profile:
+        total = damage_profile.get('physical', 0) + damage_profile.get('magical', 0)
+        if total > 0:
+            return (damage_profile.get('physical', 0) / total + share) / 2 if shares else \
+                damage_profile.get('physical', 0) / total
+    return share
+
+
+def enemy_composition(enemies: Sequence[Tuple[Sequence[str], Optional[Dict[str, float]]]]) -> EnemyComposition:
+    """Résume les adversaires connus, chacun donné par (tags, profil de dégâts ou None)"""
+    if not enemies:
+        return EnemyComposition()
+    counts = {}
+    for tags, _ in enemies:
+        for tag in tags:
+            counts[tag] = counts.get(tag, 0) + 1
+    share = sum(physical_share(tags, profile) for tags, profile in enemies) / len(enemies)
+    return EnemyComposition(round(share, 3), tuple(sorted(counts.items())))
+
+
+def champion_needs(tags: Sequence[str], damage_profile: Optional[Dict[str, float]] = None,
+                   partype: Optional[str] = None, enemies: EnemyComposition = EnemyComposition()) -> np.ndarray:
+    """Poids de chaque caractéristique pour un champion face à une composition adverse"""
+    weights = np.zeros(len(FEATURES))
+    physical = physical_share(tags, damage_profile)
+    marksman = 'Marksman' in tags
+    weights[_FEATURE_INDEX['ad']] = physical
+    weights[_FEATURE_INDEX['ap']] = 1 - physical
+    weights[_FEATURE_INDEX['attack_speed']] = physical * (1.0 if marksman else 0.3)
+    weights[_FEATURE_INDEX['crit']] = physical * (1.0 if marksman else 0.1)
+    weights[_FEATURE_INDEX['on_hit']] = physical * (0.6 if marksman else 0.3)
+    weights[_FEATURE_INDEX['lifesteal']] = physical * (0.4 if marksman or 'Fighter' in tags else 0.1)
+    weights[_FEATURE_INDEX['haste']] = 0.6 if {'Mage', 'Fighter', 'Tank', 'Support'} & set(tags) else 0.3
+    weights[_FEATURE_INDEX['mana']] = 0.4 * (1 - physical) + 0.1 if partype == 'Mana' else 0.0
+    weights[_FEATURE_INDEX['movespeed']] = 0.15
+
+    # Pénétration contre les tanks, résistances selon les dégâts adverses (plus si assassins)
+    tanks = enemies.count('Tank')
+    weights[_FEATURE_INDEX['armor_pen']] = physical * (0.5 + 0.15 * tanks)
+    weights[_FEATURE_INDEX['magic_pen']] = (1 - physical) * (0.5 + 0.15 * tanks)
+    defense = max((TAG_DEFENSE[tag] for tag in tags if tag in TAG_DEFENSE), default=0.3)
+    defense += 0.1 * enemies.count('Assassin')
+    weights[_FEATURE_INDEX['hp']] = defense
+    weights[_FEATURE_INDEX['armor']] = defense * 2 * enemies.physical_share
+    weights[_FEATURE_INDEX['mr']] = defense * 2 * (1 - enemies.physical_share)
+    return weights
+
+
+def _fold_words(text: str) -> List[str]:
+    """Mots d'un texte en minuscules, sans accents"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return re.findall(r"[a-z0-9]+", ''.join(c for c in text if not unicodedata.combining(c)))
+
+
+class ItemIndex:
+    def __init__(self, items: Dict[str, Dict], version: Optional[str] = None):
+        """Objets achetables sur la Faille, caractéristiques (objets x FEATURES) et arbre de construction"""
+        self.version = version
+        self.items = {}
+        for item_id, item in items.items():
+            gold = item.get('gold') or {}
+            if not gold.get('purchasable') or not gold.get('total') or item.get('consumed') \
+                    or item.get('requiredChampion') or item.get('inStore') is False \
+                    or not (item.get('maps') or {}).get(SUMMONERS_RIFT) or EXCLUDED_TAGS & set(item.get('tags', [])):
+                continue
+            self.items[item_id] = item
+        self.ids = list(self.items)
+        self._positions = {item_id: i for i, item_id in enumerate(self.ids)}
+        self.costs = np.array([self.items[item_id]['gold']['total'] for item_id in self.ids], dtype=np.int32)
+        self.features = np.zeros((len(self.ids), len(FEATURES)))
+        for i, item_id in enumerate(self.ids):
+            item = self.items[item_id]
+            for stat, value in (item.get('stats') or {}).items():
+                if stat in STAT_GOLD:
+                    feature, gold = STAT_GOLD[stat]
+                    self.features[i, _FEATURE_INDEX[feature]] += value * gold
+            for tag in item.get('tags', []):
+                if tag in TAG_GOLD:
+                    feature, gold = TAG_GOLD[tag]
+                    self.features[i, _FEATURE_INDEX[feature]] += gold
+
+        # Arbre de construction : composants directs, objets améliorés, ordre d'achat précalculé
+        self.components = {item_id: [c for c in self.items[item_id].get('from', []) if c in self.items]
+                           for item_id in self.ids}
+        self.upgrades = {item_id: [u for u in self.items[item_id].get('into', []) if u in self.items]
+                         for item_id in self.ids}
+        self.purchase_paths = {}
+        for item_id in self.ids:
+            self._purchase_path(item_id)
+
+        # Candidats d'un build : objets finis (aucune amélioration achetable)
+        self.boots = np.array([not self.upgrades[item_id] and 'Boots' in self.items[item_id].get('tags', [])
+                               for item_id in self.ids], dtype=bool)
+        self.completed = np.array([not self.upgrades[item_id] and 'Boots' not in self.items[item_id].get('tags', [])
+                                   and self.items[item_id].get('depth', 1) > 1 for item_id in self.ids], dtype=bool)
+        self.mythic = np.array([bool(self.items[item_id].get('mythic', 'rarityMythic' in
+                                                                 self.items[item_id].get('description', '')))
+                                for item_id in self.ids], dtype=bool)
+        # Objets incompatibles dans un même build : identiques ou liés par l'arbre de construction
+        self.conflicts = np.eye(len(self.ids), dtype=bool)
+        for item_id, path in self.purchase_paths.items():
+            for component in path:
+                self.conflicts[self._positions[item_id], self._positions[component]] = True
+                self.conflicts[self._positions[component], self._positions[item_id]] = True
+
+        self._names = {}
+        word_items = {}
+        for item_id in self.ids:
+            name = self.items[item_id]['name']
+            self._names[' '.join(_fold_words(name))] = item_id
+            for word in set(_fold_words(name)):
+                if len(word) >= _MIN_WORD_LENGTH and word not in _NAME_STOPWORDS:
+                    word_items.setdefault(word, set()).add(item_id)
+        # Mot propre à un seul objet ("rabadon", "zhonya")
+        self._words = {word: next(iter(ids)) for word, ids in word_items.items() if len(ids) == 1}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.items
+
+    def name(self, item_id: str) -> str:
+        return self.items[item_id]['name']
+
+    def cost(self, item_id: str) -> int:
+        return int(self.costs[self._positions[item_id]])
+
+    def _purchase_path(self, item_id: str) -> List[str]:
+        """Composants à acheter avant l'objet (feuilles d'abord, moins chères en premier)"""
+        path = self.purchase_paths.get(item_id)
+        if path is None:
+            path = []
+            for component in sorted(self.components[item_id], key=lambda c: self.items[c]['gold']['total']):
+                path.extend(self._purchase_path(component) + [component])
+            self.purchase_paths[item_id] = path
+        return path
+
+    def build_path(self, item_id: str) -> List[str]:
+        """Ordre d'achat complet menant à l'objet, lui compris"""
+        return self.purchase_paths.get(item_id, []) + [item_id]
+
+    def find_items(self, text: str) -> List[str]:
+        """Objets cités dans un texte : nom complet ou mot propre à un objet"""
+        words = _fold_words(text)
+        folded = ' '.join(words)
+        found = [item_id for name, item_id in self._names.items() if name and f" {name} " in f" {folded} "]
+        for word in words:
+            item_id = self._words.get(word)
+            if item_id is not None and item_id not in found:
+                found.append(item_id)
+        return found
+
+    def _utility(self, totals: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Valeur d'un ensemble de caractéristiques : rendement décroissant au-delà de SATURATION_GOLD"""
+        return (weights * SATURATION_GOLD * (1 - np.exp(-totals / SATURATION_GOLD))).sum(axis=-1)
+
+    def recommend(self, weights: np.ndarray, size: int = BUILD_SIZE, beam: int = BEAM_WIDTH) -> Optional[Build]:
+        """Meilleur build (une paire de bottes + objets finis) par recherche en faisceau.
+
+        Chaque étape évalue l'ajout de chaque objet candidat à chaque build partiel en une opération.
+        """
+        candidates = np.flatnonzero(self.completed)
+        if not len(candidates):
+            return None
+        features = self.features[candidates]
+        conflicts = self.conflicts[np.ix_(candidates, candidates)]
+        mythic = self.mythic[candidates]
+        slots = size - (1 if self.boots.any() else 0)
+
+        # Builds partiels : objets choisis (masque), caractéristiques cumulées, présence d'un mythique
+        chosen = np.zeros((1, len(candidates)), dtype=bool)
+        totals = np.zeros((1, len(FEATURES)))
+        has_mythic = np.zeros(1, dtype=bool)
+        for _ in range(min(slots, len(candidates))):
+            # Valeur de chaque (build partiel, candidat)
+            scores = self._utility(totals[:, None, :] + features[None, :, :], weights)
+            blocked = (chosen.astype(np.int32) @ conflicts.astype(np.int32)) > 0
+            blocked |= has_mythic[:, None] & mythic[None, :]
+            scores = np.where(blocked, -np.inf, scores)
+            order = np.argsort(-scores, axis=None, kind='stable')
+            next_chosen, next_totals, next_mythic, seen = [], [], [], set()
+            for flat in order:
+                row, column = divmod(int(flat), len(candidates))
+                if not np.isfinite(scores[row, column]):
+                    break
+                selection = chosen[row].copy()
+                selection[column] = True
+                key = selection.tobytes()
+                if key in seen:
+                    continue
+                seen.add(key)
+                next_chosen.append(selection)
+                next_totals.append(totals[row] + features[column])
+                next_mythic.append(has_mythic[row] or mythic[column])
+                if len(next_chosen) >= beam:
+                    break
+            if not next_chosen:
+                break
+            chosen, totals, has_mythic = np.array(next_chosen), np.array(next_totals), np.array(next_mythic)
+
+        best = int(np.argmax(self._utility(totals, weights)))
+        items = [self.ids[candidates[i]] for i in np.flatnonzero(chosen[best])]
+        total = totals[best]
+        boots = np.flatnonzero(self.boots)
+        if len(boots):
+            boot = boots[int(np.argmax(self._utility(total[None, :] + self.features[boots], weights)))]
+            items.insert(0, self.ids[boot])
+            total = total + self.features[boot]
+        # Ordre d'achat : bottes, puis objets par valeur pour le champion rapportée au coût
+        first, rest = items[:1] if len(boots) else [], items[1:] if len(boots) else items
+        rest.sort(key=lambda item_id: -float(self.features[self._positions[item_id]] @ weights) / self.cost(item_id))
+        items = first + rest
+        return Build(tuple(items), sum(self.cost(item_id) for item_id in items),
+                     round(float(self._utility(total, weights)), 1))
+
+    def describe(self, item_id: str) -> str:
+        """Fiche d'un objet : coût, statistiques, recette et améliorations"""
+        item = self.items[item_id]
+        lines = [f"{item['name']} ({self.cost(item_id)} PO)"]
+        if item.get('plaintext'):
+            lines.append(item['plaintext'])
+        for stat, value in (item.get('stats') or {}).items():
+            if stat in STAT_LABELS:
+                label, scale, suffix = STAT_LABELS[stat]
+                lines.append(f"- +{value * scale:g}{suffix} {label}")
+        if self.components[item_id]:
+            recipe = " + ".join(self.name(component) for component in self.components[item_id])
+            lines.append(f"Recette : {recipe} (+{item['gold'].get('base', 0)} PO)")
+        if self.upgrades[item_id]:
+            lines.append("Se combine en : " + ", ".join(self.name(upgrade) for upgrade in self.upgrades[item_id]))
+        return "\n".join(lines) + "\n"
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_retry_at = 0.0  # échéance avant de retenter après un index vide
+
+
+def _needs_build(index: Optional[ItemIndex]) -> bool:
+    return index is None or (not len(index) and time.monotonic() >= _retry_at)
+
+
+def get_item_index(riot_api) -> ItemIndex:
+    """Retourne l'index des objets du patch courant, construit une seule fois par processus"""
+    global _retry_at
+    version = riot_api.version
+    index = _indexes.get(version)
+    if _needs_build(index):
+        with _indexes_lock:
+            index = _indexes.get(version)
+            if _needs_build(index):
+                items = riot_api.get_all_items()
+                index = ItemIndex(items, version)
+                _indexes.clear()
+                _indexes[version] = index
+                if not items:
+                    # Objets indisponibles : ne pas réessayer à chaque message
+                    _retry_at = time.monotonic() + INDEX_RETRY_DELAY
+    return index
+
+
+def reset_item_indexes() -> None:
+    """Supprime les index en cache (utilisé par les tests)"""
+    global _retry_at
+    with _indexes_lock:
+        _indexes.clear()
+        _retry_at = 0.0
@@ -0,0 +1,300 @@
+"""
+Stockage en colonnes des participants de parties match-v5 : fichiers binaires en ajout seul, lus en memmap.
+"""
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.config.config import Config
+
+# Colonnes d'une ligne (un participant d'une partie) et leur type
+COLUMNS = {
+    'match': np.int64,  # empreinte de matchId (voir match_key)
+    'patch': np.int16,  # code dans store.patches
+    'queue': np.int16,
+    'duration': np.int32,  # secondes
+    'champion': np.int16,  # code dans store.champions
+    'champion_key': np.int16,  # championId Riot (clé Data Dragon)
+    'ban': np.int16,  # championId banni par ce joueur, 0 si aucun
+    'role': np.int8,  # index dans ROLES, -1 si inconnu
+    'team': np.int8,  # 0 bleu, 1 rouge
+    'win': np.int8,
+    'kills': np.int16,
+    'deaths': np.int16,
+    'assists': np.int16,
+    'gold': np.int32,
+    'cs': np.int16,
+    'damage': np.int32,  # dégâts aux champions
+    **{f'item{slot}': np.int32 for slot in range(7)},
+}
+# Colonnes codées par dictionnaire : valeurs reçues sous forme de chaînes
+ENCODED_COLUMNS = {'champion': 'champions', 'patch': 'patches'}
+MANIFEST = 'manifest.json'
+# Index des empreintes de parties : séries triées, fusionnées quand la plus récente atteint la moitié de la précédente
+KEY_RUN_PREFIX = 'keys-'
+KEY_RUN_RATIO = 2
+MERGE_CHUNK = 1 << 20
+
+
+def merge_sorted(a: np.ndarray, b: np.ndarray, f) -> None:
+    """Écrit dans f la fusion de deux tableaux triés sans doublon commun, par blocs de MERGE_CHUNK"""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        a_chunk, b_chunk = a[i:i + MERGE_CHUNK], b[j:j + MERGE_CHUNK]
+        # Borne : dernière valeur d'un bloc dont le tableau n'est pas épuisé (tout ce qui est en dessous est sûr)
+        bounds = [chunk[-1] for chunk, end, size in ((a_chunk, i + MERGE_CHUNK, len(a)),
+                                                     (b_chunk, j + MERGE_CHUNK, len(b))) if end < size]
+        if bounds:
+            bound = min(bounds)
+            a_chunk = a_chunk[:np.searchsorted(a_chunk, bound, side='right')]
+            b_chunk = b_chunk[:np.searchsorted(b_chunk, bound, side='right')]
+        f.write(np.sort(np.concatenate((a_chunk, b_chunk))).tobytes())
+        i += len(a_chunk)
+        j += len(b_chunk)
+
+
+class MatchStore:
+    def __init__(self, path: str, read_only: bool = False):
+        """Colonnes de path ; les écritures non validées d'une exécution interrompue sont tronquées.
+
+        read_only : lecteur d'un stockage alimenté par un autre processus (rien n'est modifié sur le disque).
+        """
+        self.path = path
+        self.read_only = read_only
+        self.rows = 0
+        self.matches = 0
+        self.champions = []
+        self.patches = []
+        self.files = {}  # fichier source ingéré -> taille
+        self.key_runs = []  # [fichier, nombre d'empreintes] des séries triées de l'index, la plus ancienne en premier
+        self._codes = {'champions': {}, 'patches': {}}
+        self._pending_rows = 0  # lignes écrites, pas encore validées
+        self._pending_matches = 0
+        self._pending_keys = []  # empreintes triées des lots non validés
+        self._manifest_mtime = None
+        self._lock = threading.RLock()
+        self._load_manifest()
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+            self._truncate()
+            self._clean_key_runs()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def refresh(self) -> bool:
+        """Relit le manifeste s'il a été validé par un autre processus (ingestion en cours)"""
+        manifest_path = os.path.join(self.path, MANIFEST)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            return False
+        with self._lock:
+            if mtime == self._manifest_mtime or self._pending_rows:
+                return False
+            self._load_manifest()
+            return True
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _load_manifest(self) -> None:
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return
+        try:
+            self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            self.rows = manifest['rows']
+            self.matches = manifest['matches']
+            self.champions = manifest['champions']
+            self.patches = manifest['patches']
+            self.files = manifest['files']
+            self.key_runs = manifest.get('key_runs', [])
+            for name in ENCODED_COLUMNS.values():
+                self._codes[name] = {value: code for code, value in enumerate(getattr(self, name))}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Erreur lors de la lecture du manifeste {manifest_path}: {e}")
+
+    def _truncate(self) -> None:
+        """Ramène chaque colonne au nombre de lignes validées (reprise après interruption).
+
+        Une colonne ajoutée depuis la création du stockage est complétée par des zéros.
+        """
+        for name, dtype in COLUMNS.items():
+            column_path = self._column_path(name)
+            size = self.rows * np.dtype(dtype).itemsize
+            if not os.path.exists(column_path):
+                open(column_path, 'wb').close()
+            if os.path.getsize(column_path) != size:
+                os.truncate(column_path, size)
+
+    def _clean_key_runs(self) -> None:
+        """Supprime les séries non référencées (commit interrompu) ; construit l'index d'un stockage plus ancien"""
+        referenced = {name for name, _ in self.key_runs}
+        for name in os.listdir(self.path):
+            if name.startswith(KEY_RUN_PREFIX) and name not in referenced:
+                os.remove(os.path.join(self.path, name))
+        if self.rows and not self.key_runs:
+            self._pending_keys.append(np.unique(self.column('match')))
+            self.commit()
+
+    def _key_run(self, name: str, size: int) -> np.ndarray:
+        if not size:
+            return np.zeros(0, dtype=np.int64)
+        return np.memmap(os.path.join(self.path, name), dtype=np.int64, mode='r', shape=(size,))
+
+    def _write_key_run(self, write) -> str:
+        """Nouvelle série écrite puis synchronisée sur le disque ; référencée seulement par le manifeste"""
+        fd, run_path = tempfile.mkstemp(prefix=KEY_RUN_PREFIX, suffix='.bin', dir=self.path)
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        return os.path.basename(run_path)
+
+    def _add_key_run(self, keys: np.ndarray) -> List[str]:
+        """Ajoute une série triée et fusionne les plus récentes ; retourne les fichiers devenus inutiles"""
+        runs = self.key_runs + [[self._write_key_run(lambda f: f.write(keys.tobytes())), len(keys)]]
+        obsolete = []
+        while len(runs) >= 2 and runs[-2][1] <= KEY_RUN_RATIO * runs[-1][1]:
+            (older, older_size), (newer, newer_size) = runs[-2], runs[-1]
+            merged = self._write_key_run(lambda f: merge_sorted(self._key_run(older, older_size),
+                                                                self._key_run(newer, newer_size), f))
+            runs[-2:] = [[merged, older_size + newer_size]]
+            obsolete += [older, newer]
+        self.key_runs = runs
+        return obsolete
+
+    def encode(self, kind: str, values: Iterable[str]) -> np.ndarray:
+        """Codes de chaînes (champions ou patches), ajoutées au dictionnaire si nouvelles"""
+        codes, known = self._codes[kind], getattr(self, kind)
+        result = []
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(known)
+                known.append(value)
+            result.append(code)
+        return np.array(result, dtype=COLUMNS['champion' if kind == 'champions' else 'patch'])
+
+    def code(self, kind: str, value: str) -> Optional[int]:
+        return self._codes[kind].get(value)
+
+    def known_matches(self, keys: np.ndarray) -> np.ndarray:
+        """Masque des empreintes de parties déjà stockées ou ajoutées (recherche dichotomique dans l'index)"""
+        keys = np.asarray(keys, dtype=np.int64)
+        known = np.zeros(len(keys), dtype=bool)
+        if not len(keys):
+            return known
+        runs = [self._key_run(name, size) for name, size in self.key_runs] + self._pending_keys
+        for run in runs:
+            if not len(run):
+                continue
+            positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            known |= run[positions] == keys
+        return known
+
+    def append(self, batch: Dict[str, object]) -> int:
+        """Ajoute un lot de lignes (colonnes de même longueur) ; visible seulement après commit()"""
+        if self.read_only:
+            raise ValueError(f"Stockage {self.path} ouvert en lecture seule")
+        with self._lock:
+            count = len(batch['match'])
+            if not count:
+                return 0
+            for name, dtype in COLUMNS.items():
+                values = batch[name]
+                if name in ENCODED_COLUMNS:
+                    values = self.encode(ENCODED_COLUMNS[name], values)
+                column = np.asarray(values, dtype=dtype)
+                if len(column) != count:
+                    raise ValueError(f"Colonne {name} de longueur {len(column)} au lieu de {count}")
+                with open(self._column_path(name), 'ab') as f:
+                    f.write(column.tobytes())
+            keys = np.unique(np.asarray(batch['match'], dtype=np.int64))
+            self._pending_keys.append(keys)
+            self._pending_rows += count
+            self._pending_matches += len(keys)
+            return count
+
+    def commit(self, files: Optional[Dict[str, int]] = None) -> None:
+        """Valide les lignes ajoutées et les fichiers sources traités (point de reprise)"""
+        with self._lock:
+            for name in COLUMNS:
+                with open(self._column_path(name), 'ab') as f:
+                    os.fsync(f.fileno())
+            obsolete = []
+            if self._pending_keys:
+                keys = np.sort(np.concatenate(self._pending_keys))
+                obsolete = self._add_key_run(keys)
+            self.rows += self._pending_rows
+            self.matches += self._pending_matches
+            self._pending_rows = self._pending_matches = 0
+            self._pending_keys = []
+            self.files.update(files or {})
+            manifest_path = os.path.join(self.path, MANIFEST)
+            tmp_path = f"{manifest_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'rows': self.rows,
+                    'matches': self.matches,
+                    'champions': self.champions,
+                    'patches': self.patches,
+                    'files': self.files,
+                    'key_runs': self.key_runs
+                }, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, manifest_path)
+            self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+            for name in obsolete:
+                os.remove(os.path.join(self.path, name))
+
+    def rollback(self) -> None:
+        """Abandonne les lignes ajoutées depuis le dernier commit()"""
+        with self._lock:
+            self._pending_rows = self._pending_matches = 0
+            self._pending_keys = []
+            self._truncate()
+            self._clean_key_runs()
+
+    def column(self, name: str) -> np.ndarray:
+        """Colonne validée, projetée en mémoire en lecture seule (aucune copie)"""
+        dtype = COLUMNS[name]
+        column_path = self._column_path(name)
+        if not self.rows:
+            return np.zeros(0, dtype=dtype)
+        if not os.path.exists(column_path) or os.path.getsize(column_path) < self.rows * np.dtype(dtype).itemsize:
+            # Colonne absente d'un stockage plus ancien, ouvert en lecture seule
+            return np.zeros(self.rows, dtype=dtype)
+        return np.memmap(column_path, dtype=dtype, mode='r', shape=(self.rows,))
+
+    def columns(self, names: List[str]) -> Dict[str, np.ndarray]:
+        return {name: self.column(name) for name in names}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_match_store() -> MatchStore:
+    """Retourne le stockage partagé des parties ingérées (MATCH_STORE_DIR)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MatchStore(Config().MATCH_STORE_DIR)
+    return _store
+
+
+def reset_match_store() -> None:
+    """Supprime le stockage partagé (utilisé par les tests)"""
+    global _store
+    with _store_lock:
+        _store = None
@@ -0,0 +1,406 @@
+"""
+Matchups calculés à partir de parties réelles (fichiers match-v5 locaux) : taux de victoire par paire
+de champions, rôle et patch.
+"""
+import fcntl
+import gzip
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.utils.files import atomic_write
+
+from src.config.config import Config
+from src.utils.json_stream import iter_json_values
+
+ROLES = ('top', 'jungle', 'mid', 'bot', 'support')
+# teamPosition de match-v5 et rôles employés dans les questions -> rôle
+ROLE_ALIASES = {
+    'top': 'top', 'jungle': 'jungle', 'jgl': 'jungle',
+    'mid': 'mid', 'middle': 'mid',
+    'bot': 'bot', 'bottom': 'bot', 'adc': 'bot',
+    'support': 'support', 'utility': 'support', 'supp': 'support', 'sup': 'support',
+}
+_ROLE_INDEX = {role: i for i, role in enumerate(ROLES)}
+
+# Parties plus courtes ignorées (remakes), en secondes
+MIN_GAME_DURATION = 300
+MATCH_FILE_SUFFIXES = ('.json', '.jsonl', '.json.gz', '.jsonl.gz')
+
+
+@dataclass(frozen=True)
+class Matchup:
+    """Champion adverse (ou allié) et taux de victoire du champion demandé face à lui (ou avec lui)"""
+    champion: str
+    games: int
+    winrate: float
+
+
+def normalize_role(role: Optional[str]) -> Optional[str]:
+    return ROLE_ALIASES.get(role.lower().strip()) if role else None
+
+
+def patch_of(game_version: str) -> Optional[str]:
+    """Patch d'une partie : "13.24.551.1234" -> "13.24" """
+    parts = (game_version or '').split('.')
+    if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    return f"{parts[0]}.{parts[1]}"
+
+
+def patch_key(patch: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in patch.split('.'))
+
+
+def read_matches(path: str) -> Iterator[Dict]:
+    """Parties d'un fichier, lues une à une : une partie, une liste de parties, ou une partie par ligne (.jsonl)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        yield from iter_json_values(f)
+
+
+def parse_match(match: Dict) -> Optional[Tuple[str, str, List[Tuple[str, int, int, bool]]]]:
+    """Identifiant, patch et participants (champion, équipe, rôle, victoire) d'une partie exploitable"""
+    metadata, info = match.get('metadata') or {}, match.get('info') or {}
+    patch = patch_of(info.get('gameVersion'))
+    participants = info.get('participants') or []
+    if patch is None or len(participants) != 10 or info.get('gameDuration', MIN_GAME_DURATION) < MIN_GAME_DURATION:
+        return None
+    players = []
+    for participant in participants:
+        role = normalize_role(participant.get('teamPosition'))
+        if role is None or not participant.get('championName'):
+            return None
+        players.append((participant['championName'], participant.get('teamId'),
+                        _ROLE_INDEX[role], bool(participant.get('win'))))
+    match_id = metadata.get('matchId') or f"{info.get('platformId', '')}_{info.get('gameId', '')}"
+    return match_id, patch, players
+
+
+class PatchMatchups:
+    def __init__(self, capacity: int):
+        """Compteurs d'un patch, indexés (rôle, champion, autre champion)"""
+        shape = (len(ROLES), capacity, capacity)
+        self.games = np.zeros(shape, dtype=np.int32)  # face à face dans le même rôle
+        self.wins = np.zeros(shape, dtype=np.int32)
+        self.ally_games = np.zeros(shape, dtype=np.int32)  # même équipe, tous rôles
+        self.ally_wins = np.zeros(shape, dtype=np.int32)
+        # (rôle, champion) -> (adversaires par taux de victoire croissant, alliés par taux décroissant)
+        self.rankings = {}
+
+    def grow(self, capacity: int) -> None:
+        extra = capacity - self.games.shape[1]
+        if extra <= 0:
+            return
+        for name in ('games', 'wins', 'ally_games', 'ally_wins'):
+            setattr(self, name, np.pad(getattr(self, name), ((0, 0), (0, extra), (0, extra))))
+
+    def add(self, rows: np.ndarray) -> Set[Tuple[int, int]]:
+        """Ajoute des observations (type, rôle, champion, autre champion, victoire) ; retourne les lignes modifiées"""
+        for kind, (games, wins) in enumerate(((self.games, self.wins), (self.ally_games, self.ally_wins))):
+            selected = rows[rows[:, 0] == kind]
+            if len(selected):
+                index = (selected[:, 1], selected[:, 2], selected[:, 3])
+                np.add.at(games, index, 1)
+                np.add.at(wins, index, selected[:, 4])
+        return set(zip(rows[:, 1].tolist(), rows[:, 2].tolist()))
+
+    def rank(self, role: int, champion: int, min_games: int) -> None:
+        """Précalcule les classements d'une ligne : top-k ensuite servi par simple découpage"""
+        rankings = []
+        for games, wins, descending in ((self.games, self.wins, False), (self.ally_games, self.ally_wins, True)):
+            row_games, row_wins = games[role, champion], wins[role, champion]
+            valid = np.flatnonzero(row_games >= min_games)
+            rates = row_wins[valid] / row_games[valid]
+            order = np.argsort(-rates if descending else rates, kind='stable')
+            rankings.append((valid[order], rates[order]))
+        self.rankings[(role, champion)] = tuple(rankings)
+
+
+class MatchupEngine:
+    def __init__(self, data_dir: Optional[str] = None, min_games: int = 30):
+        """Agrégats des parties de data_dir ; un duel n'est classé qu'au-delà de min_games parties"""
+        self.data_dir = data_dir
+        self.min_games = min_games
+        self.champions = []
+        self._positions = {}
+        self.patches = {}  # patch -> PatchMatchups
+        self.files = {}  # fichier déjà lu -> taille
+        self.match_ids = set()
+        self.last_refresh = 0.0
+        self._lock = threading.RLock()
+        self._refresher_pid = None  # processus où tourne le thread de rafraîchissement
+        self._refresher_stop = None
+        self._state_mtime = None  # date du fichier d'état lu ou écrit en dernier par ce processus
+
+    @property
+    def capacity(self) -> int:
+        return next(iter(self.patches.values())).games.shape[1] if self.patches else 0
+
+    def __len__(self) -> int:
+        """Nombre de parties agrégées"""
+        return len(self.match_ids)
+
+    def _champion_position(self, champion: str) -> int:
+        position = self._positions.get(champion)
+        if position is None:
+            position = self._positions[champion] = len(self.champions)
+            self.champions.append(champion)
+        return position
+
+    def _patch(self, patch: str) -> PatchMatchups:
+        table = self.patches.get(patch)
+        if table is None:
+            table = self.patches[patch] = PatchMatchups(max(self.capacity, 16))
+        return table
+
+    def ingest(self, matches: Iterable[Dict]) -> int:
+        """Ajoute des parties (déjà vues ignorées) ; seules les lignes modifiées sont reclassées"""
+        observations = {}  # patch -> lignes (type, rôle, champion, autre champion, victoire)
+        added = 0
+        with self._lock:
+            for match in matches:
+                parsed = parse_match(match)
+                if parsed is None or parsed[0] in self.match_ids:
+                    continue
+                match_id, patch, players = parsed
+                self.match_ids.add(match_id)
+                added += 1
+                positions = [self._champion_position(champion) for champion, _, _, _ in players]
+                rows = observations.setdefault(patch, [])
+                for i, (_, team, role, win) in enumerate(players):
+                    for j, (_, other_team, other_role, _) in enumerate(players):
+                        if i == j:
+                            continue
+                        if other_team != team and other_role == role:
+                            rows.append((0, role, positions[i], positions[j], win))
+                        elif other_team == team:
+                            rows.append((1, role, positions[i], positions[j], win))
+            if not observations:
+                return added
+
+            capacity = self.capacity
+            if len(self.champions) > capacity:
+                capacity = max(16, capacity)
+                while capacity < len(self.champions):
+                    capacity *= 2
+                for table in self.patches.values():
+                    table.grow(capacity)
+            for patch, rows in observations.items():
+                table = self._patch(patch)
+                table.grow(capacity)
+                for role, champion in table.add(np.array(rows, dtype=np.int64)):
+                    table.rank(role, champion, self.min_games)
+        return added
+
+    def refresh(self) -> int:
+        """Lit uniquement les fichiers nouveaux (ou agrandis) de data_dir ; retourne le nombre de parties ajoutées"""
+        self.last_refresh = time.monotonic()
+        if not self.data_dir or not os.path.isdir(self.data_dir):
+            return 0
+        added = 0
+        with self._lock:
+            for name in sorted(os.listdir(self.data_dir)):
+                if not name.endswith(MATCH_FILE_SUFFIXES):
+                    continue
+                path = os.path.join(self.data_dir, name)
+                size = os.path.getsize(path)
+                if self.files.get(name) == size:
+                    continue
+                try:
+                    added += self.ingest(read_matches(path))
+                    self.files[name] = size
+                except (OSError, ValueError) as e:
+                    print(f"Erreur lors de la lecture des parties {name}: {e}")
+        return added
+
+    def start_refresher(self, interval: float, state_path: Optional[str] = None, scan: bool = True) -> bool:
+        """Met à jour les agrégats toutes les interval secondes dans un thread (un par processus).
+
+        scan=True : relit data_dir et enregistre les agrégats dans state_path quand de nouvelles
+        parties ont été lues (un seul processus du serveur). scan=False : recharge seulement
+        state_path quand un autre processus l'a réécrit.
+        """
+        with self._lock:
+            if interval <= 0 or self._refresher_pid == os.getpid() or (not scan and not state_path):
+                return False
+            self._refresher_pid = os.getpid()
+            self._refresher_stop = threading.Event()
+            target = self._refresh_loop if scan else self._follow_loop
+            threading.Thread(target=target, args=(interval, state_path, self._refresher_stop),
+                             daemon=True, name="lolchatbot-matchups").start()
+            return True
+
+    def _refresh_loop(self, interval: float, state_path: Optional[str], stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                if self.refresh() and state_path:
+                    self.save(state_path)
+            except Exception as e:
+                print(f"Erreur lors du rafraîchissement des matchups: {e}")
+
+    def _follow_loop(self, interval: float, state_path: str, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                if os.path.exists(state_path) and os.stat(state_path).st_mtime_ns != self._state_mtime:
+                    self.load(state_path)
+            except Exception as e:
+                print(f"Erreur lors du rechargement des matchups: {e}")
+
+    def stop_refresher(self) -> None:
+        with self._lock:
+            if self._refresher_stop is not None:
+                self._refresher_stop.set()
+            self._refresher_pid = self._refresher_stop = None
+
+    def latest_patch(self, champion: Optional[str] = None, role: Optional[str] = None) -> Optional[str]:
+        """Patch le plus récent (où le champion a joué ce rôle, si précisé)"""
+        for patch in sorted(self.patches, key=patch_key, reverse=True):
+            if champion is None:
+                return patch
+            position, role_index = self._positions.get(champion), _ROLE_INDEX.get(normalize_role(role))
+            if position is not None and role_index is not None and \
+                    self.patches[patch].games[role_index, position].any():
+                return patch
+        return None
+
+    def games(self, champion: str, role: str, patch: Optional[str] = None) -> int:
+        """Parties jouées par le champion dans ce rôle sur le patch"""
+        patch = patch or self.latest_patch(champion, role)
+        position, role_index = self._positions.get(champion), _ROLE_INDEX.get(normalize_role(role))
+        if patch not in self.patches or position is None or role_index is None:
+            return 0
+        return int(self.patches[patch].games[role_index, position].sum())
+
+    def matchups(self, champion: str, role: str, patch: Optional[str] = None,
+                 k: int = 3) -> Optional[Dict[str, List[Matchup]]]:
+        """Contre-picks, matchups favorables et synergies (k de chaque), None sans données"""
+        role_index = _ROLE_INDEX.get(normalize_role(role))
+        position = self._positions.get(champion)
+        patch = patch or self.latest_patch(champion, role)
+        if role_index is None or position is None or patch not in self.patches:
+            return None
+        table = self.patches[patch]
+        ranking = table.rankings.get((role_index, position))
+        if ranking is None:
+            return None
+        (opponents, opponent_rates), (allies, ally_rates) = ranking
+
+        def entries(indices, rates, games, predicate) -> List[Matchup]:
+            result = []
+            for index, rate in zip(indices, rates):
+                if len(result) >= k or not predicate(rate):
+                    break
+                result.append(Matchup(self.champions[index], int(games[index]), round(float(rate) * 100, 1)))
+            return result
+
+        row_games, row_ally_games = table.games[role_index, position], table.ally_games[role_index, position]
+        return {
+            'patch': patch,
+            'counter_picks': entries(opponents, opponent_rates, row_games, lambda rate: rate < 0.5),
+            'good_against': entries(opponents[::-1], opponent_rates[::-1], row_games, lambda rate: rate > 0.5),
+            'synergies': entries(allies, ally_rates, row_ally_games, lambda rate: True)
+        }
+
+    def save(self, path: str) -> bool:
+        """Enregistre les agrégats : un redémarrage ne relit que les nouveaux fichiers.
+
+        L'écriture est sautée si le fichier, réécrit entre-temps par un autre processus, couvre déjà
+        tous les fichiers de parties lus ici.
+        """
+        try:
+            with self._lock:
+                files = dict(self.files)
+                payload = pickle.dumps({
+                    'champions': self.champions,
+                    'patches': {patch: (table.games, table.wins, table.ally_games, table.ally_wins)
+                                for patch, table in self.patches.items()},
+                    'files': files,
+                    'match_ids': self.match_ids
+                }, protocol=pickle.HIGHEST_PROTOCOL)
+            directory = os.path.dirname(path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            # Verrou entre processus : vérification et remplacement du fichier d'un seul tenant
+            with open(f"{path}.lock", 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                saved = self._saved_files(path)
+                if saved is not None and all(saved.get(name, -1) >= size for name, size in files.items()):
+                    return True
+                atomic_write(path, payload)
+                self._state_mtime = os.stat(path).st_mtime_ns
+            return True
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement des matchups: {e}")
+            return False
+
+    def _saved_files(self, path: str) -> Optional[Dict[str, int]]:
+        """Fichiers de parties couverts par state_path s'il a été réécrit par un autre processus"""
+        if not os.path.exists(path) or os.stat(path).st_mtime_ns == self._state_mtime:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)['files']
+        except Exception:
+            return None
+
+    def load(self, path: str) -> bool:
+        """Recharge des agrégats enregistrés (classements recalculés)"""
+        try:
+            if not os.path.exists(path):
+                return False
+            mtime = os.stat(path).st_mtime_ns
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+            with self._lock:
+                self._state_mtime = mtime
+                self.champions = payload['champions']
+                self._positions = {champion: i for i, champion in enumerate(self.champions)}
+                self.files = payload['files']
+                self.match_ids = payload['match_ids']
+                self.patches = {}
+                for patch, arrays in payload['patches'].items():
+                    table = PatchMatchups(0)
+                    table.games, table.wins, table.ally_games, table.ally_wins = arrays
+                    self.patches[patch] = table
+                    for role, champion in zip(*np.nonzero(table.games.any(axis=2) | table.ally_games.any(axis=2))):
+                        table.rank(int(role), int(champion), self.min_games)
+            return True
+        except Exception as e:
+            print(f"Erreur lors du chargement des matchups: {e}")
+            return False
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_matchup_engine() -> MatchupEngine:
+    """Retourne le moteur partagé : agrégats enregistrés, complétés par les nouveaux fichiers de parties.
+
+    Premier appel coûteux (lecture du dossier) : le serveur le fait avant le fork (preload_shared_data).
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                config = Config()
+                engine = MatchupEngine(config.MATCH_DATA_DIR, config.MATCHUP_MIN_GAMES)
+                engine.load(config.MATCHUP_STATE_PATH)
+                if engine.refresh():
+                    engine.save(config.MATCHUP_STATE_PATH)
+                _engine = engine
+    return _engine
+
+
+def reset_matchup_engine() -> None:
+    """Supprime le moteur partagé (utilisé par les tests)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.stop_refresher()
+        _engine = None
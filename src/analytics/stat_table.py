@@ -0,0 +1,182 @@
+"""
+Table vectorisée des statistiques de tous les champions pour les niveaux 1 à 18.
+"""
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+LEVELS = np.arange(1, 19)
+
+# Statistique -> (champ de base, champ de croissance par niveau) dans les données Data Dragon
+STAT_FIELDS = {
+    'hp': ('hp', 'hpperlevel'),
+    'mp': ('mp', 'mpperlevel'),
+    'armor': ('armor', 'armorperlevel'),
+    'mr': ('spellblock', 'spellblockperlevel'),
+    'ad': ('attackdamage', 'attackdamageperlevel'),
+    'hpregen': ('hpregen', 'hpregenperlevel'),
+    'mpregen': ('mpregen', 'mpregenperlevel'),
+    'movespeed': ('movespeed', None),
+    'attackrange': ('attackrange', None),
+}
+# Statistiques calculées à partir des autres
+STATS = tuple(STAT_FIELDS) + ('as', 'dps')
+
+STAT_LABELS = {
+    'hp': "PV",
+    'mp': "Mana",
+    'armor': "Armure",
+    'mr': "Résistance magique",
+    'ad': "Dégâts d'attaque",
+    'as': "Vitesse d'attaque",
+    'dps': "DPS théorique",
+    'hpregen': "Régénération de PV",
+    'mpregen': "Régénération de mana",
+    'movespeed': "Vitesse de déplacement",
+    'attackrange': "Portée d'attaque",
+}
+
+# Mots utilisés dans les questions pour désigner une statistique
+STAT_ALIASES = {
+    'pv': 'hp', 'vie': 'hp', 'hp': 'hp', 'points de vie': 'hp',
+    'mana': 'mp',
+    'armure': 'armor', 'armor': 'armor',
+    'résistance magique': 'mr', 'rm': 'mr', 'mr': 'mr',
+    "dégâts d'attaque": 'ad', 'ad': 'ad', 'attaque': 'ad',
+    "vitesse d'attaque": 'as', 'as': 'as',
+    'dps': 'dps',
+    'régénération': 'hpregen', 'regen': 'hpregen',
+    'vitesse de déplacement': 'movespeed', 'vitesse': 'movespeed', 'movespeed': 'movespeed',
+    'portée': 'attackrange', 'range': 'attackrange',
+}
+_STAT_PATTERN = re.compile(
+    r"(?<!\w)(" + "|".join(re.escape(a) for a in sorted(STAT_ALIASES, key=len, reverse=True)) + r")(?!\w)"
+)
+
+
+def find_stat(text: str) -> Optional[str]:
+    """Retourne la première statistique mentionnée dans un texte"""
+    match = _STAT_PATTERN.search(text.lower())
+    return STAT_ALIASES[match.group(1)] if match else None
+
+
+class StatTable:
+    def __init__(self, champion_ids: List[str], names: List[str], values: np.ndarray, version: Optional[str] = None):
+        """values : tableau (champions, statistiques, niveaux 1-18)"""
+        self.champion_ids = champion_ids
+        self.names = names
+        self.values = values
+        self.version = version
+        self._positions = {champion_id: i for i, champion_id in enumerate(champion_ids)}
+        self._stat_positions = {stat: i for i, stat in enumerate(STATS)}
+
+    @classmethod
+    def from_champions(cls, champions: Dict[str, Dict], version: Optional[str] = None) -> 'StatTable':
+        """Construit la table à partir des blocs 'stats' de Data Dragon"""
+        champion_ids = sorted(champions)
+        names = [champions[c].get('name', c) for c in champion_ids]
+        growth = LEVELS - 1
+
+        base = np.zeros((len(champion_ids), len(STAT_FIELDS)))
+        per_level = np.zeros_like(base)
+        attack_speed = np.zeros(len(champion_ids))
+        attack_speed_per_level = np.zeros(len(champion_ids))
+        for i, champion_id in enumerate(champion_ids):
+            stats = champions[champion_id]['stats']
+            for j, (base_field, level_field) in enumerate(STAT_FIELDS.values()):
+                base[i, j] = stats.get(base_field, 0)
+                per_level[i, j] = stats.get(level_field, 0) if level_field else 0
+            attack_speed[i] = 0.625 / stats['attackspeed']
+            attack_speed_per_level[i] = stats.get('attackspeedperlevel', 0)
+
+        # Croissance linéaire par niveau, calculée pour tous les champions à la fois
+        linear = base[:, :, None] + per_level[:, :, None] * growth[None, None, :]
+        as_curve = attack_speed[:, None] * (1 + attack_speed_per_level[:, None] * growth[None, :] / 100)
+        ad_curve = linear[:, list(STAT_FIELDS).index('ad'), :]
+        dps_curve = np.round(ad_curve * as_curve, 2)
+        values = np.concatenate([linear, as_curve[:, None, :], dps_curve[:, None, :]], axis=1)
+        return cls(champion_ids, names, values, version)
+
+    def __len__(self) -> int:
+        return len(self.champion_ids)
+
+    def __contains__(self, champion_id: str) -> bool:
+        return champion_id in self._positions
+
+    def _level_index(self, level: int) -> int:
+        if not 1 <= level <= 18:
+            raise ValueError(f"Niveau invalide : {level}")
+        return level - 1
+
+    def column(self, stat: str, level: int = 18) -> np.ndarray:
+        """Valeurs d'une statistique pour tous les champions à un niveau"""
+        return self.values[:, self._stat_positions[stat], self._level_index(level)]
+
+    def curve(self, champion_id: str, stat: str = 'dps') -> np.ndarray:
+        """Courbe d'une statistique du niveau 1 au niveau 18"""
+        return self.values[self._positions[champion_id], self._stat_positions[stat], :]
+
+    def stats_at(self, champion_id: str, level: int) -> Dict[str, float]:
+        """Toutes les statistiques d'un champion à un niveau"""
+        row = self.values[self._positions[champion_id], :, self._level_index(level)]
+        return dict(zip(STATS, row.tolist()))
+
+    def top(self, stat: str, level: int = 18, n: int = 10, ascending: bool = False) -> List[Tuple[str, float]]:
+        """Les n champions ayant la plus haute (ou basse) valeur d'une statistique"""
+        column = self.column(stat, level)
+        n = min(n, len(column))
+        if n <= 0:
+            return []
+        keys = column if ascending else -column
+        # Sélection partielle en O(n), puis tri des seuls candidats (égalités par ordre alphabétique)
+        candidates = np.sort(np.argpartition(keys, n - 1)[:n])
+        ordered = candidates[np.argsort(keys[candidates], kind='stable')]
+        return [(self.champion_ids[i], float(column[i])) for i in ordered]
+
+    def percentiles(self, stat: str, level: int = 18) -> np.ndarray:
+        """Rang centile (0-100) de chaque champion pour une statistique"""
+        column = self.column(stat, level)
+        ranks = np.searchsorted(np.sort(column), column, side='right')
+        return 100.0 * ranks / len(column)
+
+    def percentile(self, champion_id: str, stat: str, level: int = 18) -> float:
+        """Part des champions ayant une valeur inférieure ou égale à celle du champion"""
+        return float(self.percentiles(stat, level)[self._positions[champion_id]])
+
+    def compare(self, champion_a: str, champion_b: str, level: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Différences (a - b) pour chaque statistique, à un niveau ou sur les 18 niveaux"""
+        diff = self.values[self._positions[champion_a]] - self.values[self._positions[champion_b]]
+        if level is not None:
+            diff = diff[:, self._level_index(level)]
+        return dict(zip(STATS, diff))
+
+    def name(self, champion_id: str) -> str:
+        return self.names[self._positions[champion_id]]
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_stat_table(riot_api) -> StatTable:
+    """Retourne la table du patch courant, construite une seule fois par processus"""
+    version = riot_api.version
+    table = _tables.get(version)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(version)
+            if table is None:
+                champions = riot_api.get_all_champions()
+                table = StatTable.from_champions(champions, version)
+                if champions:
+                    _tables.clear()
+                    _tables[version] = table
+    return table
+
+
+def reset_stat_tables() -> None:
+    """Supprime les tables en cache (utilisé par les tests)"""
+    with _tables_lock:
+        _tables.clear()
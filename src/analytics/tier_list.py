@@ -0,0 +1,239 @@
+"""
+Tier list par rôle et par patch : taux de sélection, de victoire et de bannissement calculés sur le
+stockage des parties ingérées, textes des tiers mis en cache.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config.config import Config
+from src.analytics.match_store import MANIFEST, MatchStore
+from src.analytics.matchups import ROLES, patch_key
+
+# Tiers attribués par percentile du score dans le rôle (seuil inférieur)
+TIER_THRESHOLDS = (('S', 0.9), ('A', 0.7), ('B', 0.4), ('C', 0.15), ('D', 0.0))
+# Poids de la présence (sélection + bannissement) face au taux de victoire ajusté
+PRESENCE_WEIGHT = 0.1
+
+ROLE_LABELS = {'top': "Top", 'jungle': "Jungle", 'mid': "Mid", 'bot': "Bot (ADC)", 'support': "Support"}
+
+
+@dataclass(frozen=True)
+class TierEntry:
+    """Champion classé dans un rôle (taux en pourcentage)"""
+    champion: str
+    role: str
+    tier: str
+    games: int
+    winrate: float
+    pick_rate: float
+    ban_rate: float
+    score: float
+
+
+def _assign_tiers(scores: np.ndarray) -> List[str]:
+    """Tier de chaque score selon son percentile parmi les champions classés du rôle"""
+    if len(scores) == 1:
+        return [TIER_THRESHOLDS[0][0]]
+    ranks = np.empty(len(scores))
+    ranks[np.argsort(scores, kind='stable')] = np.arange(len(scores)) / (len(scores) - 1)
+    return [next(tier for tier, threshold in TIER_THRESHOLDS if rank >= threshold) for rank in ranks]
+
+
+def compute_tiers(store: MatchStore, patch: str, queues: Sequence[int] = (),
+                  min_games: int = 50) -> Tuple[int, Dict[str, List[TierEntry]]]:
+    """Parties du patch et tiers par rôle (meilleur score en premier), en une passe sur les colonnes"""
+    patch_code = store.code('patches', patch)
+    if patch_code is None or not len(store):
+        return 0, {}
+    mask = store.column('patch') == patch_code
+    if queues:
+        mask &= np.isin(store.column('queue'), queues)
+    match = store.column('match')[mask]
+    if not len(match):
+        return 0, {}
+    # Lignes d'une partie contiguës (ajoutées ensemble, sans doublon) : numéro de partie par rupture
+    match_index = np.cumsum(np.concatenate(([True], match[1:] != match[:-1])), dtype=np.int64) - 1
+    matches = int(match_index[-1]) + 1
+    champion = store.column('champion')[mask].astype(np.int64)
+    role = store.column('role')[mask].astype(np.int64)
+    win = store.column('win')[mask]
+    size = len(store.champions)
+
+    # Regroupement (rôle, champion) : parties et victoires
+    played = role >= 0
+    index = role[played] * size + champion[played]
+    games = np.bincount(index, minlength=len(ROLES) * size).reshape(len(ROLES), size)
+    wins = np.bincount(index, weights=win[played], minlength=len(ROLES) * size).reshape(len(ROLES), size)
+
+    # Bannissements : championId -> code via les participants, une fois par partie au plus
+    keys, bans = store.column('champion_key')[mask].astype(np.int64), store.column('ban')[mask].astype(np.int64)
+    ban_counts = np.zeros(size)
+    if bans.any():
+        key_codes = np.full(max(keys.max(), bans.max()) + 1, -1)
+        key_codes[keys] = champion
+        banned = key_codes[bans]
+        valid = (bans > 0) & (banned >= 0)
+        # Paires (partie, champion) triées puis dédoublonnées par rupture
+        pairs = np.sort(match_index[valid] * size + banned[valid])
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        ban_counts = np.bincount(pairs % size, minlength=size).astype(float)
+
+    # Taux de victoire ramené vers 50% pour les champions peu joués
+    adjusted = (wins + min_games * 0.5) / (games + min_games)
+    pick_rates = games / matches
+    ban_rates = ban_counts / matches
+    scores = (adjusted - 0.5) * 100 + PRESENCE_WEIGHT * (pick_rates + ban_rates) * 100
+
+    tiers = {}
+    for role_index, role_name in enumerate(ROLES):
+        ranked = np.flatnonzero(games[role_index] >= min_games)
+        if not len(ranked):
+            continue
+        ranked = ranked[np.argsort(-scores[role_index, ranked], kind='stable')]
+        labels = _assign_tiers(scores[role_index, ranked])
+        tiers[role_name] = [
+            TierEntry(store.champions[code], role_name, tier, int(games[role_index, code]),
+                      round(float(wins[role_index, code] / games[role_index, code]) * 100, 1),
+                      round(float(pick_rates[role_index, code]) * 100, 1),
+                      round(float(ban_rates[code]) * 100, 1),
+                      round(float(scores[role_index, code]), 2))
+            for code, tier in zip(ranked, labels)
+        ]
+    return matches, tiers
+
+
+class TierListService:
+    def __init__(self, store_path: str, min_games: int = 50, queues: Sequence[int] = (),
+                 display_name: Optional[Callable[[str], str]] = None):
+        """Tiers du stockage de store_path, recalculés seulement quand de nouvelles parties sont validées"""
+        self.store_path = store_path
+        self.min_games = min_games
+        self.queues = tuple(queues)
+        self.display_name = display_name or (lambda champion: champion)
+        self._store = None
+        self._version = None  # lignes validées lors du dernier calcul
+        self._tiers = {}  # patch -> (parties, tiers par rôle)
+        self._rendered = {}  # (patch, rôle ou None, champion ou None) -> texte
+        self._lock = threading.Lock()
+
+    def _open(self) -> Optional[MatchStore]:
+        """Stockage en lecture seule (None tant qu'aucune ingestion n'a été validée) ; caches vidés s'il a changé"""
+        if self._store is None:
+            if not os.path.exists(os.path.join(self.store_path, MANIFEST)):
+                return None
+            self._store = MatchStore(self.store_path, read_only=True)
+        else:
+            self._store.refresh()
+        if self._store.rows != self._version:
+            self._version = self._store.rows
+            self._tiers.clear()
+            self._rendered.clear()
+        return self._store if len(self._store) else None
+
+    def latest_patch(self) -> Optional[str]:
+        with self._lock:
+            store = self._open()
+            return max(store.patches, key=patch_key) if store and store.patches else None
+
+    def tiers(self, patch: Optional[str] = None) -> Tuple[Optional[str], int, Dict[str, List[TierEntry]]]:
+        """Patch, nombre de parties et tiers par rôle (patch le plus récent par défaut)"""
+        with self._lock:
+            store = self._open()
+            if store is None or not store.patches:
+                return None, 0, {}
+            patch = patch or max(store.patches, key=patch_key)
+            if patch not in self._tiers:
+                self._tiers[patch] = compute_tiers(store, patch, self.queues, self.min_games)
+            matches, tiers = self._tiers[patch]
+            return patch, matches, tiers
+
+    def _cached(self, key: Tuple, render: Callable[[], Optional[str]]) -> Optional[str]:
+        with self._lock:
+            if key in self._rendered:
+                return self._rendered[key]
+        text = render()
+        with self._lock:
+            self._rendered[key] = text
+        return text
+
+    def _describe(self, entry: TierEntry) -> str:
+        return (f"{self.display_name(entry.champion)} ({entry.winrate:.1f}% V, "
+                f"{entry.pick_rate:.1f}% pick, {entry.ban_rate:.1f}% ban)")
+
+    def render_role(self, role: str, patch: Optional[str] = None, per_tier: int = 5) -> Optional[str]:
+        """Tier list d'un rôle, None sans données"""
+        patch, matches, tiers = self.tiers(patch)
+
+        def render() -> Optional[str]:
+            entries = tiers.get(role)
+            if not entries:
+                return None
+            lines = [f"Tier list {ROLE_LABELS.get(role, role)} - patch {patch} ({matches} parties) :"]
+            for tier, _ in TIER_THRESHOLDS:
+                in_tier = [entry for entry in entries if entry.tier == tier]
+                if in_tier:
+                    lines.append(f"{tier} : " + ", ".join(self._describe(entry) for entry in in_tier[:per_tier]))
+            return "\n".join(lines) + "\n"
+        return self._cached((patch, role, None), render) if patch else None
+
+    def render_overview(self, patch: Optional[str] = None, per_role: int = 3) -> Optional[str]:
+        """Meilleurs champions de chaque rôle"""
+        patch, matches, tiers = self.tiers(patch)
+
+        def render() -> Optional[str]:
+            if not tiers:
+                return None
+            lines = [f"Champions les plus forts - patch {patch} ({matches} parties) :"]
+            for role in ROLES:
+                if tiers.get(role):
+                    lines.append(f"- {ROLE_LABELS[role]} : " + ", ".join(
+                        f"{self.display_name(entry.champion)} ({entry.tier})" for entry in tiers[role][:per_role]))
+            return "\n".join(lines) + "\n"
+        return self._cached((patch, None, None), render) if patch else None
+
+    def render_champion(self, champion: str, patch: Optional[str] = None) -> Optional[str]:
+        """Tier et taux d'un champion dans chacun des rôles où il est classé"""
+        patch, matches, tiers = self.tiers(patch)
+
+        def render() -> Optional[str]:
+            entries = [entry for role in ROLES for entry in tiers.get(role, []) if entry.champion == champion]
+            if not entries:
+                return None
+            lines = [f"{self.display_name(champion)} - patch {patch} ({matches} parties) :"]
+            for entry in sorted(entries, key=lambda entry: -entry.games):
+                lines.append(f"- {ROLE_LABELS[entry.role]} : tier {entry.tier}, {entry.winrate:.1f}% de victoires, "
+                             f"{entry.pick_rate:.1f}% de sélection, {entry.ban_rate:.1f}% de bannissement "
+                             f"({entry.games} parties)")
+            return "\n".join(lines) + "\n"
+        return self._cached((patch, None, champion), render) if patch else None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_tier_list_service(riot_api=None) -> TierListService:
+    """Retourne le service partagé ; noms affichés depuis le snapshot Data Dragon de riot_api"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                config = Config()
+                display_name = None
+                if riot_api is not None:
+                    def display_name(champion: str) -> str:
+                        return (riot_api.snapshot.get_champion(champion) or {}).get('name', champion)
+                _service = TierListService(config.MATCH_STORE_DIR, config.TIER_MIN_GAMES,
+                                           config.TIER_QUEUES, display_name)
+    return _service
+
+
+def reset_tier_list_service() -> None:
+    """Supprime le service partagé (utilisé par les tests)"""
+    global _service
+    with _service_lock:
+        _service = None
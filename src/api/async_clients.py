@@ -0,0 +1,100 @@
+"""
+Clients asynchrones pour les API Riot et HuggingFace.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.config.config import Config
+from src.api.riot_api import RiotAPI
+from src.api.huggingface_api import HuggingFaceAPI
+from src.utils.champion_index import ChampionIndex
+from src.utils.tracing import traced
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Pool de threads partagé pour les appels réseau bloquants"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=Config().ASYNC_WORKERS,
+                                               thread_name_prefix="lolchatbot-io")
+    return _executor
+
+
+async def run_blocking(func: Callable, *args) -> Any:
+    """Exécute un appel bloquant sans bloquer la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    # Contexte copié : les étapes exécutées dans le pool restent rattachées à la requête tracée
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), partial(context.run, func, *args))
+
+
+class AsyncRiotAPI:
+    def __init__(self, riot_api: Optional[RiotAPI] = None):
+        """Client Riot asynchrone partageant le cache du client synchrone"""
+        self.riot_api = riot_api or RiotAPI()
+        # Requêtes en cours, pour fusionner les recherches dupliquées
+        self._inflight = {}
+
+    async def _coalesce(self, key: tuple, func: Callable, *args) -> Any:
+        """Lance func une seule fois par clé tant qu'un appel identique est en cours"""
+        loop = asyncio.get_running_loop()
+        inflight_key = (id(loop), key)
+        future = self._inflight.get(inflight_key)
+        if future is None:
+            future = loop.run_in_executor(get_executor(), partial(contextvars.copy_context().run, func, *args))
+            self._inflight[inflight_key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        return await asyncio.shield(future)
+
+    def _champion_key(self, champion_name: str) -> str:
+        champion_id = self.riot_api.get_champion_index().resolve(champion_name)
+        return champion_id or ChampionIndex.normalize(champion_name)
+
+    async def get_champion_info(self, champion_name: str) -> Optional[Dict]:
+        """Récupère les informations d'un champion"""
+        if self.riot_api.snapshot.is_loaded:
+            # Données sur disque déjà chargées : aucun appel bloquant
+            return self.riot_api.get_champion_info(champion_name)
+        return await self._coalesce(('champion', self._champion_key(champion_name)),
+                                    self.riot_api.get_champion_info, champion_name)
+
+    async def get_champion_matchups(self, champion_name: str, role: str) -> Optional[Dict[str, List[str]]]:
+        """Récupère les matchups d'un champion pour un rôle"""
+        return await self._coalesce(('matchups', self._champion_key(champion_name), role),
+                                    self.riot_api.get_champion_matchups, champion_name, role)
+
+    @traced('riot.prefetch')
+    async def prefetch(self, champion_names: Iterable[Optional[str]]) -> List[Optional[Dict]]:
+        """Récupère en parallèle plusieurs champions (doublons ignorés)"""
+        unique_names = list(dict.fromkeys(name for name in champion_names if name))
+        return await asyncio.gather(*(self.get_champion_info(name) for name in unique_names))
+
+
+class AsyncHuggingFaceAPI:
+    def __init__(self, huggingface_api: Optional[HuggingFaceAPI] = None,
+                 async_riot_api: Optional[AsyncRiotAPI] = None):
+        """Client HuggingFace asynchrone"""
+        self.huggingface_api = huggingface_api or HuggingFaceAPI()
+        self.async_riot_api = async_riot_api or AsyncRiotAPI(self.huggingface_api.riot_api)
+
+    async def get_response(self, query: str, session_context: Optional[List[str]] = None,
+                           history: Optional[List[Tuple[str, str]]] = None) -> Optional[str]:
+        """Obtient une réponse du modèle sans bloquer la boucle d'événements"""
+        try:
+            # Récupérer en parallèle les champions mentionnés avant de construire le prompt
+            champion_index = self.async_riot_api.riot_api.get_champion_index()
+            await self.async_riot_api.prefetch(champion_index.find_champions(query))
+            full_prompt = await run_blocking(self.huggingface_api.build_prompt, query, session_context, history)
+            return await run_blocking(self.huggingface_api.generate, full_prompt)
+        except Exception as e:
+            print(f"Erreur lors de l'appel à HuggingFace: {str(e)}")
+            return None
@@ -0,0 +1,161 @@
+"""
+Ordonnanceur de micro-lots : regroupe les prompts de toutes les sessions avant la génération.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.utils.tracing import LatencyHistogram
+
+
+class MicroBatchScheduler:
+    def __init__(self, run_batch: Callable[[List[str]], List[Optional[str]]], max_batch: int = 8,
+                 window: float = 0.01, queue_size: int = 64, concurrency: int = 1,
+                 queue_timeout: float = 30, name: str = "lolchatbot-batch"):
+        """File partagée de prompts ; run_batch traite un lot et retourne une réponse par prompt"""
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.window = window
+        self.queue_size = queue_size
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        # File bornée : au-delà, les nouveaux prompts sont refusés plutôt que d'attendre indéfiniment
+        self._queue = queue.Queue(maxsize=queue_size)
+        # Un lot n'est formé que lorsqu'un emplacement est libre : la file se remplit pendant l'attente
+        self._slots = threading.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=name)
+        self._closed = False
+        # Métriques
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.in_flight = 0
+        self.batch_sizes = Counter()
+        self.wait_histogram = LatencyHistogram()
+        self._lock = threading.Lock()
+        self._dispatcher = threading.Thread(target=self._dispatch, name=name, daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, prompt: str) -> Future:
+        """Ajoute un prompt à la file ; lève queue.Full si elle reste saturée après queue_timeout"""
+        if self._closed:
+            raise RuntimeError("Ordonnanceur de génération arrêté")
+        future = Future()
+        try:
+            self._queue.put((prompt, future, time.perf_counter()), timeout=self.queue_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise
+        with self._lock:
+            self.submitted += 1
+        return future
+
+    def _collect(self, first) -> List:
+        """Complète le lot avec les prompts arrivés pendant la fenêtre (jusqu'à max_batch)"""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch(self) -> None:
+        while True:
+            self._slots.acquire()
+            item = self._queue.get()
+            if item is None:
+                self._slots.release()
+                return
+            batch = self._collect(item)
+            # Les prompts annulés entre-temps ne sont pas envoyés
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                self._slots.release()
+                continue
+            now = time.perf_counter()
+            with self._lock:
+                self.batches += 1
+                self.in_flight += 1
+                self.batch_sizes[len(batch)] += 1
+            for _, _, queued_at in batch:
+                self.wait_histogram.observe((now - queued_at) * 1000)
+            try:
+                self._executor.submit(self._run, batch)
+            except RuntimeError as e:
+                self._finish(batch, error=e)
+
+    def _run(self, batch: List) -> None:
+        try:
+            results = self.run_batch([prompt for prompt, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"{len(results)} réponses pour un lot de {len(batch)} prompts")
+        except Exception as e:
+            self._finish(batch, error=e)
+            return
+        self._finish(batch, results=results)
+
+    def _finish(self, batch: List, results: Optional[List] = None, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if error is not None:
+                self.failed += len(batch)
+        self._slots.release()
+        for i, (_, future, _) in enumerate(batch):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[i])
+
+    def queue_depth(self) -> int:
+        """Nombre de prompts en attente d'un lot"""
+        return self._queue.qsize()
+
+    def saturation(self) -> float:
+        """Taux de remplissage de la file (1.0 = les nouveaux prompts sont refusés)"""
+        return self.queue_depth() / self.queue_size if self.queue_size > 0 else 0.0
+
+    def stats(self) -> Dict:
+        """Retourne les métriques de file d'attente et de regroupement"""
+        with self._lock:
+            batched = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                'queue_depth': self.queue_depth(),
+                'queue_size': self.queue_size,
+                'saturation': round(self.saturation(), 3),
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'batches': self.batches,
+                'mean_batch_size': round(batched / self.batches, 2) if self.batches else None,
+                'batch_sizes': dict(sorted(self.batch_sizes.items())),
+                'queue_wait': self.wait_histogram.to_dict()
+            }
+
+    def close(self) -> None:
+        """Arrête le dispatcher ; les prompts encore en file échouent"""
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("Ordonnanceur de génération arrêté"))
+        self._queue.put(None)
+        self._dispatcher.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
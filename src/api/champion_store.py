@@ -0,0 +1,119 @@
+"""
+Stockage partagé des données de champions pour tout le processus.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.config.config import Config
+from src.utils.champion_index import ChampionIndex
+
+# Valeur renvoyée par get() lorsqu'une clé n'est pas en cache
+MISSING = object()
+
+
+class ChampionStore:
+    def __init__(self, max_size: int = 256, ttl: float = 86400, negative_ttl: float = 300):
+        """Cache LRU borné, invalidé à chaque changement de version Data Dragon"""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.version = None
+        # Index des noms partagé par toutes les sessions
+        self.index = None
+        self.index_retry_at = 0.0
+        self.index_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # clé -> (valeur, version, expiration)
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return ChampionIndex.normalize(name)
+
+    def set_version(self, version: str) -> None:
+        """Change la version courante et purge les entrées d'une autre version"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            self.index = None
+            self.index_retry_at = 0.0
+
+    def get(self, name: str) -> Any:
+        """Retourne les données en cache, None pour un non-champion connu, MISSING sinon"""
+        key = self._key(name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, version, expires_at = entry
+                if version == self.version and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, name: str, value: Optional[Dict]) -> None:
+        """Met en cache un champion, ou None pour mémoriser une absence"""
+        ttl = self.ttl if value is not None else self.negative_ttl
+        key = self._key(name)
+        with self._lock:
+            self._entries[key] = (value, self.version, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vide le cache et l'index"""
+        with self._lock:
+            self._entries.clear()
+            self.index = None
+            self.index_retry_at = 0.0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du cache"""
+        total = self.hits + self.misses
+        return {
+            'version': self.version,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_champion_store() -> ChampionStore:
+    """Retourne le stockage de champions partagé par le processus"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = Config()
+                _store = ChampionStore(
+                    max_size=config.CHAMPION_CACHE_SIZE,
+                    ttl=config.CHAMPION_CACHE_TTL,
+                    negative_ttl=config.CHAMPION_NEGATIVE_TTL
+                )
+    return _store
+
+
+def reset_champion_store() -> None:
+    """Supprime le stockage partagé (utilisé par les tests)"""
+    global _store
+    with _store_lock:
+        _store = None
@@ -0,0 +1,257 @@
+"""
+Copie locale et versionnée des données Data Dragon.
+"""
+import contextlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.api.http_client import HttpClient, get_http_client
+from src.config.config import Config
+from src.utils.files import atomic_write
+
+# Champs conservés pour chaque champion (le reste de championFull.json est ignoré)
+CHAMPION_FIELDS = (
+    'id', 'key', 'name', 'title', 'lore', 'blurb', 'tags', 'partype',
+    'info', 'stats', 'passive', 'spells', 'allytips', 'enemytips'
+)
+SPELL_FIELDS = (
+    'id', 'name', 'description', 'tooltip', 'maxrank', 'cooldown',
+    'cost', 'costType', 'range'
+)
+
+# Champs conservés pour chaque objet de item.json
+ITEM_FIELDS = (
+    'name', 'plaintext', 'gold', 'tags', 'stats', 'from', 'into', 'maps',
+    'depth', 'requiredChampion', 'inStore', 'consumed'
+)
+# Délai avant de retenter le chargement des objets après un échec (secondes)
+ITEMS_RETRY_DELAY = 30
+
+_VERSION_PATTERN = re.compile(r"^\d+(?:\.\d+)*$")
+
+
+def _version_key(version: str) -> tuple:
+    return tuple(int(part) for part in version.split('.'))
+
+
+def compact_champion(champion_data: Dict) -> Dict:
+    """Réduit les données d'un champion aux champs utilisés par le chatbot"""
+    compact = {field: champion_data[field] for field in CHAMPION_FIELDS if field in champion_data}
+    compact['passive'] = {
+        'name': champion_data['passive']['name'],
+        'description': champion_data['passive']['description']
+    }
+    compact['spells'] = [
+        {field: spell[field] for field in SPELL_FIELDS if field in spell}
+        for spell in champion_data['spells']
+    ]
+    return compact
+
+
+def compact_item(item_data: Dict) -> Dict:
+    """Réduit les données d'un objet aux champs utilisés (la description HTML n'est pas gardée)"""
+    compact = {field: item_data[field] for field in ITEM_FIELDS if field in item_data}
+    compact['mythic'] = 'rarityMythic' in item_data.get('description', '')
+    return compact
+
+
+class DDragonSnapshot:
+    def __init__(self, cache_dir: str, lang: str = "fr_FR",
+                 base_url: str = "https://ddragon.leagueoflegends.com",
+                 http: Optional[HttpClient] = None):
+        """Snapshot Data Dragon stocké dans cache_dir/<version>/<lang>/"""
+        self.cache_dir = cache_dir
+        self.lang = lang
+        self.base_url = base_url
+        self._http = http
+        self.version = None
+        self.champions = {}
+        self.online = True  # téléchargements autorisés (voir sync)
+        self._items = None  # chargés à la première demande
+        self._items_retry_at = 0.0
+        self._items_lock = threading.Lock()
+
+    @property
+    def http(self) -> HttpClient:
+        # Relu à chaque appel : le client d'avant le fork est fermé par reset_http_client
+        return self._http or get_http_client()
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self.champions)
+
+    def _path(self, version: str, filename: str) -> str:
+        return os.path.join(self.cache_dir, version, self.lang, filename)
+
+    def has_version(self, version: str) -> bool:
+        """Indique si un patch est déjà présent sur le disque"""
+        return os.path.exists(self._path(version, "champions.pickle"))
+
+    def local_versions(self) -> List[str]:
+        """Liste les patchs présents sur le disque, du plus ancien au plus récent"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        versions = [v for v in os.listdir(self.cache_dir)
+                    if _VERSION_PATTERN.match(v) and (
+                        self.has_version(v) or os.path.exists(self._path(v, "championFull.json")))]
+        return sorted(versions, key=_version_key)
+
+    def fetch_latest_version(self) -> Optional[str]:
+        """Récupère la dernière version publiée de Data Dragon"""
+        try:
+            response = self.http.get(f"{self.base_url}/api/versions.json", endpoint='ddragon')
+            if response.status_code == 200:
+                return response.json()[0]
+        except Exception as e:
+            print(f"Erreur lors de la récupération de la version Data Dragon: {e}")
+        return None
+
+    def download(self, version: str) -> bool:
+        """Télécharge championFull.json pour un patch et l'enregistre sur le disque"""
+        try:
+            url = f"{self.base_url}/cdn/{version}/data/{self.lang}/championFull.json"
+            response = self.http.get(url, endpoint='ddragon', timeout=(3.05, 60))
+            if response.status_code != 200:
+                return False
+            os.makedirs(os.path.dirname(self._path(version, "championFull.json")), exist_ok=True)
+            self._write(self._path(version, "championFull.json"), response.content)
+            return self.build(version)
+        except Exception as e:
+            print(f"Erreur lors du téléchargement du snapshot {version}: {e}")
+            return False
+
+    def build(self, version: str) -> bool:
+        """Pré-analyse championFull.json en un fichier compact rapide à charger"""
+        try:
+            with open(self._path(version, "championFull.json"), encoding="utf-8") as f:
+                data = json.load(f)['data']
+            champions = {champion['id']: compact_champion(champion) for champion in data.values()}
+            payload = pickle.dumps({'version': version, 'champions': champions},
+                                   protocol=pickle.HIGHEST_PROTOCOL)
+            self._write(self._path(version, "champions.pickle"), payload)
+            return True
+        except Exception as e:
+            print(f"Erreur lors de la construction du snapshot {version}: {e}")
+            return False
+
+    @staticmethod
+    def _write(path: str, content: bytes) -> None:
+        # Écriture atomique pour ne jamais laisser un fichier à moitié écrit, même entre processus
+        atomic_write(path, content)
+
+    def load(self, version: str) -> bool:
+        """Charge un patch depuis le disque"""
+        try:
+            if not self.has_version(version) and not self.build(version):
+                return False
+            with open(self._path(version, "champions.pickle"), "rb") as f:
+                payload = pickle.load(f)
+            self.champions = payload['champions']
+            self.version = payload['version']
+            self._items = None
+            return True
+        except Exception as e:
+            print(f"Erreur lors du chargement du snapshot {version}: {e}")
+            return False
+
+    def sync(self, version: Optional[str] = None, online: bool = True) -> bool:
+        """Charge le patch demandé (ou le plus récent), en le téléchargeant si besoin"""
+        self.online = online
+        target = version
+        if target is None and online:
+            target = self.fetch_latest_version()
+        if target is not None and not self.has_version(target):
+            if not (online and self.download(target)) and not os.path.exists(
+                    self._path(target, "championFull.json")):
+                target = None
+        if target is None:
+            # Hors ligne : utiliser le patch le plus récent déjà présent
+            versions = self.local_versions()
+            if not versions:
+                return False
+            target = versions[-1]
+        if target == self.version:
+            return True
+        return self.load(target)
+
+    def get_all_champions(self) -> Dict[str, Dict]:
+        """Retourne tous les champions du snapshot"""
+        return self.champions
+
+    def get_champion(self, champion_id: str) -> Optional[Dict]:
+        """Retourne les données brutes d'un champion"""
+        return self.champions.get(champion_id)
+
+    def _load_items(self, version: str) -> Optional[Dict[str, Dict]]:
+        """Objets d'un patch : fichier compact, sinon item.json (téléchargé si absent et autorisé)"""
+        pickle_path, json_path = self._path(version, "items.pickle"), self._path(version, "item.json")
+        try:
+            if os.path.exists(pickle_path):
+                try:
+                    with open(pickle_path, "rb") as f:
+                        return pickle.load(f)
+                except Exception as e:
+                    # Fichier compact illisible (tronqué...) : reconstruit depuis item.json
+                    print(f"Erreur lors de la lecture de {pickle_path}, reconstruction: {e}")
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(pickle_path)
+            if not os.path.exists(json_path):
+                if not self.online:
+                    return None
+                url = f"{self.base_url}/cdn/{version}/data/{self.lang}/item.json"
+                response = self.http.get(url, endpoint='ddragon')
+                if response.status_code != 200:
+                    return None
+                os.makedirs(os.path.dirname(json_path), exist_ok=True)
+                self._write(json_path, response.content)
+            with open(json_path, encoding="utf-8") as f:
+                data = json.load(f)['data']
+            items = {item_id: compact_item(item) for item_id, item in data.items()}
+            self._write(pickle_path, pickle.dumps(items, protocol=pickle.HIGHEST_PROTOCOL))
+            return items
+        except Exception as e:
+            print(f"Erreur lors du chargement des objets {version}: {e}")
+            return None
+
+    def get_items(self) -> Dict[str, Dict]:
+        """Objets du patch chargé (item.json), lus à la première demande"""
+        if self._items is None and self.version and time.monotonic() >= self._items_retry_at:
+            with self._items_lock:
+                if self._items is None and time.monotonic() >= self._items_retry_at:
+                    items = self._load_items(self.version)
+                    if items is None:
+                        # Indisponible : ne pas réessayer à chaque question
+                        self._items_retry_at = time.monotonic() + ITEMS_RETRY_DELAY
+                    else:
+                        self._items = items
+        return self._items or {}
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> DDragonSnapshot:
+    """Retourne le snapshot partagé, synchronisé une fois au démarrage du processus"""
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                config = Config()
+                snapshot = DDragonSnapshot(config.DDRAGON_CACHE_DIR, config.DDRAGON_LANG,
+                                           config.DDRAGON_URL)
+                snapshot.sync(config.DDRAGON_VERSION, online=config.DDRAGON_SYNC)
+                _snapshot = snapshot
+    return _snapshot
+
+
+def reset_snapshot() -> None:
+    """Supprime le snapshot partagé (utilisé par les tests)"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
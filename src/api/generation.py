@@ -0,0 +1,377 @@
+"""
+Moteurs de génération de texte : endpoint HuggingFace distant ou modèle local sur CPU.
+"""
+import json
+import queue
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.config.config import Config
+from src.api.batching import MicroBatchScheduler
+from src.api.http_client import HttpClient, get_http_client
+
+# Paramètres de génération communs à tous les moteurs
+GENERATION_PARAMETERS = {
+    "max_new_tokens": 500,
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "do_sample": True,
+    "return_full_text": False,
+    "stop": ["Question:", "\n\n"]
+}
+
+# Erreurs client qui ne dépendent pas de la forme des inputs (clé refusée, limite de débit)
+UNRETRIED_STATUSES = (401, 403, 429)
+# Liste d'inputs refusée par l'endpoint (validation) : les lots sont abandonnés
+LIST_REJECTED_STATUS = 422
+
+
+def clean_generated_text(text: str) -> str:
+    """Nettoie le texte généré (retire l'écho éventuel du prompt)"""
+    text = (text or "").strip()
+    if "Réponse:" in text:
+        text = text.split("Réponse:")[1].strip()
+    return text
+
+
+class GenerationBackend(ABC):
+    """Interface commune des moteurs de génération"""
+
+    @abstractmethod
+    def generate(self, prompt: str) -> Optional[str]:
+        """Réponse au prompt, None en cas d'erreur"""
+
+    def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """Génère une réponse par prompt"""
+        return [self.generate(prompt) for prompt in prompts]
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Par défaut, la réponse complète en un seul morceau"""
+        text = self.generate(prompt)
+        if text:
+            yield text
+
+    def stats(self) -> Dict:
+        """Métriques de file d'attente (vide si le moteur ne regroupe pas les prompts)"""
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class RemoteBackend(GenerationBackend):
+    def __init__(self, api_url: str, api_key: Optional[str] = None, http: Optional[HttpClient] = None):
+        """Endpoint d'inférence HuggingFace"""
+        self.api_url = api_url
+        self._http = http
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        # Passe à False dès que l'endpoint refuse une liste d'inputs
+        self.supports_lists = True
+
+    @property
+    def http(self) -> HttpClient:
+        # Relu à chaque appel : le client d'avant le fork est fermé par reset_http_client
+        return self._http or get_http_client()
+
+    def generate(self, prompt: str) -> Optional[str]:
+        """Envoie le prompt au modèle et nettoie le texte généré"""
+        payload = {"inputs": prompt, "parameters": GENERATION_PARAMETERS}
+        response = self.http.post(self.api_url, endpoint='huggingface', headers=self.headers, json=payload)
+        if response.status_code != 200:
+            print(f"Erreur HuggingFace {response.status_code}: {response.text}")
+            return None
+
+        result = response.json()
+        if isinstance(result, list) and len(result) > 0:
+            return clean_generated_text(result[0].get('generated_text', ''))
+        return None
+
+    def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """Envoie plusieurs prompts dans une seule requête (liste d'inputs)"""
+        if len(prompts) == 1 or not self.supports_lists:
+            return self._generate_each(prompts)
+        payload = {"inputs": prompts, "parameters": GENERATION_PARAMETERS}
+        response = self.http.post(self.api_url, endpoint='huggingface', headers=self.headers, json=payload)
+        if response.status_code == LIST_REJECTED_STATUS:
+            # Liste d'inputs refusée : un appel par prompt, désormais sans lot
+            print(f"Lots refusés par l'endpoint ({response.status_code}), un appel par prompt")
+            self.supports_lists = False
+            return self._generate_each(prompts)
+        if 400 <= response.status_code < 500 and response.status_code not in UNRETRIED_STATUSES:
+            # Lot refusé (prompt trop long, corps trop gros...) : ce lot seulement, prompt par prompt
+            print(f"Lot refusé par l'endpoint ({response.status_code}), un appel par prompt")
+            return self._generate_each(prompts)
+        if response.status_code != 200:
+            print(f"Erreur HuggingFace {response.status_code}: {response.text}")
+            return [None] * len(prompts)
+
+        result = response.json()
+        if not isinstance(result, list) or len(result) != len(prompts):
+            # Endpoint sans support des lots : un appel par prompt
+            self.supports_lists = False
+            return self._generate_each(prompts)
+        texts = []
+        for item in result:
+            # Selon l'endpoint : [{"generated_text": ...}] ou [[{"generated_text": ...}]]
+            if isinstance(item, list):
+                item = item[0] if item else {}
+            texts.append(clean_generated_text(item.get('generated_text', '')) if isinstance(item, dict) else None)
+        return texts
+
+    def _generate_each(self, prompts: List[str]) -> List[Optional[str]]:
+        """Un appel par prompt, envoyés simultanément (pas d'attente en série dans le lot)"""
+        if len(prompts) == 1:
+            return [self.generate(prompts[0])]
+        with ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix="lolchatbot-prompt") as pool:
+            return list(pool.map(self.generate, prompts))
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Envoie le prompt en mode streaming et produit les tokens au fil de l'eau (SSE)"""
+        payload = {"inputs": prompt, "parameters": GENERATION_PARAMETERS, "stream": True}
+        response = self.http.post(self.api_url, endpoint='huggingface', headers=self.headers,
+                                  json=payload, stream=True)
+        try:
+            if response.status_code != 200:
+                print(f"Erreur HuggingFace {response.status_code}: {response.text}")
+                return
+
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                # Format server-sent events : "data: {...}"
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if 'error' in event:
+                    print(f"Erreur HuggingFace: {event['error']}")
+                    break
+                token = event.get('token') or {}
+                if token.get('text') and not token.get('special'):
+                    yield token['text']
+                if event.get('generated_text') is not None:
+                    break
+        finally:
+            response.close()
+
+
+class BatchingBackend(GenerationBackend):
+    def __init__(self, backend: GenerationBackend, max_batch: int = 8, window: float = 0.01,
+                 queue_size: int = 64, concurrency: int = 4, queue_timeout: float = 30):
+        """Regroupe les appels concurrents au moteur en micro-lots (generate_batch)"""
+        self.backend = backend
+        self.scheduler = MicroBatchScheduler(backend.generate_batch, max_batch=max_batch, window=window,
+                                             queue_size=queue_size, concurrency=concurrency,
+                                             queue_timeout=queue_timeout)
+
+    @property
+    def api_url(self) -> Optional[str]:
+        return getattr(self.backend, 'api_url', None)
+
+    @api_url.setter
+    def api_url(self, url: str) -> None:
+        self.backend.api_url = url
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return getattr(self.backend, 'headers', {})
+
+    def submit(self, prompt: str) -> Future:
+        return self.scheduler.submit(prompt)
+
+    def generate(self, prompt: str) -> Optional[str]:
+        if not getattr(self.backend, 'supports_lists', True):
+            # Endpoint sans lots : requêtes indépendantes, sans passer par la file
+            return self.backend.generate(prompt)
+        try:
+            return self.submit(prompt).result()
+        except queue.Full:
+            print("Erreur de génération: file d'attente pleine")
+            return None
+
+    def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        return self.backend.generate_batch(prompts)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        # Le streaming reste une requête par session
+        yield from self.backend.generate_stream(prompt)
+
+    def queue_depth(self) -> int:
+        return self.scheduler.queue_depth()
+
+    def stats(self) -> Dict:
+        return self.scheduler.stats()
+
+    def close(self) -> None:
+        self.scheduler.close()
+        self.backend.close()
+
+
+class TransformersEngine:
+    def __init__(self, model_name: str, max_new_tokens: int = 256):
+        """Petit modèle causal transformers exécuté sur CPU"""
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        self.torch = torch
+        self.max_new_tokens = max_new_tokens
+        # Remplissage à gauche : toutes les générations d'un lot commencent au même index
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, padding_side="left")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32).eval()
+
+    def generate_batch(self, prompts: List[str]) -> List[str]:
+        with self.torch.no_grad():
+            encoded = self.tokenizer(prompts, return_tensors="pt", padding=True)
+            output = self.model.generate(
+                **encoded,
+                max_new_tokens=self.max_new_tokens,
+                do_sample=GENERATION_PARAMETERS["do_sample"],
+                temperature=GENERATION_PARAMETERS["temperature"],
+                top_p=GENERATION_PARAMETERS["top_p"],
+                pad_token_id=self.tokenizer.pad_token_id
+            )
+        new_tokens = output[:, encoded["input_ids"].shape[1]:]
+        texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        return [text.split("Question:")[0] for text in texts]
+
+
+class LlamaCppEngine:
+    def __init__(self, model_path: str, max_new_tokens: int = 256, n_ctx: int = 4096):
+        """Modèle GGUF quantifié via llama.cpp"""
+        from llama_cpp import Llama
+        self.max_new_tokens = max_new_tokens
+        self.model = Llama(model_path=model_path, n_ctx=n_ctx, verbose=False)
+
+    def generate_batch(self, prompts: List[str]) -> List[str]:
+        # llama.cpp traite les prompts l'un après l'autre dans le même processus
+        return [
+            self.model(prompt, max_tokens=self.max_new_tokens,
+                       temperature=GENERATION_PARAMETERS["temperature"],
+                       top_p=GENERATION_PARAMETERS["top_p"],
+                       stop=GENERATION_PARAMETERS["stop"])["choices"][0]["text"]
+            for prompt in prompts
+        ]
+
+
+# Moteur chargé dans chaque processus de travail
+_worker_engine = None
+
+
+def _init_worker(engine_factory: Callable, engine_options: Dict[str, Any]) -> None:
+    """Charge le modèle une seule fois au démarrage du processus"""
+    global _worker_engine
+    _worker_engine = engine_factory(**engine_options)
+
+
+def _worker_ready() -> bool:
+    return _worker_engine is not None
+
+
+def _worker_generate(prompts: List[str]) -> List[str]:
+    return _worker_engine.generate_batch(prompts)
+
+
+class LocalBackend(GenerationBackend):
+    def __init__(self, engine_factory: Callable, engine_options: Optional[Dict[str, Any]] = None,
+                 workers: int = 1, max_batch: int = 4, queue_size: int = 32, queue_timeout: float = 30,
+                 batch_window: float = 0.0):
+        """Modèle local dans un pool de processus ; les prompts concurrents sont regroupés par lots"""
+        self.workers = workers
+        self.max_batch = max_batch
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(engine_factory, engine_options or {}))
+        # Un lot par processus libre ; les prompts arrivés pendant une génération forment le lot suivant
+        self.scheduler = MicroBatchScheduler(self._run_batch, max_batch=max_batch, window=batch_window,
+                                             queue_size=queue_size, concurrency=workers,
+                                             queue_timeout=queue_timeout, name="lolchatbot-generation")
+
+    def preload(self, timeout: Optional[float] = None) -> bool:
+        """Démarre les processus et attend que le modèle soit chargé"""
+        futures = [self.pool.submit(_worker_ready) for _ in range(self.workers)]
+        return all(future.result(timeout=timeout) for future in futures)
+
+    def _run_batch(self, prompts: List[str]) -> List[str]:
+        return self.pool.submit(_worker_generate, prompts).result()
+
+    def submit(self, prompt: str) -> Future:
+        """Ajoute un prompt à la file ; lève queue.Full si elle est saturée"""
+        return self.scheduler.submit(prompt)
+
+    def generate(self, prompt: str) -> Optional[str]:
+        try:
+            return clean_generated_text(self.submit(prompt).result())
+        except queue.Full:
+            print("Erreur de génération locale: file d'attente pleine")
+            return None
+
+    def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        futures = [self.submit(prompt) for prompt in prompts]
+        return [clean_generated_text(future.result()) for future in futures]
+
+    def queue_depth(self) -> int:
+        return self.scheduler.queue_depth()
+
+    def stats(self) -> Dict:
+        return self.scheduler.stats()
+
+    def close(self) -> None:
+        self.scheduler.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_backend(config: Optional[Config] = None) -> GenerationBackend:
+    """Crée le moteur de génération choisi dans la configuration"""
+    config = config or Config()
+    if config.GENERATION_BACKEND == 'local':
+        model = config.LOCAL_MODEL
+        if model.endswith(".gguf"):
+            factory = LlamaCppEngine
+            options = {'model_path': model, 'max_new_tokens': config.LOCAL_MAX_NEW_TOKENS}
+        else:
+            factory = TransformersEngine
+            options = {'model_name': model, 'max_new_tokens': config.LOCAL_MAX_NEW_TOKENS}
+        backend = LocalBackend(factory, options, workers=config.LOCAL_WORKERS,
+                               max_batch=config.LOCAL_MAX_BATCH, queue_size=config.LOCAL_QUEUE_SIZE,
+                               batch_window=config.GENERATION_BATCH_WINDOW_MS / 1000)
+        try:
+            backend.preload()
+        except Exception as e:
+            print(f"Erreur lors du chargement du modèle local: {e}")
+        return backend
+    backend = RemoteBackend(config.HUGGINGFACE_MODEL_URL, config.HUGGINGFACE_API_KEY)
+    if config.GENERATION_MAX_BATCH <= 1:
+        return backend
+    # File commune à toutes les sessions : les appels simultanés partent en une seule requête
+    return BatchingBackend(backend, max_batch=config.GENERATION_MAX_BATCH,
+                           window=config.GENERATION_BATCH_WINDOW_MS / 1000,
+                           queue_size=config.GENERATION_QUEUE_SIZE,
+                           concurrency=config.GENERATION_CONCURRENCY)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_generation_backend() -> GenerationBackend:
+    """Retourne le moteur de génération partagé par le processus (modèle préchargé une fois)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def reset_generation_backend() -> None:
+    """Arrête et supprime le moteur partagé (utilisé par les tests)"""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+        _backend = None
@@ -0,0 +1,188 @@
+"""
+Client HTTP partagé : connexions persistantes, timeouts, retries et limitation de débit.
+"""
+import email.utils
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config.config import Config
+from src.utils.tracing import LatencyHistogram, count, span
+
+# Timeouts (connexion, lecture) en secondes par famille d'endpoints
+ENDPOINT_TIMEOUTS = {
+    'ddragon': (3.05, 15),
+    'riot': (3.05, 10),
+    'huggingface': (3.05, 60),
+    'chatbot': (3.05, 120),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Limites Riot par type de clé : (requêtes, fenêtre en secondes)
+RIOT_RATE_LIMITS = {
+    'development': [(20, 1), (100, 120)],
+    'production': [(500, 10), (30000, 600)],
+}
+
+# Codes HTTP pour lesquels la requête est retentée
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Attente maximale acceptée pour un en-tête Retry-After (secondes)
+MAX_RETRY_AFTER = 30
+
+
+class TokenBucket:
+    def __init__(self, capacity: int, period: float):
+        """Seau à jetons : capacity requêtes par période de period secondes"""
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """Consomme un jeton et retourne le délai à attendre avant de l'utiliser"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    def __init__(self, limits: List[Tuple[int, float]]):
+        """Combine plusieurs fenêtres de limitation (ex. 20/s et 100/2min)"""
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in limits]
+
+    def acquire(self) -> float:
+        """Bloque jusqu'à ce qu'une requête soit autorisée, retourne le temps attendu"""
+        delay = max((bucket.reserve() for bucket in self.buckets), default=0.0)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en délai"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    def __init__(self, pool_size: int = 10, max_retries: int = 2,
+                 backoff_base: float = 0.5, riot_key_type: str = 'development'):
+        """Session HTTP partagée avec pool de connexions keep-alive"""
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiters = {
+            'riot': RateLimiter(RIOT_RATE_LIMITS.get(riot_key_type, RIOT_RATE_LIMITS['development']))
+        }
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, endpoint: str) -> LatencyHistogram:
+        with self._lock:
+            if endpoint not in self.histograms:
+                self.histograms[endpoint] = LatencyHistogram()
+            return self.histograms[endpoint]
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        """Délai avant la prochaine tentative : Retry-After sinon backoff exponentiel avec jitter"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, MAX_RETRY_AFTER)
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def request(self, method: str, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """Envoie une requête avec timeout, limitation de débit et retries"""
+        kwargs.setdefault('timeout', ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT))
+        histogram = self._histogram(endpoint)
+        limiter = self.rate_limiters.get(endpoint)
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            start = time.perf_counter()
+            # Appels sortants de la requête en cours (retries compris)
+            count(f"http.{endpoint}")
+            try:
+                with span(f"http.{endpoint}"):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                histogram.observe((time.perf_counter() - start) * 1000, error=True)
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            retry = response.status_code in RETRY_STATUSES
+            histogram.observe((time.perf_counter() - start) * 1000, error=retry)
+            if not retry or attempt >= self.max_retries:
+                return response
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def get(self, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        return self.request("GET", url, endpoint, **kwargs)
+
+    def post(self, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        return self.request("POST", url, endpoint, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Retourne les histogrammes de latence par endpoint"""
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {endpoint: histogram.to_dict() for endpoint, histogram in histograms.items()}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Retourne le client HTTP partagé par le processus"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = Config()
+                _client = HttpClient(
+                    pool_size=config.HTTP_POOL_SIZE,
+                    max_retries=config.HTTP_MAX_RETRIES,
+                    backoff_base=config.HTTP_BACKOFF_BASE,
+                    riot_key_type=config.RIOT_KEY_TYPE
+                )
+    return _client
+
+
+def reset_http_client() -> None:
+    """Supprime le client partagé (utilisé par les tests)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
@@ -1,22 +1,25 @@
 """
 API HuggingFace pour le chatbot League of Legends.
 """
-import requests
-import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from src.config.config import Config
+from src.api.http_client import HttpClient, get_http_client
+from src.api.generation import GenerationBackend, get_generation_backend
+from src.api.prompt_builder import (
+    PromptBlock, get_prompt_builder, PRIORITY_CHAMPION, PRIORITY_ABILITIES,
+    PRIORITY_MATCHUPS, PRIORITY_SESSION, PRIORITY_HISTORY
+)
 from src.api.riot_api import RiotAPI
+from src.utils.tracing import count, traced
 
 class HuggingFaceAPI:
-    def __init__(self):
+    def __init__(self, riot_api: Optional[RiotAPI] = None, backend: Optional[GenerationBackend] = None):
         """Initialisation de l'API HuggingFace"""
         self.config = Config()
-        self.riot_api = RiotAPI()
-        self.api_url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.2"
-        self.headers = {
-            "Authorization": f"Bearer {self.config.HUGGINGFACE_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        # Réutiliser le client Riot du chatbot plutôt qu'en créer un second
+        self.riot_api = riot_api or RiotAPI()
+        # Moteur de génération partagé : endpoint distant ou modèle local (GENERATION_BACKEND)
+        self.backend = backend or get_generation_backend()
         
         # Prompt système pour guider le modèle
         self.system_prompt = """Tu es un expert de League of Legends qui répond exclusivement en français.
@@ -45,6 +48,12 @@ Format des réponses :
 
 N'invente JAMAIS d'informations. Utilise UNIQUEMENT les données fournies."""
 
+    @property
+    def http(self) -> HttpClient:
+        # Relu à chaque appel : le client d'avant le fork est fermé par reset_http_client
+        return get_http_client()
+
+    @traced('llm.riot_context')
     def _enrich_context_with_riot_data(self, query: str) -> Dict[str, Any]:
         """Enrichit le contexte avec les données de l'API Riot"""
         context = {}
@@ -52,9 +61,9 @@ N'invente JAMAIS d'informations. Utilise UNIQUEMENT les données fournies."""
         # Extraire les mots clés de la requête
         keywords = query.lower().split()
         
-        # Rechercher des informations sur les champions mentionnés
-        for word in keywords:
-            champion_info = self.riot_api.get_champion_info(word)
+        # Rechercher des informations sur les champions mentionnés (index local, sans requête)
+        for champion_id in self.riot_api.get_champion_index().find_champions(query):
+            champion_info = self.riot_api.get_champion_info(champion_id)
             if champion_info:
                 context['champion'] = champion_info
                 # Récupérer les statistiques enrichies
@@ -66,91 +75,103 @@ N'invente JAMAIS d'informations. Utilise UNIQUEMENT les données fournies."""
                 # Récupérer les matchups si un rôle est spécifié
                 for role in ['top', 'jungle', 'mid', 'bot', 'support']:
                     if role in keywords:
-                        matchups = self.riot_api.get_champion_matchups(word, role)
+                        matchups = self.riot_api.get_champion_matchups(champion_id, role)
                         if matchups:
                             context['matchups'] = matchups
                         break
         
         return context
 
-    def _format_riot_data_for_prompt(self, context: Dict[str, Any]) -> str:
-        """Formate les données Riot pour le prompt"""
-        if not context:
-            return ""
-            
-        formatted_data = "\nDonnées Riot actuelles :\n"
-        
-        if 'champion' in context:
-            champion = context['champion']
-            formatted_data += f"\nChampion : {champion['name']}\n"
-            formatted_data += f"Rôles : {', '.join(champion.get('tags', []))}\n"
-            
-            if 'stats' in context['champion']:
-                stats = context['champion']['stats']
-                formatted_data += "\nStatistiques de base :\n"
-                formatted_data += f"- PV : {stats['hp']} (+{stats['hpperlevel']})\n"
-                formatted_data += f"- Dégâts : {stats['attackdamage']} (+{stats['attackdamageperlevel']})\n"
-                formatted_data += f"- Armure : {stats['armor']} (+{stats['armorperlevel']})\n"
-            
-            if 'abilities' in context:
-                abilities = context['abilities']
-                formatted_data += "\nCapacités :\n"
-                if 'passive' in abilities:
-                    formatted_data += f"Passif - {abilities['passive']['name']}\n"
-                if 'spells' in abilities:
-                    for i, spell in enumerate(['Q', 'W', 'E', 'R']):
-                        if i < len(abilities['spells']):
-                            formatted_data += f"{spell} - {abilities['spells'][i]['name']}\n"
-            
-            if 'matchups' in context:
-                matchups = context['matchups']
-                formatted_data += "\nMatchups :\n"
-                if 'counter_picks' in matchups:
-                    formatted_data += f"Contres : {', '.join(matchups['counter_picks'][:3])}\n"
-                if 'good_against' in matchups:
-                    formatted_data += f"Avantagé contre : {', '.join(matchups['good_against'][:3])}\n"
-        
-        return formatted_data
+    def _riot_blocks(self, context: Dict[str, Any]) -> List[PromptBlock]:
+        """Découpe les données Riot en blocs de prompt (statistiques > capacités > matchups)"""
+        blocks = []
+        if 'champion' not in context:
+            return blocks
+
+        champion = context['champion']
+        lines = [f"- Champion : {champion['name']}", f"- Rôles : {', '.join(champion.get('tags', []))}"]
+        if 'stats' in champion:
+            stats = champion['stats']
+            lines += [
+                f"- PV : {stats['hp']} (+{stats['hpperlevel']})",
+                f"- Dégâts : {stats['attackdamage']} (+{stats['attackdamageperlevel']})",
+                f"- Armure : {stats['armor']} (+{stats['armorperlevel']})"
+            ]
+        blocks.append(PromptBlock("Données Riot actuelles", lines, PRIORITY_CHAMPION))
+
+        if 'abilities' in context:
+            abilities = context['abilities']
+            lines = []
+            if 'passive' in abilities:
+                lines.append(f"Passif - {abilities['passive']['name']}")
+            if 'spells' in abilities:
+                for spell, ability in zip(['Q', 'W', 'E', 'R'], abilities['spells']):
+                    lines.append(f"{spell} - {ability['name']}")
+            blocks.append(PromptBlock("Capacités", lines, PRIORITY_ABILITIES))
+
+        if 'matchups' in context:
+            matchups = context['matchups']
+            lines = []
+            if 'counter_picks' in matchups:
+                lines.append(f"Contres : {', '.join(matchups['counter_picks'][:3])}")
+            if 'good_against' in matchups:
+                lines.append(f"Avantagé contre : {', '.join(matchups['good_against'][:3])}")
+            blocks.append(PromptBlock("Matchups", lines, PRIORITY_MATCHUPS))
+        return blocks
+
+    @traced('llm.build_prompt')
+    def build_prompt(self, query: str, session_context: Optional[List[str]] = None,
+                     history: Optional[List[Tuple[str, str]]] = None) -> str:
+        """Construit le prompt complet : données Riot, contexte de session et historique sous le budget de tokens"""
+        # Les champions sont cherchés dans la question seule, pas dans l'historique
+        blocks = self._riot_blocks(self._enrich_context_with_riot_data(query))
+        if session_context:
+            blocks.append(PromptBlock("Contexte actuel", list(session_context), PRIORITY_SESSION))
+        if history:
+            blocks.append(PromptBlock("Historique de la conversation",
+                                      [f"Q: {q}\nR: {r}" for q, r in history],
+                                      PRIORITY_HISTORY, keep_recent=True))
+        # Préfixe système partagé : ses tokens ne sont comptés qu'une fois
+        return get_prompt_builder(self.system_prompt).build(query, blocks).text
+
+    @property
+    def api_url(self) -> Optional[str]:
+        """URL de l'endpoint distant (None pour un moteur local)"""
+        return getattr(self.backend, 'api_url', None)
+
+    @api_url.setter
+    def api_url(self, url: str) -> None:
+        self.backend.api_url = url
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return getattr(self.backend, 'headers', {})
+
+    @traced('llm.generate')
+    def generate(self, full_prompt: str) -> Optional[str]:
+        """Génère la réponse au prompt avec le moteur configuré"""
+        # Compté ici : l'appel HTTP peut partir d'un micro-lot, hors du contexte de la requête
+        count("llm.generate")
+        return self.backend.generate(full_prompt)
+
+    def generate_stream(self, full_prompt: str) -> Iterator[str]:
+        """Produit la réponse au fil de la génération"""
+        count("llm.generate")
+        yield from self.backend.generate_stream(full_prompt)
+
+    def stream_response(self, query: str, session_context: Optional[List[str]] = None,
+                        history: Optional[List[Tuple[str, str]]] = None) -> Iterator[str]:
+        """Obtient une réponse du modèle morceau par morceau"""
+        try:
+            yield from self.generate_stream(self.build_prompt(query, session_context, history))
+        except Exception as e:
+            print(f"Erreur lors de l'appel à HuggingFace: {str(e)}")
 
-    def get_response(self, query: str) -> Optional[str]:
+    def get_response(self, query: str, session_context: Optional[List[str]] = None,
+                     history: Optional[List[Tuple[str, str]]] = None) -> Optional[str]:
         """Obtient une réponse du modèle HuggingFace enrichie avec les données Riot"""
         try:
-            # Enrichir le contexte avec les données Riot
-            riot_context = self._enrich_context_with_riot_data(query)
-            formatted_riot_data = self._format_riot_data_for_prompt(riot_context)
-            
-            # Construire le prompt complet avec les données Riot
-            full_prompt = f"{self.system_prompt}\n{formatted_riot_data}\n\nQuestion: {query}\n\nRéponse:"
-            
-            # Paramètres de génération optimisés
-            payload = {
-                "inputs": full_prompt,
-                "parameters": {
-                    "max_new_tokens": 500,
-                    "temperature": 0.7,
-                    "top_p": 0.95,
-                    "do_sample": True,
-                    "return_full_text": False,
-                    "stop": ["Question:", "\n\n"]
-                }
-            }
-            
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-            response.raise_for_status()
-            
-            # Traiter la réponse
-            result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                generated_text = result[0].get('generated_text', '').strip()
-                
-                # Nettoyer la réponse
-                if "Réponse:" in generated_text:
-                    generated_text = generated_text.split("Réponse:")[1].strip()
-                
-                return generated_text
-            
-            return None
-            
+            return self.generate(self.build_prompt(query, session_context, history))
         except Exception as e:
             print(f"Erreur lors de l'appel à HuggingFace: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
\ No newline at end of file
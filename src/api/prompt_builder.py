@@ -0,0 +1,161 @@
+"""
+Assemblage du prompt envoyé au LLM : blocs de contexte dédupliqués sous un budget de tokens.
+"""
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.config.config import Config
+
+# Priorités des blocs (la plus petite est conservée en premier)
+PRIORITY_CHAMPION = 0
+PRIORITY_ABILITIES = 1
+PRIORITY_MATCHUPS = 2
+PRIORITY_SESSION = 3
+PRIORITY_HISTORY = 4
+
+# Mots et signes de ponctuation, pour l'estimation sans tokenizer
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class TokenCounter:
+    def __init__(self, tokenizer_name: Optional[str] = None):
+        """Compte les tokens avec le tokenizer du modèle s'il est disponible localement, sinon les estime"""
+        self.tokenizer = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+                # Fichiers déjà présents uniquement : aucun téléchargement pour compter des tokens
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, local_files_only=True)
+            except ImportError:
+                print("transformers non installé : estimation du nombre de tokens")
+            except Exception as e:
+                print(f"Erreur lors du chargement du tokenizer: {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        # Environ un token pour quatre caractères d'un mot, un par signe de ponctuation
+        return sum(1 + (len(piece) - 1) // 4 for piece in _PIECE_PATTERN.findall(text))
+
+
+@dataclass
+class PromptBlock:
+    """Bloc de contexte : un titre et des éléments (lignes, échanges) retirables un par un"""
+    title: str
+    items: List[str]
+    priority: int
+    # Quand le bloc est tronqué, garder les derniers éléments (historique) plutôt que les premiers
+    keep_recent: bool = False
+
+
+@dataclass
+class Prompt:
+    """Prompt assemblé et décompte des tokens"""
+    text: str
+    tokens: int
+    budget: int
+    dropped: List[str] = field(default_factory=list)
+
+
+def _normalize(item: str) -> str:
+    """Clé de déduplication : sans puces, casse, accents ni espaces superflus"""
+    text = unicodedata.normalize('NFKD', item.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lstrip('-• ').split())
+
+
+class PromptBuilder:
+    def __init__(self, system_prompt: str, max_tokens: int = 1024, counter: Optional[TokenCounter] = None):
+        """Préfixe système fixe (tokens comptés une seule fois) suivi des blocs qui tiennent dans le budget"""
+        self.counter = counter or TokenCounter()
+        self.max_tokens = max_tokens
+        self.prefix = system_prompt
+        self.prefix_tokens = self.counter.count(system_prompt)
+
+    @staticmethod
+    def _question(query: str) -> str:
+        return f"\n\nQuestion: {query}\n\nRéponse:"
+
+    def _fit(self, block: PromptBlock, items: List[str], budget: int) -> Tuple[List[str], int]:
+        """Éléments du bloc qui tiennent dans le budget, par ordre de priorité interne"""
+        header = f"\n{block.title} :\n"
+        used = self.counter.count(header)
+        if used >= budget:
+            return [], 0
+        ordered = reversed(items) if block.keep_recent else items
+        kept = []
+        for item in ordered:
+            cost = self.counter.count(item + "\n")
+            if used + cost > budget:
+                break
+            kept.append(item)
+            used += cost
+        if block.keep_recent:
+            kept.reverse()
+        return kept, used if kept else 0
+
+    def build(self, query: str, blocks: Optional[List[PromptBlock]] = None) -> Prompt:
+        """Assemble le prompt : préfixe, blocs dédupliqués par priorité, puis la question"""
+        question = self._question(query)
+        tokens = self.prefix_tokens + self.counter.count(question)
+        remaining = self.max_tokens - tokens
+        seen = {_normalize(query)}
+        sections: Dict[int, str] = {}
+        dropped = []
+        # Les blocs prioritaires réservent leur place (et leurs lignes) en premier
+        ordered = sorted(enumerate(blocks or []), key=lambda pair: pair[1].priority)
+        for position, block in ordered:
+            items = []
+            for item in block.items:
+                key = _normalize(item)
+                if key and key not in seen:
+                    seen.add(key)
+                    items.append(item)
+            if not items:
+                continue
+            kept, used = self._fit(block, items, remaining)
+            if len(kept) < len(items):
+                dropped.append(block.title)
+            if kept:
+                remaining -= used
+                tokens += used
+                sections[position] = f"\n{block.title} :\n" + "".join(f"{item}\n" for item in kept)
+        # Les blocs gardent leur ordre d'origine dans le prompt
+        context = "".join(sections[position] for position in sorted(sections))
+        text = f"{self.prefix}\n{context}{question}"
+        return Prompt(text=text, tokens=tokens, budget=self.max_tokens, dropped=dropped)
+
+
+_counter = None
+_builders = {}
+_builders_lock = threading.Lock()
+
+
+def get_prompt_builder(system_prompt: str) -> PromptBuilder:
+    """Retourne le constructeur partagé pour ce prompt système (tokenizer chargé une seule fois)"""
+    global _counter
+    builder = _builders.get(system_prompt)
+    if builder is None:
+        with _builders_lock:
+            builder = _builders.get(system_prompt)
+            if builder is None:
+                config = Config()
+                if _counter is None:
+                    _counter = TokenCounter(config.PROMPT_TOKENIZER)
+                builder = _builders[system_prompt] = PromptBuilder(
+                    system_prompt, max_tokens=config.PROMPT_MAX_TOKENS, counter=_counter
+                )
+    return builder
+
+
+def reset_prompt_builders() -> None:
+    """Supprime les constructeurs partagés (utilisé par les tests)"""
+    global _counter
+    with _builders_lock:
+        _builders.clear()
+        _counter = None
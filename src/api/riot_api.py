@@ -1,32 +1,43 @@
-import requests
+import time
 from src.config.config import Config
+from src.api.http_client import HttpClient, get_http_client
+from src.api.champion_store import get_champion_store, MISSING
+from src.api.ddragon_snapshot import get_snapshot
+from src.utils.champion_index import ChampionIndex
+from src.utils.tracing import count, traced
 from typing import Optional, Dict, List
 
+# Délai avant de retenter la construction de l'index après un échec (secondes)
+INDEX_RETRY_DELAY = 30
+
 class RiotAPI:
     def __init__(self):
         """Initialisation de l'API Riot"""
         self.config = Config()
         self.base_url = f"https://{self.config.REGION}.api.riotgames.com/lol"
-        self.ddragon_url = "http://ddragon.leagueoflegends.com/cdn/13.24.1"
+        # Snapshot local Data Dragon, synchronisé une fois par processus
+        self.snapshot = get_snapshot()
+        self.version = self.snapshot.version or self.config.DDRAGON_DEFAULT_VERSION
+        self.ddragon_url = f"{self.config.DDRAGON_URL}/cdn/{self.version}"
         self.headers = {
             "X-Riot-Token": self.config.RIOT_API_KEY
         }
-        # Cache pour les données des champions
-        self.champions_cache = {}
-        
-    def _get_latest_version(self) -> str:
-        """Récupère la dernière version de l'API"""
-        try:
-            response = requests.get("https://ddragon.leagueoflegends.com/api/versions.json")
-            return response.json()[0]
-        except:
-            return "13.24.1"  # Version par défaut
+        # Cache des champions partagé par toutes les instances du processus
+        self.store = get_champion_store()
+        self.store.set_version(self.version)
+
+    @property
+    def http(self) -> HttpClient:
+        # Relu à chaque appel : le client d'avant le fork est fermé par reset_http_client
+        return get_http_client()
     
     def get_all_champions(self) -> Dict:
         """Récupère la liste de tous les champions"""
+        if self.snapshot.is_loaded:
+            return self.snapshot.get_all_champions()
         try:
-            version = self._get_latest_version()
-            response = requests.get(f"{self.ddragon_url}/data/fr_FR/champion.json")
+            response = self.http.get(f"{self.ddragon_url}/data/{self.config.DDRAGON_LANG}/champion.json",
+                                     endpoint='ddragon')
             if response.status_code == 200:
                 return response.json()['data']
             return {}
@@ -34,79 +45,136 @@ class RiotAPI:
             print(f"Erreur lors de la récupération des champions: {e}")
             return {}
 
+    def get_all_items(self) -> Dict:
+        """Récupère tous les objets (item.json)"""
+        if self.snapshot.is_loaded:
+            return self.snapshot.get_items()
+        try:
+            response = self.http.get(f"{self.ddragon_url}/data/{self.config.DDRAGON_LANG}/item.json",
+                                     endpoint='ddragon')
+            if response.status_code == 200:
+                return response.json()['data']
+            return {}
+        except Exception as e:
+            print(f"Erreur lors de la récupération des objets: {e}")
+            return {}
+
+    def get_champion_index(self) -> ChampionIndex:
+        """Retourne l'index partagé des noms de champions construit depuis champion.json"""
+        if self.store.index is not None:
+            return self.store.index
+        with self.store.index_lock:
+            if self.store.index is None and time.monotonic() >= self.store.index_retry_at:
+                champions = self.get_all_champions()
+                if champions:
+                    self.store.index = ChampionIndex(champions)
+                else:
+                    # API indisponible : ne pas réessayer à chaque message
+                    self.store.index_retry_at = time.monotonic() + INDEX_RETRY_DELAY
+        return self.store.index or ChampionIndex({})
+
+    @traced('riot.champion_info')
     def get_champion_info(self, champion_name: str) -> Optional[Dict]:
         """Récupère les informations détaillées d'un champion"""
         try:
-            # Vérifier le cache
-            if champion_name in self.champions_cache:
-                return self.champions_cache[champion_name]
+            # Résoudre le nom via l'index (aucune requête pour un mot inconnu)
+            champion_index = self.get_champion_index()
+            if len(champion_index) > 0:
+                champion_name = champion_index.resolve(champion_name)
+                if champion_name is None:
+                    return None
+            else:
+                # Normaliser le nom du champion
+                champion_name = champion_name.lower().strip()
+                champion_name = champion_name.capitalize()
+                
+                # Cas spéciaux
+                special_names = {
+                    "wukong": "MonkeyKing",
+                    "kogmaw": "KogMaw",
+                    "reksai": "RekSai",
+                    "khazix": "Khazix",
+                    # Ajouter d'autres cas spéciaux...
+                }
+                if champion_name.lower() in special_names:
+                    champion_name = special_names[champion_name.lower()]
             
-            # Normaliser le nom du champion
-            champion_name = champion_name.lower().strip()
-            champion_name = champion_name.capitalize()
+            # Vérifier le cache partagé (y compris les absences mémorisées)
+            cached = self.store.get(champion_name)
+            if cached is not MISSING:
+                count("cache.champion.hit")
+                return cached
+            count("cache.champion.miss")
             
-            # Cas spéciaux
-            special_names = {
-                "wukong": "MonkeyKing",
-                "kogmaw": "KogMaw",
-                "reksai": "RekSai",
-                "khazix": "Khazix",
-                # Ajouter d'autres cas spéciaux...
-            }
-            if champion_name.lower() in special_names:
-                champion_name = special_names[champion_name.lower()]
+            # Lire le snapshot local, sinon récupérer les données du champion en ligne
+            if self.snapshot.is_loaded:
+                champion_data = self.snapshot.get_champion(champion_name)
+            else:
+                champion_data = self._fetch_champion(champion_name)
+                if champion_data is MISSING:
+                    return None
             
-            # Récupérer les données du champion
-            response = requests.get(f"{self.ddragon_url}/data/fr_FR/champion/{champion_name}.json")
-            if response.status_code == 200:
-                champion_data = response.json()['data'][champion_name]
-                
-                # Enrichir les données avec des informations supplémentaires
-                enriched_data = {
-                    'id': champion_data['id'],
-                    'name': champion_data['name'],
-                    'title': champion_data['title'],
-                    'lore': champion_data['lore'],
-                    'spells': champion_data['spells'],
-                    'passive': champion_data['passive'],
-                    'tips': {
-                        'ally': champion_data.get('allytips', []),
-                        'enemy': champion_data.get('enemytips', [])
-                    },
-                    'info': {
-                        'attack': champion_data['info']['attack'],
-                        'defense': champion_data['info']['defense'],
-                        'magic': champion_data['info']['magic'],
-                        'difficulty': champion_data['info']['difficulty']
-                    },
-                    'stats': champion_data['stats'],
-                    'roles': champion_data['tags'],
-                    'recommended_roles': self._get_recommended_roles(champion_data),
-                    'abilities': {
-                        'passive': {
-                            'name': champion_data['passive']['name'],
-                            'description': champion_data['passive']['description']
-                        },
-                        'spells': [{
-                            'key': spell['id'],
-                            'name': spell['name'],
-                            'description': spell['description'],
-                            'cooldown': spell['cooldown'],
-                            'cost': spell['cost'],
-                            'range': spell['range']
-                        } for spell in champion_data['spells']]
-                    }
-                }
-                
-                # Mettre en cache
-                self.champions_cache[champion_name.lower()] = enriched_data
-                return enriched_data
-                
-            return None
+            if champion_data is None:
+                self.store.put(champion_name, None)
+                return None
+            
+            # Mettre en cache
+            enriched_data = self._build_champion_info(champion_data)
+            self.store.put(champion_name, enriched_data)
+            return enriched_data
         except Exception as e:
             print(f"Erreur lors de la récupération des informations du champion: {e}")
             return None
     
+    def _fetch_champion(self, champion_id: str):
+        """Récupère un champion sur Data Dragon (None si inexistant, MISSING si erreur)"""
+        response = self.http.get(f"{self.ddragon_url}/data/{self.config.DDRAGON_LANG}/champion/{champion_id}.json",
+                                 endpoint='ddragon')
+        if response.status_code == 200:
+            return response.json()['data'][champion_id]
+        if response.status_code == 404:
+            return None
+        return MISSING
+    
+    def _build_champion_info(self, champion_data: Dict) -> Dict:
+        """Enrichit les données brutes d'un champion avec des informations supplémentaires"""
+        return {
+            'id': champion_data['id'],
+            'name': champion_data['name'],
+            'title': champion_data['title'],
+            'lore': champion_data['lore'],
+            'spells': champion_data['spells'],
+            'passive': champion_data['passive'],
+            'tips': {
+                'ally': champion_data.get('allytips', []),
+                'enemy': champion_data.get('enemytips', [])
+            },
+            'info': {
+                'attack': champion_data['info']['attack'],
+                'defense': champion_data['info']['defense'],
+                'magic': champion_data['info']['magic'],
+                'difficulty': champion_data['info']['difficulty']
+            },
+            'stats': champion_data['stats'],
+            'roles': champion_data['tags'],
+            'resource': champion_data.get('partype'),
+            'recommended_roles': self._get_recommended_roles(champion_data),
+            'abilities': {
+                'passive': {
+                    'name': champion_data['passive']['name'],
+                    'description': champion_data['passive']['description']
+                },
+                'spells': [{
+                    'key': spell['id'],
+                    'name': spell['name'],
+                    'description': spell['description'],
+                    'cooldown': spell['cooldown'],
+                    'cost': spell['cost'],
+                    'range': spell['range']
+                } for spell in champion_data['spells']]
+            }
+        }
+    
     def _get_recommended_roles(self, champion_data: Dict) -> List[str]:
         """Détermine les rôles recommandés basés sur les stats et tags"""
         roles = []
@@ -129,36 +197,29 @@ class RiotAPI:
         return roles
     
     def get_champion_matchups(self, champion_name: str, role: str) -> Optional[Dict[str, List[str]]]:
-        """Récupère les informations de matchup pour un champion dans un rôle spécifique"""
+        """Contre-picks, matchups favorables et synergies d'un champion dans un rôle (parties locales)"""
         try:
-            # Récupérer les données de matchup depuis l'API
-            matchup_data = {
-                'counter_picks': [
-                    {'champion': 'Zyra', 'winrate': 45.2, 'reason': 'Contrôle à distance et poke'},
-                    {'champion': 'Brand', 'winrate': 44.8, 'reason': 'Dégâts magiques élevés'},
-                    {'champion': 'Xerath', 'winrate': 44.5, 'reason': 'Poke à très longue portée'}
-                ],
-                'good_against': [
-                    {'champion': 'Yuumi', 'winrate': 55.5, 'reason': 'Vulnérable au CC'},
-                    {'champion': 'Sona', 'winrate': 54.8, 'reason': 'Manque de mobilité'},
-                    {'champion': 'Soraka', 'winrate': 54.2, 'reason': 'Faible en early game'}
-                ],
-                'synergies': [
-                    {'champion': 'Miss Fortune', 'winrate': 56.2, 'reason': 'Combo ulti'},
-                    {'champion': 'Jhin', 'winrate': 55.8, 'reason': 'Setup pour le W'},
-                    {'champion': 'Ashe', 'winrate': 55.5, 'reason': 'Chain CC'}
-                ]
-            }
+            # Agrégats numpy chargés à la première question sur les matchups
+            from src.analytics.matchups import get_matchup_engine
+            # Nouveaux fichiers de parties intégrés par le thread démarré avec le serveur (start_matchup_refresher)
+            engine = get_matchup_engine()
 
-            # Formater les données pour inclure les raisons
-            formatted_matchups = {
-                'counter_picks': [f"{m['champion']} ({m['reason']})" for m in matchup_data['counter_picks']],
-                'good_against': [f"{m['champion']} ({m['reason']})" for m in matchup_data['good_against']],
-                'synergies': [f"{m['champion']} ({m['reason']})" for m in matchup_data['synergies']]
-            }
+            champion_id = self.get_champion_index().resolve(champion_name) or champion_name
+            matchups = engine.matchups(champion_id, role)
+            if not matchups:
+                return None
+
+            def describe(matchup) -> str:
+                champion = self.snapshot.get_champion(matchup.champion) or {}
+                return (f"{champion.get('name', matchup.champion)} "
+                        f"({matchup.winrate:.1f}% de victoires sur {matchup.games} parties)")
 
+            formatted_matchups = {key: [describe(m) for m in matchups[key]]
+                                  for key in ('counter_picks', 'good_against', 'synergies')}
+            if not any(formatted_matchups.values()):
+                return None
             return formatted_matchups
 
         except Exception as e:
             print(f"Erreur lors de la récupération des matchups: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
@@ -1,45 +1,54 @@
 """
 Chatbot intelligent pour League of Legends.
 """
-from typing import Tuple, Optional, Dict, List, Any
-from collections import deque
+from typing import Tuple, Optional, Dict, List, Any, Iterator, Deque, Callable
 import json
+import re
+import threading
 
 from src.config.config import Config
 from src.api.riot_api import RiotAPI
 from src.api.huggingface_api import HuggingFaceAPI
-from src.utils.text_processing import initialize_nltk, find_best_match
+from src.api.async_clients import AsyncRiotAPI, AsyncHuggingFaceAPI, run_blocking
+from src.analytics.champion_analytics import get_analytics_store
+from src.chatbot.conversation import ConversationState
+from src.chatbot.intent_classifier import INTENT_KEYWORDS, IntentClassifier, QueryIntent, fold
+from src.chatbot.response_cache import context_hash, get_response_cache
+from src.utils.tracing import count, traced, traced_request
 
-class LolChatbot:
+SHORT_QUERY_MESSAGE = "Je suis désolé, votre question est trop courte. Pourriez-vous la reformuler ?"
+UNKNOWN_QUERY_MESSAGE = "Je ne suis pas sûr de comprendre votre question. Essayez de la reformuler en précisant le champion et le type d'information que vous recherchez (statistiques, capacités, counters, etc.)."
+
+# Questions de classement sur tout le roster (ex. "top 10 armure niveau 11")
+RANKING_KEYWORDS = ("classement", "le plus", "la plus", "les plus", "le moins", "la moins", "les moins", "meilleur")
+LEVEL_PATTERN = re.compile(r"\b(?:niveau|niv|lvl|level)\s*(\d{1,2})\b")
+TOP_PATTERN = re.compile(r"\btop\s*(\d{1,3})\b")
+# Types d'adversaires cités dans une question de build
+ENEMY_TAG_LABELS = {'Assassin': "assassins", 'Tank': "tanks", 'Mage': "mages", 'Marksman': "tireurs",
+                    'Fighter': "combattants", 'Support': "supports"}
+
+class ChatbotResources:
     def __init__(self):
-        """Initialisation du chatbot"""
+        """Composants lourds partagés par toutes les sessions du processus"""
         self.config = Config()
         self.riot_api = RiotAPI()
-        self.huggingface_api = HuggingFaceAPI()
-        initialize_nltk()
-        
-        # Historique des conversations avec contexte enrichi
-        self.conversation_history = deque(maxlen=5)
-        self.context = {
-            "current_champion": None,
-            "current_role": None,
-            "skill_level": "beginner",  # beginner, intermediate, advanced, expert
-            "last_topic": None
-        }
+        self.huggingface_api = HuggingFaceAPI(self.riot_api)
+        # Clients asynchrones partageant les mêmes caches (utilisés par aget_response)
+        self.async_riot_api = AsyncRiotAPI(self.riot_api)
+        self.async_huggingface_api = AsyncHuggingFaceAPI(self.huggingface_api, self.async_riot_api)
+        
+        # Statistiques dérivées partagées, précalculées pour tout le roster du patch
+        self.analytics = get_analytics_store()
+        if self.riot_api.snapshot.is_loaded:
+            self.analytics.precompute(self.riot_api)
+        
+        # Réponses du LLM déjà générées, partagées entre les sessions
+        self.response_cache = get_response_cache()
+        # Cache sémantique (numpy, scikit-learn) chargé à la première question transmise au LLM
+        self._semantic_cache = None
         
         # Patterns d'intention enrichis
-        self.intent_patterns = {
-            "champion_info": ["qui est", "quel champion", "parle moi de", "raconte moi", "comment jouer", "explique"],
-            "ability_info": ["capacité", "spell", "compétence", "q", "w", "e", "r", "passif", "sort", "ulti", "ultimate"],
-            "role_info": ["role", "poste", "position", "lane", "jouer"],
-            "item_info": ["objet", "item", "stuff", "build", "équipement", "acheter"],
-            "gameplay_info": ["comment", "quand", "pourquoi", "stratégie", "technique"],
-            "matchup_info": ["counter", "contre", "matchup", "synergie", "composition", "affinité"],
-            "mechanics_info": ["mécanique", "combo", "technique", "astuce", "trick"],
-            "tips_info": ["conseil", "astuce", "tip", "guide", "aide"],
-            "stats_info": ["statistique", "stat", "dégât", "damage", "résistance", "armor", "mr"],
-            "meta_info": ["meta", "tier", "fort", "faible", "populaire", "ban"]
-        }
+        self.intent_patterns = {intent: list(keywords) for intent, keywords in INTENT_KEYWORDS.items()}
         
         # Patterns de salutations
         self.greetings = {
@@ -49,193 +58,92 @@ class LolChatbot:
             "hello": "Bonjour invocateur ! En tant qu'assistant LoL, je peux vous aider à :\n- Maîtriser les champions\n- Comprendre les mécaniques\n- Optimiser vos builds\n- Améliorer votre gameplay\n\nQue souhaitez-vous explorer ?",
             "hi": "Salut invocateur ! Je suis votre coach LoL personnel. Je peux vous aider avec :\n- L'apprentissage des champions\n- Les stratégies de jeu\n- Les builds recommandés\n- Les conseils pro\n\nQue voulez-vous savoir ?"
         }
+        
+        # Tous les mots-clés compilés une seule fois en une expression régulière
+        self.intent_classifier = IntentClassifier(self.intent_patterns, self.greetings)
 
-    def _enrich_champion_info(self, champion_info: Dict[str, Any]) -> Dict[str, Any]:
-        """Enrichit les informations du champion avec des données supplémentaires"""
-        if not champion_info:
-            return None
+    @property
+    def semantic_cache(self):
+        if self._semantic_cache is None:
+            from src.chatbot.semantic_cache import get_semantic_cache
+            self._semantic_cache = get_semantic_cache()
+        return self._semantic_cache
 
-        # Calculer les ratios et statistiques avancées
-        stats = champion_info['stats']
-        base_stats = {
-            'hp': stats['hp'],
-            'hp_per_level': stats['hpperlevel'],
-            'mp': stats.get('mp', 0),
-            'mp_per_level': stats.get('mpperlevel', 0),
-            'armor': stats['armor'],
-            'armor_per_level': stats['armorperlevel'],
-            'mr': stats['spellblock'],
-            'mr_per_level': stats['spellblockperlevel'],
-            'attack_damage': stats['attackdamage'],
-            'ad_per_level': stats['attackdamageperlevel'],
-            'attack_speed': 0.625 / stats['attackspeed'],
-            'as_per_level': stats['attackspeedperlevel']
-        }
 
-        # Calculer les statistiques pour différents niveaux
-        levels_stats = {}
-        for level in [1, 6, 11, 16, 18]:
-            levels_stats[level] = {
-                'hp': base_stats['hp'] + base_stats['hp_per_level'] * (level - 1),
-                'mp': base_stats['mp'] + base_stats['mp_per_level'] * (level - 1),
-                'armor': base_stats['armor'] + base_stats['armor_per_level'] * (level - 1),
-                'mr': base_stats['mr'] + base_stats['mr_per_level'] * (level - 1),
-                'ad': base_stats['attack_damage'] + base_stats['ad_per_level'] * (level - 1),
-                'as': base_stats['attack_speed'] * (1 + (base_stats['as_per_level'] * (level - 1) / 100))
-            }
-            # Calculer le DPS théorique par niveau
-            levels_stats[level]['dps'] = round(levels_stats[level]['ad'] * levels_stats[level]['as'], 2)
-
-        # Enrichir avec les ratios des capacités
-        ability_ratios = self._extract_ability_ratios(champion_info['abilities'])
-
-        # Calculer les scores avancés
-        enriched_stats = {
-            'levels_stats': levels_stats,
-            'ability_ratios': ability_ratios,
-            'mobility': self._calculate_mobility_score(champion_info),
-            'scaling': self._calculate_scaling_score(champion_info, ability_ratios),
-            'damage_profile': self._calculate_damage_profile(champion_info, ability_ratios)
-        }
+_resources = None
+_resources_lock = threading.Lock()
 
-        # Ajouter des conseils spécifiques basés sur les statistiques
-        playstyle_tips = []
-        if enriched_stats['damage_profile']['physical'] > 70:
-            playstyle_tips.append("Fort potentiel de dégâts physiques")
-        if enriched_stats['damage_profile']['magical'] > 70:
-            playstyle_tips.append("Fort potentiel de dégâts magiques")
-        if levels_stats[18]['hp'] > 2500:
-            playstyle_tips.append("Très résistant en late game")
-        if enriched_stats['mobility'] > 7:
-            playstyle_tips.append("Grande mobilité")
-        if enriched_stats['scaling'] > 7:
-            playstyle_tips.append("Excellent scaling en late game")
-
-        # Enrichir l'objet champion_info
-        champion_info['enriched_stats'] = enriched_stats
-        champion_info['playstyle_tips'] = playstyle_tips
-        
-        return champion_info
-
-    def _extract_ability_ratios(self, abilities: Dict[str, Any]) -> Dict[str, Any]:
-        """Extrait les ratios AP/AD des capacités"""
-        ratios = {
-            'passive': {'ap': 0, 'ad': 0, 'description': ''},
-            'Q': {'ap': 0, 'ad': 0, 'description': ''},
-            'W': {'ap': 0, 'ad': 0, 'description': ''},
-            'E': {'ap': 0, 'ad': 0, 'description': ''},
-            'R': {'ap': 0, 'ad': 0, 'description': ''}
-        }
 
-        # Analyser le passif
-        passive_desc = abilities['passive']['description'].lower()
-        ratios['passive']['ap'] = self._find_ratio(passive_desc, 'ap')
-        ratios['passive']['ad'] = self._find_ratio(passive_desc, 'ad')
-        ratios['passive']['description'] = passive_desc
-
-        # Analyser les sorts
-        for i, spell in enumerate(abilities['spells']):
-            key = ['Q', 'W', 'E', 'R'][i]
-            desc = spell['description'].lower()
-            ratios[key]['ap'] = self._find_ratio(desc, 'ap')
-            ratios[key]['ad'] = self._find_ratio(desc, 'ad')
-            ratios[key]['description'] = desc
-
-        return ratios
-
-    def _find_ratio(self, text: str, ratio_type: str) -> float:
-        """Trouve les ratios dans le texte"""
-        import re
-        ratio = 0
-        pattern = r'(\d+(?:\.\d+)?)%\s*' + ('ap' if ratio_type == 'ap' else 'ad')
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            ratio += float(match.group(1)) / 100
-        return ratio
-
-    def _calculate_damage_profile(self, champion_info: Dict[str, Any], ability_ratios: Dict[str, Any]) -> Dict[str, float]:
-        """Calcule le profil de dégâts du champion"""
-        physical = 0
-        magical = 0
-        
-        # Analyser les ratios des capacités
-        for ability in ability_ratios.values():
-            physical += ability['ad'] * 20  # Pondération arbitraire
-            magical += ability['ap'] * 20   # Pondération arbitraire
-            
-        # Ajuster en fonction des tags et stats de base
-        champion_tags = champion_info.get('tags', [])
-        if isinstance(champion_tags, list):
-            if "Mage" in champion_tags:
-                magical += 30
-            if "Marksman" in champion_tags:
-                physical += 30
-            if "Assassin" in champion_tags:
-                if magical > physical:
-                    magical += 20
-                else:
-                    physical += 20
-                
-        return {
-            'physical': min(physical, 100),
-            'magical': min(magical, 100)
-        }
+def get_chatbot_resources() -> ChatbotResources:
+    """Retourne les composants partagés, créés par la première session du processus"""
+    global _resources
+    if _resources is None:
+        with _resources_lock:
+            if _resources is None:
+                _resources = ChatbotResources()
+    return _resources
+
+
+def reset_chatbot_resources() -> None:
+    """Supprime les composants partagés (utilisé par les tests)"""
+    global _resources
+    with _resources_lock:
+        _resources = None
 
-    def _calculate_mobility_score(self, champion_info: Dict[str, Any]) -> int:
-        """Calcule un score de mobilité basé sur les capacités"""
-        score = 5  # Score de base
-        
-        try:
-            # Analyser les descriptions des sorts pour les mots-clés de mobilité
-            mobility_keywords = ["dash", "saut", "bond", "téléportation", "vitesse", "speed"]
-            abilities = champion_info.get('abilities', {})
-            spells = abilities.get('spells', [])
-            
-            for spell in spells:
-                description = spell.get('description', '').lower()
-                if any(keyword in description for keyword in mobility_keywords):
-                    score += 1
-            
-            # Ajuster en fonction des stats de base
-            stats = champion_info.get('stats', {})
-            if stats.get('movespeed', 0) > 340:
-                score += 1
-                
-        except Exception as e:
-            print(f"Erreur lors du calcul du score de mobilité: {str(e)}")
-            return 5  # Score par défaut en cas d'erreur
-            
-        return min(score, 10)  # Plafonner à 10
-
-    def _calculate_scaling_score(self, champion_info: Dict[str, Any], ability_ratios: Dict[str, Any]) -> int:
-        """Calcule un score de scaling basé sur les ratios et stats"""
-        score = 5  # Score de base
-        
-        # Analyser les ratios AP/AD dans les descriptions des sorts
-        for spell in champion_info['abilities']['spells']:
-            if "% AD" in spell['description']:
-                score += 0.5
-            if "% AP" in spell['description']:
-                score += 0.5
-                
-        # Ajuster en fonction des stats par niveau
-        if ability_ratios['Q']['ad'] > 0 or ability_ratios['W']['ad'] > 0 or ability_ratios['E']['ad'] > 0 or ability_ratios['R']['ad'] > 0:
-            score += 1
-        if ability_ratios['Q']['ap'] > 0 or ability_ratios['W']['ap'] > 0 or ability_ratios['E']['ap'] > 0 or ability_ratios['R']['ap'] > 0:
-            score += 1
-            
-        return min(score, 10)  # Plafonner à 10
 
-    def _format_conversation_history(self) -> str:
-        """Formate l'historique de conversation pour le contexte"""
-        if not self.conversation_history:
-            return ""
+class LolChatbot:
+    def __init__(self, state: Optional[ConversationState] = None,
+                 resources: Optional[ChatbotResources] = None,
+                 on_turn: Optional[Callable[[ConversationState], None]] = None):
+        """Initialisation du chatbot : composants partagés et état propre à la session"""
+        self.resources = resources or get_chatbot_resources()
+        self.config = self.resources.config
+        self.riot_api = self.resources.riot_api
+        self.huggingface_api = self.resources.huggingface_api
+        self.async_riot_api = self.resources.async_riot_api
+        self.async_huggingface_api = self.resources.async_huggingface_api
+        self.analytics = self.resources.analytics
+        self.response_cache = self.resources.response_cache
+        self.intent_patterns = self.resources.intent_patterns
+        self.greetings = self.resources.greetings
+        self.intent_classifier = self.resources.intent_classifier
         
-        history = "\nHistorique de la conversation:\n"
-        for q, r in self.conversation_history:
-            history += f"Q: {q}\nR: {r}\n"
-        return history
-    
+        # Historique des conversations avec contexte enrichi (seule partie propre à l'utilisateur)
+        self.state = state or ConversationState()
+        # Appelé à la fin de chaque échange (enregistrement de l'état dans un stockage externe)
+        self.on_turn = on_turn
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        return self.state.context
+
+    @context.setter
+    def context(self, context: Dict[str, Any]) -> None:
+        self.state.context = context
+
+    @property
+    def conversation_history(self) -> Deque[Tuple[str, str]]:
+        return self.state.conversation_history
+
+    @property
+    def semantic_cache(self):
+        return self.resources.semantic_cache
+
+    @traced('chatbot.enrich_champion_info')
+    def _enrich_champion_info(self, champion_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Enrichit les informations du champion avec ses statistiques dérivées (précalculées)"""
+        if not champion_info:
+            return None
+
+        # Les statistiques sont calculées une fois par champion et par patch ;
+        # la fiche en cache n'est jamais modifiée
+        analytics = self.analytics.get(champion_info, self.riot_api.version)
+        return {
+            **champion_info,
+            'enriched_stats': analytics.enriched_stats,
+            'playstyle_tips': list(analytics.playstyle_tips)
+        }
+
     def _get_champion_response(self, query: str) -> Optional[str]:
         """Génère une réponse enrichie pour une question sur un champion"""
         try:
@@ -291,19 +199,17 @@ class LolChatbot:
             print(f"Erreur lors de la génération de la réponse: {str(e)}")
             return "Désolé, une erreur s'est produite lors de la récupération des informations du champion."
     
-    def _get_ability_response(self, query: str) -> Optional[str]:
+    def _get_ability_response(self, query: str, ability_key: Optional[str] = None) -> Optional[str]:
         """Génère une réponse enrichie pour une question sur une capacité"""
         words = query.split()
         champion_name = self.context.get("current_champion")
-        ability_key = None
+        if ability_key is None:
+            ability_key = self._classify(query).ability
         
-        # Détecter le champion et la capacité
+        # Détecter le champion (la capacité est reconnue par le classifieur)
         for word in words:
             if "d'" in word:
                 champion_name = word.split("d'")[1]
-            for key in ["q", "w", "e", "r", "passif", "ulti", "ultimate"]:
-                if key in word.lower():
-                    ability_key = key if key != "ulti" and key != "ultimate" else "r"
         
         if champion_name and ability_key:
             champion_info = self.riot_api.get_champion_info(champion_name)
@@ -382,21 +288,14 @@ class LolChatbot:
                 if matchups:
                     response = f"Analyse des matchups pour {champion_name.capitalize()} en {role} :\n\n"
                     
-                    # Contre-picks avec explications
-                    response += "Contre-picks difficiles :\n"
-                    for counter in matchups["counter_picks"][:3]:
-                        response += f"- {counter}\n"
-                    
-                    # Matchups favorables
-                    response += "\nMatchups favorables :\n"
-                    for good_against in matchups["good_against"][:3]:
-                        response += f"- {good_against}\n"
-                    
-                    # Synergies
-                    response += "\nMeilleures synergies :\n"
-                    for synergy in matchups["synergies"][:3]:
-                        response += f"- {synergy}\n"
-                    
+                    # Sections sans duel assez joué omises
+                    sections = (("Contre-picks difficiles", "counter_picks"),
+                                ("Matchups favorables", "good_against"),
+                                ("Meilleures synergies", "synergies"))
+                    response += "\n".join(
+                        f"{title} :\n" + "".join(f"- {entry}\n" for entry in matchups[key][:3])
+                        for title, key in sections if matchups[key]
+                    )
                     return response
             
             return f"Je n'ai pas trouvé d'informations sur les matchups de {champion_name}. Essayez de préciser un rôle (top, jungle, mid, bot, support)."
@@ -405,18 +304,18 @@ class LolChatbot:
             print(f"Erreur lors de la génération des matchups: {str(e)}")
             return None
     
-    def _is_greeting(self, query: str) -> bool:
-        """Vérifie si la requête est une salutation"""
-        query = query.lower().strip()
-        return query in self.greetings or any(greeting in query for greeting in self.greetings.keys())
+    @traced('chatbot.classify')
+    def _classify(self, query: str) -> QueryIntent:
+        """Classe la question (intentions, champions, rôle, niveau) en une seule passe"""
+        return self.intent_classifier.classify(query, self.riot_api.get_champion_index())
+    
+    def _is_greeting(self, intent: QueryIntent) -> bool:
+        """Vérifie si la requête est une simple salutation"""
+        return intent.greeting is not None and not intent.intents and not intent.champions
     
-    def _get_greeting_response(self, query: str) -> str:
+    def _get_greeting_response(self, intent: QueryIntent) -> str:
         """Retourne une réponse appropriée à une salutation"""
-        query = query.lower().strip()
-        for greeting in self.greetings.keys():
-            if greeting in query:
-                return self.greetings[greeting]
-        return self.greetings["salut"]  # Réponse par défaut
+        return self.greetings.get(intent.greeting, self.greetings["salut"])  # "salut" par défaut
     
     def _get_champion_specific_response(self, champion_name: str, topic: str) -> Optional[str]:
         """Génère une réponse spécifique pour un champion et un sujet"""
@@ -523,118 +422,427 @@ class LolChatbot:
             print(f"Erreur lors de la génération des statistiques: {str(e)}")
             return None
 
+    @staticmethod
+    def _format_stat(stat: str, value: float) -> str:
+        return f"{value:.3f}" if stat == 'as' else f"{value:.1f}"
+
+    def _get_ranking_response(self, stat: str, level: int, count: int, ascending: bool) -> Optional[str]:
+        """Classe tout le roster sur une statistique à un niveau donné"""
+        from src.analytics.stat_table import STAT_LABELS, get_stat_table
+        table = get_stat_table(self.riot_api)
+        ranking = table.top(stat, level, count, ascending=ascending)
+        if not ranking:
+            return None
+
+        order = "les plus faibles" if ascending else "les plus élevées"
+        response = f"Top {len(ranking)} - {STAT_LABELS[stat]} au niveau {level} ({order}) :\n"
+        for position, (champion_id, value) in enumerate(ranking, 1):
+            response += f"{position}. {table.name(champion_id)} : {self._format_stat(stat, value)}\n"
+        self.context["last_topic"] = "stats_info"
+        return response
+
+    def _get_comparison_response(self, champion_a: str, champion_b: str, level: int,
+                                 stat: Optional[str] = None) -> Optional[str]:
+        """Compare deux champions statistique par statistique"""
+        from src.analytics.stat_table import STAT_LABELS, STATS, get_stat_table
+        table = get_stat_table(self.riot_api)
+        if champion_a not in table or champion_b not in table:
+            return None
+
+        stats_a = table.stats_at(champion_a, level)
+        stats_b = table.stats_at(champion_b, level)
+        diffs = table.compare(champion_a, champion_b, level)
+        name_a, name_b = table.name(champion_a), table.name(champion_b)
+
+        response = f"Comparaison {name_a} vs {name_b} au niveau {level} :\n"
+        for key in ([stat] if stat else STATS):
+            response += (f"- {STAT_LABELS[key]} : {self._format_stat(key, stats_a[key])} vs "
+                         f"{self._format_stat(key, stats_b[key])} ({diffs[key]:+.{3 if key == 'as' else 1}f})\n")
+
+        # Position dans le roster pour la statistique demandée (ou le DPS)
+        focus = stat or 'dps'
+        response += (f"\n{STAT_LABELS[focus]} : {name_a} dépasse {table.percentile(champion_a, focus, level):.0f}% "
+                     f"du roster, {name_b} {table.percentile(champion_b, focus, level):.0f}%.\n")
+        self.context["last_topic"] = "stats_info"
+        return response
+
+    @traced('chatbot.stat_table')
+    def _get_stat_table_response(self, query: str, mentioned: List[str]) -> Optional[str]:
+        """Répond aux classements et comparaisons calculés sur la table du roster"""
+        # Table numpy chargée à la première question sur les statistiques
+        from src.analytics.stat_table import find_stat
+        try:
+            stat = find_stat(query)
+            level_match = LEVEL_PATTERN.search(query)
+            level = min(max(int(level_match.group(1)), 1), 18) if level_match else 18
+            champions = list(dict.fromkeys(mentioned))
+
+            if len(champions) >= 2 and (stat or "compar" in query):
+                return self._get_comparison_response(champions[0], champions[1], level, stat)
+
+            top_match = TOP_PATTERN.search(query)
+            if stat and (top_match or any(word in query for word in RANKING_KEYWORDS)):
+                count = int(top_match.group(1)) if top_match else 10
+                return self._get_ranking_response(stat, level, count, ascending="moins" in query)
+        except Exception as e:
+            print(f"Erreur lors du calcul des statistiques du roster: {str(e)}")
+        return None
+
+    @traced('chatbot.meta')
+    def _get_meta_response(self, intent: QueryIntent) -> Optional[str]:
+        """Tier list (rôle, vue d'ensemble ou champion cité) calculée sur les parties ingérées"""
+        # Colonnes numpy chargées à la première question sur la méta
+        from src.analytics.tier_list import get_tier_list_service
+        try:
+            service = get_tier_list_service(self.riot_api)
+            if intent.champions:
+                response = service.render_champion(intent.champions[-1])
+            elif intent.role:
+                response = service.render_role(intent.role)
+            else:
+                response = service.render_overview()
+            if response:
+                self.context["last_topic"] = "meta_info"
+            return response
+        except Exception as e:
+            print(f"Erreur lors du calcul de la tier list: {str(e)}")
+            return None
+
+    def _get_build_response(self, index, champion_name: str, enemy_names: List[str],
+                            enemy_tags: List[str]) -> Optional[str]:
+        """Build complet d'un champion selon son profil de dégâts et les adversaires cités"""
+        from src.analytics.items import champion_needs, enemy_composition
+        champion_info = self.riot_api.get_champion_info(champion_name)
+        if not champion_info:
+            return None
+        damage_profile = self.analytics.get(champion_info, self.riot_api.version).damage_profile
+        enemies, versus = [], []
+        for enemy_name in enemy_names:
+            enemy_info = self.riot_api.get_champion_info(enemy_name)
+            if enemy_info:
+                versus.append(enemy_info['name'])
+                enemies.append((enemy_info['roles'],
+                                self.analytics.get(enemy_info, self.riot_api.version).damage_profile))
+        enemies.extend(([tag], None) for tag in enemy_tags)
+        needs = champion_needs(champion_info['roles'], damage_profile, champion_info.get('resource'),
+                               enemy_composition(enemies))
+        build = index.recommend(needs)
+        if build is None:
+            return None
+
+        versus += [ENEMY_TAG_LABELS[tag] for tag in enemy_tags]
+        response = f"Build recommandé pour {champion_info['name']}"
+        response += f" contre {', '.join(versus)}" if versus else ""
+        response += f" (patch {index.version}) :\n" if index.version else " :\n"
+        response += "".join(f"{position}. {index.name(item_id)} ({index.cost(item_id)} PO)\n"
+                            for position, item_id in enumerate(build.items, 1))
+        response += f"Coût total : {build.cost} PO\n"
+        # Ordre d'achat détaillé pour le premier objet qui n'est pas une paire de bottes
+        first_item = next((item_id for item_id in build.items
+                           if 'Boots' not in index.items[item_id].get('tags', [])), build.items[0])
+        path = index.build_path(first_item)
+        if len(path) > 1:
+            response += f"Ordre d'achat de {index.name(first_item)} : " + \
+                " > ".join(index.name(item_id) for item_id in path) + "\n"
+        self.context["current_champion"] = champion_info['id']
+        return response
+
+    @traced('chatbot.items')
+    def _get_item_response(self, query: str, champion_name: Optional[str],
+                           intent: QueryIntent) -> Optional[str]:
+        """Fiche d'un objet cité, sinon build du champion (premier cité, les suivants sont les adversaires)"""
+        # Index des objets chargé à la première question sur les objets
+        from src.analytics.items import ENEMY_TAG_KEYWORDS, get_item_index
+        # Sans champion, recherche d'un objet cité seulement dans le snapshot local (aucune requête)
+        if not (intent.champions or champion_name) and not self.riot_api.snapshot.is_loaded:
+            return None
+        try:
+            index = get_item_index(self.riot_api)
+            if not len(index):
+                return None
+            response = None
+            named_items = index.find_items(query)
+            if named_items and not intent.champions:
+                response = "".join(index.describe(item_id) for item_id in named_items[:2])
+            elif intent.champions or champion_name:
+                subject = intent.champions[0] if intent.champions else champion_name
+                enemy_names = [name for name in intent.champions[1:] if name != subject]
+                folded = fold(query)
+                after = folded[folded.index("contre") + len("contre"):] if "contre" in folded else ""
+                enemy_tags = list(dict.fromkeys(ENEMY_TAG_KEYWORDS[word] for word in re.findall(r"\w+", after)
+                                                if word in ENEMY_TAG_KEYWORDS))
+                response = self._get_build_response(index, subject, enemy_names, enemy_tags)
+            if response:
+                self.context["last_topic"] = "item_info"
+            return response
+        except Exception as e:
+            print(f"Erreur lors de la recommandation d'objets: {str(e)}")
+            return None
+
+    def _update_skill_level(self, intent: QueryIntent) -> None:
+        """Met à jour le niveau de compétence détecté dans la question"""
+        if intent.skill_level:
+            self.context["skill_level"] = intent.skill_level
+
+    @traced('chatbot.detect_entities')
+    def _detect_entities(self, intent: QueryIntent) -> Tuple[Optional[str], List[str]]:
+        """Extrait le champion et le rôle de la question et met à jour le contexte"""
+        # Chercher d'abord dans le contexte
+        champion_name = self.context.get("current_champion")
+        
+        # Puis dans la question : champions détectés via l'index local (aucune requête)
+        if intent.champions:
+            champion_name = intent.champions[-1]
+            self.context["current_champion"] = champion_name
+        
+        if intent.role:
+            self.context["current_role"] = intent.role
+        
+        return champion_name, intent.champions
+
+    @traced('chatbot.local_response')
+    def _get_local_response(self, query: str, champion_name: Optional[str],
+                            intent: QueryIntent) -> Optional[str]:
+        """Répond à partir des données locales du champion, sans passer par le LLM"""
+        # Classements et comparaisons : une seule opération sur tout le roster
+        table_response = self._get_stat_table_response(query, intent.champions)
+        if table_response:
+            return table_response
+        # Méta (tiers, champions forts, bannissements) : réponse déterministe sans le LLM
+        if intent.has("meta_info") and not intent.has("matchup_info"):
+            meta_response = self._get_meta_response(intent)
+            if meta_response:
+                return meta_response
+        # Objets et builds : index Data Dragon, avant les matchups ("build contre Garen")
+        if intent.has("item_info"):
+            item_response = self._get_item_response(query, champion_name, intent)
+            if item_response:
+                return item_response
+        if not champion_name:
+            return None
+        
+        # Traiter la question selon son type, par ordre de priorité
+        is_stats_question = intent.has("stats_info")
+        is_counter_question = intent.has("matchup_info")
+        is_ability_question = intent.has("ability_info")
+        
+        if is_stats_question:
+            stats_response = self._get_stats_response(champion_name)
+            if stats_response:
+                return stats_response
+        
+        elif is_counter_question:
+            matchup_response = self._get_matchup_response(query, champion_name)
+            if matchup_response:
+                return matchup_response
+        
+        elif is_ability_question:
+            ability_response = self._get_ability_response(query, intent.ability)
+            if ability_response:
+                return ability_response
+        
+        # Questions générales sur le champion
+        champion_response = self._get_champion_response(query)
+        if champion_response:
+            return champion_response
+        
+        # Questions spécifiques sur un aspect du champion
+        for topic in intent.topics:
+            specific_response = self._get_champion_specific_response(champion_name, topic)
+            if specific_response:
+                self.context["last_topic"] = topic
+                return specific_response
+        
+        return None
+
+    @traced('chatbot.fallback_context')
+    def _fallback_context(self) -> Dict[str, Any]:
+        """Contexte de session et historique, transmis séparément de la question au LLM"""
+        return {
+            'session_context': self._build_context_lines(),
+            'history': list(self.conversation_history)
+        }
+
+    def _cache_context(self) -> Dict[str, Any]:
+        """Contexte qui détermine la réponse du LLM (utilisé dans la clé du cache)"""
+        return {
+            'champion': self.context["current_champion"],
+            'role': self.context["current_role"],
+            'skill_level': self.context["skill_level"]
+        }
+
+    @traced('chatbot.cache_lookup')
+    def _get_cached_response(self, query: str, intent: QueryIntent,
+                             cache_context: Dict[str, Any]) -> Optional[str]:
+        """Cherche une réponse déjà générée : question identique, puis reformulation"""
+        cached_response = self.response_cache.get(query, cache_context)
+        if cached_response:
+            count("cache.response.hit")
+            return cached_response
+        # Même champion, même contexte et même intention : comparer le reste de la question
+        match = self.semantic_cache.lookup(self.intent_classifier.residual(query),
+                                           (intent.primary, context_hash(cache_context)))
+        if match:
+            count("cache.semantic.hit")
+            self.response_cache.put(query, cache_context, match[0])
+            return match[0]
+        count("cache.response.miss")
+        return None
+
+    def _cache_response(self, query: str, intent: QueryIntent,
+                        cache_context: Dict[str, Any], response: str) -> None:
+        """Mémorise une réponse générée par le LLM dans les deux caches"""
+        self.response_cache.put(query, cache_context, response)
+        self.semantic_cache.add(self.intent_classifier.residual(query),
+                                (intent.primary, context_hash(cache_context)), response)
+
+    def _remember(self, query: str, response: str) -> str:
+        """Ajoute l'échange à l'historique et retourne la réponse"""
+        self.conversation_history.append((query, response))
+        if self.on_turn is not None:
+            self.on_turn(self.state)
+        return response
+
+    @traced_request('chatbot.get_response')
     def get_response(self, query: str) -> str:
         """Génère une réponse à la question de l'utilisateur en utilisant le contexte"""
         if not query or len(query.strip()) < 2:
-            return "Je suis désolé, votre question est trop courte. Pourriez-vous la reformuler ?"
+            return SHORT_QUERY_MESSAGE
         
         query = query.lower().strip()
-        
-        # Détecter le niveau de compétence dans la question
-        if any(word in query for word in ["débutant", "commencer", "débuter"]):
-            self.context["skill_level"] = "beginner"
-        elif any(word in query for word in ["intermédiaire", "moyen"]):
-            self.context["skill_level"] = "intermediate"
-        elif any(word in query for word in ["avancé", "expert", "pro"]):
-            self.context["skill_level"] = "expert"
+        intent = self._classify(query)
+        self._update_skill_level(intent)
         
         # Vérifier si c'est une salutation
-        if self._is_greeting(query):
-            response = self._get_greeting_response(query)
-            self.conversation_history.append((query, response))
-            return response
+        if self._is_greeting(intent):
+            return self._remember(query, self._get_greeting_response(intent))
         
-        # Extraire le nom du champion et le rôle de la question
-        champion_name = None
-        role = None
+        champion_name, _ = self._detect_entities(intent)
+        local_response = self._get_local_response(query, champion_name, intent)
+        if local_response:
+            return self._remember(query, local_response)
         
-        # Chercher d'abord dans le contexte
-        champion_name = self.context.get("current_champion")
-        role = self.context.get("current_role")
-        
-        # Puis dans la question
-        words = query.split()
-        for word in words:
-            # Vérifier si le mot est un champion
-            if self.riot_api.get_champion_info(word):
-                champion_name = word
-                self.context["current_champion"] = word
-            # Vérifier si le mot est un rôle
-            elif word in ["top", "jungle", "mid", "bot", "support"]:
-                role = word
-                self.context["current_role"] = word
-        
-        if champion_name:
-            # Détecter le type de question en priorité
-            is_stats_question = any(word in query for word in ["stat", "statistique", "dégât", "damage", "résistance"])
-            is_counter_question = any(word in query for word in ["counter", "contre", "matchup", "versus", "vs", "affinité"])
-            is_ability_question = any(word in query for word in ["capacité", "spell", "sort", "q", "w", "e", "r", "ulti", "passive", "passif"])
-            
-            # Traiter la question selon son type
-            if is_stats_question:
-                stats_response = self._get_stats_response(champion_name)
-                if stats_response:
-                    self.conversation_history.append((query, stats_response))
-                    return stats_response
-            
-            elif is_counter_question:
-                matchup_response = self._get_matchup_response(query, champion_name)
-                if matchup_response:
-                    self.conversation_history.append((query, matchup_response))
-                    return matchup_response
-            
-            elif is_ability_question:
-                ability_response = self._get_ability_response(query)
-                if ability_response:
-                    self.conversation_history.append((query, ability_response))
-                    return ability_response
-            
-            # Questions générales sur le champion
-            champion_response = self._get_champion_response(query)
-            if champion_response:
-                self.conversation_history.append((query, champion_response))
-                return champion_response
-            
-            # Questions spécifiques sur un aspect du champion
-            for topic in ["mana", "trade", "position", "combo", "objectif"]:
-                if topic in query:
-                    specific_response = self._get_champion_specific_response(champion_name, topic)
-                    if specific_response:
-                        self.conversation_history.append((query, specific_response))
-                        self.context["last_topic"] = topic
-                        return specific_response
+        # Question déjà posée (ou reformulée) dans le même contexte : aucune génération
+        cache_context = self._cache_context()
+        cached_response = self._get_cached_response(query, intent, cache_context)
+        if cached_response:
+            return self._remember(query, cached_response)
         
         # En dernier recours, utiliser l'API HuggingFace avec le contexte enrichi
         try:
-            context_prompt = self._build_context_prompt()
-            conversation_history = self._format_conversation_history()
-            response = self.huggingface_api.get_response(query + context_prompt + conversation_history)
+            response = self.huggingface_api.get_response(query, **self._fallback_context())
+            if response:
+                self._cache_response(query, intent, cache_context, response)
+                return self._remember(query, response)
+        except Exception as e:
+            print(f"Erreur HuggingFace: {str(e)}")
+        
+        return UNKNOWN_QUERY_MESSAGE
+
+    @traced_request('chatbot.stream_response')
+    def stream_response(self, query: str) -> Iterator[str]:
+        """Comme get_response, mais produit la réponse du LLM morceau par morceau"""
+        if not query or len(query.strip()) < 2:
+            yield SHORT_QUERY_MESSAGE
+            return
+        
+        query = query.lower().strip()
+        intent = self._classify(query)
+        self._update_skill_level(intent)
+        
+        if self._is_greeting(intent):
+            yield self._remember(query, self._get_greeting_response(intent))
+            return
+        
+        champion_name, _ = self._detect_entities(intent)
+        local_response = self._get_local_response(query, champion_name, intent)
+        if local_response:
+            yield self._remember(query, local_response)
+            return
+        
+        cache_context = self._cache_context()
+        cached_response = self._get_cached_response(query, intent, cache_context)
+        if cached_response:
+            yield self._remember(query, cached_response)
+            return
+        
+        # Les réponses locales sont instantanées : seul le LLM est diffusé en streaming
+        chunks = []
+        try:
+            for chunk in self.huggingface_api.stream_response(query, **self._fallback_context()):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            print(f"Erreur HuggingFace: {str(e)}")
+        
+        response = "".join(chunks).strip()
+        if response:
+            self._cache_response(query, intent, cache_context, response)
+            self._remember(query, response)
+        else:
+            yield UNKNOWN_QUERY_MESSAGE
+
+    @traced_request('chatbot.aget_response')
+    async def aget_response(self, query: str) -> str:
+        """Version asynchrone de get_response : les récupérations indépendantes sont concurrentes.
+
+        Les étapes pouvant bloquer (premières constructions des index, embedding du cache sémantique,
+        prompt, sauvegarde de la session) s'exécutent dans le pool de threads, jamais sur la boucle.
+        """
+        if not query or len(query.strip()) < 2:
+            return SHORT_QUERY_MESSAGE
+        
+        query = query.lower().strip()
+        # L'index des champions peut être construit (ou reconstruit après un échec) ici
+        intent = await run_blocking(self._classify, query)
+        self._update_skill_level(intent)
+        
+        if self._is_greeting(intent):
+            return await run_blocking(self._remember, query, self._get_greeting_response(intent))
+        
+        champion_name, mentioned = self._detect_entities(intent)
+        
+        # Précharger en parallèle tous les champions mentionnés (requêtes dupliquées fusionnées)
+        await self.async_riot_api.prefetch([champion_name, *mentioned])
+        
+        local_response = await run_blocking(self._get_local_response, query, champion_name, intent)
+        if local_response:
+            return await run_blocking(self._remember, query, local_response)
+        
+        cache_context = self._cache_context()
+        cached_response = await run_blocking(self._get_cached_response, query, intent, cache_context)
+        if cached_response:
+            return await run_blocking(self._remember, query, cached_response)
+        
+        try:
+            fallback_context = await run_blocking(self._fallback_context)
+            response = await self.async_huggingface_api.get_response(query, **fallback_context)
             if response:
-                self.conversation_history.append((query, response))
-                return response
+                await run_blocking(self._cache_response, query, intent, cache_context, response)
+                return await run_blocking(self._remember, query, response)
         except Exception as e:
             print(f"Erreur HuggingFace: {str(e)}")
         
-        return "Je ne suis pas sûr de comprendre votre question. Essayez de la reformuler en précisant le champion et le type d'information que vous recherchez (statistiques, capacités, counters, etc.)."
+        return UNKNOWN_QUERY_MESSAGE
 
-    def _build_context_prompt(self) -> str:
-        """Construit un prompt enrichi avec le contexte actuel"""
-        context_prompt = "\nContexte actuel :\n"
+    def _build_context_lines(self) -> List[str]:
+        """Lignes décrivant le contexte actuel de la conversation"""
+        lines = []
         
         if self.context["current_champion"]:
             champion_info = self.riot_api.get_champion_info(self.context["current_champion"])
             if champion_info:
-                context_prompt += f"- Champion : {champion_info['name']}\n"
+                lines.append(f"- Champion : {champion_info['name']}")
                 if 'tags' in champion_info:
-                    context_prompt += f"- Type : {', '.join(champion_info['tags'])}\n"
+                    lines.append(f"- Rôles : {', '.join(champion_info['tags'])}")
         
         if self.context["current_role"]:
-            context_prompt += f"- Rôle : {self.context['current_role']}\n"
+            lines.append(f"- Rôle : {self.context['current_role']}")
         
         if self.context["skill_level"]:
-            context_prompt += f"- Niveau de jeu : {self.context['skill_level']}\n"
+            lines.append(f"- Niveau de jeu : {self.context['skill_level']}")
         
         if self.context["last_topic"]:
-            context_prompt += f"- Dernier sujet abordé : {self.context['last_topic']}\n"
+            lines.append(f"- Dernier sujet abordé : {self.context['last_topic']}")
         
-        return context_prompt 
\ No newline at end of file
+        return lines
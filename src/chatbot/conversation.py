@@ -0,0 +1,59 @@
+"""
+État propre à un utilisateur : contexte de la conversation et derniers échanges.
+"""
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# Nombre d'échanges conservés pour le contexte du LLM
+HISTORY_SIZE = 5
+
+
+def default_context() -> Dict[str, Any]:
+    return {
+        "current_champion": None,
+        "current_role": None,
+        "skill_level": "beginner",  # beginner, intermediate, advanced, expert
+        "last_topic": None
+    }
+
+
+@dataclass
+class ConversationState:
+    """Contexte et historique d'une session ; tout le reste du chatbot est partagé"""
+    context: Dict[str, Any] = field(default_factory=default_context)
+    conversation_history: Deque[Tuple[str, str]] = field(default_factory=lambda: deque(maxlen=HISTORY_SIZE))
+    last_active: float = field(default_factory=time.monotonic)
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def clear(self) -> None:
+        """Oublie la conversation (nouvelle discussion)"""
+        self.context = default_context()
+        self.conversation_history.clear()
+
+    def size_bytes(self) -> int:
+        """Estimation de la mémoire occupée par la session"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.context) + sys.getsizeof(self.conversation_history)
+        size += sum(sys.getsizeof(value) for value in self.context.values() if value is not None)
+        for question, response in self.conversation_history:
+            size += sys.getsizeof(question) + sys.getsizeof(response)
+        return size
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forme sérialisable : contexte sans valeurs vides et échanges [question, réponse]"""
+        return {
+            'c': {key: value for key, value in self.context.items() if value is not None},
+            'h': [list(exchange) for exchange in self.conversation_history]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'ConversationState':
+        state = cls()
+        if data:
+            state.context.update(data.get('c') or {})
+            state.conversation_history.extend(tuple(exchange) for exchange in data.get('h') or [])
+        return state
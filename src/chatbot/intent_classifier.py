@@ -0,0 +1,170 @@
+"""
+Classification des questions en une seule passe (intentions, rôle, niveau, capacité).
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Mots-clés par intention ; les mots courts (q, w, e, r...) ne sont reconnus que seuls
+INTENT_KEYWORDS = {
+    "champion_info": ["qui est", "quel champion", "parle moi de", "raconte moi", "comment jouer", "explique"],
+    "ability_info": ["capacité", "spell", "compétence", "q", "w", "e", "r", "passif", "passive", "sort", "ulti", "ultimate"],
+    "role_info": ["role", "poste", "position", "lane", "jouer"],
+    "item_info": ["objet", "item", "stuff", "build", "équipement", "acheter"],
+    "gameplay_info": ["comment", "quand", "pourquoi", "stratégie", "technique"],
+    "matchup_info": ["counter", "contre", "matchup", "versus", "vs", "synergie", "composition", "affinité"],
+    "mechanics_info": ["mécanique", "combo", "technique", "astuce", "trick"],
+    "tips_info": ["conseil", "astuce", "tip", "guide", "aide"],
+    "stats_info": ["statistique", "stat", "dégât", "damage", "résistance", "armor", "mr"],
+    "meta_info": ["meta", "tier", "fort", "faible", "populaire", "ban"]
+}
+
+ROLE_KEYWORDS = {
+    "top": "top", "jungle": "jungle", "jungler": "jungle", "mid": "mid",
+    "bot": "bot", "adc": "bot", "support": "support", "supp": "support"
+}
+
+SKILL_KEYWORDS = {
+    "débutant": "beginner", "commencer": "beginner", "débuter": "beginner",
+    "intermédiaire": "intermediate", "moyen": "intermediate",
+    "avancé": "expert", "expert": "expert", "pro": "expert"
+}
+
+ABILITY_KEYWORDS = {
+    "q": "q", "w": "w", "e": "e", "r": "r",
+    "passif": "passif", "passive": "passif", "ulti": "r", "ultimate": "r"
+}
+
+TOPIC_KEYWORDS = {
+    "mana": "mana", "trade": "trade", "trading": "trade", "position": "position",
+    "positionnement": "position", "combo": "combo", "objectif": "objectif"
+}
+
+# Probabilité qu'un mot-clé isolé désigne bien son intention (combinées en "ou" probabiliste)
+KEYWORD_CONFIDENCE = 0.7
+
+
+def fold(text: str) -> str:
+    """Met en minuscules et retire les accents (la longueur du texte est conservée)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return unicodedata.normalize('NFC', ''.join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+@dataclass
+class QueryIntent:
+    """Résultat de la classification d'une question"""
+    intents: Dict[str, float] = field(default_factory=dict)
+    champions: List[str] = field(default_factory=list)
+    role: Optional[str] = None
+    skill_level: Optional[str] = None
+    greeting: Optional[str] = None
+    ability: Optional[str] = None
+    topics: List[str] = field(default_factory=list)
+
+    @property
+    def primary(self) -> Optional[str]:
+        """Intention la plus probable"""
+        return max(self.intents, key=self.intents.get) if self.intents else None
+
+    def has(self, intent: str, threshold: float = 0.0) -> bool:
+        return self.intents.get(intent, 0.0) > threshold
+
+
+class IntentClassifier:
+    def __init__(self, intent_keywords: Mapping[str, Iterable[str]] = INTENT_KEYWORDS,
+                 greetings: Iterable[str] = ()):
+        """Compile tous les mots-clés en une seule expression régulière"""
+        # Mot-clé normalisé -> liste de (catégorie, valeur)
+        self._labels = {}
+        for intent, keywords in intent_keywords.items():
+            for keyword in keywords:
+                self._add(keyword, 'intent', intent)
+        for category, keywords in (('role', ROLE_KEYWORDS), ('skill', SKILL_KEYWORDS),
+                                   ('ability', ABILITY_KEYWORDS), ('topic', TOPIC_KEYWORDS)):
+            for keyword, value in keywords.items():
+                self._add(keyword, category, value)
+        for greeting in greetings:
+            self._add(greeting, 'greeting', greeting)
+
+        self._pattern = self._compile(self._labels)
+        # Mots-clés qui ne portent qu'une intention (retirés par residual)
+        self._intent_only_pattern = self._compile(
+            keyword for keyword, labels in self._labels.items()
+            if all(category == 'intent' for category, _ in labels))
+
+        # Un mot-clé partagé par plusieurs intentions compte moins pour chacune
+        self._weights = {}
+        for keyword, labels in self._labels.items():
+            intents = [value for category, value in labels if category == 'intent']
+            if intents:
+                self._weights[keyword] = KEYWORD_CONFIDENCE / len(intents)
+
+    @staticmethod
+    def _compile(keywords: Iterable[str]) -> Optional[re.Pattern]:
+        # Les alternatives les plus longues d'abord ("passive" avant "passif") ;
+        # les mots de plus de deux lettres acceptent le pluriel
+        alternatives = []
+        for keyword in sorted(keywords, key=len, reverse=True):
+            suffix = "(?:s|x)?" if len(keyword) > 2 else ""
+            alternatives.append(re.escape(keyword) + suffix)
+        if not alternatives:
+            return None
+        return re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)")
+
+    def _add(self, keyword: str, category: str, value: str) -> None:
+        labels = self._labels.setdefault(fold(keyword), [])
+        if (category, value) not in labels:
+            labels.append((category, value))
+
+    def _lookup(self, matched: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Retrouve le mot-clé d'une correspondance (éventuellement au pluriel)"""
+        if matched in self._labels:
+            return matched, self._labels[matched]
+        singular = matched[:-1]
+        return singular, self._labels.get(singular, [])
+
+    def classify(self, query: str, champion_index=None) -> QueryIntent:
+        """Classe une question en un seul parcours du texte"""
+        result = QueryIntent()
+        if not query:
+            return result
+
+        text = fold(query)
+        misses = {}
+        seen = set()
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                keyword, labels = self._lookup(match.group(0))
+                for category, value in labels:
+                    if category == 'intent':
+                        if (keyword, value) not in seen:
+                            seen.add((keyword, value))
+                            misses[value] = misses.get(value, 1.0) * (1 - self._weights[keyword])
+                    elif category == 'role':
+                        # "top 10" désigne un classement, pas la voie du haut
+                        if value == "top" and re.match(r"\s*\d", text[match.end():]):
+                            continue
+                        result.role = value
+                    elif category == 'skill':
+                        result.skill_level = result.skill_level or value
+                    elif category == 'greeting':
+                        result.greeting = result.greeting or value
+                    elif category == 'ability':
+                        result.ability = value
+                    elif category == 'topic' and value not in result.topics:
+                        result.topics.append(value)
+
+        scores = {intent: round(1 - miss, 3) for intent, miss in misses.items()}
+        result.intents = dict(sorted(scores.items(), key=lambda item: item[1], reverse=True))
+
+        if champion_index is not None:
+            result.champions = list(champion_index.find_champions(query))
+        return result
+
+    def residual(self, query: str) -> str:
+        """Texte de la question sans ses mots-clés d'intention (ce qui la distingue de son intention)"""
+        text = fold(query or "")
+        if self._intent_only_pattern is None:
+            return text
+        return " ".join(self._intent_only_pattern.sub(" ", text).split())
@@ -0,0 +1,197 @@
+"""
+Cache des réponses du LLM, indexé par question normalisée et contexte.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.chatbot.intent_classifier import fold
+from src.config.config import Config
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Clés du contexte qui influencent la réponse du LLM
+CONTEXT_KEYS = ('champion', 'role', 'skill_level')
+
+
+def normalize_query(query: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces normalisés"""
+    return " ".join(_WORD_PATTERN.findall(fold(query or "")))
+
+
+def context_hash(context: Optional[Mapping[str, Any]]) -> str:
+    """Empreinte canonique du contexte (indépendante de l'ordre des clés)"""
+    canonical = {key: (context or {}).get(key) for key in CONTEXT_KEYS}
+    payload = json.dumps(canonical, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = 1024, ttl: float = 86400, path: Optional[str] = None):
+        """Cache LRU borné avec expiration, éventuellement partagé via SQLite"""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # clé -> [réponse, expiration, nombre de hits]
+        self._lock = threading.RLock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            # WAL : lectures concurrentes entre processus pendant une écriture
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "hits INTEGER NOT NULL DEFAULT 0, last_used REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(query: str, context: Optional[Mapping[str, Any]] = None) -> str:
+        return f"{context_hash(context)}:{normalize_query(query)}"
+
+    def get(self, query: str, context: Optional[Mapping[str, Any]] = None) -> Optional[str]:
+        """Retourne la réponse en cache, ou None"""
+        key = self.make_key(query, context)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None and self._db is not None:
+                entry = self._load(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[2] += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._trim()
+            self.hits += 1
+            if self._db is not None:
+                self._db.execute("UPDATE responses SET hits = hits + 1, last_used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            return entry[0]
+
+    def put(self, query: str, context: Optional[Mapping[str, Any]], response: str) -> None:
+        """Met en cache une réponse"""
+        if not response:
+            return
+        key = self.make_key(query, context)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._entries[key] = [response, expires_at, 0]
+            self._entries.move_to_end(key)
+            self._trim()
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, expires_at, hits, last_used) "
+                    "VALUES (?, ?, ?, 0, ?)", (key, response, expires_at, now))
+                self._prune(now)
+                self._db.commit()
+
+    def _load(self, key: str, now: float) -> Optional[list]:
+        row = self._db.execute(
+            "SELECT response, expires_at, hits FROM responses WHERE key = ? AND expires_at > ?",
+            (key, now)).fetchone()
+        return list(row) if row else None
+
+    def _trim(self) -> None:
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _prune(self, now: float) -> None:
+        # Supprimer les réponses expirées puis les moins récemment utilisées
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM responses WHERE key NOT IN "
+            "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)", (self.max_size,))
+
+    def hit_count(self, query: str, context: Optional[Mapping[str, Any]] = None) -> int:
+        """Nombre de fois où une réponse a été servie depuis le cache"""
+        key = self.make_key(query, context)
+        with self._lock:
+            if self._db is not None:
+                row = self._db.execute("SELECT hits FROM responses WHERE key = ?", (key,)).fetchone()
+                return row[0] if row else 0
+            entry = self._entries.get(key)
+            return entry[2] if entry else 0
+
+    def most_hit(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Les questions les plus souvent servies depuis le cache"""
+        with self._lock:
+            if self._db is not None:
+                rows = self._db.execute(
+                    "SELECT key, hits FROM responses ORDER BY hits DESC LIMIT ?", (n,)).fetchall()
+            else:
+                rows = sorted(((key, entry[2]) for key, entry in self._entries.items()),
+                              key=lambda row: row[1], reverse=True)[:n]
+        return [(key.split(":", 1)[1], hits) for key, hits in rows]
+
+    def clear(self) -> None:
+        """Vide le cache (mémoire et disque)"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du cache"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'persistent': self._db is not None
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Retourne le cache de réponses partagé par le processus"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = Config()
+                _cache = ResponseCache(
+                    max_size=config.RESPONSE_CACHE_SIZE,
+                    ttl=config.RESPONSE_CACHE_TTL,
+                    path=config.RESPONSE_CACHE_PATH
+                )
+    return _cache
+
+
+def reset_response_cache() -> None:
+    """Supprime le cache partagé (utilisé par les tests)"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
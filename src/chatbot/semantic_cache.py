@@ -0,0 +1,177 @@
+"""
+Cache sémantique des réponses du LLM : une question reformulée réutilise la réponse déjà générée.
+"""
+import threading
+import time
+from typing import Hashable, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from src.config.config import Config
+from src.utils.text_processing import preprocess_text
+
+
+class LexicalEmbedder:
+    def __init__(self, n_features: int = 4096):
+        """Vecteurs de mots et bigrammes (hachage), sans modèle ni apprentissage"""
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                            alternate_sign=False, norm='l2')
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Vecteurs normalisés (L2), un par texte"""
+        matrix = self.vectorizer.transform([preprocess_text(text) for text in texts])
+        return matrix.toarray().astype(np.float32)
+
+
+class TransformerEmbedder:
+    def __init__(self, model_name: str):
+        """Petit modèle d'embedding exécuté sur CPU (transformers + torch)"""
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Moyenne des états cachés pondérée par le masque d'attention, normalisée (L2)"""
+        with self.torch.no_grad():
+            encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=128,
+                                     return_tensors="pt")
+            hidden = self.model(**encoded).last_hidden_state
+            mask = encoded["attention_mask"].unsqueeze(-1).float()
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled = self.torch.nn.functional.normalize(pooled, p=2, dim=1)
+        return pooled.numpy().astype(np.float32)
+
+
+def load_embedder(model_name: Optional[str] = None):
+    """Charge le modèle d'embedding, ou les vecteurs lexicaux à défaut"""
+    if model_name:
+        try:
+            return TransformerEmbedder(model_name)
+        except ImportError:
+            print("transformers/torch non installés : cache sémantique lexical")
+        except Exception as e:
+            print(f"Erreur lors du chargement du modèle d'embedding: {e}")
+    return LexicalEmbedder()
+
+
+class SemanticCache:
+    def __init__(self, embedder=None, threshold: float = 0.85, max_size: int = 2048, ttl: float = 86400):
+        """Index vectoriel en mémoire (recherche exhaustive NumPy) borné à max_size réponses"""
+        self.embedder = embedder or LexicalEmbedder()
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Tampon circulaire : la plus ancienne réponse est remplacée quand l'index est plein
+        self._vectors = None
+        self._scopes = np.full(max_size, -1, dtype=np.int64)
+        self._expires = np.zeros(max_size)
+        self._answers = [None] * max_size
+        self._scope_ids = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _scope_id(self, scope: Hashable, create: bool = False) -> Optional[int]:
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None and create:
+            scope_id = self._scope_ids[scope] = len(self._scope_ids)
+        return scope_id
+
+    def _embed(self, text: str) -> np.ndarray:
+        return self.embedder.embed([text])[0]
+
+    def lookup(self, text: str, scope: Hashable) -> Optional[Tuple[str, float]]:
+        """Réponse la plus proche dans le même périmètre (champion, intention...), si assez similaire"""
+        with self._lock:
+            scope_id = self._scope_id(scope)
+            if scope_id is None or self._vectors is None:
+                self.misses += 1
+                return None
+        vector = self._embed(text)
+        with self._lock:
+            candidates = np.flatnonzero((self._scopes == scope_id) & (self._expires > time.time()))
+            # Texte vide ("Quand ?", "Pourquoi ?" réduits à "?") : rien ne permet de les distinguer
+            if not candidates.size or not vector.any():
+                self.misses += 1
+                return None
+            similarities = self._vectors[candidates] @ vector
+            best = int(np.argmax(similarities))
+            score = float(similarities[best])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._answers[candidates[best]], score
+
+    def add(self, text: str, scope: Hashable, answer: str) -> None:
+        """Ajoute une réponse générée à l'index"""
+        if not answer:
+            return
+        vector = self._embed(text)
+        if not vector.any():
+            # Jamais retrouvé par lookup : inutile d'occuper une place
+            return
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+            slot = self._next
+            self._vectors[slot] = vector
+            self._scopes[slot] = self._scope_id(scope, create=True)
+            self._expires[slot] = time.time() + self.ttl
+            self._answers[slot] = answer
+            self._next = (slot + 1) % self.max_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.fill(-1)
+            self._answers = [None] * self.max_size
+            self._scope_ids.clear()
+            self._next = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return int((self._scopes >= 0).sum())
+
+    def stats(self) -> dict:
+        """Retourne les compteurs du cache"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'embedder': type(self.embedder).__name__
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Retourne le cache sémantique partagé par le processus (modèle chargé une seule fois)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = Config()
+                _cache = SemanticCache(
+                    embedder=load_embedder(config.SEMANTIC_CACHE_MODEL),
+                    threshold=config.SEMANTIC_CACHE_THRESHOLD,
+                    max_size=config.SEMANTIC_CACHE_SIZE,
+                    ttl=config.SEMANTIC_CACHE_TTL
+                )
+    return _cache
+
+
+def reset_semantic_cache() -> None:
+    """Supprime le cache partagé (utilisé par les tests)"""
+    global _cache
+    with _cache_lock:
+        _cache = None
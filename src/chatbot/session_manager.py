@@ -0,0 +1,155 @@
+"""
+Sessions utilisateur : un état léger par utilisateur au-dessus des composants partagés du chatbot.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from src.config.config import Config
+from src.chatbot.chatbot import ChatbotResources, LolChatbot, get_chatbot_resources
+from src.chatbot.conversation import ConversationState
+from src.chatbot.state_store import StateStore, create_state_store
+
+
+class SessionManager:
+    def __init__(self, resources: Optional[ChatbotResources] = None, max_sessions: int = 10000,
+                 idle_ttl: float = 1800, max_bytes: int = 64 * 1024 * 1024,
+                 store: Optional[StateStore] = None):
+        """Sessions LRU : expiration après idle_ttl secondes d'inactivité, mémoire bornée à max_bytes.
+
+        Avec un stockage externe (store), l'état est relu à chaque tour et enregistré à la fin
+        de l'échange : n'importe quel processus peut servir la conversation.
+        """
+        self._resources = resources
+        self.store = store
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.evicted = 0
+        self._sessions = OrderedDict()  # identifiant -> ConversationState
+        # Taille de chaque session mesurée à son dernier accès ou tour (total tenu à jour sans tout parcourir)
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def resources(self) -> ChatbotResources:
+        # Chargés à la première session, puis partagés par toutes les suivantes
+        return self._resources or get_chatbot_resources()
+
+    def get(self, session_id: str) -> LolChatbot:
+        """Chatbot de la session (créée au premier appel) ; seul l'état de la conversation lui est propre"""
+        if self.store is not None:
+            state = self.store.load(session_id) or ConversationState()
+            return LolChatbot(state, self.resources,
+                              on_turn=lambda state: self.store.save(session_id, state))
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self._sessions[session_id] = ConversationState()
+            self._access(session_id, state)
+        return LolChatbot(state, self.resources,
+                          on_turn=lambda state: self._on_turn(session_id, state))
+
+    def _on_turn(self, session_id: str, state: ConversationState) -> None:
+        """Mesure la session après l'ajout de l'échange (l'historique a grandi depuis get)"""
+        with self._lock:
+            # Session supprimée ou remplacée entre-temps : rien à comptabiliser
+            if self._sessions.get(session_id) is state:
+                self._access(session_id, state)
+
+    def _access(self, session_id: str, state: ConversationState) -> None:
+        """Marque la session comme la plus récente, met à jour sa taille et applique les limites"""
+        self._sessions.move_to_end(session_id)
+        state.touch()
+        size = state.size_bytes()
+        self._total_bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+        self._evict()
+
+    def drop(self, session_id: str) -> bool:
+        """Supprime une session (déconnexion ou historique effacé)"""
+        if self.store is not None:
+            return self.store.delete(session_id)
+        with self._lock:
+            return self._remove(session_id) is not None
+
+    def _remove(self, session_id: str) -> Optional[ConversationState]:
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+        return self._sessions.pop(session_id, None)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def memory_bytes(self) -> int:
+        """Estimation de la mémoire occupée par l'ensemble des sessions (au dernier tour de chacune)"""
+        return self._total_bytes
+
+    def _evict(self) -> None:
+        """Retire les sessions inactives, puis les plus anciennes au-delà des limites"""
+        deadline = time.monotonic() - self.idle_ttl
+        # Ordre LRU : les sessions inactives sont en tête
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if state.last_active > deadline:
+                break
+            self._remove(session_id)
+            self.evicted += 1
+        # La session courante (la plus récente) est toujours conservée
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions
+            or (self.max_bytes and self._total_bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._sessions)))
+            self.evicted += 1
+
+    def evict_idle(self) -> int:
+        """Expire les sessions inactives, retourne le nombre de sessions supprimées"""
+        with self._lock:
+            before = self.evicted
+            self._evict()
+            return self.evicted - before
+
+    def stats(self) -> Dict:
+        """Retourne les compteurs des sessions"""
+        return {
+            'sessions': len(self),
+            'max_sessions': self.max_sessions,
+            'memory_bytes': self.memory_bytes(),
+            'max_bytes': self.max_bytes,
+            'evicted': self.evicted,
+            'store': type(self.store).__name__ if self.store is not None else None
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SessionManager:
+    """Retourne le gestionnaire de sessions partagé par le processus"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                config = Config()
+                _manager = SessionManager(
+                    max_sessions=config.SESSION_MAX_COUNT,
+                    idle_ttl=config.SESSION_IDLE_TTL,
+                    max_bytes=config.SESSION_MAX_BYTES,
+                    store=create_state_store(config)
+                )
+    return _manager
+
+
+def reset_session_manager() -> None:
+    """Supprime le gestionnaire partagé (utilisé par les tests)"""
+    global _manager
+    with _manager_lock:
+        if _manager is not None and _manager.store is not None:
+            _manager.store.close()
+        _manager = None
@@ -0,0 +1,214 @@
+"""
+Stockage externe de l'état des conversations : mémoire, SQLite ou serveur compatible Redis.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Optional
+
+from src.config.config import Config
+from src.chatbot.conversation import ConversationState
+
+# Au-delà de cette taille, l'état sérialisé est compressé
+COMPRESS_THRESHOLD = 512
+# Suppression des sessions expirées toutes les N écritures (SQLite, mémoire)
+PRUNE_EVERY = 100
+
+
+def encode_state(state: ConversationState) -> bytes:
+    """JSON compact, compressé (zlib) s'il est volumineux ; le premier octet indique le format"""
+    payload = json.dumps(state.to_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(payload) > COMPRESS_THRESHOLD:
+        return b'z' + zlib.compress(payload)
+    return b'j' + payload
+
+
+def decode_state(data: Optional[bytes]) -> Optional[ConversationState]:
+    if not data:
+        return None
+    try:
+        payload = zlib.decompress(data[1:]) if data[:1] == b'z' else data[1:]
+        return ConversationState.from_dict(json.loads(payload))
+    except (ValueError, zlib.error) as e:
+        print(f"Erreur lors du décodage d'une session: {e}")
+        return None
+
+
+class StateStore(ABC):
+    """Interface commune : un état par session, une lecture et une écriture par tour"""
+
+    def __init__(self, ttl: float = 1800):
+        self.ttl = ttl
+
+    def load(self, session_id: str) -> Optional[ConversationState]:
+        return self.load_many([session_id]).get(session_id)
+
+    def save(self, session_id: str, state: ConversationState) -> None:
+        self.save_many({session_id: state})
+
+    @abstractmethod
+    def load_many(self, session_ids: Iterable[str]) -> Dict[str, ConversationState]:
+        """États des sessions encore valides, en une seule lecture"""
+
+    @abstractmethod
+    def save_many(self, states: Dict[str, ConversationState]) -> None:
+        """Écrit les états en une seule opération et repousse leur expiration"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Supprime la session, False si elle n'existait pas"""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStateStore(StateStore):
+    def __init__(self, ttl: float = 1800):
+        """États sérialisés dans le processus (même comportement que les stockages externes)"""
+        super().__init__(ttl)
+        self._entries = {}  # identifiant -> (état sérialisé, expiration)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def load_many(self, session_ids: Iterable[str]) -> Dict[str, ConversationState]:
+        now = time.time()
+        states = {}
+        with self._lock:
+            for session_id in session_ids:
+                entry = self._entries.get(session_id)
+                if entry is not None and entry[1] > now:
+                    states[session_id] = decode_state(entry[0])
+        return {session_id: state for session_id, state in states.items() if state is not None}
+
+    def save_many(self, states: Dict[str, ConversationState]) -> None:
+        expires_at = time.time() + self.ttl
+        encoded = {session_id: encode_state(state) for session_id, state in states.items()}
+        with self._lock:
+            for session_id, data in encoded.items():
+                self._entries[session_id] = (data, expires_at)
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                now = time.time()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteStateStore(StateStore):
+    def __init__(self, path: str, ttl: float = 1800):
+        """Fichier SQLite partagé par les processus d'une même machine (mode WAL)"""
+        super().__init__(ttl)
+        self.path = path
+        self._writes = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, state BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def load_many(self, session_ids: Iterable[str]) -> Dict[str, ConversationState]:
+        session_ids = list(session_ids)
+        if not session_ids:
+            return {}
+        placeholders = ",".join("?" * len(session_ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, state FROM sessions WHERE id IN ({placeholders}) AND expires_at > ?",
+                (*session_ids, time.time())).fetchall()
+        states = {session_id: decode_state(data) for session_id, data in rows}
+        return {session_id: state for session_id, state in states.items() if state is not None}
+
+    def save_many(self, states: Dict[str, ConversationState]) -> None:
+        now = time.time()
+        rows = [(session_id, encode_state(state), now + self.ttl) for session_id, state in states.items()]
+        with self._lock:
+            # Une seule transaction pour toutes les sessions
+            self._db.executemany("INSERT OR REPLACE INTO sessions (id, state, expires_at) VALUES (?, ?, ?)", rows)
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            self._db.commit()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            self._db.commit()
+        return deleted > 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class RedisStateStore(StateStore):
+    def __init__(self, client, ttl: float = 1800, prefix: str = "lolchatbot:session:"):
+        """Serveur compatible Redis (client redis-py ou équivalent) ; l'expiration est gérée par le serveur"""
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def load_many(self, session_ids: Iterable[str]) -> Dict[str, ConversationState]:
+        session_ids = list(session_ids)
+        if not session_ids:
+            return {}
+        # Un seul aller-retour pour toutes les sessions
+        values = self.client.mget([self._key(session_id) for session_id in session_ids])
+        states = {session_id: decode_state(value) for session_id, value in zip(session_ids, values)}
+        return {session_id: state for session_id, state in states.items() if state is not None}
+
+    def save_many(self, states: Dict[str, ConversationState]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for session_id, state in states.items():
+            pipeline.set(self._key(session_id), encode_state(state), ex=int(self.ttl))
+        pipeline.execute()
+
+    def delete(self, session_id: str) -> bool:
+        return bool(self.client.delete(self._key(session_id)))
+
+    def close(self) -> None:
+        close = getattr(self.client, 'close', None)
+        if close is not None:
+            close()
+
+
+def create_state_store(config: Optional[Config] = None) -> Optional[StateStore]:
+    """Stockage choisi par SESSION_STORE ; None = états gardés en mémoire dans le processus.
+
+    Un stockage demandé mais impossible à construire lève une erreur : se rabattre sur la mémoire
+    du processus séparerait les conversations entre les processus du serveur.
+    """
+    config = config or Config()
+    backend = config.SESSION_STORE
+    ttl = config.SESSION_IDLE_TTL
+    if not backend:
+        return None
+    if backend == 'memory':
+        return MemoryStateStore(ttl)
+    if backend == 'sqlite':
+        return SQLiteStateStore(config.SESSION_STORE_PATH, ttl)
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_STORE=redis exige le paquet redis (pip install redis)") from e
+        return RedisStateStore(redis.Redis.from_url(config.REDIS_URL), ttl)
+    raise ValueError(f"SESSION_STORE inconnu : {backend} (memory, sqlite ou redis)")
@@ -22,8 +22,11 @@ def main():
                 if user_input.lower() == 'quit':
                     break
                     
-                response = chatbot.get_response(user_input)
-                print(f"Bot: {response}")
+                # Afficher la réponse au fil de la génération
+                print("Bot: ", end="", flush=True)
+                for chunk in chatbot.stream_response(user_input):
+                    print(chunk, end="", flush=True)
+                print()
                 
             except KeyboardInterrupt:
                 print("\nAu revoir!")
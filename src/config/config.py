@@ -9,11 +9,130 @@ class Config:
         self.HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
         self.RIOT_API_KEY = os.getenv('RIOT_API_KEY')
         self.REGION = os.getenv('REGION', 'euw1')
+        self.RIOT_KEY_TYPE = os.getenv('RIOT_KEY_TYPE', 'development')  # development, production
         
         # URLs
-        self.DDRAGON_URL = "http://ddragon.leagueoflegends.com/cdn/13.24.1"
-        self.HUGGINGFACE_MODEL_URL = "https://api-inference.huggingface.co/models/facebook/blenderbot-400M-distill"
+        self.DDRAGON_URL = os.getenv('DDRAGON_URL', "https://ddragon.leagueoflegends.com")
+        self.HUGGINGFACE_MODEL_URL = os.getenv(
+            'HUGGINGFACE_MODEL_URL',
+            "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.2"
+        )
         
         # Paramètres
         self.SIMILARITY_THRESHOLD = 0.3
-        self.MAX_RESPONSE_LENGTH = 200 
\ No newline at end of file
+        self.MAX_RESPONSE_LENGTH = 200
+        
+        # Cache partagé des champions
+        self.CHAMPION_CACHE_SIZE = int(os.getenv('CHAMPION_CACHE_SIZE', 256))
+        self.CHAMPION_CACHE_TTL = int(os.getenv('CHAMPION_CACHE_TTL', 86400))
+        self.CHAMPION_NEGATIVE_TTL = int(os.getenv('CHAMPION_NEGATIVE_TTL', 300))
+        
+        # Snapshot Data Dragon local
+        self.DDRAGON_VERSION = os.getenv('DDRAGON_VERSION')  # None = dernière version publiée
+        self.DDRAGON_DEFAULT_VERSION = "13.24.1"
+        self.DDRAGON_LANG = os.getenv('DDRAGON_LANG', 'fr_FR')
+        self.DDRAGON_CACHE_DIR = os.getenv(
+            'DDRAGON_CACHE_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'lolchatbot', 'ddragon')
+        )
+        self.DDRAGON_SYNC = os.getenv('DDRAGON_SYNC', '1') != '0'  # 0 = ne jamais télécharger
+        
+        # Ressources NLTK installées à la construction (python -m src.utils.download_nltk)
+        self.NLTK_DATA_DIR = os.getenv(
+            'NLTK_DATA_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'lolchatbot', 'nltk_data')
+        )
+        
+        # Client HTTP partagé
+        self.HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+        self.HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+        self.HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', 0.5))
+        
+        # Pipeline asynchrone
+        self.ASYNC_WORKERS = int(os.getenv('ASYNC_WORKERS', 16))
+
+        # Cache des réponses du LLM
+        self.RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+        self.RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 86400))
+        self.RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH')  # fichier SQLite partagé, None = mémoire
+
+        # Cache sémantique (questions reformulées)
+        # Modèle sentence-transformers (ex. sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2),
+        # chargé avant le fork du serveur ; vide = vecteurs lexicaux TF
+        self.SEMANTIC_CACHE_MODEL = os.getenv('SEMANTIC_CACHE_MODEL') or None
+        self.SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.85))
+        self.SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', 2048))
+        self.SEMANTIC_CACHE_TTL = int(os.getenv('SEMANTIC_CACHE_TTL', 86400))
+
+        # Moteur de génération : "remote" (endpoint HuggingFace) ou "local" (CPU)
+        self.GENERATION_BACKEND = os.getenv('GENERATION_BACKEND', 'remote')
+        self.LOCAL_MODEL = os.getenv('LOCAL_MODEL', 'Qwen/Qwen2.5-0.5B-Instruct')  # nom transformers ou chemin .gguf
+        self.LOCAL_WORKERS = int(os.getenv('LOCAL_WORKERS', 1))
+        self.LOCAL_MAX_BATCH = int(os.getenv('LOCAL_MAX_BATCH', 4))
+        self.LOCAL_QUEUE_SIZE = int(os.getenv('LOCAL_QUEUE_SIZE', 32))
+        self.LOCAL_MAX_NEW_TOKENS = int(os.getenv('LOCAL_MAX_NEW_TOKENS', 256))
+
+        # Micro-lots de génération (file commune à toutes les sessions)
+        self.GENERATION_MAX_BATCH = int(os.getenv('GENERATION_MAX_BATCH', 1))  # 1 = pas de regroupement (endpoint sans listes d'inputs)
+        self.GENERATION_BATCH_WINDOW_MS = float(os.getenv('GENERATION_BATCH_WINDOW_MS', 10))
+        self.GENERATION_QUEUE_SIZE = int(os.getenv('GENERATION_QUEUE_SIZE', 64))
+        self.GENERATION_CONCURRENCY = int(os.getenv('GENERATION_CONCURRENCY', 4))  # lots distants simultanés
+
+        # Assemblage du prompt
+        self.PROMPT_MAX_TOKENS = int(os.getenv('PROMPT_MAX_TOKENS', 1024))
+        self.PROMPT_TOKENIZER = os.getenv('PROMPT_TOKENIZER')  # tokenizer transformers local, None = estimation
+
+        # Sessions utilisateur (état léger par utilisateur, composants partagés)
+        self.SESSION_MAX_COUNT = int(os.getenv('SESSION_MAX_COUNT', 10000))
+        self.SESSION_IDLE_TTL = int(os.getenv('SESSION_IDLE_TTL', 1800))
+        self.SESSION_MAX_BYTES = int(os.getenv('SESSION_MAX_BYTES', 64 * 1024 * 1024))
+        self.SESSION_STORE = os.getenv('SESSION_STORE')  # memory, sqlite ou redis ; None = objets en mémoire du processus
+        self.SESSION_STORE_PATH = os.getenv(
+            'SESSION_STORE_PATH',
+            os.path.join(os.path.expanduser('~'), '.cache', 'lolchatbot', 'sessions.sqlite3')
+        )
+        self.REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+        # Serveur HTTP (python -m src.server.main)
+        self.SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+        self.SERVER_PORT = int(os.getenv('SERVER_PORT', 8000))
+        self.SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 1))  # > 1 : SESSION_STORE sqlite ou redis requis
+        self.SERVER_MAX_CONCURRENCY = int(os.getenv('SERVER_MAX_CONCURRENCY', 16))  # réponses simultanées par processus
+        self.SERVER_ACQUIRE_TIMEOUT = float(os.getenv('SERVER_ACQUIRE_TIMEOUT', 5))
+        self.SERVER_KEEP_ALIVE = int(os.getenv('SERVER_KEEP_ALIVE', 5))
+        self.CHATBOT_API_URL = os.getenv('CHATBOT_API_URL')  # Streamlit en client léger, None = chatbot local
+
+        # Instrumentation (étapes chronométrées, compteurs, GET /metrics)
+        self.TRACING_ENABLED = os.getenv('TRACING_ENABLED', '0') == '1'
+        self.TRACING_SLOW_MS = float(os.getenv('TRACING_SLOW_MS', 1000))  # requêtes lentes journalisées
+        self.TRACING_PROFILE = os.getenv('TRACING_PROFILE', '0') == '1'  # piles échantillonnées des requêtes lentes
+        self.TRACING_PROFILE_INTERVAL_MS = float(os.getenv('TRACING_PROFILE_INTERVAL_MS', 5))
+        self.TRACING_PROFILE_DIR = os.getenv(
+            'TRACING_PROFILE_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'lolchatbot', 'profiles')
+        )
+
+        # Matchups calculés à partir de parties match-v5 locales (fichiers .json, .jsonl, .gz)
+        self.MATCH_DATA_DIR = os.getenv(
+            'MATCH_DATA_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'lolchatbot', 'matches')
+        )
+        self.MATCHUP_STATE_PATH = os.getenv(
+            'MATCHUP_STATE_PATH',
+            os.path.join(os.path.expanduser('~'), '.cache', 'lolchatbot', 'matchups.pickle')
+        )
+        self.MATCHUP_MIN_GAMES = int(os.getenv('MATCHUP_MIN_GAMES', 30))  # parties minimum pour classer un duel
+        self.MATCHUP_REFRESH_INTERVAL = int(os.getenv('MATCHUP_REFRESH_INTERVAL', 300))  # secondes entre deux lectures du dossier
+
+        # Ingestion en masse (python -m src.analytics.ingest) : stockage en colonnes des participants
+        self.MATCH_STORE_DIR = os.getenv(
+            'MATCH_STORE_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'lolchatbot', 'match_store')
+        )
+        self.INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', os.cpu_count() or 1))
+        self.INGEST_CHUNK_ROWS = int(os.getenv('INGEST_CHUNK_ROWS', 100000))  # lignes par lot ajouté au stockage
+        self.MATCH_API_URL = os.getenv('MATCH_API_URL', "https://europe.api.riotgames.com")  # routage régional match-v5
+
+        # Tier list calculée sur le stockage des parties (questions sur la méta)
+        self.TIER_MIN_GAMES = int(os.getenv('TIER_MIN_GAMES', 50))  # parties minimum pour classer un champion dans un rôle
+        self.TIER_QUEUES = [int(queue) for queue in os.getenv('TIER_QUEUES', '420,440').split(',') if queue.strip()]  # vide = toutes les files
@@ -1,12 +1,15 @@
 import os
 import sys
+import uuid
 
 # Ajouter le répertoire parent au PYTHONPATH
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 import streamlit as st
 from streamlit_chat import message
-from src.chatbot.chatbot import LolChatbot
+from src.config.config import Config
+from src.chatbot.session_manager import SessionManager, get_session_manager
+from src.server.client import ChatClient
 
 # Configuration de la page
 st.set_page_config(
@@ -15,12 +18,40 @@ st.set_page_config(
     layout="centered"
 )
 
+@st.cache_resource
+def load_session_manager() -> SessionManager:
+    """Gestionnaire partagé par toutes les sessions du serveur (API, caches et modèles chargés une fois)"""
+    manager = get_session_manager()
+    # Précharger les composants partagés avant le premier message
+    manager.resources
+    return manager
+
+@st.cache_resource
+def load_client():
+    """Client du serveur HTTP si CHATBOT_API_URL est défini (Streamlit ne charge alors aucun modèle)"""
+    api_url = Config().CHATBOT_API_URL
+    return ChatClient(api_url) if api_url else None
+
+def stream_answer(user_input: str):
+    """Réponse au fil de la génération, par le serveur HTTP ou le chatbot local"""
+    client = load_client()
+    if client is not None:
+        return client.stream(user_input, st.session_state.session_id)
+    # Seul le contexte de conversation est propre à la session
+    return load_session_manager().get(st.session_state.session_id).stream_response(user_input)
+
+def clear_conversation():
+    client = load_client()
+    if client is not None:
+        client.drop_session(st.session_state.session_id)
+    else:
+        load_session_manager().drop(st.session_state.session_id)
+
 def initialize_session_state():
     """Initialise les variables de session si elles n'existent pas"""
     try:
-        if "chatbot" not in st.session_state:
-            st.session_state.chatbot = LolChatbot()
-            st.success("Chatbot initialisé avec succès!")
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
         if "messages" not in st.session_state:
             st.session_state.messages = []
     except Exception as e:
@@ -49,9 +80,15 @@ def main():
         if user_input:
             # Ajouter le message de l'utilisateur
             st.session_state.messages.append(("user", user_input))
+            message(user_input, is_user=True, key=f"{len(st.session_state.messages) - 1}_user")
             
-            # Obtenir la réponse du chatbot
-            response = st.session_state.chatbot.get_response(user_input)
+            # Afficher la réponse du chatbot au fil de la génération
+            placeholder = st.empty()
+            response = ""
+            for chunk in stream_answer(user_input):
+                response += chunk
+                placeholder.markdown(response + "▌")
+            placeholder.empty()
             
             # Ajouter la réponse du chatbot
             st.session_state.messages.append(("assistant", response))
@@ -62,6 +99,7 @@ def main():
         # Bouton pour effacer l'historique
         if st.button("Effacer l'historique"):
             st.session_state.messages = []
+            clear_conversation()
             st.rerun()
             
     except Exception as e:
@@ -0,0 +1,294 @@
+"""
+Application ASGI du chatbot : API HTTP (réponse complète ou flux SSE), WebSocket et sondes de santé.
+"""
+import asyncio
+import json
+import uuid
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs
+
+from src.config.config import Config
+from src.api.async_clients import run_blocking
+from src.api.generation import get_generation_backend
+from src.chatbot.session_manager import SessionManager, get_session_manager
+from src.utils.tracing import metrics_body
+
+JSON_HEADERS = [(b"content-type", b"application/json; charset=utf-8")]
+SSE_HEADERS = [(b"content-type", b"text/event-stream; charset=utf-8"), (b"cache-control", b"no-cache")]
+
+# Fin d'un flux de réponse (générateur épuisé)
+_END = object()
+
+
+def start_matchup_refresher(scan: bool = True) -> None:
+    """Matchups mis à jour en arrière-plan dans ce processus (moteur déjà chargé avant le fork).
+
+    scan=False : le dossier des parties est relu par le processus parent, ce processus recharge
+    seulement les agrégats qu'il enregistre.
+    """
+    from src.analytics.matchups import get_matchup_engine
+    config = Config()
+    get_matchup_engine().start_refresher(config.MATCHUP_REFRESH_INTERVAL, config.MATCHUP_STATE_PATH, scan=scan)
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ChatServer:
+    def __init__(self, manager: Optional[SessionManager] = None, max_concurrency: int = 8,
+                 acquire_timeout: float = 5.0, max_body: int = 64 * 1024, scan_matchups: bool = True):
+        """Serveur d'un processus : au plus max_concurrency réponses en cours, les suivantes attendent acquire_timeout.
+
+        scan_matchups=False : un autre processus relit les parties (serveur à plusieurs processus).
+        """
+        self._manager = manager
+        self.scan_matchups = scan_matchups
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.max_body = max_body
+        self.ready = False
+        self.in_flight = 0
+        self.rejected = 0
+        self._semaphore = None  # créé dans la boucle d'événements du processus
+
+    @property
+    def manager(self) -> SessionManager:
+        return self._manager or get_session_manager()
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+
+    async def startup(self) -> None:
+        """Charge les composants partagés du chatbot avant d'accepter du trafic"""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        await run_blocking(lambda: self.manager.resources)
+        await run_blocking(start_matchup_refresher, self.scan_matchups)
+        self.ready = True
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.ready = False
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # Limitation de la concurrence
+
+    async def _acquire(self) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RequestError(503, "Serveur saturé, réessayez dans un instant")
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    # HTTP
+
+    async def _read_json(self, receive: Callable) -> Dict[str, Any]:
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise RequestError(400, "Connexion fermée")
+            body += message.get("body", b"")
+            if len(body) > self.max_body:
+                raise RequestError(413, "Requête trop volumineuse")
+            if not message.get("more_body"):
+                break
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "JSON invalide")
+        if not isinstance(payload, dict):
+            raise RequestError(400, "Un objet JSON est attendu")
+        return payload
+
+    @staticmethod
+    async def _send_json(send: Callable, status: int, payload: Any,
+                         headers: Optional[list] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": JSON_HEADERS + (headers or []) + [(b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _message(payload: Dict[str, Any]) -> Tuple[str, str]:
+        """Question et identifiant de session (nouvelle session si absent)"""
+        message = payload.get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise RequestError(400, "Le champ 'message' est obligatoire")
+        session_id = payload.get("session_id") or uuid.uuid4().hex
+        if not isinstance(session_id, str):
+            raise RequestError(400, "Le champ 'session_id' doit être une chaîne")
+        return message, session_id
+
+    async def _http(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        try:
+            if path == "/healthz" and method == "GET":
+                await self._send_json(send, 200, {"status": "ok"})
+            elif path == "/readyz" and method == "GET":
+                if self.ready:
+                    await self._send_json(send, 200, {"status": "ready"})
+                else:
+                    await self._send_json(send, 503, {"status": "starting"})
+            elif path == "/stats" and method == "GET":
+                await self._send_json(send, 200, self.stats())
+            elif path == "/metrics" and method == "GET":
+                query = parse_qs(scope.get("query_string", b"").decode())
+                body, content_type = metrics_body(query.get("format", ["prometheus"])[0])
+                await send({"type": "http.response.start", "status": 200,
+                            "headers": [(b"content-type", content_type.encode()),
+                                        (b"content-length", str(len(body)).encode())]})
+                await send({"type": "http.response.body", "body": body})
+            elif path == "/sessions" and method == "POST":
+                await self._send_json(send, 201, {"session_id": uuid.uuid4().hex})
+            elif path.startswith("/sessions/") and method == "DELETE":
+                if not await run_blocking(self.manager.drop, path[len("/sessions/"):]):
+                    raise RequestError(404, "Session inconnue")
+                await self._send_json(send, 200, {"deleted": True})
+            elif path == "/chat" and method == "POST":
+                await self._chat(receive, send)
+            elif path == "/chat/stream" and method == "POST":
+                await self._chat_stream(receive, send)
+            else:
+                raise RequestError(404, "Route inconnue")
+        except RequestError as e:
+            headers = [(b"retry-after", b"1")] if e.status == 503 else None
+            await self._send_json(send, e.status, {"error": e.message}, headers)
+        except Exception as e:
+            print(f"Erreur du serveur: {e}")
+            await self._send_json(send, 500, {"error": "Erreur interne"})
+
+    async def _chat(self, receive: Callable, send: Callable) -> None:
+        message, session_id = self._message(await self._read_json(receive))
+        await self._acquire()
+        try:
+            # Session éventuellement relue dans le stockage partagé : hors de la boucle d'événements
+            chatbot = await run_blocking(self.manager.get, session_id)
+            response = await chatbot.aget_response(message)
+        finally:
+            self._release()
+        await self._send_json(send, 200, {"session_id": session_id, "response": response})
+
+    async def _stream_chunks(self, chunks: Iterator[str]):
+        """Parcourt le générateur synchrone du chatbot sans bloquer la boucle d'événements"""
+        while True:
+            chunk = await run_blocking(next, chunks, _END)
+            if chunk is _END:
+                return
+            yield chunk
+
+    async def _chat_stream(self, receive: Callable, send: Callable) -> None:
+        message, session_id = self._message(await self._read_json(receive))
+        await self._acquire()
+        try:
+            chatbot = await run_blocking(self.manager.get, session_id)
+            chunks = chatbot.stream_response(message)
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": SSE_HEADERS + [(b"x-session-id", session_id.encode())]})
+            try:
+                async for chunk in self._stream_chunks(chunks):
+                    event = json.dumps({"text": chunk}, ensure_ascii=False)
+                    await send({"type": "http.response.body", "body": f"data: {event}\n\n".encode("utf-8"),
+                                "more_body": True})
+            except Exception as e:
+                # En-têtes déjà envoyés : terminer le flux proprement
+                print(f"Erreur pendant le streaming: {e}")
+            await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+        finally:
+            self._release()
+
+    # WebSocket
+
+    @staticmethod
+    async def _ws_send(send: Callable, event: Dict[str, Any]) -> bool:
+        """Envoie un événement JSON au client ; False s'il est déjà déconnecté"""
+        try:
+            await send({"type": "websocket.send", "text": json.dumps(event, ensure_ascii=False)})
+            return True
+        except Exception:
+            return False
+
+    async def _websocket(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if scope["path"].rstrip("/") != "/ws":
+            await send({"type": "websocket.close", "code": 4404})
+            return
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        query = parse_qs(scope.get("query_string", b"").decode())
+        session_id = query.get("session_id", [uuid.uuid4().hex])[0]
+        await send({"type": "websocket.accept"})
+        if not await self._ws_send(send, {"type": "session", "session_id": session_id}):
+            return
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                payload = json.loads(message.get("text") or "{}")
+                question, _ = self._message(payload if isinstance(payload, dict) else {})
+                await self._acquire()
+            except (ValueError, RequestError) as e:
+                error = e.message if isinstance(e, RequestError) else "JSON invalide"
+                if not await self._ws_send(send, {"type": "error", "error": error}):
+                    return
+                continue
+            try:
+                parts = []
+                chatbot = await run_blocking(self.manager.get, session_id)
+                async for chunk in self._stream_chunks(chatbot.stream_response(question)):
+                    parts.append(chunk)
+                    if not await self._ws_send(send, {"type": "chunk", "text": chunk}):
+                        return
+                if not await self._ws_send(send, {"type": "done", "response": "".join(parts)}):
+                    return
+            except Exception as e:
+                # Erreur du chatbot : signalée au client, la connexion reste ouverte
+                print(f"Erreur pendant le streaming: {e}")
+                if not await self._ws_send(send, {"type": "error", "error": "Erreur interne"}):
+                    return
+            finally:
+                self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métriques du processus : requêtes en cours, sessions et file de génération"""
+        return {
+            'ready': self.ready,
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'rejected': self.rejected,
+            'sessions': self.manager.stats(),
+            'generation': get_generation_backend().stats()
+        }
+
+
+def create_app(config: Optional[Config] = None, scan_matchups: bool = True) -> ChatServer:
+    """Application configurée depuis l'environnement"""
+    config = config or Config()
+    return ChatServer(max_concurrency=config.SERVER_MAX_CONCURRENCY,
+                      acquire_timeout=config.SERVER_ACQUIRE_TIMEOUT, scan_matchups=scan_matchups)
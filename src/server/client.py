@@ -0,0 +1,45 @@
+"""
+Client du serveur HTTP du chatbot (utilisé par l'interface Streamlit en mode client léger).
+"""
+import json
+from typing import Iterator, Optional
+
+from src.api.http_client import HttpClient, get_http_client
+
+
+class ChatClient:
+    def __init__(self, base_url: str, http: Optional[HttpClient] = None):
+        """Client de l'API /chat d'un ou plusieurs serveurs (derrière un répartiteur de charge)"""
+        self.base_url = base_url.rstrip("/")
+        self.http = http or get_http_client()
+
+    def chat(self, message: str, session_id: str) -> Optional[str]:
+        """Réponse complète à une question"""
+        response = self.http.post(f"{self.base_url}/chat", endpoint='chatbot',
+                                  json={"message": message, "session_id": session_id})
+        if response.status_code != 200:
+            print(f"Erreur du serveur {response.status_code}: {response.text}")
+            return None
+        return response.json().get("response")
+
+    def stream(self, message: str, session_id: str) -> Iterator[str]:
+        """Réponse morceau par morceau (flux SSE de /chat/stream)"""
+        response = self.http.post(f"{self.base_url}/chat/stream", endpoint='chatbot', stream=True,
+                                  json={"message": message, "session_id": session_id})
+        try:
+            if response.status_code != 200:
+                print(f"Erreur du serveur {response.status_code}: {response.text}")
+                return
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data).get("text", "")
+        finally:
+            response.close()
+
+    def drop_session(self, session_id: str) -> None:
+        """Oublie la conversation côté serveur"""
+        self.http.request("DELETE", f"{self.base_url}/sessions/{session_id}", endpoint='chatbot')
@@ -0,0 +1,134 @@
+"""
+Lancement du serveur HTTP : données partagées chargées une fois, puis plusieurs processus (fork).
+"""
+import gc
+import os
+import signal
+import socket
+import sys
+from typing import Optional
+
+from src.config.config import Config
+from src.api.http_client import reset_http_client
+from src.api.riot_api import RiotAPI
+from src.analytics.champion_analytics import get_analytics_store
+from src.analytics.items import get_item_index
+from src.analytics.matchups import get_matchup_engine
+from src.analytics.stat_table import get_stat_table
+from src.chatbot.state_store import create_state_store
+from src.utils.text_processing import initialize_nltk
+
+
+def preload_shared_data() -> None:
+    """Charge les données en lecture seule avant le fork (partagées en copy-on-write)"""
+    riot_api = RiotAPI()
+    riot_api.get_champion_index()
+    if riot_api.snapshot.is_loaded:
+        get_analytics_store().precompute(riot_api)
+        get_stat_table(riot_api)
+        # Objets lus (ou téléchargés) une fois ici plutôt que par chaque processus à la première question
+        get_item_index(riot_api)
+    # Agrégats des parties locales : lecture du dossier faite une fois, pas dans une requête
+    get_matchup_engine()
+    initialize_nltk()
+    # Cache sémantique (et modèle d'embedding éventuel) construit une fois, jamais dans une requête
+    from src.chatbot.semantic_cache import get_semantic_cache
+    get_semantic_cache()
+    # Aucune connexion HTTP ni thread ne doit être hérité par les processus
+    reset_http_client()
+    # Objets préchargés exclus du ramasse-miettes : leurs pages mémoire restent partagées
+    gc.freeze()
+
+
+# Stockages de sessions partagés entre processus
+SHARED_SESSION_STORES = ('sqlite', 'redis')
+
+
+def check_worker_config(config: Config) -> Optional[str]:
+    """Erreur de configuration empêchant le démarrage, None si elle est valide"""
+    if config.SERVER_WORKERS > 1 and config.SESSION_STORE not in SHARED_SESSION_STORES:
+        return (f"SERVER_WORKERS={config.SERVER_WORKERS} exige un stockage de sessions partagé "
+                f"(SESSION_STORE=sqlite ou redis) : sinon le contexte d'une conversation dépend du processus "
+                f"qui reçoit chaque requête")
+    # Le stockage configuré doit pouvoir être construit (paquet installé, fichier accessible)
+    try:
+        store = create_state_store(config)
+    except Exception as e:
+        return f"stockage de sessions {config.SESSION_STORE} inutilisable : {e}"
+    if store is not None:
+        store.close()
+    return None
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_worker(sock: socket.socket, config: Config, scan_matchups: bool = True) -> None:
+    """Boucle d'événements d'un processus sur le socket partagé"""
+    import uvicorn
+    from src.server.app import create_app
+    server = uvicorn.Server(uvicorn.Config(create_app(config, scan_matchups), lifespan="on", log_level="warning",
+                                           timeout_keep_alive=config.SERVER_KEEP_ALIVE))
+    server.run(sockets=[sock])
+
+
+def main():
+    config = Config()
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        print("uvicorn n'est pas installé : pip install uvicorn")
+        sys.exit(1)
+    error = check_worker_config(config)
+    if error:
+        print(f"Erreur de configuration : {error}")
+        sys.exit(1)
+
+    print("Préchargement des données partagées...")
+    preload_shared_data()
+    sock = bind_socket(config.SERVER_HOST, config.SERVER_PORT)
+    print(f"Serveur sur http://{config.SERVER_HOST}:{config.SERVER_PORT} ({config.SERVER_WORKERS} processus)")
+
+    if config.SERVER_WORKERS <= 1:
+        serve_worker(sock, config)
+        return
+
+    workers = set()
+    for _ in range(config.SERVER_WORKERS):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # Les processus rechargent les agrégats enregistrés par le parent
+                serve_worker(sock, config, scan_matchups=False)
+            finally:
+                os._exit(0)
+        workers.add(pid)
+    # Un seul lecteur du dossier des parties, démarré après les forks (aucun thread hérité)
+    get_matchup_engine().start_refresher(config.MATCHUP_REFRESH_INTERVAL, config.MATCHUP_STATE_PATH)
+
+    def stop(signum, frame):
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Singletons du processus (caches, clients, index, sessions) et leur réinitialisation commune.
+"""
+
+
+def reset_all() -> None:
+    """Réinitialise tous les singletons du processus (tests, benchmarks).
+
+    Tout nouveau singleton get_X() doit ajouter son reset_X() ici.
+    """
+    from src.api.champion_store import reset_champion_store
+    from src.api.ddragon_snapshot import reset_snapshot
+    from src.api.http_client import reset_http_client
+    from src.analytics.champion_analytics import reset_analytics_store
+    from src.analytics.stat_table import reset_stat_tables
+    from src.chatbot.response_cache import reset_response_cache
+    from src.chatbot.semantic_cache import reset_semantic_cache
+    from src.api.generation import reset_generation_backend
+    from src.api.prompt_builder import reset_prompt_builders
+    from src.chatbot.chatbot import reset_chatbot_resources
+    from src.chatbot.session_manager import reset_session_manager
+    from src.utils.tracing import reset_tracer
+    from src.analytics.matchups import reset_matchup_engine
+    from src.analytics.match_store import reset_match_store
+    from src.analytics.tier_list import reset_tier_list_service
+    from src.analytics.items import reset_item_indexes
+    reset_champion_store()
+    reset_snapshot()
+    reset_http_client()
+    reset_analytics_store()
+    reset_stat_tables()
+    reset_response_cache()
+    reset_semantic_cache()
+    reset_generation_backend()
+    reset_prompt_builders()
+    reset_chatbot_resources()
+    reset_session_manager()
+    reset_tracer()
+    reset_matchup_engine()
+    reset_match_store()
+    reset_tier_list_service()
+    reset_item_indexes()
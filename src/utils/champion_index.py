@@ -0,0 +1,114 @@
+"""
+Index des noms de champions pour la détection hors ligne dans les questions.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+# Surnoms et variantes courantes utilisés par les joueurs
+CHAMPION_ALIASES = {
+    "wukong": "MonkeyKing",
+    "mf": "MissFortune",
+    "miss": "MissFortune",
+    "tf": "TwistedFate",
+    "asol": "AurelionSol",
+    "aurelion": "AurelionSol",
+    "j4": "JarvanIV",
+    "jarvan": "JarvanIV",
+    "mundo": "DrMundo",
+    "kog": "KogMaw",
+    "nunu": "Nunu",
+    "lee": "LeeSin",
+    "yi": "MasterYi",
+    "xin": "XinZhao",
+    "tahm": "TahmKench",
+    "renata": "Renata",
+    "blitz": "Blitzcrank",
+    "cait": "Caitlyn",
+    "cassio": "Cassiopeia",
+    "heca": "Hecarim",
+    "naut": "Nautilus",
+}
+
+# Nombre maximal de mots dans un nom de champion ("nunu et willump")
+MAX_NAME_WORDS = 3
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+_ELISION_PATTERN = re.compile(r"^(?:d|l|qu|j|m|t|s|n|c)['’](.+)$")
+
+
+class ChampionIndex:
+    def __init__(self, champions: Dict[str, Dict]):
+        """Construit l'index à partir de la liste de champion.json"""
+        self._names = {}
+        # Noms en plusieurs mots ("kog maw", "dr mundo"), indexés mot par mot
+        self._phrases = {}
+        for champion_id, champion_data in champions.items():
+            canonical_id = champion_data.get('id', champion_id)
+            for form in (champion_id, canonical_id, champion_data.get('name', '')):
+                key = self.normalize(form)
+                if key:
+                    self._names[key] = canonical_id
+                words = tuple(self.normalize(w) for w in re.split(r"[\W_]+", form) if w)
+                if len(words) > 1:
+                    self._phrases[words] = canonical_id
+
+        # Les alias ne sont ajoutés que si le champion existe dans ce patch
+        known_ids = set(self._names.values())
+        for alias, canonical_id in CHAMPION_ALIASES.items():
+            if canonical_id in known_ids:
+                self._names.setdefault(alias, canonical_id)
+
+    def __len__(self) -> int:
+        return len(set(self._names.values()))
+
+    def __contains__(self, name: str) -> bool:
+        return self.resolve(name) is not None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalise un nom : minuscules, sans accents, espaces ni ponctuation"""
+        text = unicodedata.normalize('NFKD', text.lower())
+        return ''.join(c for c in text if c.isalnum() and not unicodedata.combining(c))
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Retourne l'identifiant canonique d'un nom de champion, ou None"""
+        if not name:
+            return None
+        champion_id = self._names.get(self.normalize(name))
+        if champion_id is None:
+            elided = _ELISION_PATTERN.match(name.lower().strip())
+            if elided:
+                champion_id = self._names.get(self.normalize(elided.group(1)))
+        return champion_id
+
+    def _resolve_phrase(self, tokens: List[str]) -> Optional[str]:
+        """Résout une suite de mots vers un champion au nom composé"""
+        first = _ELISION_PATTERN.match(tokens[0])
+        candidates = [tokens]
+        if first:
+            candidates.append([first.group(1)] + tokens[1:])
+        for candidate in candidates:
+            champion_id = self._phrases.get(tuple(self.normalize(t) for t in candidate))
+            if champion_id:
+                return champion_id
+        return None
+
+    def find_champions(self, text: str) -> List[str]:
+        """Détecte les champions mentionnés dans un texte en un seul passage"""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        found = []
+        i = 0
+        while i < len(tokens):
+            for size in range(min(MAX_NAME_WORDS, len(tokens) - i), 0, -1):
+                if size == 1:
+                    champion_id = self.resolve(tokens[i])
+                else:
+                    champion_id = self._resolve_phrase(tokens[i:i + size])
+                if champion_id:
+                    found.append(champion_id)
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
@@ -1,18 +1,24 @@
+"""
+Installe les ressources NLTK dans NLTK_DATA_DIR (étape de construction : aucun téléchargement à l'exécution).
+"""
 import nltk
 
-def download_nltk_resources():
+from src.config.config import Config
+
+def download_nltk_resources(download_dir=None):
+    download_dir = download_dir or Config().NLTK_DATA_DIR
     resources = [
         'punkt',
-        'stopwords',
-        'averaged_perceptron_tagger'
+        'punkt_tab',
+        'stopwords'
     ]
     
     for resource in resources:
         try:
-            nltk.download(resource)
+            nltk.download(resource, download_dir=download_dir, quiet=True)
             print(f"Successfully downloaded {resource}")
         except Exception as e:
             print(f"Error downloading {resource}: {e}")
 
 if __name__ == "__main__":
-    download_nltk_resources() 
\ No newline at end of file
+    download_nltk_resources() 
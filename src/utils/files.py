@@ -0,0 +1,24 @@
+"""
+Écriture de fichiers partagés entre threads et processus.
+"""
+import os
+import tempfile
+
+
+def atomic_write(path: str, content: bytes) -> None:
+    """Écrit le fichier d'un bloc : les lecteurs voient l'ancien contenu ou le nouveau, jamais un fichier tronqué.
+
+    Le fichier temporaire est propre à l'appel (les processus du serveur écrivent en même temps)
+    et synchronisé sur le disque avant de remplacer la cible.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,45 @@
+"""
+Lecture incrémentale de fichiers JSON volumineux : une valeur à la fois, sans charger le fichier entier.
+"""
+import json
+from typing import Any, Iterator, TextIO
+
+# Caractères ignorés entre deux valeurs (tableau de premier niveau, une valeur par ligne)
+_SEPARATORS = " \t\r\n,[]"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_values(f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Valeurs d'un flux texte : éléments d'un tableau de premier niveau, objet seul ou une valeur par ligne.
+
+    La mémoire utilisée reste de l'ordre de la plus grande valeur, quelle que soit la taille du fichier.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, exhausted = '', 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in _SEPARATORS:
+            position += 1
+        if position >= len(buffer):
+            if exhausted:
+                return
+            buffer, position = f.read(chunk_size), 0
+            exhausted = not buffer
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            # Valeur incomplète : lire davantage (taille doublée, pas de décodages répétés pour un gros objet)
+            chunk = f.read(max(chunk_size, len(buffer) - position))
+            exhausted = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        if end == len(buffer) and not exhausted and buffer[position] not in '{["':
+            # Nombre ou littéral en fin de tampon : peut-être tronqué
+            chunk = f.read(chunk_size)
+            exhausted = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield value
+        position = end
@@ -1,37 +1,97 @@
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+"""
+Traitement du texte. NLTK et scikit-learn ne sont importés qu'à la première utilisation.
+"""
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from src.config.config import Config
+from src.utils.files import atomic_write
+
+_nltk_ready = False
+_nltk_lock = threading.Lock()
+# Ressources NLTK trouvées sur le disque (sinon découpage et stopwords de secours)
+_nltk_resources = {'punkt': False, 'stopwords': False}
+
+# Découpage de secours si le tokenizer punkt n'est pas installé
+_WORD_PATTERN = re.compile(r"\w+")
 
 def initialize_nltk():
-    """Initialise les ressources NLTK nécessaires"""
-    try:
-        nltk.data.find('tokenizers/punkt')
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        print("Téléchargement des ressources NLTK...")
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        print("Ressources NLTK téléchargées avec succès!")
+    """Localise les ressources NLTK installées (une seule fois par processus, sans téléchargement).
+
+    Les ressources s'installent à la construction de l'image avec python -m src.utils.download_nltk.
+    """
+    global _nltk_ready
+    if _nltk_ready:
+        return
+    with _nltk_lock:
+        if _nltk_ready:
+            return
+        import nltk
+        data_dir = Config().NLTK_DATA_DIR
+        if data_dir not in nltk.data.path:
+            nltk.data.path.insert(0, data_dir)
+        for name, path in (('punkt', 'tokenizers/punkt'), ('stopwords', 'corpora/stopwords')):
+            try:
+                nltk.data.find(path)
+                _nltk_resources[name] = True
+            except LookupError:
+                _nltk_resources[name] = False
+        _nltk_ready = True
+
+# Stopwords français minimaux si le corpus NLTK n'est pas installé
+FALLBACK_STOP_WORDS = frozenset((
+    "a", "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "elle", "en", "et", "eux",
+    "il", "je", "la", "le", "les", "leur", "lui", "ma", "mais", "me", "mes", "moi", "mon", "ne",
+    "nos", "notre", "nous", "on", "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se",
+    "ses", "son", "sur", "ta", "te", "tes", "toi", "ton", "tu", "un", "une", "vos", "votre",
+    "vous", "c", "d", "j", "l", "m", "n", "s", "t", "y", "est", "sont"
+))
+
+@lru_cache(maxsize=None)
+def get_stop_words(language: str = 'french') -> frozenset:
+    """Stopwords d'une langue, chargés une seule fois"""
+    initialize_nltk()
+    if _nltk_resources['stopwords']:
+        from nltk.corpus import stopwords
+        try:
+            return frozenset(stopwords.words(language))
+        except (LookupError, OSError):
+            pass
+    return FALLBACK_STOP_WORDS if language == 'french' else frozenset()
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en mots (tokenizer NLTK, ou expression régulière à défaut)"""
+    initialize_nltk()
+    if _nltk_resources['punkt']:
+        from nltk.tokenize import word_tokenize
+        try:
+            return word_tokenize(text)
+        except LookupError:
+            pass
+    return _WORD_PATTERN.findall(text)
 
 def preprocess_text(text: str) -> str:
     """Prétraite le texte pour la comparaison"""
     # S'assurer que les ressources sont disponibles
     initialize_nltk()
-    
+
     # Tokenisation et mise en minuscules
-    tokens = word_tokenize(text.lower())
-    
+    tokens = tokenize(text.lower())
+
     # Suppression des stopwords
-    stop_words = set(stopwords.words('french'))
+    stop_words = get_stop_words('french')
     tokens = [token for token in tokens if token not in stop_words]
-    
+
     return ' '.join(tokens)
 
 def calculate_similarity(text1, text2):
     """Calcule la similarité cosinus entre deux textes"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
     vectorizer = TfidfVectorizer()
     try:
         tfidf_matrix = vectorizer.fit_transform([text1, text2])
@@ -39,28 +99,98 @@ def calculate_similarity(text1, text2):
     except:
         return 0.0
 
+class TfidfMatcher:
+    def __init__(self, candidates: Iterable[str], preprocess: bool = True, **vectorizer_options):
+        """Index TF-IDF ajusté une seule fois sur un corpus de candidats"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        self.candidates = list(candidates)
+        self.preprocess = preprocess
+        self.vectorizer = TfidfVectorizer(**vectorizer_options)
+        try:
+            # Lignes normalisées (L2) : le produit scalaire donne directement le cosinus
+            self.matrix = self.vectorizer.fit_transform([self._prepare(c) for c in self.candidates])
+        except ValueError:
+            # Corpus vide ou uniquement composé de stopwords
+            self.matrix = None
+
+    def _prepare(self, text: str) -> str:
+        return preprocess_text(text) if self.preprocess else text.lower()
+
+    def scores(self, queries: List[str]) -> 'np.ndarray':
+        """Similarités (requêtes x candidats) en une transformation et un produit creux"""
+        import numpy as np
+        if self.matrix is None:
+            return np.zeros((len(queries), len(self.candidates)))
+        query_matrix = self.vectorizer.transform([self._prepare(q or "") for q in queries])
+        return (query_matrix @ self.matrix.T).toarray()
+
+    def match_many(self, queries: List[str]) -> List[Tuple[Optional[str], float]]:
+        """Meilleur candidat pour chaque requête"""
+        if not queries:
+            return []
+        similarities = self.scores(queries)
+        if not self.candidates:
+            return [(None, 0.0)] * len(queries)
+        best = similarities.argmax(axis=1)
+        results = []
+        for row, index in enumerate(best):
+            score = float(similarities[row, index])
+            results.append((self.candidates[index], score) if score > 0 else (None, 0.0))
+        return results
+
+    def match(self, query: str) -> Tuple[Optional[str], float]:
+        """Meilleur candidat pour une requête"""
+        if not query:
+            return None, 0.0
+        return self.match_many([query])[0]
+
+    def top_k(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Les k candidats les plus proches d'une requête"""
+        import numpy as np
+        similarities = self.scores([query])[0]
+        k = min(k, len(similarities))
+        if k <= 0:
+            return []
+        best = np.argsort(-similarities, kind='stable')[:k]
+        return [(self.candidates[i], float(similarities[i])) for i in best if similarities[i] > 0]
+
+    def save(self, path: str) -> None:
+        """Enregistre l'index ajusté sur le disque"""
+        atomic_write(path, pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def load(cls, path: str) -> Optional['TfidfMatcher']:
+        """Charge un index enregistré avec save"""
+        try:
+            with open(path, "rb") as f:
+                matcher = pickle.load(f)
+            return matcher if isinstance(matcher, cls) else None
+        except Exception as e:
+            print(f"Erreur lors du chargement de l'index TF-IDF: {e}")
+            return None
+
+# Index déjà ajustés, par liste de candidats
+_matchers = OrderedDict()
+_matchers_lock = threading.Lock()
+MAX_CACHED_MATCHERS = 32
+
+def get_matcher(candidates: Iterable[str]) -> TfidfMatcher:
+    """Retourne l'index TF-IDF d'une liste de candidats, ajusté au premier appel"""
+    key = tuple(candidates)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is not None:
+            _matchers.move_to_end(key)
+            return matcher
+    matcher = TfidfMatcher(key)
+    with _matchers_lock:
+        _matchers[key] = matcher
+        if len(_matchers) > MAX_CACHED_MATCHERS:
+            _matchers.popitem(last=False)
+    return matcher
+
 def find_best_match(query: str, candidates: list) -> tuple:
     """Trouve la meilleure correspondance pour une requête donnée"""
     if not query or not candidates:
         return None, 0.0
-    
-    # Prétraitement
-    processed_query = preprocess_text(query)
-    processed_candidates = [preprocess_text(c) for c in candidates]
-    
-    # Vectorisation TF-IDF
-    vectorizer = TfidfVectorizer()
-    try:
-        tfidf_matrix = vectorizer.fit_transform([processed_query] + processed_candidates)
-    except ValueError:
-        return None, 0.0
-    
-    # Calcul des similarités
-    similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])[0]
-    
-    # Trouver le meilleur match
-    if len(similarities) > 0:
-        best_idx = np.argmax(similarities)
-        return candidates[best_idx], similarities[best_idx]
-    
-    return None, 0.0 
\ No newline at end of file
+    return get_matcher(candidates).match(query)
@@ -0,0 +1,426 @@
+"""
+Instrumentation des requêtes : étapes chronométrées, compteurs, métriques agrégées et profilage des requêtes lentes.
+
+Désactivée par défaut (TRACING_ENABLED=1 pour l'activer) : span() et count() se réduisent alors
+à la lecture d'une variable de contexte.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from src.config.config import Config
+
+# Bornes des histogrammes de latence (millisecondes)
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Requête en cours dans le contexte courant (thread ou tâche asyncio)
+_current_trace = contextvars.ContextVar('lolchatbot_trace', default=None)
+# Profondeur de l'étape en cours (étapes imbriquées)
+_span_depth = contextvars.ContextVar('lolchatbot_span_depth', default=0)
+_NOOP = nullcontext()
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: Tuple[int, ...] = LATENCY_BUCKETS):
+        """Histogramme cumulatif des latences en millisecondes"""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms: float, error: bool = False) -> None:
+        with self._lock:
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if latency_ms <= bound:
+                    index = i
+                    break
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += latency_ms
+            if error:
+                self.errors += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Borne supérieure du bucket contenant le percentile p (0-100)"""
+        if not self.count:
+            return None
+        threshold = self.count * p / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold:
+                return float(self.buckets[i]) if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': dict(zip([*map(str, self.buckets), '+Inf'], self.counts))
+        }
+
+
+class Trace:
+    def __init__(self, name: str):
+        """Une requête : étapes (nom, début, durée en ms, profondeur) et compteurs"""
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self.counters = Counter()
+        self.samples = Counter()  # piles d'appels échantillonnées -> occurrences
+        self.error = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        depth = _span_depth.get()
+        token = _span_depth.set(depth + 1)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            _span_depth.reset(token)
+            with self._lock:
+                self.spans.append((name, (start - self.start) * 1000, (end - start) * 1000, depth))
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'duration_ms': round(self.duration_ms, 2) if self.duration_ms is not None else None,
+            'error': self.error,
+            'spans': [{'name': name, 'start_ms': round(offset, 2), 'duration_ms': round(duration, 2),
+                       'depth': depth} for name, offset, duration, depth in sorted(self.spans, key=lambda s: s[1])],
+            'counters': dict(self.counters)
+        }
+
+
+def _collapse(frame) -> str:
+    """Pile d'appels au format « replié » des flamegraphs (racine;...;feuille)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005):
+        """Échantillonne toutes les interval secondes la pile des threads qui traitent une requête"""
+        self.interval = interval
+        self._active = {}  # Trace -> identifiant du thread qui la traite
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, trace: Trace) -> None:
+        with self._lock:
+            self._active[trace] = threading.get_ident()
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="lolchatbot-profiler", daemon=True)
+                self._thread.start()
+
+    def detach(self, trace: Trace) -> None:
+        with self._lock:
+            self._active.pop(trace, None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for trace, thread_id in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    trace.samples[_collapse(frame)] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=1)
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, slow_ms: float = 1000.0,
+                 profiler: Optional[SamplingProfiler] = None, profile_dir: Optional[str] = None,
+                 keep_slow: int = 20):
+        """Agrège les requêtes terminées ; les requêtes plus longues que slow_ms sont conservées (et profilées)"""
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.requests = {}  # nom de requête -> LatencyHistogram
+        self.spans = {}  # nom d'étape -> LatencyHistogram
+        self.counters = Counter()
+        self.slow = deque(maxlen=keep_slow)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def request(self, name: str, profile: bool = True) -> Iterator[Optional[Trace]]:
+        """Trace une requête ; les étapes et compteurs du même contexte lui sont rattachés.
+
+        profile=False : pas d'échantillonnage de pile (coroutines : le thread de la boucle
+        d'événements exécute plusieurs requêtes à la fois, un échantillon ne peut pas leur être attribué).
+        """
+        if not self.enabled:
+            yield None
+            return
+        if _current_trace.get() is not None:
+            # Requête imbriquée : simple étape de la requête englobante
+            with span(name):
+                yield _current_trace.get()
+            return
+        trace = Trace(name)
+        try:
+            with self.activate(trace, profile):
+                yield trace
+        except BaseException:
+            trace.error = True
+            raise
+        finally:
+            self._finish(trace)
+
+    @contextmanager
+    def activate(self, trace: Trace, profile: bool = True) -> Iterator[Trace]:
+        """Rattache la requête au contexte courant (et au profileur) le temps du bloc"""
+        token = _current_trace.set(trace)
+        profiler = self.profiler if profile else None
+        if profiler is not None:
+            profiler.attach(trace)
+        try:
+            yield trace
+        finally:
+            if profiler is not None:
+                profiler.detach(trace)
+            _current_trace.reset(token)
+
+    def _histogram(self, histograms: Dict[str, LatencyHistogram], name: str) -> LatencyHistogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = LatencyHistogram()
+        return histogram
+
+    def _finish(self, trace: Trace) -> None:
+        trace.duration_ms = (time.perf_counter() - trace.start) * 1000
+        with self._lock:
+            self._histogram(self.requests, trace.name).observe(trace.duration_ms, error=trace.error)
+            for name, _, duration, _ in trace.spans:
+                self._histogram(self.spans, name).observe(duration)
+            self.counters.update(trace.counters)
+        if trace.duration_ms >= self.slow_ms:
+            self._report_slow(trace)
+
+    def _report_slow(self, trace: Trace) -> None:
+        summary = trace.to_dict()
+        top = sorted(trace.spans, key=lambda s: s[2], reverse=True)[:3]
+        print(f"Requête lente {trace.name} ({trace.id}): {trace.duration_ms:.0f} ms - "
+              + ", ".join(f"{name} {duration:.0f} ms" for name, _, duration, _ in top))
+        if trace.samples and self.profile_dir:
+            try:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"{trace.name}-{trace.id}.folded")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.writelines(f"{stack} {count}\n" for stack, count in trace.samples.most_common())
+                summary['profile'] = path
+            except OSError as e:
+                print(f"Erreur lors de l'écriture du profil: {e}")
+        self.slow.append(summary)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Métriques agrégées (JSON)"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'requests': {name: histogram.to_dict() for name, histogram in self.requests.items()},
+                'spans': {name: histogram.to_dict() for name, histogram in self.spans.items()},
+                'counters': dict(self.counters),
+                'slow_requests': list(self.slow)
+            }
+
+    def prometheus(self) -> str:
+        """Métriques agrégées au format texte de Prometheus"""
+        lines = []
+        with self._lock:
+            for metric, label, histograms in (('lolchatbot_request_duration_seconds', 'request', self.requests),
+                                              ('lolchatbot_span_duration_seconds', 'span', self.spans)):
+                lines.append(f"# TYPE {metric} histogram")
+                for name, histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip([*histogram.buckets, None], histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound is None else f"{bound / 1000:g}"
+                        lines.append(f'{metric}_bucket{{{label}="{name}",le="{le}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.total_ms / 1000:.6f}')
+                    lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+            lines.append("# TYPE lolchatbot_events_total counter")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'lolchatbot_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        if self.profiler is not None:
+            self.profiler.stop()
+
+
+def span(name: str):
+    """Chronomètre une étape de la requête en cours (sans effet hors requête tracée)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP
+    return trace.span(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Incrémente un compteur de la requête en cours (succès de cache, appels sortants...)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(name, n)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def traced(name: str) -> Callable:
+    """Décorateur : chronomètre chaque appel de la fonction (ou coroutine) comme une étape"""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return await func(*args, **kwargs)
+                with trace.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with trace.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_request(name: str) -> Callable:
+    """Décorateur : trace une requête complète (fonction, coroutine ou générateur)"""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                tracer = get_tracer()
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                # Étapes chronométrées, sans échantillonnage du thread partagé de la boucle
+                with tracer.request(name, profile=False):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                tracer = get_tracer()
+                if not tracer.enabled or _current_trace.get() is not None:
+                    yield from func(*args, **kwargs)
+                    return
+                # Le consommateur peut reprendre le générateur depuis un autre thread ou contexte :
+                # la requête n'est rattachée au contexte que pendant chaque reprise
+                trace = Trace(name)
+                chunks = func(*args, **kwargs)
+                try:
+                    while True:
+                        with tracer.activate(trace):
+                            try:
+                                chunk = next(chunks)
+                            except StopIteration:
+                                return
+                        yield chunk
+                except GeneratorExit:
+                    # Consommateur arrêté avant la fin (client déconnecté)
+                    chunks.close()
+                    raise
+                except BaseException:
+                    trace.error = True
+                    raise
+                finally:
+                    tracer._finish(trace)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.request(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def metrics_body(fmt: str = 'prometheus') -> Tuple[bytes, str]:
+    """Corps et type de contenu de l'export des métriques"""
+    tracer = get_tracer()
+    if fmt == 'json':
+        return json.dumps(tracer.metrics(), ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+    return tracer.prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Retourne le traceur partagé par le processus"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                config = Config()
+                profiler = None
+                if config.TRACING_ENABLED and config.TRACING_PROFILE:
+                    profiler = SamplingProfiler(config.TRACING_PROFILE_INTERVAL_MS / 1000)
+                _tracer = Tracer(enabled=config.TRACING_ENABLED, slow_ms=config.TRACING_SLOW_MS,
+                                 profiler=profiler, profile_dir=config.TRACING_PROFILE_DIR)
+    return _tracer
+
+
+def reset_tracer() -> None:
+    """Supprime le traceur partagé (utilisé par les tests)"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer = None
@@ -1,10 +1,108 @@
 import pytest
 import sys
 import os
+import json
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Ajout du chemin du projet aux chemins Python
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+@pytest.fixture(autouse=True)
+def reset_shared_state(tmp_path, monkeypatch):
+    """Réinitialise les caches partagés du processus entre les tests"""
+    from src.shared_state import reset_all
+    # Aucun téléchargement Data Dragon pendant les tests
+    monkeypatch.setenv('DDRAGON_CACHE_DIR', str(tmp_path / 'ddragon'))
+    monkeypatch.setenv('DDRAGON_SYNC', '0')
+    monkeypatch.setenv('HTTP_BACKOFF_BASE', '0')
+    # Pas de modèle d'embedding téléchargé : vecteurs lexicaux
+    monkeypatch.setenv('SEMANTIC_CACHE_MODEL', '')
+    monkeypatch.setenv('GENERATION_BACKEND', 'remote')
+    monkeypatch.setenv('MATCH_DATA_DIR', str(tmp_path / 'matches'))
+    monkeypatch.setenv('MATCHUP_STATE_PATH', str(tmp_path / 'matchups.pickle'))
+    monkeypatch.setenv('MATCH_STORE_DIR', str(tmp_path / 'match_store'))
+    reset_all()
+    yield
+    reset_all()
+
+@pytest.fixture
+def ddragon_snapshot(tmp_path):
+    """Snapshot Data Dragon de test (Ahri, Garen, Jinx, Wukong, objets) chargé hors ligne"""
+    from src.api.ddragon_snapshot import get_snapshot
+    version_dir = tmp_path / 'ddragon' / '13.24.1' / 'fr_FR'
+    version_dir.mkdir(parents=True)
+    shutil.copy(os.path.join(FIXTURES_DIR, 'ddragon', 'championFull.json'), version_dir)
+    shutil.copy(os.path.join(FIXTURES_DIR, 'ddragon', 'item.json'), version_dir)
+    return get_snapshot()
+
+class InferenceStubHandler(BaseHTTPRequestHandler):
+    """Imite l'endpoint d'inférence HuggingFace (réponse complète ou flux SSE)"""
+    protocol_version = "HTTP/1.1"
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.requests.append(payload)
+        tokens = self.server.tokens
+        if payload.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i, text in enumerate(tokens):
+                time.sleep(self.server.token_delay)
+                event = {"token": {"id": i, "text": text, "special": False}, "generated_text": None}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            final = {"token": {"id": len(tokens), "text": "</s>", "special": True},
+                     "generated_text": "".join(tokens)}
+            self._write_chunk(f"data: {json.dumps(final)}\n\n".encode())
+            self._write_chunk(b"")
+        else:
+            time.sleep(self.server.token_delay * len(tokens))
+            inputs = payload.get('inputs')
+            if isinstance(inputs, list) and not self.server.accept_lists:
+                body = b'{"error": "Input validation error: `inputs` must be a string"}'
+                self.send_response(422)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            count = len(inputs) if isinstance(inputs, list) else 1
+            body = json.dumps([{"generated_text": "".join(tokens)}] * count).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def inference_stub():
+    """Serveur local d'inférence ; server.tokens, server.token_delay et server.accept_lists sont modifiables"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), InferenceStubHandler)
+    server.requests = []
+    server.accept_lists = True
+    server.tokens = ["Ahri ", "est ", "une ", "mage."]
+    server.token_delay = 0.0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/models/stub"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
 @pytest.fixture
 def config():
     """Fixture pour la configuration de test"""
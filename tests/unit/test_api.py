@@ -4,7 +4,7 @@ from src.api.riot_api import RiotAPI
 
 @pytest.fixture
 def mock_api():
-    with patch('src.api.riot_api.requests.get') as mock_get:
+    with patch('src.api.http_client.requests.Session.request') as mock_get:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -32,7 +32,7 @@ def test_get_champion_info(mock_api):
     assert champion_data["title"] == "the Nine-Tailed Fox"
 
 def test_api_error_handling(mock_api):
-    with patch('src.api.riot_api.requests.get') as mock_get:
+    with patch('src.api.http_client.requests.Session.request') as mock_get:
         mock_response = Mock()
         mock_response.status_code = 404
         mock_get.return_value = mock_response
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from src.api.async_clients import AsyncRiotAPI, AsyncHuggingFaceAPI
+from src.chatbot.chatbot import LolChatbot
+
+@pytest.fixture
+def slow_riot_api():
+    riot_api = MagicMock()
+    riot_api.snapshot.is_loaded = False
+    riot_api.get_champion_index.return_value.resolve.side_effect = lambda name: name.capitalize()
+
+    def slow_lookup(name):
+        time.sleep(0.05)
+        return {"name": name.capitalize()}
+    riot_api.get_champion_info.side_effect = slow_lookup
+    return riot_api
+
+def test_duplicate_lookups_are_coalesced(slow_riot_api):
+    async_api = AsyncRiotAPI(slow_riot_api)
+
+    async def scenario():
+        return await asyncio.gather(*(async_api.get_champion_info(name) for name in ["ahri", "Ahri", "AHRI"]))
+
+    results = asyncio.run(scenario())
+    assert all(result == {"name": "Ahri"} for result in results)
+    assert slow_riot_api.get_champion_info.call_count == 1
+    assert async_api._inflight == {}
+
+def test_prefetch_runs_concurrently(slow_riot_api):
+    async_api = AsyncRiotAPI(slow_riot_api)
+    start = time.perf_counter()
+    results = asyncio.run(async_api.prefetch(["ahri", "zed", "lux", None, "ahri"]))
+    assert len(results) == 3
+    assert time.perf_counter() - start < 0.12
+
+def test_aget_response_local_answer(ddragon_snapshot):
+    chatbot = LolChatbot()
+    response = asyncio.run(chatbot.aget_response("stats de jinx"))
+    assert "Statistiques complètes de Jinx" in response
+    assert chatbot.context["current_champion"] == "Jinx"
+
+def test_aget_response_fallback(ddragon_snapshot):
+    chatbot = LolChatbot()
+    with patch.object(chatbot.huggingface_api, 'generate', return_value="Le drake donne des bonus.") as mock_generate:
+        response = asyncio.run(chatbot.aget_response("comment fonctionne le drake"))
+    assert response == "Le drake donne des bonus."
+    assert "Question: comment fonctionne le drake" in mock_generate.call_args[0][0]
+    assert chatbot.conversation_history[-1] == ("comment fonctionne le drake", response)
+
+def test_sessions_share_one_event_loop(ddragon_snapshot):
+    chatbots = [LolChatbot() for _ in range(5)]
+
+    def slow_generate(prompt):
+        time.sleep(0.1)
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(c.aget_response("que faire en fin de partie") for c in chatbots))
+
+    with patch('src.api.huggingface_api.HuggingFaceAPI.generate', side_effect=slow_generate):
+        start = time.perf_counter()
+        responses = asyncio.run(scenario())
+    assert responses == ["ok"] * 5
+    assert time.perf_counter() - start < 0.4
+
+@pytest.mark.parametrize("step, query", [("_classify", "stats de jinx"),
+                                         ("_get_local_response", "stats de jinx"),
+                                         ("_get_cached_response", "comment fonctionne le drake"),
+                                         ("_remember", "stats de jinx")])
+def test_blocking_steps_leave_the_event_loop_free(ddragon_snapshot, step, query):
+    chatbot = LolChatbot()
+    original = getattr(chatbot, step)
+
+    def slow_step(*args):
+        # Première construction d'un index, embedding, sauvegarde de la session...
+        time.sleep(0.2)
+        return original(*args)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await chatbot.aget_response(query)
+        task.cancel()
+        return ticks
+
+    with patch.object(chatbot, step, side_effect=slow_step), \
+            patch.object(chatbot.huggingface_api, 'generate', return_value="ok"):
+        assert asyncio.run(scenario()) >= 10
+
+def test_async_huggingface_error_returns_none(ddragon_snapshot):
+    async_hf = AsyncHuggingFaceAPI()
+    with patch.object(async_hf.huggingface_api, 'generate', side_effect=Exception("boom")):
+        assert asyncio.run(async_hf.get_response("test")) is None
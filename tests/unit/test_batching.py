@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+from unittest.mock import Mock
+import pytest
+from src.api.batching import MicroBatchScheduler
+from src.api.generation import BatchingBackend, RemoteBackend
+from src.api.huggingface_api import HuggingFaceAPI
+
+class RecordingBatch:
+    """Traitement de lot factice qui enregistre la taille des lots reçus"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sizes = []
+
+    def __call__(self, prompts):
+        self.sizes.append(len(prompts))
+        time.sleep(self.delay)
+        return [prompt.upper() for prompt in prompts]
+
+def test_results_are_demultiplexed():
+    run = RecordingBatch()
+    scheduler = MicroBatchScheduler(run, max_batch=8, window=0.05)
+    try:
+        futures = [scheduler.submit(f"question {i}") for i in range(5)]
+        assert [future.result(timeout=5) for future in futures] == [f"QUESTION {i}" for i in range(5)]
+        assert run.sizes == [5]
+    finally:
+        scheduler.close()
+
+def test_batches_are_capped():
+    run = RecordingBatch()
+    scheduler = MicroBatchScheduler(run, max_batch=3, window=0.05)
+    try:
+        futures = [scheduler.submit(f"question {i}") for i in range(7)]
+        [future.result(timeout=5) for future in futures]
+        assert max(run.sizes) <= 3
+        assert sum(run.sizes) == 7
+    finally:
+        scheduler.close()
+
+def test_concurrent_callers_share_a_batch():
+    run = RecordingBatch()
+    scheduler = MicroBatchScheduler(run, max_batch=16, window=0.1)
+    results = {}
+
+    def ask(i):
+        results[i] = scheduler.submit(f"session {i}").result(timeout=5)
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(10)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {i: f"SESSION {i}" for i in range(10)}
+        assert len(run.sizes) < 10
+    finally:
+        scheduler.close()
+
+def test_batch_error_fails_every_caller():
+    def run(prompts):
+        raise ValueError("endpoint indisponible")
+
+    scheduler = MicroBatchScheduler(run, max_batch=4, window=0.05)
+    try:
+        futures = [scheduler.submit("a"), scheduler.submit("b")]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+        assert scheduler.stats()['failed'] == 2
+    finally:
+        scheduler.close()
+
+def test_backpressure_and_metrics():
+    run = RecordingBatch(delay=0.3)
+    scheduler = MicroBatchScheduler(run, max_batch=1, window=0, queue_size=2, queue_timeout=0.01)
+    try:
+        scheduler.submit("en cours")
+        time.sleep(0.05)
+        scheduler.submit("attente 1")
+        scheduler.submit("attente 2")
+        assert scheduler.queue_depth() == 2
+        assert scheduler.saturation() == 1.0
+        with pytest.raises(queue.Full):
+            scheduler.submit("refusé")
+        stats = scheduler.stats()
+        assert stats['rejected'] == 1
+        assert stats['submitted'] == 3
+        assert stats['in_flight'] == 1
+    finally:
+        scheduler.close()
+
+def test_remote_prompts_are_sent_as_one_request(inference_stub):
+    backend = BatchingBackend(RemoteBackend(inference_stub.url, "test"), max_batch=8, window=0.1)
+    try:
+        futures = [backend.submit(f"Question {i}\n\nRéponse:") for i in range(4)]
+        assert [future.result(timeout=5) for future in futures] == ["Ahri est une mage."] * 4
+        assert len(inference_stub.requests) == 1
+        assert inference_stub.requests[0]['inputs'] == [f"Question {i}\n\nRéponse:" for i in range(4)]
+        assert backend.stats()['batch_sizes'] == {4: 1}
+    finally:
+        backend.close()
+
+def test_list_inputs_rejected_falls_back_per_prompt(inference_stub):
+    inference_stub.accept_lists = False
+    backend = BatchingBackend(RemoteBackend(inference_stub.url, "test"), max_batch=8, window=0.1)
+    try:
+        futures = [backend.submit(f"Question {i}\n\nRéponse:") for i in range(3)]
+        assert [future.result(timeout=5) for future in futures] == ["Ahri est une mage."] * 3
+        # Un lot refusé (422) puis un appel par prompt
+        assert isinstance(inference_stub.requests[0]['inputs'], list)
+        assert [isinstance(request['inputs'], str) for request in inference_stub.requests[1:]] == [True] * 3
+        assert backend.backend.supports_lists is False
+        # Lots suivants envoyés directement prompt par prompt
+        futures = [backend.submit(f"Autre {i}") for i in range(2)]
+        assert [future.result(timeout=5) for future in futures] == ["Ahri est une mage."] * 2
+        assert all(isinstance(request['inputs'], str) for request in inference_stub.requests[4:])
+        assert len(inference_stub.requests) == 6
+    finally:
+        backend.close()
+
+def test_prompts_without_list_support_are_not_serialized(inference_stub):
+    inference_stub.accept_lists = False
+    inference_stub.token_delay = 0.3 / len(inference_stub.tokens)
+    backend = BatchingBackend(RemoteBackend(inference_stub.url, "test"), max_batch=8, window=0.05)
+    results = {}
+
+    def ask(i):
+        results[i] = backend.generate(f"Question {i}")
+
+    try:
+        for _ in range(2):
+            threads = [threading.Thread(target=ask, args=(i,)) for i in range(8)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # Lot refusé puis prompts simultanés : deux appels au plus, pas huit en série
+            assert time.perf_counter() - start < 1.2
+            assert results == {i: "Ahri est une mage." for i in range(8)}
+        assert backend.backend.supports_lists is False
+    finally:
+        backend.close()
+
+def test_oversized_batch_keeps_list_support():
+    def post(url, json=None, **kwargs):
+        if isinstance(json['inputs'], list):
+            return Mock(status_code=413, text="Payload Too Large")
+        return Mock(status_code=200, json=lambda: [{"generated_text": json['inputs'].upper()}])
+
+    backend = RemoteBackend("http://inference.test", "test", http=Mock(post=Mock(side_effect=post)))
+    assert backend.generate_batch(["a", "b"]) == ["A", "B"]
+    # Erreur propre à ce lot : les lots suivants restent groupés
+    assert backend.supports_lists is True
+
+def test_single_prompt_keeps_plain_payload(inference_stub, ddragon_snapshot):
+    backend = BatchingBackend(RemoteBackend(inference_stub.url, "test"), window=0)
+    try:
+        api = HuggingFaceAPI(backend=backend)
+        assert api.get_response("qui est ahri") == "Ahri est une mage."
+        assert isinstance(inference_stub.requests[0]['inputs'], str)
+        assert api.api_url == inference_stub.url
+    finally:
+        backend.close()
@@ -0,0 +1,82 @@
+import os
+import re
+import threading
+from unittest.mock import patch
+import src
+from benchmarks.corpus import CORPUS, load_corpus
+from benchmarks.runner import BenchmarkEnvironment, percentile, run_benchmark, run_latency, run_load
+from src.chatbot.chatbot import LolChatbot
+
+def test_percentile_nearest_rank():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([7.0], 95) == 7.0
+    assert percentile([], 50) is None
+
+def test_load_corpus_from_file(tmp_path):
+    path = tmp_path / "questions.txt"
+    path.write_text("# commentaire\nQui est Ahri ?\n\nQuel build sur Jinx ?\n", encoding="utf-8")
+    assert load_corpus(str(path)) == ["Qui est Ahri ?", "Quel build sur Jinx ?"]
+    assert load_corpus() == CORPUS
+
+def test_latency_report_counts_outbound_requests():
+    report = run_benchmark(["Parle-moi d'Ahri", "Parle-moi d'Ahri", "Comment bien jouer jungle ?"],
+                           env={'GENERATION_MAX_BATCH': '1'})
+    assert report['latency']['count'] == 3
+    assert report['latency']['p50_ms'] <= report['latency']['p99_ms']
+    # Snapshot téléchargé au démarrage : aucune requête Data Dragon par question
+    assert report['startup']['outbound']['ddragon'] == 2
+    assert report['outbound']['total']['ddragon'] == 0
+    # Question répétée servie par le cache de réponses
+    assert report['outbound']['total']['inference'] == 2
+    assert report['caches']['response']['hits'] == 1
+
+def test_without_snapshot_unknown_words_are_not_probed():
+    with BenchmarkEnvironment(snapshot=False) as bench:
+        report = run_latency(bench, ["Comment bien jouer jungle avec un bon build ?"], sessions=1)
+        assert report['outbound']['total']['ddragon'] <= 1
+        assert bench.ddragon.requests['/api/versions.json'] == 0
+
+def test_environment_is_restored():
+    before = os.environ.get('DDRAGON_URL')
+    with BenchmarkEnvironment() as bench:
+        assert os.environ['DDRAGON_URL'] == bench.ddragon.url
+    assert os.environ.get('DDRAGON_URL') == before
+
+def test_load_and_memory_modes():
+    load = run_benchmark(CORPUS[:6], mode='load', concurrency=3, queries=12)
+    assert load['errors'] == 0
+    assert load['latency']['count'] == 12
+    memory = run_benchmark(CORPUS[:4], mode='memory', memory_sessions=5)
+    assert memory['memory']['sessions'] == 5
+    assert memory['memory']['state_bytes_per_session'] > 0
+
+def test_load_sessions_never_serve_concurrent_turns():
+    original = LolChatbot.get_response
+    busy, overlaps, lock = set(), [], threading.Lock()
+
+    def guarded(chatbot, query):
+        with lock:
+            if id(chatbot.state) in busy:
+                overlaps.append(query)
+            busy.add(id(chatbot.state))
+        try:
+            return original(chatbot, query)
+        finally:
+            with lock:
+                busy.discard(id(chatbot.state))
+
+    with BenchmarkEnvironment() as bench, patch.object(LolChatbot, 'get_response', guarded):
+        report = run_load(bench, CORPUS[:6], concurrency=4, queries=40)
+    assert report['errors'] == 0 and overlaps == []
+
+def test_reset_all_covers_every_singleton():
+    with open(os.path.join(os.path.dirname(src.__file__), 'shared_state.py'), encoding='utf-8') as f:
+        reset_all = f.read()
+    for root, _, files in os.walk(os.path.dirname(src.__file__)):
+        for name in files:
+            if name.endswith('.py') and name != 'shared_state.py':
+                with open(os.path.join(root, name), encoding='utf-8') as f:
+                    for reset in re.findall(r"^def (reset_\w+)\(", f.read(), re.MULTILINE):
+                        assert f"{reset}()" in reset_all, f"{reset} absent de src.shared_state.reset_all"
@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import patch
+from src.analytics.champion_analytics import (
+    AnalyticsStore, compute_champion_analytics, find_ratio, get_analytics_store
+)
+from src.api.riot_api import RiotAPI
+from src.chatbot.chatbot import LolChatbot
+
+@pytest.fixture
+def ahri(ddragon_snapshot):
+    return RiotAPI().get_champion_info("Ahri")
+
+def test_find_ratio():
+    assert find_ratio("inflige 40% ap puis 20% ap", 'ap') == pytest.approx(0.6)
+    assert find_ratio("aucun ratio", 'ad') == 0
+
+def test_compute_analytics(ahri):
+    analytics = compute_champion_analytics(ahri, "13.24.1")
+    assert analytics.ability_ratios['Q']['ap'] == pytest.approx(0.4)
+    assert analytics.ability_ratios['E']['ap'] == pytest.approx(0.6)
+    assert analytics.levels_stats[18]['hp'] == 590 + 96 * 17
+    assert analytics.levels_stats[1]['dps'] == round(53 * 0.625 / 0.668, 2)
+    assert set(analytics.levels_stats) == {1, 6, 11, 16, 18}
+
+def test_analytics_are_immutable(ahri):
+    analytics = compute_champion_analytics(ahri)
+    with pytest.raises(TypeError):
+        analytics.levels_stats[18]['hp'] = 0
+    with pytest.raises(AttributeError):
+        analytics.mobility = 10
+
+def test_store_computes_once_per_patch(ahri):
+    store = AnalyticsStore()
+    with patch('src.analytics.champion_analytics.compute_champion_analytics',
+               wraps=compute_champion_analytics) as mock_compute:
+        first = store.get(ahri, "13.24.1")
+        assert store.get(ahri, "13.24.1") is first
+        assert mock_compute.call_count == 1
+        store.get(ahri, "14.1.1")
+        assert mock_compute.call_count == 2
+
+def test_roster_precomputed_at_startup(ddragon_snapshot):
+    LolChatbot()
+    assert len(get_analytics_store()) == 4
+    assert get_analytics_store().precompute(RiotAPI()) == 0
+
+def test_enrich_does_not_mutate_cached_info(ddragon_snapshot):
+    chatbot = LolChatbot()
+    cached = chatbot.riot_api.get_champion_info("Jinx")
+    enriched = chatbot._enrich_champion_info(cached)
+    assert 'enriched_stats' in enriched
+    assert 'enriched_stats' not in cached
+    assert "Statistiques complètes de Jinx" in chatbot.get_response("statistiques de jinx")
@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import patch
+from src.utils.champion_index import ChampionIndex
+from src.api.riot_api import RiotAPI
+
+@pytest.fixture
+def champion_index():
+    return ChampionIndex({
+        "Ahri": {"id": "Ahri", "name": "Ahri"},
+        "KogMaw": {"id": "KogMaw", "name": "Kog'Maw"},
+        "MonkeyKing": {"id": "MonkeyKing", "name": "Wukong"},
+        "RekSai": {"id": "RekSai", "name": "Rek'Sai"},
+        "LeeSin": {"id": "LeeSin", "name": "Lee Sin"},
+        "Nunu": {"id": "Nunu", "name": "Nunu et Willump"},
+        "Belveth": {"id": "Belveth", "name": "Bel'Veth"},
+    })
+
+@pytest.mark.parametrize("name,expected", [
+    ("ahri", "Ahri"),
+    ("AHRI", "Ahri"),
+    ("kog maw", "KogMaw"),
+    ("kogmaw", "KogMaw"),
+    ("wukong", "MonkeyKing"),
+    ("monkeyking", "MonkeyKing"),
+    ("rek'sai", "RekSai"),
+    ("bél'veth", "Belveth"),
+    ("d'ahri", "Ahri"),
+    ("comment", None),
+    ("", None),
+])
+def test_resolve(champion_index, name, expected):
+    assert champion_index.resolve(name) == expected
+
+def test_find_champions_single_pass(champion_index):
+    assert champion_index.find_champions("comment jouer kog maw contre lee sin ?") == ["KogMaw", "LeeSin"]
+    assert champion_index.find_champions("quel est le q d'ahri") == ["Ahri"]
+    assert champion_index.find_champions("nunu et willump en jungle") == ["Nunu"]
+
+def test_no_false_positive_across_words(champion_index):
+    # "le e" ne doit pas être confondu avec "lee"
+    assert champion_index.find_champions("quel est le e de rek'sai") == ["RekSai"]
+    assert champion_index.find_champions("comment jouer contre un tank") == []
+
+def test_aliases_require_known_champion(champion_index):
+    assert champion_index.resolve("lee") == "LeeSin"
+    assert champion_index.resolve("mf") is None
+
+def test_riot_api_skips_http_for_unknown_words(champion_index):
+    api = RiotAPI()
+    api.store.index = champion_index
+    with patch('src.api.http_client.requests.Session.request') as mock_get:
+        assert api.get_champion_info("contre") is None
+        mock_get.assert_not_called()
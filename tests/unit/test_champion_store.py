@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import Mock, patch
+from src.api.champion_store import ChampionStore, MISSING, get_champion_store
+from src.api.riot_api import RiotAPI
+from src.api.huggingface_api import HuggingFaceAPI
+from src.utils.champion_index import ChampionIndex
+
+@pytest.fixture
+def store():
+    store = ChampionStore(max_size=2, ttl=60, negative_ttl=60)
+    store.set_version("13.24.1")
+    return store
+
+def test_hit_miss_counters(store):
+    assert store.get("Ahri") is MISSING
+    store.put("Ahri", {"name": "Ahri"})
+    assert store.get("ahri") == {"name": "Ahri"}
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 1
+
+def test_negative_caching(store):
+    store.put("comment", None)
+    assert store.get("comment") is None
+
+def test_lru_eviction(store):
+    store.put("Ahri", {"name": "Ahri"})
+    store.put("Zed", {"name": "Zed"})
+    store.get("Ahri")
+    store.put("Lux", {"name": "Lux"})
+    assert store.get("Zed") is MISSING
+    assert store.get("Ahri") is not MISSING
+    assert len(store) == 2
+
+def test_version_change_invalidates(store):
+    store.put("Ahri", {"name": "Ahri"})
+    store.set_version("14.1.1")
+    assert store.get("Ahri") is MISSING
+
+def test_ttl_expiry():
+    store = ChampionStore(ttl=0)
+    store.put("Ahri", {"name": "Ahri"})
+    assert store.get("Ahri") is MISSING
+
+def test_store_shared_between_clients():
+    riot_api = RiotAPI()
+    hf_api = HuggingFaceAPI(riot_api)
+    assert hf_api.riot_api is riot_api
+    assert RiotAPI().store is riot_api.store is get_champion_store()
+
+def test_alias_lookup_hits_cache():
+    api = RiotAPI()
+    api.store.index = ChampionIndex({"MonkeyKing": {"id": "MonkeyKing", "name": "Wukong"}})
+    api.store.put("MonkeyKing", {"name": "Wukong"})
+    with patch('src.api.http_client.requests.Session.request') as mock_get:
+        assert api.get_champion_info("wukong") == {"name": "Wukong"}
+        mock_get.assert_not_called()
+
+def test_not_found_is_cached():
+    api = RiotAPI()
+    api.store.index = ChampionIndex({"Ahri": {"id": "Ahri", "name": "Ahri"}})
+    with patch('src.api.http_client.requests.Session.request') as mock_get:
+        mock_get.return_value = Mock(status_code=404)
+        assert api.get_champion_info("ahri") is None
+        assert api.get_champion_info("ahri") is None
+        assert mock_get.call_count == 1
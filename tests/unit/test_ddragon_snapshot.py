@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from src.api.ddragon_snapshot import DDragonSnapshot
+from src.api.riot_api import RiotAPI
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'ddragon', 'championFull.json')
+
+def _fixture_bytes():
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+def test_fixture_snapshot_loaded(ddragon_snapshot):
+    assert ddragon_snapshot.version == "13.24.1"
+    assert set(ddragon_snapshot.get_all_champions()) == {"Ahri", "Garen", "Jinx", "MonkeyKing"}
+    # Les champs inutiles (skins, images) sont retirés
+    assert "skins" not in ddragon_snapshot.get_champion("Ahri")
+    assert "image" not in ddragon_snapshot.get_champion("Ahri")["spells"][0]
+
+def test_riot_api_served_from_disk(ddragon_snapshot):
+    with patch('src.api.http_client.requests.Session.request') as mock_get:
+        api = RiotAPI()
+        assert api.version == "13.24.1"
+        champion = api.get_champion_info("wukong")
+        assert champion["name"] == "Wukong"
+        assert champion["abilities"]["spells"][0]["name"] == "Frappe écrasante"
+        assert "Ahri" in api.get_all_champions()
+        mock_get.assert_not_called()
+
+def test_preparsed_file_reused(ddragon_snapshot, tmp_path):
+    os.remove(tmp_path / 'ddragon' / '13.24.1' / 'fr_FR' / 'championFull.json')
+    snapshot = DDragonSnapshot(str(tmp_path / 'ddragon'))
+    assert snapshot.sync(online=False)
+    assert snapshot.get_champion("Jinx")["name"] == "Jinx"
+
+def test_sync_downloads_new_patch_once(tmp_path):
+    def fake_get(method, url, **kwargs):
+        if url.endswith("versions.json"):
+            return Mock(status_code=200, json=Mock(return_value=["14.1.1", "13.24.1"]))
+        assert "/cdn/14.1.1/data/fr_FR/championFull.json" in url
+        return Mock(status_code=200, content=_fixture_bytes())
+
+    snapshot = DDragonSnapshot(str(tmp_path))
+    with patch('src.api.http_client.requests.Session.request', side_effect=fake_get) as mock_get:
+        assert snapshot.sync()
+        assert snapshot.version == "14.1.1"
+        assert mock_get.call_count == 2
+
+        # Deuxième démarrage : seule la version est vérifiée
+        restarted = DDragonSnapshot(str(tmp_path))
+        assert restarted.sync()
+        assert mock_get.call_count == 3
+    assert restarted.get_champion("Ahri") is not None
+
+def test_offline_uses_latest_local_version(tmp_path):
+    for version in ("13.23.1", "13.24.1"):
+        version_dir = tmp_path / version / 'fr_FR'
+        version_dir.mkdir(parents=True)
+        (version_dir / 'championFull.json').write_bytes(_fixture_bytes())
+    snapshot = DDragonSnapshot(str(tmp_path))
+    with patch('src.api.http_client.requests.Session.request', side_effect=Exception("offline")):
+        assert snapshot.sync()
+    assert snapshot.version == "13.24.1"
+
+def test_no_snapshot_available(tmp_path):
+    snapshot = DDragonSnapshot(str(tmp_path))
+    assert not snapshot.sync(online=False)
+    assert not snapshot.is_loaded
+
+def test_concurrent_writes_never_publish_partial_files(tmp_path):
+    path = str(tmp_path / "item.json")
+    contents = [bytes([i]) * 200000 for i in range(8)]
+    threads = [threading.Thread(target=DDragonSnapshot._write, args=(path, content)) for content in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path, 'rb') as f:
+        assert f.read() in contents
+    assert os.listdir(tmp_path) == ["item.json"]
+
+def test_failed_write_removes_temp_file(tmp_path):
+    with patch('src.utils.files.os.replace', side_effect=OSError("disque plein")):
+        with pytest.raises(OSError):
+            DDragonSnapshot._write(str(tmp_path / "items.pickle"), b"contenu")
+    assert os.listdir(tmp_path) == []
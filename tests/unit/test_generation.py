@@ -0,0 +1,84 @@
+import queue
+import time
+import pytest
+from src.api.generation import BatchingBackend, GenerationBackend, LocalBackend, RemoteBackend, create_backend, get_generation_backend
+from src.api.huggingface_api import HuggingFaceAPI
+from src.config.config import Config
+
+class EchoEngine:
+    """Moteur factice exécuté dans le processus de travail"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def generate_batch(self, prompts):
+        time.sleep(self.delay)
+        return [f"Réponse: {prompt.upper()} ({len(prompts)})" for prompt in prompts]
+
+@pytest.fixture
+def local_backend():
+    backend = LocalBackend(EchoEngine, {'delay': 0.2}, workers=1, max_batch=8)
+    assert backend.preload(timeout=30)
+    yield backend
+    backend.close()
+
+def test_default_backend_is_remote(monkeypatch):
+    backend = get_generation_backend()
+    # Endpoint public sans listes d'inputs : pas de regroupement par défaut
+    assert isinstance(backend, RemoteBackend)
+    assert backend.api_url == Config().HUGGINGFACE_MODEL_URL
+    assert "blenderbot" not in backend.api_url
+    assert get_generation_backend() is backend
+    monkeypatch.setenv('GENERATION_MAX_BATCH', '8')
+    batching = create_backend()
+    try:
+        assert isinstance(batching, BatchingBackend) and isinstance(batching.backend, RemoteBackend)
+    finally:
+        batching.close()
+
+def test_backend_must_implement_generate():
+    with pytest.raises(TypeError):
+        GenerationBackend()
+
+    class Incomplete(GenerationBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_local_generation(local_backend):
+    assert local_backend.generate("qui est ahri") == "QUI EST AHRI (1)"
+
+def test_concurrent_prompts_are_batched(local_backend):
+    futures = [local_backend.submit("question 0")]
+    time.sleep(0.05)
+    futures += [local_backend.submit(f"question {i}") for i in range(1, 4)]
+    results = [future.result(timeout=30) for future in futures]
+    assert results[0].endswith("(1)")
+    # Les prompts arrivés pendant la première génération partent en un seul lot
+    assert all(result.endswith("(3)") for result in results[1:])
+
+def test_bounded_queue():
+    backend = LocalBackend(EchoEngine, {'delay': 0.5}, workers=1, max_batch=1,
+                           queue_size=1, queue_timeout=0.01)
+    try:
+        with pytest.raises(queue.Full):
+            for i in range(6):
+                backend.submit(f"question {i}")
+    finally:
+        backend.close()
+
+def test_chatbot_api_uses_local_backend(local_backend, ddragon_snapshot):
+    api = HuggingFaceAPI(backend=local_backend)
+    assert api.api_url is None
+    assert api.get_response("qui est ahri").endswith("(1)")
+    assert list(api.stream_response("qui est ahri"))[0].endswith("(1)")
+
+def test_create_local_backend_from_config(monkeypatch):
+    monkeypatch.setenv('GENERATION_BACKEND', 'local')
+    monkeypatch.setattr('src.api.generation.LocalBackend.preload', lambda self: True)
+    backend = create_backend()
+    try:
+        assert isinstance(backend, LocalBackend)
+        assert backend.max_batch == Config().LOCAL_MAX_BATCH
+    finally:
+        backend.close()
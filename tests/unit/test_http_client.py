@@ -0,0 +1,87 @@
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from src.api.http_client import (
+    HttpClient, TokenBucket, RateLimiter, LatencyHistogram, parse_retry_after,
+    ENDPOINT_TIMEOUTS, get_http_client
+)
+
+def _response(status_code, headers=None):
+    return Mock(status_code=status_code, headers=headers or {})
+
+@pytest.fixture
+def client():
+    return HttpClient(max_retries=2, backoff_base=0)
+
+def test_shared_client_is_singleton():
+    assert get_http_client() is get_http_client()
+
+def test_endpoint_timeout_applied(client):
+    with patch.object(client.session, 'request', return_value=_response(200)) as mock_request:
+        client.get("https://example.test", endpoint='huggingface')
+    assert mock_request.call_args[1]['timeout'] == ENDPOINT_TIMEOUTS['huggingface']
+
+def test_retries_then_succeeds(client):
+    responses = [_response(503), _response(200)]
+    with patch.object(client.session, 'request', side_effect=responses) as mock_request:
+        response = client.get("https://example.test", endpoint='ddragon')
+    assert response.status_code == 200
+    assert mock_request.call_count == 2
+
+def test_gives_up_after_max_retries(client):
+    with patch.object(client.session, 'request', return_value=_response(500)) as mock_request:
+        response = client.post("https://example.test")
+    assert response.status_code == 500
+    assert mock_request.call_count == 3
+
+def test_honors_retry_after(client):
+    responses = [_response(429, {'Retry-After': '2'}), _response(200)]
+    with patch.object(client.session, 'request', side_effect=responses), \
+         patch('src.api.http_client.time.sleep') as mock_sleep:
+        client.get("https://example.test", endpoint='riot')
+    assert mock_sleep.call_args_list[-1][0][0] == 2.0
+
+def test_connection_error_is_retried_then_raised(client):
+    with patch.object(client.session, 'request', side_effect=requests.ConnectionError("down")) as mock_request:
+        with pytest.raises(requests.ConnectionError):
+            client.get("https://example.test")
+    assert mock_request.call_count == 3
+
+def test_client_errors_not_retried(client):
+    with patch.object(client.session, 'request', return_value=_response(404)) as mock_request:
+        assert client.get("https://example.test").status_code == 404
+    assert mock_request.call_count == 1
+
+@pytest.mark.parametrize("value,expected", [("3", 3.0), ("0", 0.0), (None, None), ("abc", None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+def test_token_bucket_delays_when_empty():
+    bucket = TokenBucket(capacity=2, period=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+
+def test_rate_limiter_uses_strictest_window():
+    limiter = RateLimiter([(20, 1), (1, 120)])
+    with patch('src.api.http_client.time.sleep') as mock_sleep:
+        limiter.acquire()
+        mock_sleep.assert_not_called()
+        limiter.acquire()
+        assert mock_sleep.call_args[0][0] == pytest.approx(120, abs=1)
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for latency in [3, 8, 40, 40, 900]:
+        histogram.observe(latency)
+    assert histogram.percentile(50) == 50.0
+    assert histogram.percentile(99) == 1000.0
+    assert histogram.to_dict()['count'] == 5
+
+def test_stats_per_endpoint(client):
+    with patch.object(client.session, 'request', return_value=_response(200)):
+        client.get("https://example.test", endpoint='ddragon')
+        client.post("https://example.test", endpoint='huggingface')
+    stats = client.stats()
+    assert stats['ddragon']['count'] == 1
+    assert stats['huggingface']['count'] == 1
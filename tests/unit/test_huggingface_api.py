@@ -4,7 +4,7 @@ from src.api.huggingface_api import HuggingFaceAPI
 
 @pytest.fixture
 def mock_hf_api():
-    with patch('src.api.huggingface_api.requests.post') as mock_post:
+    with patch('src.api.http_client.requests.Session.request') as mock_post:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = [{"generated_text": "Test response"}]
@@ -0,0 +1,191 @@
+import gzip
+import io
+import json
+import os
+import numpy as np
+import pytest
+from src.analytics import match_store
+from src.analytics.ingest import extract_file, fetch_matches, ingest_directory, iter_batches, match_key, match_rows
+from src.analytics.match_store import MatchStore, get_match_store, merge_sorted
+from tests.unit.test_matchups import make_match, write_matches
+
+def write_gzip(directory, name, matches):
+    directory.mkdir(exist_ok=True)
+    with gzip.open(directory / name, 'wt', encoding='utf-8') as f:
+        json.dump(matches, f)
+
+def test_match_rows():
+    match = make_match("EUW1_1")
+    match["info"]["participants"][0].update({"kills": 7, "item0": 3078, "totalMinionsKilled": 150,
+                                             "neutralMinionsKilled": 12, "goldEarned": 12000})
+    rows = match_rows(match)
+    assert len(rows) == 10
+    assert rows[0]["champion"] == "Garen"
+    assert rows[0]["patch"] == "13.24"
+    assert (rows[0]["role"], rows[0]["team"], rows[0]["win"]) == (0, 0, 1)
+    assert (rows[0]["kills"], rows[0]["cs"], rows[0]["item0"], rows[0]["gold"]) == (7, 162, 3078, 12000)
+    assert rows[5]["team"] == 1 and rows[5]["win"] == 0
+    assert rows[0]["match"] == match_key("EUW1_1") != match_key("EUW1_2")
+    assert match_rows({"info": {}}) == []
+
+def test_ingest_directory(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match(f"EUW1_{i}") for i in range(3)])
+    write_gzip(data_dir, "b.json.gz", [make_match("EUW1_3", blue_wins=False), make_match("EUW1_1")])
+    store = MatchStore(str(tmp_path / "store"))
+    report = ingest_directory(str(data_dir), store)
+    assert (report["files"], report["matches"], report["rows"], report["errors"]) == (2, 4, 40, 0)
+    assert len(store) == 40 and store.matches == 4
+    champions = store.column("champion")
+    garen = champions == store.code("champions", "Garen")
+    assert store.column("win")[garen].tolist() == [1, 1, 1, 0]
+    assert store.patches == ["13.24"]
+    # Rien à relire
+    assert ingest_directory(str(data_dir), store)["files"] == 0
+
+def test_resume_after_interruption(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match("EUW1_1")])
+    store = MatchStore(str(tmp_path / "store"))
+    ingest_directory(str(data_dir), store)
+    # Écriture interrompue avant validation : lignes orphelines en fin de colonnes
+    store.append({name: values for name, values in extract_file(str(data_dir / "a.json")).items()})
+    reopened = MatchStore(str(tmp_path / "store"))
+    assert len(reopened) == 10
+    assert reopened.files == {"a.json": (data_dir / "a.json").stat().st_size}
+    write_matches(data_dir, "b.jsonl", [make_match("EUW1_2"), make_match("EUW1_1")])
+    assert ingest_directory(str(data_dir), reopened)["matches"] == 1
+    assert len(MatchStore(str(tmp_path / "store"))) == 20
+
+def test_corrupt_file_is_reported_and_retried(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match("EUW1_1")])
+    (data_dir / "b.json").write_text('[{"metadata": ', encoding="utf-8")
+    store = MatchStore(str(tmp_path / "store"))
+    report = ingest_directory(str(data_dir), store)
+    assert (report["files"], report["errors"]) == (1, 1)
+    assert "b.json" not in store.files
+
+def test_process_pool_matches_in_process(tmp_path):
+    data_dir = tmp_path / "matches"
+    for i in range(6):
+        write_matches(data_dir, f"{i}.jsonl", [make_match(f"EUW1_{i}_{j}", blue_wins=j % 2 == 0) for j in range(3)])
+    serial = MatchStore(str(tmp_path / "serial"))
+    pooled = MatchStore(str(tmp_path / "pooled"))
+    ingest_directory(str(data_dir), serial)
+    report = ingest_directory(str(data_dir), pooled, workers=2)
+    assert report["matches"] == 18
+    for name in ("match", "champion", "win", "role"):
+        assert np.array_equal(serial.column(name), pooled.column(name))
+
+def test_chunked_ingest_matches_whole_files(tmp_path):
+    data_dir = tmp_path / "matches"
+    # Doublons dans un même fichier, séparés par plusieurs lots, et entre fichiers
+    write_matches(data_dir, "a.jsonl", [make_match(f"EUW1_{i % 7}") for i in range(12)])
+    write_matches(data_dir, "b.jsonl", [make_match(f"EUW1_{i}") for i in range(5, 15)])
+    assert [len(batch["match"]) for batch in iter_batches(str(data_dir / "a.jsonl"), chunk_rows=20)] == [20, 20, 20, 20, 20, 20]
+    whole = MatchStore(str(tmp_path / "whole"))
+    chunked = MatchStore(str(tmp_path / "chunked"))
+    pooled = MatchStore(str(tmp_path / "pooled"))
+    ingest_directory(str(data_dir), whole)
+    report = ingest_directory(str(data_dir), chunked, chunk_rows=20)
+    assert (report["matches"], report["rows"]) == (15, 150)
+    assert ingest_directory(str(data_dir), pooled, workers=2, chunk_rows=20)["matches"] == 15
+    for name in ("match", "champion", "win"):
+        assert np.array_equal(whole.column(name), chunked.column(name))
+        assert np.array_equal(whole.column(name), pooled.column(name))
+    assert not [name for name in os.listdir(tmp_path / "pooled") if name.startswith("spill-")]
+
+def test_key_index_runs_are_merged(tmp_path):
+    store = MatchStore(str(tmp_path / "store"))
+    data_dir = tmp_path / "matches"
+    for i in range(8):
+        write_matches(data_dir, f"{i}.jsonl", [make_match(f"EUW1_{i}_{j}") for j in range(3)])
+    ingest_directory(str(data_dir), store)
+    # Séries fusionnées au fil des validations : nombre logarithmique, empreintes triées et complètes
+    assert len(store.key_runs) <= 3
+    assert sum(size for _, size in store.key_runs) == store.matches == 24
+    for name, size in store.key_runs:
+        run = np.fromfile(tmp_path / "store" / name, dtype=np.int64)
+        assert len(run) == size and np.all(run[1:] > run[:-1])
+    assert sorted(name for name in os.listdir(tmp_path / "store") if name.startswith("keys-")) == \
+        sorted(name for name, _ in store.key_runs)
+    reopened = MatchStore(str(tmp_path / "store"))
+    keys = np.array([match_key("EUW1_3_1"), match_key("EUW1_9_9")])
+    assert reopened.known_matches(keys).tolist() == [True, False]
+
+def test_merge_sorted_in_chunks(monkeypatch):
+    monkeypatch.setattr(match_store, "MERGE_CHUNK", 3)
+    rng = np.random.default_rng(0)
+    values = rng.permutation(np.arange(-50, 50, dtype=np.int64))
+    a, b = np.sort(values[:17]), np.sort(values[17:])
+    f = io.BytesIO()
+    merge_sorted(a, b, f)
+    assert np.array_equal(np.frombuffer(f.getvalue(), dtype=np.int64), np.arange(-50, 50))
+
+def test_store_without_key_index_is_indexed(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match("EUW1_1"), make_match("EUW1_2")])
+    store = MatchStore(str(tmp_path / "store"))
+    ingest_directory(str(data_dir), store)
+    # Manifeste d'un stockage créé avant l'index des empreintes
+    manifest_path = tmp_path / "store" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    for name, _ in manifest.pop("key_runs"):
+        os.remove(tmp_path / "store" / name)
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    reopened = MatchStore(str(tmp_path / "store"))
+    assert sum(size for _, size in reopened.key_runs) == 2
+    write_matches(data_dir, "b.json", [make_match("EUW1_2"), make_match("EUW1_3")])
+    assert ingest_directory(str(data_dir), reopened)["matches"] == 1
+
+def test_shared_store_uses_config(tmp_path):
+    store = get_match_store()
+    assert store.path == str(tmp_path / "match_store")
+    assert get_match_store() is store
+    assert len(store) == 0 and len(store.column("win")) == 0
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+class FakeHttp:
+    def __init__(self, matches):
+        self.matches = matches
+        self.calls = []
+
+    def get(self, url, endpoint='default', **kwargs):
+        self.calls.append((url, endpoint))
+        match_id = url.rsplit("/", 1)[-1]
+        if match_id in self.matches:
+            return FakeResponse(200, self.matches[match_id])
+        return FakeResponse(404)
+
+def test_fetch_matches_resumes(tmp_path, monkeypatch):
+    monkeypatch.setenv("MATCH_API_URL", "http://127.0.0.1:1")
+    http = FakeHttp({"EUW1_1": make_match("EUW1_1"), "EUW1_2": make_match("EUW1_2")})
+    data_dir = tmp_path / "matches"
+    report = fetch_matches(["EUW1_1", "EUW1_404", "EUW1_2"], str(data_dir), http=http)
+    assert report == {"fetched": 2, "skipped": 0, "errors": 0}
+    assert all(endpoint == "riot" for _, endpoint in http.calls)
+    assert http.calls[0][0] == "http://127.0.0.1:1/lol/match/v5/matches/EUW1_1"
+    again = fetch_matches(["EUW1_1", "EUW1_2", "EUW1_404"], str(data_dir), http=http)
+    assert again["skipped"] == 3 and len(http.calls) == 3
+    store = MatchStore(str(tmp_path / "store"))
+    assert ingest_directory(str(data_dir), store)["matches"] == 2
+
+def test_matches_without_id_use_game_id(tmp_path):
+    matches = []
+    for game_id in (1, 2, 2):
+        match = make_match("")
+        match["metadata"] = {}
+        match["info"].update({"platformId": "EUW1", "gameId": game_id})
+        matches.append(match)
+    write_matches(tmp_path / "matches", "a.json", matches)
+    columns = extract_file(str(tmp_path / "matches" / "a.json"))
+    assert len(np.unique(columns["match"])) == 2
+    assert len(columns["champion"]) == 20
@@ -0,0 +1,55 @@
+import pytest
+from src.api.riot_api import RiotAPI
+from src.chatbot.chatbot import LolChatbot
+from src.chatbot.intent_classifier import IntentClassifier, fold
+
+@pytest.fixture
+def classifier():
+    return IntentClassifier(greetings=["salut", "bonjour", "hi"])
+
+def test_single_letters_need_word_boundaries(classifier):
+    # "e" et "r" ne doivent plus correspondre à n'importe quelle phrase
+    intent = classifier.classify("comment gérer une partie perdue")
+    assert not intent.has("ability_info")
+    assert intent.ability is None
+
+    intent = classifier.classify("quel est le r de jinx")
+    assert intent.has("ability_info")
+    assert intent.ability == "r"
+
+def test_intents_with_confidence(classifier):
+    intent = classifier.classify("donne moi les statistiques et les dégâts de garen")
+    assert intent.primary == "stats_info"
+    assert intent.intents["stats_info"] == pytest.approx(1 - 0.3 * 0.3)
+    # Mot-clé partagé entre deux intentions : confiance répartie
+    shared = classifier.classify("une technique")
+    assert shared.intents["gameplay_info"] == pytest.approx(0.35)
+    assert shared.intents["mechanics_info"] == pytest.approx(0.35)
+
+def test_accents_and_plurals(classifier):
+    assert classifier.classify("quels degats").has("stats_info")
+    assert classifier.classify("ses capacités").has("ability_info")
+    assert fold("Débutant") == "debutant"
+
+def test_role_skill_greeting_topics(classifier):
+    intent = classifier.classify("salut, je suis débutant en jungle, conseils de trades ?")
+    assert intent.role == "jungle"
+    assert intent.skill_level == "beginner"
+    assert intent.greeting == "salut"
+    assert intent.topics == ["trade"]
+    assert classifier.classify("top 10 armure").role is None
+    # "pro" et "hi" ne correspondent plus à l'intérieur d'un mot
+    intent = classifier.classify("un problème de chips")
+    assert intent.skill_level is None and intent.greeting is None
+
+def test_champions_detected(classifier, ddragon_snapshot):
+    intent = classifier.classify("ahri contre wukong", RiotAPI().get_champion_index())
+    assert intent.champions == ["Ahri", "MonkeyKing"]
+    assert intent.has("matchup_info")
+
+def test_chatbot_routing(ddragon_snapshot):
+    chatbot = LolChatbot()
+    assert chatbot.get_response("bonjour").startswith("Bonjour invocateur")
+    response = chatbot.get_response("quel est le e d'ahri")
+    assert response.startswith("Capacité E de Ahri")
+    assert chatbot.context["current_champion"] == "Ahri"
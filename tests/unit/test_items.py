@@ -0,0 +1,139 @@
+import json
+import os
+import pytest
+from unittest.mock import Mock, patch
+from src.analytics.items import (FEATURES, Build, EnemyComposition, ItemIndex, champion_needs, enemy_composition,
+                                 get_item_index, physical_share)
+from src.api.ddragon_snapshot import DDragonSnapshot
+from src.api.riot_api import RiotAPI
+from src.chatbot.chatbot import LolChatbot
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'ddragon', 'item.json')
+
+@pytest.fixture
+def index():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return ItemIndex(json.load(f)['data'], '13.24.1')
+
+def names(index, item_ids):
+    return [index.name(item_id) for item_id in item_ids]
+
+def test_index_filters_and_features(index):
+    # Balise, balise de contrôle consommée et objets hors Faille exclus
+    assert '3340' not in index and '2055' not in index
+    assert index.features.shape == (len(index), len(FEATURES))
+    rabadon = index.features[index.ids.index('3089')]
+    assert rabadon[FEATURES.index('ap')] == 120 * 20
+    assert index.mythic[index.ids.index('6655')] and not index.mythic[index.ids.index('3089')]
+
+def test_build_tree(index):
+    assert names(index, index.build_path('3031')) == ["Cape d'agilité", "Pioche", "Épée en B.F.", "Lame d'infini"]
+    assert index.build_path('1038') == ['1038']
+    # Un objet et ses composants ne peuvent pas figurer dans le même build
+    assert index.conflicts[index.ids.index('3031'), index.ids.index('1038')]
+    assert not index.completed[index.ids.index('1038')] and index.completed[index.ids.index('3031')]
+
+def test_find_items(index):
+    assert index.find_items("que fait la coiffe de rabadon ?") == ['3089']
+    assert index.find_items("Zhonya ou banshee ?") == ['3157', '3102']
+    assert index.find_items("quel objet acheter pour ward la rivière") == []
+
+def test_describe(index):
+    text = index.describe('3031')
+    assert text.startswith("Lame d'infini (3400 PO)")
+    assert "- +20% Chances de coup critique" in text
+    assert "Recette : Épée en B.F. + Pioche + Cape d'agilité (+625 PO)" in text
+
+def test_physical_share():
+    assert physical_share(['Mage'], {'physical': 0, 'magical': 27}) == pytest.approx(0.05)
+    assert physical_share(['Marksman']) == 1.0
+    assert physical_share([], {'physical': 0, 'magical': 0}) == 0.5
+    assert enemy_composition([]) == EnemyComposition()
+    enemies = enemy_composition([(['Fighter'], {'physical': 10, 'magical': 0}), (['Assassin'], None)])
+    assert enemies.physical_share == pytest.approx(0.75) and enemies.count('Assassin') == 1
+
+def test_recommend_build(index):
+    mage = index.recommend(champion_needs(['Mage'], {'physical': 0, 'magical': 27}, 'Mana'))
+    marksman = index.recommend(champion_needs(['Marksman'], {'physical': 62, 'magical': 20}, 'Mana'))
+    for build in (mage, marksman):
+        assert len(build.items) == 6 and len(set(build.items)) == 6
+        assert 'Boots' in index.items[build.items[0]]['tags']
+        assert sum(index.mythic[index.ids.index(item_id)] for item_id in build.items) <= 1
+        assert build.cost == sum(index.cost(item_id) for item_id in build.items)
+    assert "Coiffe de Rabadon" in names(index, mage.items)
+    assert "Lame d'infini" in names(index, marksman.items)
+    assert not set(mage.items) & set(marksman.items[1:])
+
+def test_enemy_composition_shifts_defense(index):
+    weights = champion_needs(['Fighter', 'Tank'], {'physical': 16.4, 'magical': 0})
+    physical = champion_needs(['Fighter', 'Tank'], {'physical': 16.4, 'magical': 0}, enemies=EnemyComposition(1.0))
+    magical = champion_needs(['Fighter', 'Tank'], {'physical': 16.4, 'magical': 0}, enemies=EnemyComposition(0.0))
+    armor, mr = FEATURES.index('armor'), FEATURES.index('mr')
+    assert physical[armor] > weights[armor] > magical[armor]
+    assert magical[mr] > weights[mr] > physical[mr]
+    versus_physical = index.recommend(physical)
+    versus_magical = index.recommend(magical)
+    armor_of = lambda build: index.features[[index.ids.index(i) for i in build.items], armor].sum()
+    assert armor_of(versus_physical) > armor_of(versus_magical)
+
+def test_items_loaded_lazily_from_snapshot(ddragon_snapshot, tmp_path):
+    version_dir = tmp_path / 'ddragon' / '13.24.1' / 'fr_FR'
+    with patch('src.api.http_client.requests.Session.request') as mock_get:
+        api = RiotAPI()
+        assert not (version_dir / 'items.pickle').exists()
+        index = get_item_index(api)
+        assert index.version == "13.24.1" and '3031' in index
+        assert get_item_index(api) is index
+        mock_get.assert_not_called()
+    # Fichier compact réutilisé sans item.json
+    assert (version_dir / 'items.pickle').exists()
+    os.remove(version_dir / 'item.json')
+    snapshot = DDragonSnapshot(str(tmp_path / 'ddragon'))
+    assert snapshot.sync(online=False)
+    assert snapshot.get_items()['3089']['name'] == "Coiffe de Rabadon"
+
+def test_empty_item_index_retried_after_delay(index):
+    api = Mock(version="13.24.1")
+    api.get_all_items.return_value = {}
+    with patch('src.analytics.items.time.monotonic', return_value=100.0) as monotonic:
+        assert len(get_item_index(api)) == 0
+        # Index vide conservé : pas de nouvel appel à chaque message
+        assert len(get_item_index(api)) == 0
+        assert api.get_all_items.call_count == 1
+        api.get_all_items.return_value = index.items
+        monotonic.return_value = 100.0 + 31
+        assert '3031' in get_item_index(api)
+        assert api.get_all_items.call_count == 2
+
+def test_truncated_items_file_rebuilt(tmp_path, ddragon_snapshot):
+    pickle_path = tmp_path / 'ddragon' / '13.24.1' / 'fr_FR' / 'items.pickle'
+    assert ddragon_snapshot.get_items()
+    pickle_path.write_bytes(pickle_path.read_bytes()[:100])
+    snapshot = DDragonSnapshot(str(tmp_path / 'ddragon'))
+    assert snapshot.sync(online=False)
+    assert snapshot.get_items()['3089']['name'] == "Coiffe de Rabadon"
+    # Fichier compact réécrit en entier
+    assert DDragonSnapshot(str(tmp_path / 'ddragon'))._load_items('13.24.1') == snapshot.get_items()
+
+def test_missing_items_offline(tmp_path, ddragon_snapshot):
+    os.remove(tmp_path / 'ddragon' / '13.24.1' / 'fr_FR' / 'item.json')
+    snapshot = DDragonSnapshot(str(tmp_path / 'ddragon'))
+    assert snapshot.sync(online=False)
+    assert snapshot.get_items() == {}
+
+def test_chatbot_item_questions(ddragon_snapshot):
+    chatbot = LolChatbot()
+    build = chatbot.get_response("Quel build pour Jinx contre Garen et Ahri ?")
+    assert build.startswith("Build recommandé pour Jinx contre Garen, Ahri (patch 13.24.1)")
+    assert "Lame d'infini" in build and "Coût total" in build
+    assert chatbot.context["current_champion"] == "Jinx"
+    assert "contre assassins" in chatbot.get_response("quel objet acheter sur Garen contre des assassins")
+    card = chatbot.get_response("Que donne l'objet Coiffe de Rabadon ?")
+    assert card.startswith("Coiffe de Rabadon (3600 PO)")
+
+def test_purchase_order_skips_boots(ddragon_snapshot):
+    build = Build(items=('3031', '3006', '3089'), cost=8100, score=1.0)
+    with patch('src.analytics.items.ItemIndex.recommend', return_value=build):
+        response = LolChatbot().get_response("Quel build pour Jinx ?")
+    assert "Ordre d'achat de Lame d'infini" in response
+    assert "Ordre d'achat de Jambières" not in response
@@ -0,0 +1,26 @@
+import io
+import json
+import pytest
+from src.utils.json_stream import iter_json_values
+
+VALUES = [{"id": i, "name": "Ahri" * i, "nested": {"items": list(range(i))}} for i in range(20)]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_top_level_array(chunk_size):
+    stream = io.StringIO(json.dumps(VALUES, indent=2))
+    assert list(iter_json_values(stream, chunk_size)) == VALUES
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 16])
+def test_one_value_per_line(chunk_size):
+    stream = io.StringIO("\n".join(json.dumps(value) for value in VALUES) + "\n\n")
+    assert list(iter_json_values(stream, chunk_size)) == VALUES
+
+def test_single_object_and_scalars():
+    assert list(iter_json_values(io.StringIO('{"a": [1, 2]}'))) == [{"a": [1, 2]}]
+    assert list(iter_json_values(io.StringIO('[12345, true, null, "x"]'), 2)) == [12345, True, None, "x"]
+    assert list(iter_json_values(io.StringIO(''))) == []
+
+def test_truncated_file_raises():
+    stream = io.StringIO(json.dumps(VALUES)[:-40])
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_values(stream, 16))
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+import pytest
+from src.analytics.matchups import MatchupEngine, get_matchup_engine, normalize_role, patch_of
+from src.api.riot_api import RiotAPI
+
+POSITIONS = ("TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY")
+BLUE = ("Garen", "LeeSin", "Ahri", "Jinx", "Thresh")
+RED = ("Darius", "Vi", "Zed", "Caitlyn", "Lulu")
+
+def make_match(match_id, blue=BLUE, red=RED, blue_wins=True, version="13.24.551.1234"):
+    participants = []
+    for team_id, champions, win in ((100, blue, blue_wins), (200, red, not blue_wins)):
+        for champion, position in zip(champions, POSITIONS):
+            participants.append({"championName": champion, "teamId": team_id,
+                                 "teamPosition": position, "win": win})
+    return {"metadata": {"matchId": match_id},
+            "info": {"gameVersion": version, "gameDuration": 1800, "participants": participants}}
+
+def write_matches(directory, name, matches):
+    directory.mkdir(exist_ok=True)
+    path = directory / name
+    if name.endswith(".jsonl"):
+        path.write_text("\n".join(json.dumps(m) for m in matches), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(matches), encoding="utf-8")
+    return path
+
+def test_helpers():
+    assert patch_of("13.24.551.1234") == "13.24"
+    assert patch_of("") is None
+    assert normalize_role("UTILITY") == "support"
+    assert normalize_role("ADC") == "bot"
+    assert normalize_role("roaming") is None
+
+def test_lane_winrates_and_synergies():
+    engine = MatchupEngine(min_games=2)
+    # Ahri bat Zed 3 fois sur 4
+    matches = [make_match(f"EUW1_{i}", blue_wins=i != 3) for i in range(4)]
+    assert engine.ingest(matches) == 4
+    ahri = engine.matchups("Ahri", "mid")
+    assert ahri["patch"] == "13.24"
+    assert ahri["good_against"][0].champion == "Zed"
+    assert ahri["good_against"][0].winrate == 75.0
+    assert ahri["good_against"][0].games == 4
+    assert ahri["counter_picks"] == []
+    assert ahri["synergies"][0].winrate == 75.0
+    zed = engine.matchups("Zed", "middle")
+    assert zed["counter_picks"][0].champion == "Ahri"
+    assert engine.games("Ahri", "mid") == 4
+    # Aucune partie dans ce rôle, ou rôle inconnu
+    assert engine.matchups("Ahri", "top") is None
+    assert engine.matchups("Ahri", "roaming") is None
+
+def test_min_games_and_duplicates():
+    engine = MatchupEngine(min_games=3)
+    engine.ingest([make_match("EUW1_1"), make_match("EUW1_2")])
+    assert engine.ingest([make_match("EUW1_1")]) == 0
+    assert engine.matchups("Ahri", "mid")["good_against"] == []
+    engine.ingest([make_match("EUW1_3")])
+    assert engine.matchups("Ahri", "mid")["good_against"][0].games == 3
+
+def test_invalid_matches_are_skipped():
+    engine = MatchupEngine(min_games=1)
+    remake = make_match("EUW1_1")
+    remake["info"]["gameDuration"] = 120
+    no_position = make_match("EUW1_2")
+    no_position["info"]["participants"][0]["teamPosition"] = ""
+    assert engine.ingest([remake, no_position, {"info": {}}]) == 0
+
+def test_patches_are_separate():
+    engine = MatchupEngine(min_games=1)
+    engine.ingest([make_match("EUW1_1", version="13.23.1"), make_match("EUW1_2", blue_wins=False, version="13.24.1")])
+    assert engine.latest_patch() == "13.24"
+    assert engine.matchups("Ahri", "mid")["counter_picks"][0].champion == "Zed"
+    assert engine.matchups("Ahri", "mid", patch="13.23")["good_against"][0].champion == "Zed"
+
+def test_new_champions_grow_arrays():
+    engine = MatchupEngine(min_games=1)
+    for i in range(5):
+        red = tuple(f"{champion}{i}" for champion in RED)
+        engine.ingest([make_match(f"EUW1_{i}", red=red)])
+    assert len(engine.champions) == 30
+    assert engine.capacity >= 30
+    assert len(engine.matchups("Ahri", "mid")["good_against"]) == 3
+
+def test_refresh_reads_only_new_files(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match("EUW1_1"), make_match("EUW1_2")])
+    engine = MatchupEngine(str(data_dir), min_games=1)
+    assert engine.refresh() == 2
+    assert engine.refresh() == 0
+    write_matches(data_dir, "b.jsonl", [make_match("EUW1_3"), make_match("EUW1_2")])
+    assert engine.refresh() == 1
+    assert len(engine) == 3
+
+def test_saved_state_avoids_rescanning(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match(f"EUW1_{i}") for i in range(3)])
+    engine = MatchupEngine(str(data_dir), min_games=1)
+    engine.refresh()
+    assert engine.save(str(tmp_path / "state.pickle"))
+
+    restored = MatchupEngine(str(data_dir), min_games=1)
+    assert restored.load(str(tmp_path / "state.pickle"))
+    assert restored.refresh() == 0
+    assert restored.matchups("Ahri", "mid") == engine.matchups("Ahri", "mid")
+
+def test_background_refresher(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match("EUW1_1")])
+    engine = MatchupEngine(str(data_dir), min_games=1)
+    state_path = tmp_path / "state.pickle"
+    try:
+        assert engine.start_refresher(0.01, str(state_path))
+        # Un seul thread par processus
+        assert not engine.start_refresher(0.01, str(state_path))
+        deadline = time.monotonic() + 5
+        while not state_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(engine) == 1 and state_path.exists()
+    finally:
+        engine.stop_refresher()
+
+def test_save_skipped_when_another_process_saved_more(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match(f"EUW1_{i}") for i in range(2)])
+    state_path = str(tmp_path / "state.pickle")
+    stale = MatchupEngine(str(data_dir), min_games=1)
+    stale.refresh()
+    write_matches(data_dir, "b.json", [make_match("EUW1_9")])
+    current = MatchupEngine(str(data_dir), min_games=1)
+    current.refresh()
+    assert current.save(state_path)
+    # Le fichier enregistré couvre déjà a.json : l'écriture la plus ancienne est sautée
+    assert stale.save(state_path)
+    restored = MatchupEngine(str(data_dir), min_games=1)
+    assert restored.load(state_path) and len(restored) == 3
+
+def test_worker_follows_saved_state(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match("EUW1_1")])
+    state_path = tmp_path / "state.pickle"
+    scanner = MatchupEngine(str(data_dir), min_games=1)
+    worker = MatchupEngine(str(data_dir), min_games=1)
+    try:
+        # Le processus de travail ne relit jamais le dossier, seulement les agrégats enregistrés
+        assert not worker.start_refresher(0.01, None, scan=False)
+        assert worker.start_refresher(0.01, str(state_path), scan=False)
+        scanner.refresh()
+        scanner.save(str(state_path))
+        deadline = time.monotonic() + 5
+        while len(worker) < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(worker) == 1 and worker.files == {"a.json": os.path.getsize(data_dir / "a.json")}
+    finally:
+        worker.stop_refresher()
+
+def test_concurrent_saves_use_distinct_temp_files(tmp_path):
+    data_dir = tmp_path / "matches"
+    write_matches(data_dir, "a.json", [make_match(f"EUW1_{i}") for i in range(3)])
+    engine = MatchupEngine(str(data_dir), min_games=1)
+    engine.refresh()
+    state_path = tmp_path / "state" / "matchups.pickle"
+    threads = [threading.Thread(target=lambda: results.append(engine.save(str(state_path)))) for _ in range(8)]
+    results = []
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 8
+    assert sorted(os.listdir(tmp_path / "state")) == ["matchups.pickle", "matchups.pickle.lock"]
+    restored = MatchupEngine(str(data_dir), min_games=1)
+    assert restored.load(str(state_path)) and len(restored) == 3
+
+def test_riot_api_serves_engine_matchups(ddragon_snapshot, tmp_path, monkeypatch):
+    monkeypatch.setenv("MATCHUP_MIN_GAMES", "1")
+    matches = [make_match(f"EUW1_{i}", red=("Darius", "Vi", "Ahri", "Caitlyn", "Lulu"),
+                          blue=("Garen", "LeeSin", "MonkeyKing", "Jinx", "Thresh"), blue_wins=False)
+               for i in range(2)]
+    write_matches(tmp_path / "matches", "dump.json", matches)
+    matchups = RiotAPI().get_champion_matchups("wukong", "mid")
+    assert matchups["counter_picks"] == ["Ahri (0.0% de victoires sur 2 parties)"]
+    assert matchups["good_against"] == []
+    assert RiotAPI().get_champion_matchups("wukong", "top") is None
+    assert len(get_matchup_engine()) == 2
+    # Fichiers ajoutés ensuite : lus par le thread de rafraîchissement, jamais pendant la question
+    write_matches(tmp_path / "matches", "more.json", [make_match("EUW1_9")])
+    RiotAPI().get_champion_matchups("wukong", "mid")
+    assert len(get_matchup_engine()) == 2
+    # Aucun thread démarré par une question : le serveur le lance une fois au démarrage
+    assert get_matchup_engine()._refresher_pid is None
+
+def test_riot_api_without_dataset(ddragon_snapshot):
+    assert RiotAPI().get_champion_matchups("ahri", "mid") is None
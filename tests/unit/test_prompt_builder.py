@@ -0,0 +1,81 @@
+import pytest
+from src.api.huggingface_api import HuggingFaceAPI
+from src.api.prompt_builder import (
+    PromptBlock, PromptBuilder, TokenCounter, get_prompt_builder,
+    PRIORITY_CHAMPION, PRIORITY_ABILITIES, PRIORITY_HISTORY
+)
+from src.chatbot.chatbot import LolChatbot
+
+SYSTEM = "Tu es un expert de League of Legends."
+
+def test_token_estimate():
+    counter = TokenCounter()
+    assert counter.count("") == 0
+    assert counter.count("Ahri") == 1
+    assert counter.count("Ahri est une mage.") == 5
+    assert counter.count("invocateur") == 3
+
+def test_duplicate_lines_are_kept_once():
+    builder = PromptBuilder(SYSTEM, max_tokens=1000)
+    prompt = builder.build("qui est ahri", [
+        PromptBlock("Données Riot actuelles", ["- Champion : Ahri", "- Rôles : Mage"], PRIORITY_CHAMPION),
+        PromptBlock("Contexte actuel", ["Champion : ahri", "- Rôles : Mage", "- Niveau de jeu : beginner"], 3)
+    ])
+    assert prompt.text.count("Champion : Ahri") == 1
+    assert prompt.text.lower().count("rôles : mage") == 1
+    assert "Niveau de jeu" in prompt.text
+    assert prompt.text.startswith(SYSTEM)
+    assert prompt.text.endswith("Question: qui est ahri\n\nRéponse:")
+
+def test_budget_drops_lowest_priority_first():
+    counter = TokenCounter()
+    history = [(f"question {i}", "réponse " * 20) for i in range(5)]
+    blocks = [
+        PromptBlock("Données Riot actuelles", ["- Champion : Ahri", "- PV : 590 (+104)"], PRIORITY_CHAMPION),
+        PromptBlock("Capacités", ["Q - Orbe d'illusion", "R - Ruée spirituelle"], PRIORITY_ABILITIES),
+        PromptBlock("Historique", [f"Q: {q}\nR: {r}" for q, r in history], PRIORITY_HISTORY, keep_recent=True)
+    ]
+    full = PromptBuilder(SYSTEM, max_tokens=10000).build("combo", blocks)
+    budget = full.tokens - 60
+    prompt = PromptBuilder(SYSTEM, max_tokens=budget).build("combo", blocks)
+    assert prompt.tokens <= budget
+    assert counter.count(prompt.text) <= budget + 2
+    assert "PV : 590" in prompt.text and "Ruée spirituelle" in prompt.text
+    # Les échanges les plus récents sont conservés
+    assert "question 4" in prompt.text
+    assert "question 0" not in prompt.text
+    assert prompt.dropped == ["Historique"]
+
+def test_tiny_budget_keeps_question():
+    prompt = PromptBuilder(SYSTEM, max_tokens=10).build("qui est ahri", [
+        PromptBlock("Capacités", ["Q - Orbe d'illusion"], PRIORITY_ABILITIES)
+    ])
+    assert "Orbe" not in prompt.text
+    assert "Question: qui est ahri" in prompt.text
+
+def test_prefix_is_counted_once(monkeypatch):
+    builder = get_prompt_builder(SYSTEM)
+    assert get_prompt_builder(SYSTEM) is builder
+    calls = []
+    original = builder.counter.count
+    monkeypatch.setattr(builder.counter, 'count', lambda text: calls.append(text) or original(text))
+    builder.build("qui est ahri")
+    assert SYSTEM not in calls
+
+def test_fallback_prompt_has_no_duplicated_context(ddragon_snapshot):
+    chatbot = LolChatbot()
+    chatbot.context["current_champion"] = "Ahri"
+    chatbot.conversation_history.append(("parle moi d'ahri", "Ahri est une mage."))
+    fallback = chatbot._fallback_context()
+    prompt = chatbot.huggingface_api.build_prompt("comment jouer ahri", **fallback)
+    assert prompt.count("Champion : Ahri") == 1
+    assert prompt.count("Ahri est une mage.") == 1
+    assert prompt.count("comment jouer ahri") == 1
+    assert "Historique de la conversation" in prompt
+    assert prompt.index("Données Riot actuelles") < prompt.index("Contexte actuel") < prompt.index("Historique")
+
+def test_history_champions_are_not_looked_up(ddragon_snapshot):
+    api = HuggingFaceAPI()
+    prompt = api.build_prompt("comment gagner", history=[("stats de garen", "Garen a 690 PV.")])
+    assert "Données Riot actuelles" not in prompt
+    assert "Garen a 690 PV." in prompt
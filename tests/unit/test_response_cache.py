@@ -0,0 +1,56 @@
+import pytest
+from unittest.mock import patch
+from src.chatbot.chatbot import LolChatbot
+from src.chatbot.response_cache import ResponseCache, context_hash, normalize_query
+
+CONTEXT = {'champion': None, 'role': 'support', 'skill_level': 'beginner'}
+
+def test_normalized_key():
+    assert normalize_query("  Comment JOUER support ?! ") == "comment jouer support"
+    assert normalize_query("débutant") == "debutant"
+    assert context_hash({'role': 'mid', 'champion': 'Ahri'}) == context_hash({'champion': 'Ahri', 'role': 'mid'})
+    assert context_hash({'role': 'mid'}) != context_hash({'role': 'top'})
+
+def test_get_put_and_hits():
+    cache = ResponseCache(max_size=10, ttl=60)
+    assert cache.get("comment jouer support", CONTEXT) is None
+    cache.put("comment jouer support", CONTEXT, "Restez près de votre ADC.")
+    assert cache.get("Comment jouer support ?", CONTEXT) == "Restez près de votre ADC."
+    assert cache.get("comment jouer support", {**CONTEXT, 'role': 'mid'}) is None
+    cache.get("comment jouer support", CONTEXT)
+    assert cache.hit_count("comment jouer support", CONTEXT) == 2
+    assert cache.most_hit(1) == [("comment jouer support", 2)]
+    assert cache.stats()['hits'] == 2
+
+def test_size_bound_and_ttl():
+    cache = ResponseCache(max_size=2, ttl=60)
+    for i in range(3):
+        cache.put(f"question {i}", CONTEXT, f"réponse {i}")
+    assert len(cache) == 2
+    assert cache.get("question 0", CONTEXT) is None
+
+    with patch('src.chatbot.response_cache.time.time', return_value=0):
+        cache.put("ancienne", CONTEXT, "réponse")
+    assert cache.get("ancienne", CONTEXT) is None
+
+def test_sqlite_shared_between_instances(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    first = ResponseCache(max_size=10, ttl=60, path=path)
+    first.put("comment jouer support", CONTEXT, "Posez des balises.")
+    second = ResponseCache(max_size=10, ttl=60, path=path)
+    assert second.get("comment jouer support", CONTEXT) == "Posez des balises."
+    assert first.hit_count("comment jouer support", CONTEXT) == 1
+    first.close()
+    second.close()
+
+def test_fallback_generated_once(ddragon_snapshot, inference_stub):
+    chatbot = LolChatbot()
+    chatbot.huggingface_api.api_url = inference_stub.url
+    first = chatbot.get_response("comment jouer support")
+    second = chatbot.get_response("Comment jouer support ?")
+    assert first == second == "Ahri est une mage."
+    assert len(inference_stub.requests) == 1
+    # Le cache est partagé entre les sessions et le streaming
+    other = LolChatbot()
+    assert "".join(other.stream_response("comment jouer support")) == first
+    assert len(inference_stub.requests) == 1
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.chatbot.chatbot import LolChatbot
+from src.chatbot.semantic_cache import LexicalEmbedder, SemanticCache, get_semantic_cache, load_embedder
+
+SCOPE = ("champion_info", "Ahri")
+
+def test_lexical_embedder_normalized():
+    vectors = LexicalEmbedder().embed(["ahri mid", ""])
+    assert vectors.shape[0] == 2
+    assert np.linalg.norm(vectors[0]) == pytest.approx(1.0)
+    assert not vectors[1].any()
+
+def test_load_embedder_falls_back_without_model():
+    assert isinstance(load_embedder(None), LexicalEmbedder)
+    with patch('src.chatbot.semantic_cache.TransformerEmbedder', side_effect=ImportError):
+        assert isinstance(load_embedder("modele-absent"), LexicalEmbedder)
+
+def test_lookup_scoped_and_thresholded():
+    cache = SemanticCache(threshold=0.8, max_size=8)
+    cache.add("ahri en mid", SCOPE, "Réponse Ahri mid")
+    assert cache.lookup("ahri en mid ?", SCOPE)[0] == "Réponse Ahri mid"
+    assert cache.lookup("ahri en mid", ("matchup_info", "Ahri")) is None
+    assert cache.lookup("garen en top", SCOPE) is None
+    assert cache.stats()['hits'] == 1
+
+def test_empty_residuals_never_match():
+    cache = SemanticCache()
+    cache.add("?", SCOPE, "Ahri est une mage")
+    assert len(cache) == 0
+    cache.add("ahri mid", SCOPE, "Ahri va au mid")
+    assert cache.lookup("?", SCOPE) is None
+    assert cache.lookup("", SCOPE) is None
+
+def test_function_word_questions_do_not_collide(ddragon_snapshot, inference_stub):
+    chatbot = LolChatbot()
+    chatbot.huggingface_api.api_url = inference_stub.url
+    chatbot.get_response("Quand ?")
+    chatbot.get_response("Pourquoi ?")
+    assert len(inference_stub.requests) == 2
+    assert get_semantic_cache().stats()['hits'] == 0
+
+def test_ring_buffer_and_ttl():
+    cache = SemanticCache(threshold=0.9, max_size=2)
+    for i in range(3):
+        cache.add(f"question {i} unique{i}", SCOPE, f"réponse {i}")
+    assert len(cache) == 2
+    assert cache.lookup("question 0 unique0", SCOPE) is None
+    assert cache.lookup("question 2 unique2", SCOPE)[0] == "réponse 2"
+    with patch('src.chatbot.semantic_cache.time.time', return_value=1e12):
+        assert cache.lookup("question 2 unique2", SCOPE) is None
+
+def test_chatbot_reuses_paraphrased_answer(ddragon_snapshot, inference_stub):
+    chatbot = LolChatbot()
+    chatbot.huggingface_api.api_url = inference_stub.url
+    first = chatbot.get_response("pourquoi ward la rivière")
+    second = chatbot.get_response("pourquoi est-ce qu'on ward la rivière ?")
+    assert first == second
+    assert len(inference_stub.requests) == 1
+    assert get_semantic_cache().stats()['hits'] == 1
+    # Une autre intention n'utilise pas la réponse
+    chatbot.get_response("quel objet acheter pour ward la rivière")
+    assert len(inference_stub.requests) == 2
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import sys
+import time
+from unittest.mock import Mock, patch
+import pytest
+from src.analytics.items import get_item_index
+from src.api.http_client import get_http_client
+from src.api.riot_api import RiotAPI
+from src.chatbot.chatbot import LolChatbot
+from src.chatbot.semantic_cache import LexicalEmbedder, get_semantic_cache, load_embedder
+from src.chatbot.session_manager import SessionManager
+from src.config.config import Config
+from src.server.app import ChatServer
+from src.server.main import check_worker_config, preload_shared_data
+from src.server.client import ChatClient
+
+async def http_call(app, method, path, payload=None):
+    """Envoie une requête HTTP à l'application ASGI et retourne (statut, en-têtes, corps)"""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path, "headers": [], "query_string": b""}, receive, send)
+    start = sent[0]
+    return start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+@pytest.fixture
+def app(ddragon_snapshot):
+    server = ChatServer(manager=SessionManager(), max_concurrency=2, acquire_timeout=0.05)
+    run(server.startup())
+    return server
+
+def test_health_and_readiness(ddragon_snapshot):
+    server = ChatServer(manager=SessionManager())
+    assert run(http_call(server, "GET", "/healthz"))[0] == 200
+    assert run(http_call(server, "GET", "/readyz"))[0] == 503
+    run(server.startup())
+    status, _, body = run(http_call(server, "GET", "/readyz"))
+    assert status == 200 and json.loads(body) == {"status": "ready"}
+
+def test_lifespan_startup(ddragon_snapshot):
+    server = ChatServer(manager=SessionManager())
+    events = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return events.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    run(server({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+def test_chat_keeps_session_context(app):
+    status, _, body = run(http_call(app, "POST", "/chat", {"message": "stats de garen"}))
+    assert status == 200
+    payload = json.loads(body)
+    assert "Garen" in payload["response"]
+    session_id = payload["session_id"]
+    assert app.manager.get(session_id).context["current_champion"] == "Garen"
+
+def test_chat_validation(app):
+    assert run(http_call(app, "POST", "/chat", {"session_id": "x"}))[0] == 400
+    assert run(http_call(app, "POST", "/chat", ["stats"]))[0] == 400
+    assert run(http_call(app, "GET", "/inconnue"))[0] == 404
+
+def test_chat_stream(app):
+    status, headers, body = run(http_call(app, "POST", "/chat/stream",
+                                          {"message": "stats de jinx", "session_id": "abc"}))
+    assert status == 200
+    assert headers[b"x-session-id"] == b"abc"
+    events = [line[len("data: "):] for line in body.decode().split("\n\n") if line]
+    assert events[-1] == "[DONE]"
+    assert "Jinx" in "".join(json.loads(event)["text"] for event in events[:-1])
+
+def test_concurrency_limit(app):
+    async def slow_response(query):
+        await asyncio.sleep(0.3)
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(http_call(app, "POST", "/chat", {"message": f"question {i}"})
+                                      for i in range(3)))
+
+    with patch.object(LolChatbot, 'aget_response', side_effect=slow_response):
+        results = run(scenario())
+    statuses = sorted(status for status, _, _ in results)
+    assert statuses == [200, 200, 503]
+    rejected = next(headers for status, headers, _ in results if status == 503)
+    assert rejected[b"retry-after"] == b"1"
+    assert app.stats()["rejected"] == 1
+
+def test_delete_session(app):
+    run(http_call(app, "POST", "/chat", {"message": "stats de garen", "session_id": "abc"}))
+    assert run(http_call(app, "DELETE", "/sessions/abc"))[0] == 200
+    assert run(http_call(app, "DELETE", "/sessions/abc"))[0] == 404
+
+def test_websocket(app):
+    incoming = [
+        {"type": "websocket.connect"},
+        {"type": "websocket.receive", "text": json.dumps({"message": "stats de garen"})},
+        {"type": "websocket.receive", "text": "pas du json"},
+        {"type": "websocket.disconnect"}
+    ]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    run(app({"type": "websocket", "path": "/ws", "query_string": b"session_id=ws1"}, receive, send))
+    assert sent[0]["type"] == "websocket.accept"
+    events = [json.loads(m["text"]) for m in sent[1:]]
+    assert events[0] == {"type": "session", "session_id": "ws1"}
+    assert events[-2]["type"] == "done" and "Garen" in events[-2]["response"]
+    assert events[-1]["type"] == "error"
+    assert app.manager.get("ws1").context["current_champion"] == "Garen"
+
+def test_websocket_errors_are_reported(app):
+    incoming = [
+        {"type": "websocket.connect"},
+        {"type": "websocket.receive", "text": json.dumps({"message": "stats de garen"})},
+        {"type": "websocket.receive", "text": json.dumps({"message": "stats de jinx"})},
+        {"type": "websocket.disconnect"}
+    ]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        if len(sent) >= 3:
+            raise OSError("client déconnecté")
+        sent.append(message)
+
+    with patch.object(LolChatbot, 'stream_response', side_effect=RuntimeError("génération impossible")):
+        run(app({"type": "websocket", "path": "/ws", "query_string": b""}, receive, send))
+    # Erreur du chatbot signalée, puis fin propre quand le client ne répond plus
+    assert json.loads(sent[2]["text"]) == {"type": "error", "error": "Erreur interne"}
+    assert app.in_flight == 0
+
+def test_client_parses_stream():
+    response = Mock(status_code=200)
+    response.iter_lines.return_value = ['data: {"text": "Ahri "}', '', 'data: {"text": "est une mage."}', 'data: [DONE]']
+    http = Mock()
+    http.post.return_value = response
+    client = ChatClient("http://chatbot:8000/", http)
+    assert "".join(client.stream("qui est ahri", "abc")) == "Ahri est une mage."
+    assert http.post.call_args[0][0] == "http://chatbot:8000/chat/stream"
+    assert http.post.call_args[1]["json"] == {"message": "qui est ahri", "session_id": "abc"}
+    response.close.assert_called_once()
+
+def test_metrics_endpoint(app, monkeypatch):
+    from src.utils.tracing import reset_tracer
+    monkeypatch.setenv('TRACING_ENABLED', '1')
+    reset_tracer()
+    run(http_call(app, "POST", "/chat", {"message": "stats de garen"}))
+    status, headers, body = run(http_call(app, "GET", "/metrics"))
+    assert status == 200
+    assert headers[b"content-type"].startswith(b"text/plain")
+    assert b'lolchatbot_request_duration_seconds_count{request="chatbot.aget_response"} 1' in body
+
+def test_session_loading_leaves_the_event_loop_free(app):
+    manager = app.manager
+    original = manager.get
+
+    def slow_get(session_id):
+        # Session relue dans un stockage partagé lent
+        time.sleep(0.2)
+        return original(session_id)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        status = (await http_call(app, "POST", "/chat", {"message": "stats de jinx", "session_id": "s"}))[0]
+        task.cancel()
+        return status, ticks
+
+    with patch.object(manager, "get", side_effect=slow_get):
+        status, ticks = run(scenario())
+    assert status == 200 and ticks >= 10
+
+def test_workers_require_shared_session_store(monkeypatch, tmp_path):
+    assert Config().SERVER_WORKERS == 1 and check_worker_config(Config()) is None
+    monkeypatch.setenv("SERVER_WORKERS", "4")
+    for store in ("", "memory"):
+        monkeypatch.setenv("SESSION_STORE", store)
+        assert "SESSION_STORE=sqlite ou redis" in check_worker_config(Config())
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "sessions.sqlite3"))
+    assert check_worker_config(Config()) is None
+    # Paquet redis absent : refus au démarrage plutôt que des sessions par processus
+    monkeypatch.setenv("SESSION_STORE", "redis")
+    with patch.dict(sys.modules, {"redis": None}):
+        assert "paquet redis" in check_worker_config(Config())
+
+def test_semantic_cache_built_before_fork(ddragon_snapshot, monkeypatch):
+    monkeypatch.delenv("SEMANTIC_CACHE_MODEL", raising=False)
+    assert Config().SEMANTIC_CACHE_MODEL is None
+    with patch('src.server.main.gc.freeze'), \
+         patch('src.chatbot.semantic_cache.load_embedder', wraps=load_embedder) as load:
+        preload_shared_data()
+        get_semantic_cache()
+    # Modèle lexical par défaut, chargé une seule fois au préchargement
+    load.assert_called_once_with(None)
+    assert isinstance(get_semantic_cache().embedder, LexicalEmbedder)
+
+def test_preload_warms_item_index(ddragon_snapshot):
+    with patch('src.server.main.gc.freeze'):
+        preload_shared_data()
+    with patch.object(ddragon_snapshot, '_load_items') as load_items:
+        assert '3031' in get_item_index(RiotAPI())
+        load_items.assert_not_called()
+
+def test_preloaded_objects_use_the_worker_http_client(ddragon_snapshot):
+    riot_api = RiotAPI()
+    before = riot_api.http
+    with patch('src.server.main.gc.freeze'):
+        preload_shared_data()
+    # Client fermé avant le fork : les objets préchargés utilisent le nouveau client du processus
+    assert ddragon_snapshot.http is riot_api.http is get_http_client()
+    assert riot_api.http is not before
@@ -0,0 +1,80 @@
+import time
+from unittest.mock import Mock
+import pytest
+from src.chatbot.chatbot import LolChatbot, get_chatbot_resources
+from src.chatbot.conversation import ConversationState
+from src.chatbot.session_manager import SessionManager, get_session_manager
+
+def test_sessions_share_resources(ddragon_snapshot):
+    manager = SessionManager()
+    first = manager.get("alice")
+    second = manager.get("bob")
+    assert first.resources is second.resources is get_chatbot_resources()
+    assert first.riot_api is second.riot_api
+    assert first.intent_classifier is second.intent_classifier
+    assert first.state is not second.state
+
+def test_conversation_state_is_per_session(ddragon_snapshot):
+    manager = SessionManager()
+    manager.get("alice").get_response("stats de garen")
+    assert manager.get("alice").context["current_champion"] == "Garen"
+    assert manager.get("bob").context["current_champion"] is None
+    assert len(manager.get("alice").conversation_history) == 1
+    assert len(manager.get("bob").conversation_history) == 0
+
+def test_idle_sessions_are_evicted():
+    manager = SessionManager(resources=Mock(), idle_ttl=0.05)
+    manager.get("alice")
+    time.sleep(0.1)
+    manager.get("bob")
+    assert "alice" not in manager
+    assert "bob" in manager
+    assert manager.evicted == 1
+
+def test_session_count_is_capped():
+    manager = SessionManager(resources=Mock(), max_sessions=2)
+    for name in ("alice", "bob", "alice", "carol"):
+        manager.get(name)
+    # bob est la session la moins récemment utilisée
+    assert "bob" not in manager
+    assert len(manager) == 2
+
+def test_memory_cap():
+    manager = SessionManager(resources=Mock(), max_bytes=ConversationState().size_bytes() * 3)
+    chatbot = manager.get("alice")
+    chatbot.conversation_history.append(("question", "réponse " * 500))
+    manager.get("alice")
+    manager.get("bob")
+    assert "alice" not in manager
+    assert manager.memory_bytes() <= manager.max_bytes
+
+def test_sessions_measured_after_each_turn():
+    manager = SessionManager(resources=Mock(), max_bytes=ConversationState().size_bytes() * 3)
+    alice = manager.get("alice")
+    manager.get("bob")
+    alice._remember("question", "réponse " * 500)
+    # La taille suit l'échange ajouté, sans attendre le prochain get ; bob est le moins récent
+    assert manager.memory_bytes() == alice.state.size_bytes()
+    assert "alice" in manager and "bob" not in manager
+    manager.drop("alice")
+    alice._remember("question", "réponse")
+    assert manager.memory_bytes() == 0
+
+def test_drop_and_stats():
+    manager = SessionManager(resources=Mock())
+    manager.get("alice")
+    assert manager.drop("alice")
+    assert not manager.drop("alice")
+    assert manager.stats()['sessions'] == 0
+    assert manager.memory_bytes() == 0
+
+def test_new_sessions_are_light(ddragon_snapshot):
+    get_session_manager().get("warmup")
+    start = time.perf_counter()
+    for i in range(200):
+        get_session_manager().get(f"user-{i}")
+    assert time.perf_counter() - start < 0.5
+    assert get_session_manager().memory_bytes() / 201 < 4096
+
+def test_default_chatbot_uses_shared_resources(ddragon_snapshot):
+    assert LolChatbot().resources is LolChatbot().resources
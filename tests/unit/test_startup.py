@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY_MODULES = ("numpy", "sklearn", "scipy", "nltk", "torch", "transformers")
+# Borne volontairement large : l'import complet de la pile NLP prenait plus d'une seconde
+MAX_IMPORT_SECONDS = 1.0
+
+def import_in_fresh_process(module):
+    """Importe un module dans un nouvel interpréteur, retourne (durée, modules lourds chargés)"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def test_chatbot_import_defers_nlp_stack():
+    elapsed, loaded = import_in_fresh_process("src.chatbot.chatbot")
+    assert loaded == []
+    assert elapsed < MAX_IMPORT_SECONDS
+
+def test_session_server_import_defers_nlp_stack():
+    _, loaded = import_in_fresh_process("src.server.app")
+    assert loaded == []
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from src.analytics.champion_analytics import compute_levels_stats
+from src.analytics.stat_table import STATS, StatTable, find_stat, get_stat_table
+from src.api.riot_api import RiotAPI
+from src.chatbot.chatbot import LolChatbot
+
+@pytest.fixture
+def table(ddragon_snapshot):
+    return get_stat_table(RiotAPI())
+
+def test_table_shape(table):
+    assert table.values.shape == (4, len(STATS), 18)
+    assert table.champion_ids == ['Ahri', 'Garen', 'Jinx', 'MonkeyKing']
+    assert table.name('MonkeyKing') == "Wukong"
+
+def test_matches_scalar_formula(table, ddragon_snapshot):
+    scalar = compute_levels_stats(ddragon_snapshot.get_champion('Jinx')['stats'])
+    for level, level_stats in scalar.items():
+        for stat, value in level_stats.items():
+            assert table.stats_at('Jinx', level)[stat] == pytest.approx(value)
+
+def test_top_and_percentile(table):
+    assert table.top('armor', 11, 2) == [('Garen', 78.0), ('MonkeyKing', 78.0)]
+    assert table.top('hp', 18, 1, ascending=True) == [('Ahri', 590 + 96 * 17)]
+    assert table.top('hp', 18, 10)[0][0] == 'Jinx'
+    assert table.percentile('Jinx', 'hp') == 100.0
+    assert table.percentile('Ahri', 'hp') == 25.0
+
+def test_compare_and_curve(table):
+    diff = table.compare('Garen', 'Ahri', 1)
+    assert diff['hp'] == 100
+    assert table.compare('Garen', 'Ahri')['armor'].shape == (18,)
+    curve = table.curve('Garen', 'dps')
+    assert curve.shape == (18,)
+    assert np.all(np.diff(curve) > 0)
+
+def test_invalid_level(table):
+    with pytest.raises(ValueError):
+        table.column('hp', 19)
+
+def test_table_built_once_per_patch(ddragon_snapshot):
+    riot_api = RiotAPI()
+    assert get_stat_table(riot_api) is get_stat_table(riot_api)
+
+def test_find_stat():
+    assert find_stat("qui a le plus d'armure ?") == 'armor'
+    assert find_stat("vitesse d'attaque de jinx") == 'as'
+    assert find_stat("parle moi de garen") is None
+
+def test_empty_roster():
+    table = StatTable.from_champions({})
+    assert len(table) == 0
+    assert table.top('hp') == []
+
+def test_chatbot_ranking_and_comparison(ddragon_snapshot):
+    chatbot = LolChatbot()
+    ranking = chatbot.get_response("top 2 armure niveau 11")
+    assert ranking.startswith("Top 2 - Armure au niveau 11")
+    assert "1. Garen : 78.0" in ranking
+    assert chatbot.context["current_role"] is None
+
+    comparison = chatbot.get_response("compare garen et jinx niveau 1")
+    assert "Comparaison Garen vs Jinx au niveau 1" in comparison
+    assert "- PV : 690.0 vs 630.0 (+60.0)" in comparison
@@ -0,0 +1,157 @@
+import sys
+import time
+from unittest.mock import patch
+import pytest
+from src.chatbot.conversation import ConversationState
+from src.chatbot.session_manager import SessionManager, get_session_manager
+from src.chatbot.state_store import (
+    MemoryStateStore, RedisStateStore, SQLiteStateStore, StateStore, create_state_store, decode_state, encode_state
+)
+
+class FakeRedis:
+    """Sous-ensemble du client redis-py : GET/SET EX/MGET/DEL et pipeline"""
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def _get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key):
+        self.round_trips += 1
+        return self._get(key)
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self._get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.time() + ex if ex else None)
+
+    def delete(self, *keys):
+        self.round_trips += 1
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def set(self, key, value, ex=None):
+                self.commands.append((key, value, ex))
+
+            def execute(self):
+                redis.round_trips += 1
+                for command in self.commands:
+                    redis.set(*command)
+
+        return Pipeline()
+
+def make_state(champion="Ahri", answer="Ahri est une mage."):
+    state = ConversationState()
+    state.context["current_champion"] = champion
+    state.context["skill_level"] = "expert"
+    state.conversation_history.append(("qui est ahri", answer))
+    return state
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStateStore(ttl=60)
+    elif request.param == "sqlite":
+        store = SQLiteStateStore(str(tmp_path / "sessions.sqlite3"), ttl=60)
+    else:
+        store = RedisStateStore(FakeRedis(), ttl=60)
+    yield store
+    store.close()
+
+def test_encoding_round_trip():
+    state = make_state()
+    data = encode_state(state)
+    assert data.startswith(b"j")
+    decoded = decode_state(data)
+    assert decoded.context == state.context
+    assert list(decoded.conversation_history) == list(state.conversation_history)
+    # Les longs historiques sont compressés
+    long_state = make_state(answer="réponse détaillée " * 200)
+    assert encode_state(long_state).startswith(b"z")
+    assert decode_state(encode_state(long_state)).conversation_history[0][1] == "réponse détaillée " * 200
+    assert decode_state(b"jpas du json") is None
+
+def test_store_must_implement_storage_methods():
+    class Incomplete(StateStore):
+        def load_many(self, session_ids):
+            return {}
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_save_load_delete(store):
+    assert store.load("alice") is None
+    store.save("alice", make_state())
+    loaded = store.load("alice")
+    assert loaded.context["current_champion"] == "Ahri"
+    assert loaded.conversation_history[-1] == ("qui est ahri", "Ahri est une mage.")
+    assert loaded.conversation_history.maxlen == 5
+    assert store.delete("alice")
+    assert store.load("alice") is None
+
+def test_batched_reads_and_writes(store):
+    store.save_many({"alice": make_state("Ahri"), "bob": make_state("Garen")})
+    states = store.load_many(["alice", "bob", "carol"])
+    assert sorted(states) == ["alice", "bob"]
+    assert states["bob"].context["current_champion"] == "Garen"
+
+def test_ttl_expiry(store):
+    store.ttl = 1
+    store.save("alice", make_state())
+    assert store.load("alice") is not None
+    time.sleep(1.1)
+    assert store.load("alice") is None
+
+def test_redis_round_trips():
+    redis = FakeRedis()
+    store = RedisStateStore(redis, ttl=60)
+    store.save_many({f"user-{i}": make_state() for i in range(10)})
+    store.load_many([f"user-{i}" for i in range(10)])
+    assert redis.round_trips == 2
+
+def test_two_workers_share_a_conversation(tmp_path, ddragon_snapshot):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SessionManager(store=SQLiteStateStore(path))
+    second = SessionManager(store=SQLiteStateStore(path))
+    first.get("alice").get_response("stats de garen")
+    chatbot = second.get("alice")
+    assert chatbot.context["current_champion"] == "Garen"
+    assert len(chatbot.conversation_history) == 1
+    chatbot.get_response("stats de jinx")
+    assert len(first.get("alice").conversation_history) == 2
+    assert second.drop("alice")
+    assert first.get("alice").context["current_champion"] is None
+
+def test_state_survives_restart(tmp_path, monkeypatch, ddragon_snapshot):
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "state" / "sessions.sqlite3"))
+    get_session_manager().get("alice").get_response("stats de jinx")
+    from src.chatbot.session_manager import reset_session_manager
+    reset_session_manager()
+    assert get_session_manager().get("alice").context["current_champion"] == "Jinx"
+
+def test_default_store_is_in_process():
+    assert create_state_store() is None
+    assert get_session_manager().store is None
+
+def test_configured_store_never_falls_back_to_memory(monkeypatch):
+    monkeypatch.setenv("SESSION_STORE", "postgres")
+    with pytest.raises(ValueError):
+        create_state_store()
+    monkeypatch.setenv("SESSION_STORE", "redis")
+    with patch.dict(sys.modules, {"redis": None}):
+        with pytest.raises(RuntimeError, match="paquet redis"):
+            create_state_store()
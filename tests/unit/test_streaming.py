@@ -0,0 +1,53 @@
+import time
+import pytest
+from unittest.mock import patch
+from src.api.huggingface_api import HuggingFaceAPI
+from src.chatbot.chatbot import LolChatbot, UNKNOWN_QUERY_MESSAGE
+
+@pytest.fixture
+def hf_api(ddragon_snapshot, inference_stub):
+    api = HuggingFaceAPI()
+    api.api_url = inference_stub.url
+    return api
+
+def test_stream_yields_tokens(hf_api, inference_stub):
+    chunks = list(hf_api.stream_response("qui est ahri"))
+    assert chunks == ["Ahri ", "est ", "une ", "mage."]
+    assert inference_stub.requests[0]["stream"] is True
+
+def test_first_token_arrives_before_generation_ends(hf_api, inference_stub):
+    inference_stub.token_delay = 0.1
+    start = time.perf_counter()
+    stream = hf_api.stream_response("qui est ahri")
+    next(stream)
+    first_token = time.perf_counter() - start
+    list(stream)
+    total = time.perf_counter() - start
+    assert first_token < total / 2
+
+def test_stream_error_status(hf_api):
+    hf_api.api_url = hf_api.api_url.replace("/models/", "/missing/")
+    with patch.object(hf_api.http, 'post') as mock_post:
+        mock_post.return_value.status_code = 503
+        assert list(hf_api.stream_response("test")) == []
+
+def test_chatbot_streams_fallback(ddragon_snapshot, inference_stub):
+    chatbot = LolChatbot()
+    chatbot.huggingface_api.api_url = inference_stub.url
+    chunks = list(chatbot.stream_response("comment gagner en fin de partie"))
+    assert len(chunks) == 4
+    assert chatbot.conversation_history[-1][1] == "Ahri est une mage."
+
+def test_chatbot_streams_local_answer_in_one_chunk(ddragon_snapshot, inference_stub):
+    chatbot = LolChatbot()
+    chatbot.huggingface_api.api_url = inference_stub.url
+    chunks = list(chatbot.stream_response("stats de garen"))
+    assert len(chunks) == 1
+    assert "Statistiques complètes de Garen" in chunks[0]
+    assert inference_stub.requests == []
+
+def test_chatbot_stream_failure_message(ddragon_snapshot, inference_stub):
+    chatbot = LolChatbot()
+    chatbot.huggingface_api.api_url = inference_stub.url
+    inference_stub.tokens = []
+    assert list(chatbot.stream_response("comment gagner en fin de partie")) == [UNKNOWN_QUERY_MESSAGE]
@@ -0,0 +1,65 @@
+import pickle
+import pytest
+from unittest.mock import patch
+from src.utils import text_processing
+from src.utils.text_processing import TfidfMatcher, find_best_match, get_matcher
+
+CANDIDATES = [
+    "comment jouer ahri au mid",
+    "quels objets acheter sur garen",
+    "counter de jinx en bot",
+]
+
+def test_match_and_batch():
+    matcher = TfidfMatcher(CANDIDATES)
+    assert matcher.match("objets garen")[0] == CANDIDATES[1]
+    results = matcher.match_many(["jouer ahri", "counter jinx", "baron nashor"])
+    assert [r[0] for r in results] == [CANDIDATES[0], CANDIDATES[2], None]
+    assert results[0][1] > 0
+    assert matcher.scores(["ahri", "garen"]).shape == (2, 3)
+
+def test_top_k():
+    matcher = TfidfMatcher(CANDIDATES)
+    ranked = matcher.top_k("jouer jinx en bot", 2)
+    assert ranked[0][0] == CANDIDATES[2]
+    assert len(ranked) <= 2
+
+def test_empty_corpus():
+    matcher = TfidfMatcher([])
+    assert matcher.match("ahri") == (None, 0.0)
+    assert matcher.top_k("ahri") == []
+
+def test_picklable(tmp_path):
+    matcher = TfidfMatcher(CANDIDATES)
+    restored = pickle.loads(pickle.dumps(matcher))
+    assert restored.match("objets garen") == matcher.match("objets garen")
+
+    path = str(tmp_path / "matcher.pickle")
+    matcher.save(path)
+    assert TfidfMatcher.load(path).match("counter jinx")[0] == CANDIDATES[2]
+    assert TfidfMatcher.load(str(tmp_path / "absent.pickle")) is None
+
+def test_find_best_match_fits_once():
+    candidates = ["ahri mage", "garen combattant"]
+    with patch.object(text_processing, 'TfidfMatcher', wraps=TfidfMatcher) as mock_matcher:
+        assert find_best_match("mage", candidates)[0] == "ahri mage"
+        assert find_best_match("combattant", candidates)[0] == "garen combattant"
+        assert mock_matcher.call_count == 1
+    assert get_matcher(candidates) is get_matcher(list(candidates))
+    assert find_best_match("", candidates) == (None, 0.0)
+
+def test_nltk_initialized_once():
+    with patch.object(text_processing, '_nltk_ready', False), \
+         patch.dict(text_processing._nltk_resources), \
+         patch('nltk.data.find') as mock_find:
+        text_processing.initialize_nltk()
+        text_processing.initialize_nltk()
+        assert mock_find.call_count == 2
+
+def test_missing_nltk_resources_are_never_downloaded():
+    with patch.object(text_processing, '_nltk_ready', False), \
+         patch.dict(text_processing._nltk_resources), \
+         patch('nltk.data.find', side_effect=LookupError), \
+         patch('nltk.download') as mock_download:
+        assert text_processing.tokenize("Ahri, la mage !") == ["Ahri", "la", "mage"]
+        assert not mock_download.called
@@ -0,0 +1,84 @@
+import pytest
+from src.analytics.ingest import ingest_directory
+from src.analytics.match_store import MatchStore, get_match_store
+from src.analytics.tier_list import TierListService, compute_tiers, get_tier_list_service
+from src.chatbot.chatbot import LolChatbot
+from tests.unit.test_matchups import BLUE, RED, make_match, write_matches
+
+CHAMPION_KEYS = {name: key for key, name in enumerate(BLUE + RED + ("Darius2",), start=1)}
+
+def ranked_match(match_id, blue_wins=True, red=RED, version="13.24.551.1234", queue=420, bans=("Zed",)):
+    match = make_match(match_id, red=red, blue_wins=blue_wins, version=version)
+    match["info"]["queueId"] = queue
+    for participant in match["info"]["participants"]:
+        participant["championId"] = CHAMPION_KEYS.get(participant["championName"], 99)
+    match["info"]["teams"] = [
+        {"teamId": 100, "bans": [{"championId": CHAMPION_KEYS[name], "pickTurn": i + 1} for i, name in enumerate(bans)]},
+        {"teamId": 200, "bans": [{"championId": -1, "pickTurn": 6}]},
+    ]
+    return match
+
+@pytest.fixture
+def store(tmp_path):
+    # Bleus gagnants 3 fois sur 4 ; Zed banni quand il n'est pas joué, Darius2 joue deux parties
+    matches = [ranked_match(f"EUW1_{i}", blue_wins=i != 0, bans=("Zed", "Jinx")) for i in range(4)]
+    matches += [ranked_match(f"EUW1_{i}", red=("Darius2",) + RED[1:], bans=()) for i in range(4, 6)]
+    matches.append(ranked_match("EUW1_aram", queue=450))
+    matches.append(ranked_match("EUW1_old", version="13.23.1"))
+    write_matches(tmp_path / "matches", "dump.json", matches)
+    store = get_match_store()
+    ingest_directory(str(tmp_path / "matches"), store)
+    return store
+
+def test_compute_tiers(store):
+    matches, tiers = compute_tiers(store, "13.24", queues=(420, 440), min_games=1)
+    assert matches == 6
+    assert [entry.champion for entry in tiers["top"]] == ["Garen", "Darius", "Darius2"]
+    garen = tiers["top"][0]
+    assert (garen.games, garen.winrate, garen.pick_rate) == (6, 83.3, 100.0)
+    assert garen.tier == "S" and tiers["top"][-1].tier == "D"
+    darius = next(entry for entry in tiers["top"] if entry.champion == "Darius")
+    assert (darius.games, darius.pick_rate, darius.ban_rate) == (4, 66.7, 0.0)
+    # Bannissement par le bleu : une fois par partie, y compris quand Jinx est jouée
+    zed = tiers["mid"][-1]
+    assert (zed.champion, zed.ban_rate) == ("Zed", 66.7)
+    jinx = tiers["bot"][0]
+    assert (jinx.champion, jinx.ban_rate) == ("Jinx", 66.7)
+
+def test_queue_filter_and_min_games(store):
+    matches, _ = compute_tiers(store, "13.24", queues=(), min_games=1)
+    assert matches == 7
+    _, tiers = compute_tiers(store, "13.24", queues=(420,), min_games=3)
+    assert "Darius2" not in [entry.champion for entry in tiers["top"]]
+    assert compute_tiers(store, "12.1") == (0, {})
+
+def test_service_caches_until_new_matches(store, tmp_path):
+    service = TierListService(store.path, min_games=1, queues=(420,))
+    text = service.render_role("top")
+    assert text.startswith("Tier list Top - patch 13.24 (6 parties) :")
+    assert "S : Garen (83.3% V, 100.0% pick, 0.0% ban)" in text
+    assert service.render_role("top") is text
+    assert service.render_role("top", patch="13.23").startswith("Tier list Top - patch 13.23 (1 parties)")
+    assert "Garen" in service.render_champion("Garen")
+    assert service.render_champion("Teemo") is None
+    # Parties validées par un autre processus : tiers recalculés
+    write_matches(tmp_path / "matches", "more.jsonl", [ranked_match("EUW1_new", blue_wins=False)])
+    ingest_directory(str(tmp_path / "matches"), MatchStore(store.path))
+    assert "(7 parties)" in service.render_role("top")
+
+def test_service_without_store(tmp_path):
+    service = TierListService(str(tmp_path / "missing"))
+    assert service.render_overview() is None
+    assert service.tiers() == (None, 0, {})
+    assert not (tmp_path / "missing").exists()
+
+def test_chatbot_meta_questions(store, ddragon_snapshot, monkeypatch):
+    monkeypatch.setenv("TIER_MIN_GAMES", "1")
+    chatbot = LolChatbot()
+    overview = chatbot.get_response("Quels champions sont forts dans la meta ?")
+    assert overview.startswith("Champions les plus forts - patch 13.24")
+    assert "- Top : Garen (S)" in overview
+    assert chatbot.get_response("Tier list jungle").startswith("Tier list Jungle")
+    # Nom affiché depuis le snapshot
+    assert chatbot.get_response("Ahri est-elle populaire en ce moment ?").startswith("Ahri - patch 13.24")
+    assert get_tier_list_service() is get_tier_list_service()
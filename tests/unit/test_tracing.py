@@ -0,0 +1,143 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import pytest
+from src.api.async_clients import run_blocking
+from src.chatbot.chatbot import LolChatbot
+from src.utils import tracing
+from src.utils.tracing import (
+    SamplingProfiler, Trace, Tracer, count, get_tracer, reset_tracer, span, traced, traced_request
+)
+
+@pytest.fixture
+def tracer(monkeypatch):
+    monkeypatch.setenv('TRACING_ENABLED', '1')
+    reset_tracer()
+    return get_tracer()
+
+@traced('test.step')
+def step(value):
+    count('test.calls')
+    return value * 2
+
+@traced_request('test.request')
+def handle(value):
+    with span('test.outer'):
+        return step(value)
+
+def test_disabled_by_default_records_nothing():
+    assert not get_tracer().enabled
+    assert span('test.outer') is tracing._NOOP
+    assert handle(2) == 4
+    metrics = get_tracer().metrics()
+    assert metrics['requests'] == {} and metrics['counters'] == {}
+
+def test_request_spans_and_counters(tracer):
+    assert handle(3) == 6
+    assert handle(4) == 8
+    metrics = tracer.metrics()
+    assert metrics['requests']['test.request']['count'] == 2
+    assert metrics['spans']['test.outer']['count'] == 2
+    assert metrics['spans']['test.step']['count'] == 2
+    assert metrics['counters'] == {'test.calls': 2}
+
+def test_nested_span_depth(tracer):
+    with tracer.request('test.request') as trace:
+        with span('test.outer'):
+            step(1)
+    spans = {entry['name']: entry for entry in trace.to_dict()['spans']}
+    assert spans['test.outer']['depth'] == 0
+    assert spans['test.step']['depth'] == 1
+
+def test_prometheus_export(tracer):
+    handle(1)
+    text = tracer.prometheus()
+    assert 'lolchatbot_request_duration_seconds_count{request="test.request"} 1' in text
+    assert 'lolchatbot_span_duration_seconds_bucket{span="test.step",le="+Inf"} 1' in text
+    assert 'lolchatbot_events_total{event="test.calls"} 1' in text
+
+def test_generator_resumed_from_other_threads(tracer):
+    @traced_request('test.stream')
+    def chunks():
+        for i in range(3):
+            with span('test.chunk'):
+                yield i
+
+    stream = chunks()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        values = [executor.submit(next, stream).result() for _ in range(3)]
+        assert executor.submit(next, stream, None).result() is None
+    assert values == [0, 1, 2]
+    assert tracer.metrics()['spans']['test.chunk']['count'] == 3
+    assert tracer.metrics()['requests']['test.stream']['count'] == 1
+
+def test_async_request_follows_executor_calls(tracer):
+    @traced_request('test.async')
+    async def handle_async():
+        return await run_blocking(step, 5)
+
+    assert asyncio.run(handle_async()) == 10
+    metrics = tracer.metrics()
+    assert metrics['spans']['test.step']['count'] == 1
+    assert metrics['counters']['test.calls'] == 1
+
+def test_slow_request_profile_is_flamegraph_ready(tmp_path):
+    slow_tracer = Tracer(enabled=True, slow_ms=0, profiler=SamplingProfiler(0.001),
+                         profile_dir=str(tmp_path))
+    try:
+        with slow_tracer.request('test.slow'):
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+    finally:
+        slow_tracer.close()
+    slow = slow_tracer.metrics()['slow_requests']
+    assert len(slow) == 1
+    with open(slow[0]['profile'], encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines
+    stack, samples = lines[0].rsplit(' ', 1)
+    assert int(samples) > 0 and 'test_slow_request_profile_is_flamegraph_ready' in stack
+
+def test_profiler_keys_samples_by_trace():
+    profiler = SamplingProfiler(0.001)
+    first, second = Trace('first'), Trace('second')
+    try:
+        profiler.attach(first)
+        profiler.attach(second)
+        profiler.detach(second)
+        # Deux requêtes sur le même thread : détacher l'une laisse l'autre échantillonnée
+        deadline = time.perf_counter() + 2
+        while not first.samples and time.perf_counter() < deadline:
+            time.sleep(0.005)
+        assert first.samples
+    finally:
+        profiler.stop()
+
+def test_coroutine_requests_are_not_sampled(tracer):
+    tracer.profiler = SamplingProfiler(0.001)
+
+    @traced_request('test.coroutine')
+    async def handle():
+        await asyncio.sleep(0.01)
+
+    try:
+        with patch.object(tracer.profiler, 'attach') as attach:
+            asyncio.run(handle())
+        attach.assert_not_called()
+        assert tracer.metrics()['requests']['test.coroutine']['count'] == 1
+    finally:
+        tracer.profiler.stop()
+
+def test_chatbot_request_is_traced(tracer, ddragon_snapshot, inference_stub):
+    chatbot = LolChatbot()
+    chatbot.huggingface_api.api_url = inference_stub.url
+    assert chatbot.get_response("comment gagner en fin de partie")
+    metrics = tracer.metrics()
+    assert metrics['requests']['chatbot.get_response']['count'] == 1
+    for name in ('chatbot.classify', 'chatbot.local_response', 'chatbot.cache_lookup',
+                 'llm.build_prompt', 'llm.generate'):
+        assert name in metrics['spans']
+    assert metrics['counters']['cache.response.miss'] == 1
+    assert metrics['counters']['llm.generate'] == 1